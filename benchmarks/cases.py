@@ -0,0 +1,295 @@
+# benchmarks/cases.py
+"""
+Сценарии нагрузочных замеров.
+
+Сценарий - функция подготовки: получает BenchContext и возвращает
+функцию одного прогона или пару (подготовка прогона, прогон), если перед
+каждым прогоном нужно вернуть исходное состояние. Подготовка (создание диалогов, выбор клиента,
+заполнение позиций) в замер не входит, прогон повторяется несколько раз
+в той же сессии БД - как при работе в приложении.
+
+Модуль импортируется только после того, как run_benchmarks.py выставил
+DATABASE_URL и QT_QPA_PLATFORM.
+"""
+
+import itertools
+import shutil
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from PySide6.QtCore import QDate
+
+from shared_models.common_models import Client, Car, Employee
+from sto_app.models_sto import Order, OrderStatus
+
+
+class BenchmarkError(Exception):
+    """Сценарий не может выполниться (например, приложение показало бы диалог)"""
+
+
+@dataclass
+class BenchContext:
+    """Общие данные сценариев"""
+    session: object
+    db_path: Path
+    work_dir: Path
+    date_from: date
+    date_to: date
+    samples: Dict[str, object]
+    # Действия после сценария: набор данных не должен меняться между запусками
+    cleanups: List[Callable[[], None]] = field(default_factory=list)
+    # Окна и модели Qt сценария: удаляются после него, до выхода интерпретатора
+    widgets: List[object] = field(default_factory=list)
+
+    def track(self, widget):
+        """Удалить объект Qt после сценария"""
+        self.widgets.append(widget)
+        return widget
+
+
+@dataclass
+class Case:
+    """Сценарий замера"""
+    name: str
+    group: str
+    setup: Callable[[BenchContext], Callable[[], object]]
+
+
+CASES: List[Case] = []
+
+
+def case(name: str, group: str):
+    """Регистрация сценария"""
+    def register(setup):
+        CASES.append(Case(name, group, setup))
+        return setup
+    return register
+
+
+def collect_samples(session) -> Dict[str, object]:
+    """
+    Значения для фильтров и поиска из сгенерированных данных: фамилия
+    клиента, конец VIN, фрагмент номера заказа, клиент с автомобилем.
+    """
+    car = session.query(Car).filter(Car.vin.isnot(None)).order_by(Car.id).first()
+    order = session.query(Order).order_by(Order.id.desc()).first()
+    employee = session.query(Employee).order_by(Employee.id).first()
+    if car is None or order is None or employee is None:
+        raise BenchmarkError('В базе нет данных для замеров - нужен сгенерированный набор')
+    client = session.get(Client, car.client_id)
+    return {
+        'client_name': client.name.split()[0],
+        'vin_tail': car.vin[-6:],
+        'order_number': order.order_number.rsplit('-', 1)[0],
+        'service_name': 'масл',
+        'employee_name': employee.name.split()[0],
+        'client_id': client.id,
+        'car_id': car.id,
+    }
+
+
+# --- Список заказов: каждая комбинация фильтров ---
+
+ORDER_FILTERS = ('status', 'client', 'vin', 'dates', 'unpaid')
+
+
+def _order_filters(ctx: BenchContext, enabled) -> Dict[str, object]:
+    filters = {}
+    if 'status' in enabled:
+        filters['status'] = OrderStatus.COMPLETED.value
+    if 'client' in enabled:
+        filters['client_search'] = ctx.samples['client_name']
+    if 'vin' in enabled:
+        filters['vin_search'] = ctx.samples['vin_tail']
+    if 'dates' in enabled:
+        # Последние 90 дней набора, как фильтр по кварталу в интерфейсе
+        filters['date_from'] = datetime.combine(ctx.date_to - timedelta(days=90), datetime.min.time())
+        filters['date_to'] = datetime.combine(ctx.date_to, datetime.max.time())
+    if 'unpaid' in enabled:
+        filters['only_unpaid'] = True
+    return filters
+
+
+def _register_orders_cases():
+    for size in range(len(ORDER_FILTERS) + 1):
+        for enabled in itertools.combinations(ORDER_FILTERS, size):
+            name = f"orders.refresh[{'+'.join(enabled) or 'all'}]"
+
+            def setup(ctx, enabled=enabled):
+                from sto_app.views.orders_view import OrdersTableModel
+                model = ctx.track(OrdersTableModel(ctx.session))
+                filters = _order_filters(ctx, enabled)
+                return lambda: model.refresh_data(filters)
+
+            CASES.append(Case(name, 'orders', setup))
+
+
+_register_orders_cases()
+
+
+# --- Поиск ---
+
+SEARCH_METHODS = {
+    'clients': 'client_name',
+    'cars': 'vin_tail',
+    'orders': 'order_number',
+    'services': 'service_name',
+    'employees': 'employee_name',
+}
+
+
+def _register_search_cases():
+    for method, sample in SEARCH_METHODS.items():
+        def setup(ctx, method=method, sample=sample):
+            from sto_app.dialogs.search_dialog import SearchDialog
+            dialog = ctx.track(SearchDialog(ctx.session))
+            search = getattr(dialog, f'search_{method}')
+            query = ctx.samples[sample]
+            return lambda: search(query, False, False)
+
+        CASES.append(Case(f'search.{method}', 'search', setup))
+
+
+_register_search_cases()
+
+
+# --- Отчеты ---
+
+def _reports_dialog(ctx: BenchContext):
+    from sto_app.dialogs.reports_dialog import ReportsDialog
+    dialog = ctx.track(ReportsDialog(ctx.session))
+    dialog.date_from.setDate(QDate(ctx.date_from))
+    dialog.date_to.setDate(QDate(ctx.date_to))
+    return dialog
+
+
+def _register_report_cases():
+    for report in ('orders', 'status', 'clients', 'services'):
+        def setup(ctx, report=report):
+            dialog = _reports_dialog(ctx)
+            generate = getattr(dialog, f'generate_{report}_report')
+            return lambda: generate(ctx.date_from, ctx.date_to)
+
+        CASES.append(Case(f'reports.{report}', 'reports', setup))
+
+    for report in ('financial', 'analytics'):
+        def setup(ctx, report=report):
+            dialog = _reports_dialog(ctx)
+            return getattr(dialog, f'generate_{report}_report')
+
+        CASES.append(Case(f'reports.{report}', 'reports', setup))
+
+
+_register_report_cases()
+
+
+# --- Календарь ---
+
+@case('calendar.load_orders', 'calendar')
+def calendar_load_orders(ctx: BenchContext):
+    from sto_app.dialogs.calendar_dialog import CalendarDialog
+    dialog = ctx.track(CalendarDialog(ctx.session))
+    return dialog.load_orders
+
+
+# --- Новый заказ ---
+
+def _filled_new_order_view(ctx: BenchContext, services: int = 8, parts: int = 12):
+    from sto_app.utils.order_lines import ServiceLine, PartLine
+    from sto_app.views.new_order_view import NewOrderView
+
+    view = ctx.track(NewOrderView(ctx.session))
+    view.autosave_timer.stop()
+
+    def fill():
+        view.select_client(ctx.session.get(Client, ctx.samples['client_id']))
+        view.select_car(ctx.session.get(Car, ctx.samples['car_id']))
+        for i in range(services):
+            line = ServiceLine(service_name=f'Услуга {i + 1}', price=Decimal(350 + 50 * i))
+            view.line_items.add_service(line)
+            view._append_service_row(line)
+        for i in range(parts):
+            line = PartLine(part_name=f'Запчасть {i + 1}', price=Decimal('189.90') + i,
+                            quantity=Decimal(1 + i % 3), article=f'BENCH-{i + 1}')
+            view.line_items.add_part(line)
+            view._append_part_row(line)
+        view.discount_input.setValue(5)
+        view.prepayment_input.setValue(500)
+
+    fill()
+    return view, fill
+
+
+@case('new_order.calculate_totals', 'new_order')
+def new_order_calculate_totals(ctx: BenchContext):
+    view, _ = _filled_new_order_view(ctx)
+    return view.calculate_totals
+
+
+@case('new_order.save_draft', 'new_order')
+def new_order_save_draft(ctx: BenchContext):
+    view, fill = _filled_new_order_view(ctx)
+    created = []
+
+    def prepare():
+        # Каждый прогон создает новый черновик со всеми позициями
+        if view.current_order is not None:
+            created.append(view.current_order.id)
+            view.clear_form()
+            fill()
+
+    def run():
+        if not view.save_draft():
+            raise BenchmarkError('Черновик не сохранен')
+
+    def delete_drafts():
+        prepare()
+        for order_id in created:
+            ctx.session.delete(ctx.session.get(Order, order_id))
+        ctx.session.commit()
+
+    ctx.cleanups.append(delete_drafts)
+    return prepare, run
+
+
+# --- Резервное копирование ---
+
+def _backup_archive(ctx: BenchContext, name: str) -> Path:
+    from sto_app.utils.backup_manager import BackupWorker
+
+    backup_path = ctx.work_dir / name
+    worker = BackupWorker(str(backup_path), str(ctx.db_path), include_files=False)
+    result = {}
+    worker.backup_completed.connect(lambda success, message: result.update(success=success, message=message))
+    worker.run()  # синхронно, без запуска потока
+    if not result.get('success'):
+        raise BenchmarkError(f"Резервная копия не создана: {result.get('message')}")
+    return backup_path
+
+
+@case('backup.create', 'backup')
+def backup_create(ctx: BenchContext):
+    return lambda: _backup_archive(ctx, 'bench_backup.zip')
+
+
+@case('backup.restore', 'backup')
+def backup_restore(ctx: BenchContext):
+    from sto_app.utils.backup_manager import RestoreWorker
+
+    backup_path = _backup_archive(ctx, 'bench_restore_source.zip')
+    restore_dir = ctx.work_dir / 'restored'
+
+    def run():
+        shutil.rmtree(restore_dir, ignore_errors=True)
+        restore_dir.mkdir()
+        worker = RestoreWorker(str(backup_path), str(restore_dir))
+        result = {}
+        worker.restore_completed.connect(lambda success, message: result.update(success=success, message=message))
+        worker.run()
+        if not result.get('success'):
+            raise BenchmarkError(f"Восстановление не выполнено: {result.get('message')}")
+
+    return run
@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+"""
+Нагрузочные замеры на сгенерированных данных.
+
+Создает (или берет готовую) базу с синтетическими данными config.seed,
+выполняет сценарии benchmarks/cases.py и для каждого выводит время
+(медиана и лучший из --repeat прогонов), число SQL-запросов и пик памяти
+Python (tracemalloc) за один прогон. Результаты сравниваются с базовыми
+из benchmarks/baseline.json для набора того же размера.
+
+Работает без экрана: QT_QPA_PLATFORM=offscreen выставляется до импорта Qt.
+
+Примеры:
+    python benchmarks/run_benchmarks.py --size small
+    python benchmarks/run_benchmarks.py --size medium -k orders -k search
+    python benchmarks/run_benchmarks.py --db /tmp/bench.db --save-baseline
+    python benchmarks/run_benchmarks.py --fail-on-regression --json results.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+
+SIZES = {  # клиентов, заказов
+    'small': (2_000, 10_000),
+    'medium': (10_000, 50_000),
+    'large': (20_000, 100_000),
+}
+
+# Отклонения меньше этих величин считаются шумом
+MIN_TIME_DELTA_MS = 2.0
+MIN_MEMORY_DELTA_KIB = 256
+
+EXIT_CASE_ERRORS = 1
+EXIT_REGRESSION = 2
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Нагрузочные замеры СТО на сгенерированных данных')
+    parser.add_argument('--size', choices=SIZES, default='small', help='Размер набора данных')
+    parser.add_argument('--clients', type=int, help='Клиентов (вместо значения из --size)')
+    parser.add_argument('--orders', type=int, help='Заказов (вместо значения из --size)')
+    parser.add_argument('--random-seed', type=int, default=42, help='Зерно генератора данных')
+    parser.add_argument('--db', help='Файл БД: используется, если уже заполнен, иначе создается '
+                                     '(по умолчанию - временный файл)')
+    parser.add_argument('--repeat', type=int, default=5, help='Прогонов для замера времени')
+    parser.add_argument('-k', '--filter', action='append', default=[],
+                        help='Только сценарии, в имени которых есть подстрока (можно несколько)')
+    parser.add_argument('--list', action='store_true', help='Показать сценарии и выйти')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Файл базовых результатов')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Записать результаты как базовые для этого набора данных')
+    parser.add_argument('--tolerance', type=float, default=1.25,
+                        help='Допустимое замедление/рост памяти относительно базы (1.25 = +25%%)')
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help=f'Код выхода {EXIT_REGRESSION} при регрессии')
+    parser.add_argument('--json', help='Записать результаты в JSON-файл')
+    return parser.parse_args(argv)
+
+
+# --- Подготовка окружения ---
+
+def prepare_environment(args) -> Path:
+    """Путь к БД и переменные окружения (до импорта приложения)"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    if args.db:
+        db_path = Path(args.db).resolve()
+    else:
+        db_path = Path(tempfile.mkdtemp(prefix='sto_bench_')) / 'bench.db'
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    return db_path
+
+
+def prepare_database(args):
+    """Создать схему и заполнить данными, если база пустая"""
+    from config.database import init_database, engine
+    from config.seed import SeedConfig, seed_database
+    from sqlalchemy import text
+
+    init_database()
+    with engine.connect() as connection:
+        orders = connection.execute(text('SELECT COUNT(*) FROM orders')).scalar()
+    if orders:
+        print(f"✅ Используется готовая база: заказов {orders}")
+        return
+
+    clients, orders = SIZES[args.size]
+    config = SeedConfig(
+        clients=args.clients or clients,
+        orders=args.orders or orders,
+        random_seed=args.random_seed
+    )
+    print(f"🔄 Генерация данных: клиентов {config.clients}, заказов {config.orders}")
+    seed_database(engine, config)
+
+
+def dataset_label(session) -> str:
+    """Ключ набора данных в файле базовых результатов"""
+    from shared_models.common_models import Client
+    from sto_app.models_sto import Order
+    return f"clients={session.query(Client).count()},orders={session.query(Order).count()}"
+
+
+def block_message_boxes(error_class):
+    """
+    Модальные окна сообщений без экрана никто не закроет - вместо показа
+    сценарий завершается ошибкой с текстом сообщения.
+    """
+    from PySide6.QtWidgets import QMessageBox
+
+    def blocked(parent, title, text, *args, **kwargs):
+        raise error_class(f"{title}: {text}")
+
+    for name in ('critical', 'warning', 'information', 'question'):
+        setattr(QMessageBox, name, staticmethod(blocked))
+
+
+class QueryCounter:
+    """Число запросов к БД"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+# --- Замеры ---
+
+def measure(run, repeat: int, counter: QueryCounter, prepare=None) -> dict:
+    """
+    Первый прогон - с tracemalloc (запросы и пик памяти), затем repeat
+    прогонов без трассировки для замера времени. prepare вызывается перед
+    каждым прогоном и в замер не входит.
+    """
+    prepare = prepare or (lambda: None)
+    prepare()
+    gc.collect()
+    counter.count = 0
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    queries = counter.count
+
+    timings = []
+    for _ in range(max(repeat, 1)):
+        prepare()
+        gc.collect()
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return {
+        'median_ms': round(statistics.median(timings), 3),
+        'best_ms': round(min(timings), 3),
+        'queries': queries,
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def compare(result: dict, base: dict, tolerance: float) -> list:
+    """Регрессии результата относительно базового"""
+    problems = []
+    if (result['median_ms'] > base['median_ms'] * tolerance
+            and result['median_ms'] - base['median_ms'] > MIN_TIME_DELTA_MS):
+        problems.append(f"время {base['median_ms']:.1f} -> {result['median_ms']:.1f} мс")
+    if result['queries'] > base['queries']:
+        problems.append(f"запросов {base['queries']} -> {result['queries']}")
+    if (result['peak_kib'] > base['peak_kib'] * tolerance
+            and result['peak_kib'] - base['peak_kib'] > MIN_MEMORY_DELTA_KIB):
+        problems.append(f"память {base['peak_kib']:.0f} -> {result['peak_kib']:.0f} КиБ")
+    return problems
+
+
+def load_baseline(path: str) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'datasets': {}}
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Не удалось прочитать базовые результаты {path}: {e}")
+        return {'datasets': {}}
+
+
+def save_baseline(path: str, baseline: dict, label: str, results: dict):
+    dataset = baseline.setdefault('datasets', {}).setdefault(label, {'cases': {}})
+    dataset['saved_at'] = datetime.now().isoformat(timespec='seconds')
+    dataset['python'] = sys.version.split()[0]
+    dataset['cases'].update(results)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write('\n')
+    print(f"✅ Базовые результаты для {label} записаны в {path}")
+
+
+def run_cleanups(context):
+    while context.cleanups:
+        cleanup = context.cleanups.pop()
+        try:
+            cleanup()
+        except Exception as e:
+            context.session.rollback()
+            print(f"⚠️  Ошибка очистки после сценария: {e}")
+
+
+def close_widgets(context, app):
+    """
+    Удалить окна сценария сразу после него (без closeEvent - он спросил бы о
+    несохраненных изменениях). Иначе объекты Qt разрушает сборщик мусора
+    при выходе - после QApplication (падение интерпретатора, код 134).
+    """
+    from PySide6.QtCore import QEvent
+
+    while context.widgets:
+        context.widgets.pop().deleteLater()
+    app.sendPostedEvents(None, QEvent.DeferredDelete)
+    app.processEvents()
+
+
+def print_row(name, result, status):
+    print(f"{name:<46} {result['median_ms']:>10.1f} {result['best_ms']:>10.1f} "
+          f"{result['queries']:>8} {result['peak_kib']:>10.0f}  {status}")
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    db_path = prepare_environment(args)
+
+    # Приложение импортируется после настройки DATABASE_URL и платформы Qt
+    from PySide6.QtWidgets import QApplication
+    from benchmarks.cases import CASES, BenchContext, BenchmarkError, collect_samples
+
+    selected = [c for c in CASES if not args.filter or any(f in c.name for f in args.filter)]
+    if args.list:
+        for item in selected:
+            print(f"{item.group:<10} {item.name}")
+        return 0
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    block_message_boxes(BenchmarkError)
+
+    prepare_database(args)
+
+    from config.database import SessionLocal, engine
+    from sqlalchemy import func
+    from sto_app.models_sto import Order
+
+    session = SessionLocal()
+    counter = QueryCounter(engine)
+    date_from, date_to = session.query(func.min(Order.date_received), func.max(Order.date_received)).one()
+    context = BenchContext(
+        session=session,
+        db_path=db_path,
+        work_dir=Path(tempfile.mkdtemp(prefix='sto_bench_work_')),
+        date_from=date_from.date(),
+        date_to=date_to.date(),
+        samples=collect_samples(session),
+    )
+    label = dataset_label(session)
+    baseline = load_baseline(args.baseline)
+    base_cases = baseline.get('datasets', {}).get(label, {}).get('cases', {})
+
+    print(f"\nНабор данных: {label}; прогонов: {args.repeat}; "
+          f"база: {'есть' if base_cases else 'нет'} ({args.baseline})\n")
+    print(f"{'Сценарий':<46} {'Медиана,мс':>10} {'Лучшее,мс':>10} {'Запросов':>8} {'Пик,КиБ':>10}  Сравнение")
+
+    results, errors, regressions = {}, [], []
+    for item in selected:
+        try:
+            run = item.setup(context)
+            prepare, run = run if isinstance(run, tuple) else (None, run)
+            result = measure(run, args.repeat, counter, prepare)
+        except Exception as e:
+            session.rollback()
+            errors.append(item.name)
+            print(f"{item.name:<46} ⚠️  ошибка: {e}")
+            continue
+        finally:
+            run_cleanups(context)
+            close_widgets(context, app)
+        results[item.name] = result
+
+        base = base_cases.get(item.name)
+        if base is None:
+            status = 'новый'
+        else:
+            problems = compare(result, base, args.tolerance)
+            if problems:
+                regressions.append((item.name, problems))
+                status = '⚠️  ' + '; '.join(problems)
+            else:
+                status = f"ok ({result['median_ms'] / max(base['median_ms'], 1e-9):.2f}x)"
+        print_row(item.name, result, status)
+
+    session.close()
+    close_widgets(context, app)
+    shutil.rmtree(context.work_dir, ignore_errors=True)
+    if not args.db:
+        engine.dispose()
+        shutil.rmtree(db_path.parent, ignore_errors=True)
+
+    print()
+    if regressions:
+        print(f"⚠️  Регрессий: {len(regressions)} (допуск {args.tolerance:g}x)")
+    elif base_cases:
+        print("✅ Регрессий нет")
+    if errors:
+        print(f"⚠️  Сценарии с ошибками: {', '.join(errors)}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'dataset': label, 'repeat': args.repeat, 'results': results,
+                       'regressions': dict(regressions), 'errors': errors},
+                      f, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        save_baseline(args.baseline, baseline, label, results)
+
+    # QApplication разрушается явно, пока интерпретатор еще работает
+    app.shutdown()
+    del app
+
+    if errors:
+        return EXIT_CASE_ERRORS
+    if regressions and args.fail_on_regression:
+        return EXIT_REGRESSION
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,13 @@
 # config/database.py
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
+import logging
 import os
-from typing import Generator
+from pathlib import Path
+from typing import Generator, Optional
+
+from config.sql_profiler import sql_profiler
 
 # Конфигурация БД
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///sto_database.db')
@@ -17,6 +21,41 @@ engine = create_engine(
     echo=False           # Логирование SQL запросов (True для отладки)
 )
 
+# Учет запросов по действиям интерфейса (включается STO_SQL_PROFILE=1)
+sql_profiler.attach(engine)
+
+logger = logging.getLogger(__name__)
+
+# Архив закрытых заказов (sto_app/services/archive.py): отдельный файл
+# SQLite рядом с рабочей БД, подключается к каждому соединению схемой
+# archive. Путь - STO_ARCHIVE_DB или "<имя БД>_archive.db".
+ARCHIVE_SCHEMA = 'archive'
+ARCHIVE_TABLES = ('orders', 'order_services', 'order_parts', 'order_payments')
+
+
+def archive_path_for(database_path: str) -> str:
+    """Файл архива по умолчанию для файла БД"""
+    path = Path(database_path)
+    return str(path.with_name(f"{path.stem}_archive{path.suffix or '.db'}"))
+
+
+def _archive_database() -> Optional[str]:
+    if engine.url.get_backend_name() != 'sqlite' or engine.url.database in (None, '', ':memory:'):
+        return None
+    return os.getenv('STO_ARCHIVE_DB') or archive_path_for(engine.url.database)
+
+
+ARCHIVE_DATABASE = _archive_database()
+
+if ARCHIVE_DATABASE:
+    @event.listens_for(engine, 'connect')
+    def _attach_archive(dbapi_connection, connection_record):
+        try:
+            dbapi_connection.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (ARCHIVE_DATABASE,))
+        except Exception as e:
+            # Без архива работают все окна, кроме запросов истории
+            logger.warning(f"Архив заказов не подключен ({ARCHIVE_DATABASE}): {e}")
+
 # Фабрика сессий
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -60,17 +99,423 @@ def migrate_service_catalog_if_needed():
         db.close()
 
 
+def _add_missing_columns(db: Session, table: str, columns: dict, schema: str = 'main') -> list:
+    """Добавить отсутствующие колонки (имя -> SQL-определение), вернуть добавленные"""
+    result = db.execute(text(f"PRAGMA {schema}.table_info({table})"))
+    existing = {row[1] for row in result.fetchall()}
+    added = []
+    for name, definition in columns.items():
+        if name not in existing:
+            db.execute(text(f"ALTER TABLE {schema}.{table} ADD COLUMN {name} {definition}"))
+            added.append(name)
+    return added
+
+
+def repair_order_totals(order_ids=None) -> int:
+    """
+    Проверка целостности итогов заказов.
+
+    Пересчитывает денормализованные суммы (услуги, запчасти, НДС, скидка,
+    оплачено, итог) по строкам заказов и исправляет расхождения.
+    Возвращает количество исправленных заказов.
+    """
+    from sto_app.models_sto import recalculate_order_totals
+
+    with engine.begin() as connection:
+        return len(recalculate_order_totals(connection, order_ids))
+
+
+def migrate_order_totals_if_needed() -> bool:
+    """Миграция: денормализованные итоги заказа и индексы строк заказа (True - нужен пересчет)"""
+    db = SessionLocal()
+    try:
+        added = _add_missing_columns(db, 'orders', {
+            'discount_percent': 'REAL DEFAULT 0.0',
+            'services_total': 'REAL DEFAULT 0.0',
+            'parts_total': 'REAL DEFAULT 0.0',
+            'vat_total': 'REAL DEFAULT 0.0',
+            'discount_total': 'REAL DEFAULT 0.0',
+            'paid_total': 'REAL DEFAULT 0.0',
+        })
+        db.execute(text("CREATE INDEX IF NOT EXISTS ix_order_services_order_id ON order_services (order_id)"))
+        db.execute(text("CREATE INDEX IF NOT EXISTS ix_order_parts_order_id ON order_parts (order_id)"))
+        db.commit()
+        return bool(added)
+
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️  Миграция итогов заказов не выполнена: {e}")
+        return False
+    finally:
+        db.close()
+
+
+def migrate_order_payments_if_needed() -> bool:
+    """Миграция: журнал оплат и хранимый остаток заказа (True - нужен пересчет)"""
+    db = SessionLocal()
+    try:
+        added = _add_missing_columns(db, 'orders', {'balance_due': 'REAL DEFAULT 0.0'})
+        db.execute(text("CREATE INDEX IF NOT EXISTS ix_orders_balance_due ON orders (balance_due)"))
+
+        if added:
+            print("🔄 Перенос оплат заказов в журнал оплат...")
+            # Старые колонки оплат становятся записями журнала
+            db.execute(text("""
+                INSERT INTO order_payments (order_id, amount, method, is_prepayment, paid_at, note, created_at, updated_at)
+                SELECT id, prepayment, 'CASH', 1, date_received, 'Перенесено из заказа', created_at, updated_at
+                FROM orders WHERE prepayment IS NOT NULL AND prepayment != 0
+            """))
+            db.execute(text("""
+                INSERT INTO order_payments (order_id, amount, method, is_prepayment, paid_at, note, created_at, updated_at)
+                SELECT id, additional_payment, 'CASH', 0, updated_at, 'Перенесено из заказа', created_at, updated_at
+                FROM orders WHERE additional_payment IS NOT NULL AND additional_payment != 0
+            """))
+        db.commit()
+        return bool(added)
+
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️  Миграция оплат не выполнена: {e}")
+        return False
+    finally:
+        db.close()
+
+
+CLIENT_SEARCH_KEYS_UPDATE = "UPDATE clients SET name_key = :name_key, phone_digits = :phone_digits WHERE id = :id"
+CAR_SEARCH_KEYS_UPDATE = ("UPDATE cars SET vin_norm = :vin_norm, vin_rev = :vin_rev, "
+                          "plate_norm = :plate_norm WHERE id = :id")
+
+
+def client_search_key_updates(db) -> list:
+    """Клиенты, у которых сохраненные ключи поиска расходятся с вычисленными"""
+    from shared_models.normalize import name_key, phone_digits
+
+    # lower() в SQLite не работает с кириллицей - ключи считаются в Python
+    rows = db.execute(text("SELECT id, name, phone, name_key, phone_digits FROM clients"))
+    updates = []
+    for client_id, name, phone, stored_name, stored_phone in rows:
+        params = {'id': client_id, 'name_key': name_key(name), 'phone_digits': phone_digits(phone)}
+        if (stored_name, stored_phone) != (params['name_key'], params['phone_digits']):
+            updates.append(params)
+    return updates
+
+
+def car_search_key_updates(db) -> list:
+    """Автомобили, у которых сохраненные ключи поиска расходятся с вычисленными"""
+    from shared_models.normalize import plate_key, vin_key, reversed_key
+
+    rows = db.execute(text("SELECT id, vin, license_plate, vin_norm, vin_rev, plate_norm FROM cars"))
+    updates = []
+    for car_id, vin, plate, *stored in rows:
+        vin_norm = vin_key(vin)
+        params = {'id': car_id, 'vin_norm': vin_norm,
+                  'vin_rev': reversed_key(vin_norm), 'plate_norm': plate_key(plate)}
+        if tuple(stored) != (params['vin_norm'], params['vin_rev'], params['plate_norm']):
+            updates.append(params)
+    return updates
+
+
+def _update_search_keys(db, statement: str, updates: list) -> int:
+    if updates:
+        db.execute(text(statement), updates)
+    return len(updates)
+
+
+def rebuild_search_keys() -> dict:
+    """Пересчет устаревших ключей поиска клиентов и автомобилей, вернуть количество по таблицам"""
+    db = SessionLocal()
+    try:
+        counts = {
+            'clients': _update_search_keys(db, CLIENT_SEARCH_KEYS_UPDATE, client_search_key_updates(db)),
+            'cars': _update_search_keys(db, CAR_SEARCH_KEYS_UPDATE, car_search_key_updates(db)),
+        }
+        db.commit()
+        return counts
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def migrate_client_search_keys_if_needed():
+    """Миграция: нормализованные ключи поиска клиентов по имени и телефону"""
+    db = SessionLocal()
+    try:
+        added = _add_missing_columns(db, 'clients', {
+            'name_key': 'VARCHAR(255)',
+            'phone_digits': 'VARCHAR(50)',
+        })
+        if added:
+            print("🔄 Заполнение ключей поиска клиентов...")
+            filled = _update_search_keys(db, CLIENT_SEARCH_KEYS_UPDATE, client_search_key_updates(db))
+            print(f"✅ Ключи поиска заполнены: {filled}")
+        db.execute(text("CREATE INDEX IF NOT EXISTS ix_clients_name_key ON clients (name_key)"))
+        db.execute(text("CREATE INDEX IF NOT EXISTS ix_clients_phone_digits ON clients (phone_digits)"))
+        db.commit()
+
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️  Миграция ключей поиска клиентов не выполнена: {e}")
+    finally:
+        db.close()
+
+
+def migrate_car_search_keys_if_needed():
+    """Миграция: нормализованные ключи поиска автомобилей по VIN и гос. номеру"""
+    db = SessionLocal()
+    try:
+        added = _add_missing_columns(db, 'cars', {
+            'vin_norm': 'VARCHAR(50)',
+            'vin_rev': 'VARCHAR(50)',
+            'plate_norm': 'VARCHAR(50)',
+        })
+        if added:
+            print("🔄 Заполнение ключей поиска автомобилей...")
+            filled = _update_search_keys(db, CAR_SEARCH_KEYS_UPDATE, car_search_key_updates(db))
+            print(f"✅ Ключи поиска заполнены: {filled}")
+        db.execute(text("CREATE INDEX IF NOT EXISTS ix_cars_vin_norm ON cars (vin_norm)"))
+        db.execute(text("CREATE INDEX IF NOT EXISTS ix_cars_vin_rev ON cars (vin_rev)"))
+        db.execute(text("CREATE INDEX IF NOT EXISTS ix_cars_plate_norm ON cars (plate_norm)"))
+        db.commit()
+
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️  Миграция ключей поиска автомобилей не выполнена: {e}")
+    finally:
+        db.close()
+
+
+# Журнал изменений для уведомлений между процессами (sto_app/services/changes.py).
+# Таблица -> (таблица в журнале, id строки в журнале): строки, услуги,
+# запчасти и оплаты заказа записываются как изменение самого заказа.
+CHANGE_LOG_SOURCES = {
+    'orders': ('orders', 'id'),
+    'order_services': ('orders', 'order_id'),
+    'order_parts': ('orders', 'order_id'),
+    'order_payments': ('orders', 'order_id'),
+    'clients': ('clients', 'id'),
+    'cars': ('cars', 'id'),
+    'employees': ('employees', 'id'),
+    'services_catalog': ('services_catalog', 'id'),
+    'car_brands': ('car_brands', 'id'),
+}
+CHANGE_LOG_RETENTION_DAYS = 7
+
+_CHANGE_LOG_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS trg_{source}_change_log_{suffix}
+AFTER {event} ON {source}
+BEGIN
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('{table}', {row}.{column}, '{operation}');
+END
+"""
+
+
+def migrate_change_log_if_needed():
+    """Миграция: журнал изменений и триггеры, которые его заполняют; старые записи удаляются"""
+    db = SessionLocal()
+    try:
+        db.execute(text("""
+            CREATE TABLE IF NOT EXISTS change_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name VARCHAR(50) NOT NULL,
+                row_id INTEGER NOT NULL,
+                operation CHAR(1) NOT NULL,
+                changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        for source, (table, column) in CHANGE_LOG_SOURCES.items():
+            for trigger_event, suffix, row in (('INSERT', 'ins', 'NEW'), ('UPDATE', 'upd', 'NEW'), ('DELETE', 'del', 'OLD')):
+                db.execute(text(_CHANGE_LOG_TRIGGER.format(
+                    source=source, suffix=suffix, event=trigger_event, table=table,
+                    row=row, column=column, operation=trigger_event[0]
+                )))
+        db.execute(text("DELETE FROM change_log WHERE changed_at < datetime('now', :age)"),
+                   {'age': f'-{CHANGE_LOG_RETENTION_DAYS} days'})
+        db.commit()
+
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️  Миграция журнала изменений не выполнена: {e}")
+    finally:
+        db.close()
+
+
+# Репликация между площадками (sto_app/services/replication.py).
+# Записи этих таблиц получают глобальный ключ sync_uid и версию
+# (sync_clock, sync_site); строки, услуги, запчасти и оплаты заказа
+# меняют версию самого заказа. Триггеры работают после "sto_cli.py sync
+# init" (есть строка sync_state) и не срабатывают при импорте пакета.
+SYNC_TABLES = ('car_brands', 'services_catalog', 'employees', 'clients', 'cars', 'orders')
+SYNC_ORDER_LINES = ('order_services', 'order_parts', 'order_payments')
+
+_SYNC_ACTIVE = "(SELECT importing FROM sync_state) = 0"
+_SYNC_STAMP = """
+    UPDATE sync_state SET clock = clock + 1;
+    UPDATE {table} SET sync_clock = (SELECT clock FROM sync_state),
+                       sync_site = (SELECT site_id FROM sync_state){uid}
+    WHERE id = {row}.{column};
+"""
+_SYNC_TRIGGERS = {
+    'ins': """
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_sync_ins AFTER INSERT ON {table}
+        WHEN {active}
+        BEGIN {stamp} END
+    """,
+    'upd': """
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_sync_upd AFTER UPDATE ON {table}
+        WHEN {active} AND NEW.sync_clock IS OLD.sync_clock
+        BEGIN {stamp} END
+    """,
+    'del': """
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_sync_del AFTER DELETE ON {table}
+        WHEN {active} AND OLD.sync_uid IS NOT NULL
+        BEGIN
+            UPDATE sync_state SET clock = clock + 1;
+            INSERT OR REPLACE INTO sync_tombstones (table_name, sync_uid, sync_clock, sync_site)
+            VALUES ('{table}', OLD.sync_uid, (SELECT clock FROM sync_state), (SELECT site_id FROM sync_state));
+        END
+    """,
+}
+
+
+def migrate_sync_if_needed():
+    """Миграция: ключи и версии записей для репликации, служебные таблицы и триггеры"""
+    db = SessionLocal()
+    try:
+        db.execute(text("""
+            CREATE TABLE IF NOT EXISTS sync_state (
+                site_id VARCHAR(16) NOT NULL,
+                clock INTEGER NOT NULL DEFAULT 0,
+                importing INTEGER NOT NULL DEFAULT 0
+            )
+        """))
+        db.execute(text("""
+            CREATE TABLE IF NOT EXISTS sync_peers (
+                site_id VARCHAR(16) PRIMARY KEY,
+                imported_clock INTEGER NOT NULL DEFAULT 0,
+                acked_clock INTEGER NOT NULL DEFAULT 0,
+                imported_at TIMESTAMP
+            )
+        """))
+        db.execute(text("""
+            CREATE TABLE IF NOT EXISTS sync_tombstones (
+                table_name VARCHAR(50) NOT NULL,
+                sync_uid VARCHAR(40) NOT NULL,
+                sync_clock INTEGER NOT NULL,
+                sync_site VARCHAR(16) NOT NULL,
+                PRIMARY KEY (table_name, sync_uid)
+            )
+        """))
+        db.execute(text("""
+            CREATE TABLE IF NOT EXISTS sync_aliases (
+                table_name VARCHAR(50) NOT NULL,
+                sync_uid VARCHAR(40) NOT NULL,
+                local_uid VARCHAR(40) NOT NULL,
+                PRIMARY KEY (table_name, sync_uid)
+            )
+        """))
+
+        for table in SYNC_TABLES:
+            _add_missing_columns(db, table, {
+                'sync_uid': 'VARCHAR(40)',
+                'sync_clock': 'INTEGER',
+                'sync_site': 'VARCHAR(16)',
+            })
+            db.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS ix_{table}_sync_uid ON {table} (sync_uid)"))
+            db.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_sync_version ON {table} (sync_site, sync_clock)"))
+            uid = ",\n                       sync_uid = COALESCE(NEW.sync_uid, (SELECT site_id FROM sync_state) || '-' || NEW.id)"
+            for kind, trigger in _SYNC_TRIGGERS.items():
+                stamp = _SYNC_STAMP.format(table=table, uid=uid if kind == 'ins' else '', row='NEW', column='id')
+                db.execute(text(trigger.format(table=table, active=_SYNC_ACTIVE, stamp=stamp)))
+
+        for table in SYNC_ORDER_LINES:
+            for trigger_event, suffix, row in (('INSERT', 'ins', 'NEW'), ('UPDATE', 'upd', 'NEW'), ('DELETE', 'del', 'OLD')):
+                stamp = _SYNC_STAMP.format(table='orders', uid='', row=row, column='order_id')
+                db.execute(text(f"""
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_sync_{suffix} AFTER {trigger_event} ON {table}
+                    WHEN {_SYNC_ACTIVE}
+                    BEGIN {stamp} END
+                """))
+        db.commit()
+
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️  Миграция репликации не выполнена: {e}")
+    finally:
+        db.close()
+
+
+# Индексы архива: история клиента, период отчетов, номер заказа, строки заказа
+_ARCHIVE_INDEXES = {
+    'orders': ('order_number', 'client_id', 'car_id', 'date_received', 'sync_uid'),
+    'order_services': ('order_id',),
+    'order_parts': ('order_id',),
+    'order_payments': ('order_id',),
+}
+
+
+def migrate_archive_if_needed():
+    """Миграция: таблицы архива заказов с теми же колонками, что в рабочей БД"""
+    if not ARCHIVE_DATABASE:
+        return
+    db = SessionLocal()
+    try:
+        attached = {row[1] for row in db.execute(text("PRAGMA database_list"))}
+        if ARCHIVE_SCHEMA not in attached:
+            print(f"⚠️  Архив заказов недоступен: {ARCHIVE_DATABASE}")
+            return
+
+        for table in ARCHIVE_TABLES:
+            # Ограничения и внешние ключи не копируются: архив только хранит строки
+            columns = {row[1]: f"{row[2]}{' PRIMARY KEY' if row[5] else ''}"
+                       for row in db.execute(text(f"PRAGMA main.table_info({table})"))}
+            db.execute(text(f"CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.{table} "
+                            f"({', '.join(f'{name} {definition}' for name, definition in columns.items())})"))
+            _add_missing_columns(db, table, {name: definition.replace(' PRIMARY KEY', '')
+                                             for name, definition in columns.items()}, schema=ARCHIVE_SCHEMA)
+            for column in _ARCHIVE_INDEXES[table]:
+                if column in columns:
+                    db.execute(text(f"CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.ix_{table}_{column} "
+                                    f"ON {table} ({column})"))
+        db.commit()
+
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️  Миграция архива заказов не выполнена: {e}")
+    finally:
+        db.close()
+
+
+def local_site_id(db) -> str:
+    """Код площадки (пустая строка - репликация не настроена)"""
+    return db.execute(text("SELECT site_id FROM sync_state")).scalar() or ''
+
+
 def init_database():
     """Инициализация базы данных"""
     from shared_models.base import Base
     from shared_models.common_models import Client, Car, Employee
-    from sto_app.models_sto import Order, OrderService, OrderPart, ServiceCatalog, CarBrand
+    from sto_app.models_sto import Order, OrderService, OrderPart, OrderPayment, ServiceCatalog, CarBrand
     
     # Создаем все таблицы
     Base.metadata.create_all(bind=engine)
     
     # Выполняем миграцию если нужно
     migrate_service_catalog_if_needed()
+    migrate_client_search_keys_if_needed()
+    migrate_car_search_keys_if_needed()
+    migrate_change_log_if_needed()
+    migrate_sync_if_needed()
+    needs_repair = migrate_order_totals_if_needed()
+    needs_repair = migrate_order_payments_if_needed() or needs_repair
+    if needs_repair:
+        # Итоги пересчитываются, когда все новые колонки и журнал оплат на месте
+        print("🔄 Выполняется расчет итогов заказов...")
+        repaired = repair_order_totals()
+        print(f"✅ Итоги заказов рассчитаны: {repaired}")
+    # Архив повторяет колонки рабочих таблиц - после всех миграций
+    migrate_archive_if_needed()
     
     # Заполняем начальными данными
     db = SessionLocal()
@@ -0,0 +1,425 @@
+# config/seed.py
+"""
+Генератор синтетических данных для нагрузочных проверок.
+
+Клиенты, автомобили (VIN правильного формата с контрольной цифрой),
+сотрудники, заказы по статусам и годам, строки услуг и запчастей и
+оплаты вставляются пакетами через Core (executemany, одна транзакция),
+без ORM-объектов. Поэтому ключи поиска (Client.name_key/phone_digits,
+Car.vin_norm/vin_rev/plate_norm) заполняются здесь явно, а итоги заказов
+после вставки пересчитываются recalculate_order_totals.
+
+Все распределения задаются SeedConfig; при одном и том же random_seed и
+пустой базе результат полностью воспроизводим.
+"""
+
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select, text
+
+from shared_models.normalize import (name_key, phone_digits, plate_key, reversed_key,
+                                     vin_key)
+from sto_app.utils.pricing import order_totals_kopecks, to_kopecks
+
+# --- Справочные данные для генерации ---
+
+MALE_FIRST = ['Олександр', 'Андрій', 'Сергій', 'Дмитро', 'Іван', 'Михайло', 'Віктор', 'Юрій',
+              'Олег', 'Максим', 'Володимир', 'Богдан', 'Тарас', 'Роман', 'Артем', 'Павло',
+              'Алексей', 'Николай', 'Евгений', 'Игорь']
+FEMALE_FIRST = ['Олена', 'Наталія', 'Ірина', 'Оксана', 'Тетяна', 'Юлія', 'Марія', 'Світлана',
+                'Анна', 'Катерина', 'Вікторія', 'Людмила', 'Екатерина', 'Ольга']
+LAST_NAMES = ['Шевченко', 'Коваленко', 'Бондаренко', 'Ткаченко', 'Кравченко', 'Олійник',
+              'Шевчук', 'Поліщук', 'Бойко', 'Мельник', 'Ковальчук', 'Савченко', 'Руденко',
+              'Марченко', 'Лисенко', 'Мороз', 'Петренко', 'Клименко', 'Павленко', 'Кузьменко',
+              'Иванов', 'Петров', 'Сидоренко', 'Гончаренко', 'Левченко', 'Карпенко']
+MIDDLE_NAMES = ['Олександрович', 'Андрійович', 'Сергійович', 'Іванович', 'Петрович',
+                'Миколайович', 'Володимирович', 'Васильович']
+COMPANY_NAMES = ['ТОВ "Автотранс"', 'ФОП Коваль', 'ТОВ "Логістик-Плюс"', 'ПП "Агросвіт"',
+                 'ТОВ "БудМонтаж"', 'ТОВ "Експрес Доставка"', 'ТОВ "Таксі Центр"']
+PHONE_OPERATORS = ['050', '066', '067', '068', '063', '073', '093', '095', '096', '097', '098', '099']
+STREETS = ['вул. Шевченка', 'вул. Франка', 'просп. Перемоги', 'вул. Соборна', 'вул. Гагаріна',
+           'вул. Центральна', 'вул. Садова', 'бул. Лесі Українки']
+CITIES = ['Київ', 'Львів', 'Одеса', 'Дніпро', 'Харків', 'Вінниця', 'Полтава']
+COLORS = ['Білий', 'Чорний', 'Сірий', 'Сріблястий', 'Синій', 'Червоний', 'Зелений', 'Коричневий']
+FUEL_TYPES = ['Бензин', 'Дизель', 'Газ/Бензин', 'Гібрид', 'Електро']
+PLATE_REGIONS = ['AA', 'KA', 'AI', 'BC', 'BH', 'AE', 'AX', 'BI', 'AB', 'BO', 'CA', 'BX']
+PLATE_LETTERS = 'ABCEHIKMOPTX'  # буквы, совпадающие в кириллице и латинице
+
+# Реальные WMI производителей (первые три символа VIN)
+WMI = {
+    'Toyota': 'JTD', 'Honda': 'JHM', 'Volkswagen': 'WVW', 'BMW': 'WBA', 'Mercedes-Benz': 'WDD',
+    'Audi': 'WAU', 'Mazda': 'JM1', 'Nissan': 'JN1', 'Hyundai': 'KMH', 'Kia': 'KNA',
+    'Ford': '1FA', 'Chevrolet': '1G1', 'Skoda': 'TMB', 'Renault': 'VF1', 'Peugeot': 'VF3',
+    'Mitsubishi': 'JA3', 'Subaru': 'JF1', 'Lexus': 'JTH', 'Infiniti': 'JNK', 'Volvo': 'YV1',
+}
+
+EMPLOYEE_ROLES = [  # должность, отдел, роль, ставка
+    ('Майстер', 'Ремонтна зона', 'master', 250),
+    ('Майстер-приймальник', 'Прийом', 'manager', 220),
+    ('Слюсар', 'Ремонтна зона', 'master', 200),
+    ('Електрик', 'Діагностика', 'master', 230),
+    ('Шиномонтажник', 'Шиномонтаж', 'master', 180),
+    ('Адміністратор', 'Адміністрація', 'admin', 200),
+]
+
+PARTS = [  # артикул, название, цена
+    ('OC-90', 'Фільтр масляний', 280), ('AF-211', 'Фільтр повітряний', 350),
+    ('CF-33', 'Фільтр салону', 320), ('BP-1045', 'Колодки гальмівні передні', 1450),
+    ('BP-2046', 'Колодки гальмівні задні', 1250), ('BD-310', 'Диск гальмівний', 2100),
+    ('SP-7', 'Свічка запалювання', 260), ('OIL-5W30', 'Масло моторне 5W-30, л', 420),
+    ('AB-60', 'Акумулятор 60 А·год', 3600), ('SA-442', 'Амортизатор передній', 2800),
+    ('TB-18', 'Ремінь ГРМ', 1900), ('WP-5', 'Помпа водяна', 2300),
+    ('CL-3', 'Антифриз, л', 190), ('WB-24', 'Щітка склоочисника', 310),
+    ('BR-12', 'Рідина гальмівна, л', 240), ('HB-9', 'Лампа H7', 150),
+]
+PART_UNITS = {'OIL-5W30': 'л', 'CL-3': 'л', 'BR-12': 'л'}
+
+# Услуги на случай пустого каталога
+FALLBACK_SERVICES = [
+    ('Замена масла двигателя', 'Заміна масла двигуна', 500.0, 20.0),
+    ('Диагностика двигателя', 'Діагностика двигуна', 400.0, 20.0),
+    ('Замена тормозных колодок', 'Заміна гальмівних колодок', 600.0, 20.0),
+    ('Шиномонтаж', 'Шиномонтаж', 250.0, 20.0),
+]
+
+_VIN_CHARS = '0123456789ABCDEFGHJKLMNPRSTUVWXYZ'  # без I, O, Q
+_VIN_VALUES = {**{str(d): d for d in range(10)},
+               **dict(zip('ABCDEFGH', range(1, 9))), **dict(zip('JKLMN', range(1, 6))),
+               'P': 7, 'R': 9, **dict(zip('STUVWXYZ', range(2, 10)))}
+_VIN_WEIGHTS = (8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2)
+_VIN_YEAR_CODES = 'ABCDEFGHJKLMNPRSTVWXY123456789'  # 1980, 1981, ... (цикл 30 лет)
+
+
+def vin_check_digit(vin: str) -> str:
+    """Контрольная цифра VIN (9-я позиция, ISO 3779 / 49 CFR 565)"""
+    remainder = sum(_VIN_VALUES[ch] * w for ch, w in zip(vin, _VIN_WEIGHTS)) % 11
+    return 'X' if remainder == 10 else str(remainder)
+
+
+def make_vin(rng: random.Random, brand: str, year: int, serial: int) -> str:
+    """VIN правильного формата; serial делает его уникальным (до 33 млн)"""
+    wmi = WMI.get(brand) or 'X' + ''.join(rng.choices(_VIN_CHARS, k=2))
+    vds = ''.join(rng.choices(_VIN_CHARS, k=4)) + _VIN_CHARS[(serial // 1_000_000) % len(_VIN_CHARS)]
+    year_code = _VIN_YEAR_CODES[(year - 1980) % len(_VIN_YEAR_CODES)]
+    plant = rng.choice(_VIN_CHARS)
+    vin = f"{wmi}{vds}0{year_code}{plant}{serial % 1_000_000:06d}"
+    return vin[:8] + vin_check_digit(vin) + vin[9:]
+
+
+@dataclass
+class SeedConfig:
+    """Объем и распределения генерируемых данных"""
+    clients: int = 10_000
+    employees: int = 30
+    orders: int = 50_000
+    cars_per_client: Dict[int, float] = field(default_factory=lambda: {1: 0.72, 2: 0.21, 3: 0.07})
+    company_share: float = 0.05            # доля клиентов-организаций
+    email_share: float = 0.35
+    start_year: int = field(default_factory=lambda: date.today().year - 4)
+    end_year: int = field(default_factory=lambda: date.today().year)
+    yearly_growth: float = 1.15            # рост числа заказов год к году
+    repeat_skew: float = 1.6               # >1 - постоянные клиенты приезжают чаще
+    services_per_order: Tuple[int, int] = (1, 5)
+    parts_per_order: Tuple[int, int] = (0, 6)
+    discount_percents: Dict[float, float] = field(
+        default_factory=lambda: {0: 0.82, 5: 0.1, 10: 0.06, 15: 0.02})
+    # Статусы заказов старше recent_days и свежих
+    recent_days: int = 45
+    old_statuses: Dict[str, float] = field(default_factory=lambda: {
+        'COMPLETED': 0.9, 'CANCELLED': 0.07, 'WAITING_PAYMENT': 0.03})
+    recent_statuses: Dict[str, float] = field(default_factory=lambda: {
+        'DRAFT': 0.08, 'IN_WORK': 0.37, 'WAITING_PAYMENT': 0.15, 'COMPLETED': 0.35, 'CANCELLED': 0.05})
+    prepayment_share: float = 0.4          # доля заказов с предоплатой
+    payment_methods: Dict[str, float] = field(default_factory=lambda: {
+        'CASH': 0.45, 'CARD': 0.45, 'TRANSFER': 0.1})
+    random_seed: int = 42
+    batch_size: int = 5_000
+
+
+def _weighted(rng: random.Random, weights: Dict):
+    keys = list(weights)
+    return rng.choices(keys, weights=[weights[k] for k in keys])[0]
+
+
+def _next_id(connection, table) -> int:
+    return (connection.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+
+class DataSeeder:
+    """Пакетная генерация и вставка синтетических данных"""
+
+    def __init__(self, connection, config: SeedConfig):
+        self.connection = connection
+        self.config = config
+        self.rng = random.Random(config.random_seed)
+        self.counts: Dict[str, int] = {}
+        self.order_ids: List[int] = []
+
+    # --- Вставка ---
+
+    def _insert(self, table, rows: List[dict]):
+        if rows:
+            self.connection.execute(table.insert(), rows)
+            self.counts[table.name] = self.counts.get(table.name, 0) + len(rows)
+            rows.clear()
+
+    # --- Даты ---
+
+    def _day_sampler(self):
+        """Дни периода с весами: рост по годам, меньше заказов в выходные"""
+        cfg = self.config
+        start = date(cfg.start_year, 1, 1)
+        end = min(date(cfg.end_year, 12, 31), date.today())
+        days, cum_weights, total = [], [], 0.0
+        day = start
+        while day <= end:
+            weight = cfg.yearly_growth ** (day.year - cfg.start_year)
+            weight *= (1.0, 1.0, 1.0, 1.0, 1.0, 0.6, 0.2)[day.weekday()]
+            total += weight
+            days.append(day)
+            cum_weights.append(total)
+            day += timedelta(days=1)
+        return days, cum_weights
+
+    def _random_datetime(self, day: date) -> datetime:
+        return datetime(day.year, day.month, day.day, self.rng.randint(8, 18),
+                        self.rng.randint(0, 59), self.rng.randint(0, 59))
+
+    # --- Сущности ---
+
+    def _person_name(self) -> Tuple[str, str, str]:
+        rng = self.rng
+        first = rng.choice(MALE_FIRST if rng.random() < 0.7 else FEMALE_FIRST)
+        return first, rng.choice(LAST_NAMES), rng.choice(MIDDLE_NAMES)
+
+    def _phone(self, serial: int) -> str:
+        return f"+38{self.rng.choice(PHONE_OPERATORS)}{serial % 10_000_000:07d}"
+
+    def seed_employees(self, created: datetime) -> Tuple[List[int], List[int]]:
+        """Сотрудники; возвращает id мастеров и id приемщиков"""
+        from shared_models.common_models import Employee
+        table = Employee.__table__
+        rng = self.rng
+        next_id = _next_id(self.connection, table)
+        rows, masters, managers = [], [], []
+        for i in range(self.config.employees):
+            emp_id = next_id + i
+            position, department, role, rate = EMPLOYEE_ROLES[i % len(EMPLOYEE_ROLES)]
+            first, last, middle = self._person_name()
+            rows.append({
+                'id': emp_id, 'name': f"{last} {first} {middle}", 'role': role,
+                'first_name': first, 'last_name': last, 'middle_name': middle,
+                'position': position, 'department': department,
+                'phone': self._phone(rng.randrange(10_000_000)), 'email': None,
+                'is_active': 1 if rng.random() < 0.9 else 0,
+                'hire_date': date(self.config.start_year, 1, 1) - timedelta(days=rng.randint(0, 2000)),
+                'hourly_rate': rate + rng.randint(-20, 40),
+                'created_at': created, 'updated_at': created,
+            })
+            (managers if role == 'manager' else masters).append(emp_id)
+        self._insert(table, rows)
+        return masters or [None], managers or masters or [None]
+
+    def seed_clients_and_cars(self, days: Sequence[date], cum_weights: Sequence[float]) -> List[Tuple[int, int]]:
+        """Клиенты и их автомобили; возвращает пары (car_id, client_id)"""
+        from shared_models.common_models import Client, Car
+        cfg, rng = self.config, self.rng
+        clients_table, cars_table = Client.__table__, Car.__table__
+        client_id = _next_id(self.connection, clients_table)
+        car_id = _next_id(self.connection, cars_table)
+        brands = [(row[0], [m for m in (row[1] or '').split(',') if m])
+                  for row in self.connection.execute(text("SELECT brand, models FROM car_brands"))]
+        brands = [b for b in brands if b[1]] or [('Toyota', ['Corolla']), ('Volkswagen', ['Golf'])]
+
+        clients, cars, pairs = [], [], []
+        for _ in range(cfg.clients):
+            created = self._random_datetime(rng.choices(days, cum_weights=cum_weights)[0])
+            if rng.random() < cfg.company_share:
+                name = rng.choice(COMPANY_NAMES)
+            else:
+                first, last, middle = self._person_name()
+                name = f"{last} {first} {middle}"
+            phone = self._phone(client_id * 7919)
+            clients.append({
+                'id': client_id, 'name': name, 'phone': phone,
+                'address': f"м. {rng.choice(CITIES)}, {rng.choice(STREETS)}, {rng.randint(1, 150)}",
+                'email': f"client{client_id}@example.com" if rng.random() < cfg.email_share else None,
+                'name_key': name_key(name), 'phone_digits': phone_digits(phone),
+                'created_at': created, 'updated_at': created,
+            })
+            for _ in range(_weighted(rng, cfg.cars_per_client)):
+                brand, models = rng.choice(brands)
+                year = rng.randint(2003, min(cfg.end_year, date.today().year))
+                vin = make_vin(rng, brand, year, car_id)
+                plate = (f"{rng.choice(PLATE_REGIONS)}{rng.randint(0, 9999):04d}"
+                         f"{rng.choice(PLATE_LETTERS)}{rng.choice(PLATE_LETTERS)}")
+                vin_norm = vin_key(vin)
+                cars.append({
+                    'id': car_id, 'client_id': client_id, 'brand': brand, 'make': brand,
+                    'model': rng.choice(models), 'year': year, 'license_plate': plate, 'vin': vin,
+                    'mileage': max(0, (date.today().year - year) * rng.randint(8_000, 25_000)),
+                    'color': rng.choice(COLORS), 'engine_volume': rng.choice((1.2, 1.4, 1.6, 1.8, 2.0, 2.5, 3.0)),
+                    'fuel_type': rng.choice(FUEL_TYPES), 'is_active': 1, 'notes': None,
+                    'vin_norm': vin_norm, 'vin_rev': reversed_key(vin_norm), 'plate_norm': plate_key(plate),
+                    'created_at': created, 'updated_at': created,
+                })
+                pairs.append((car_id, client_id))
+                car_id += 1
+            client_id += 1
+            if len(cars) >= cfg.batch_size:
+                self._flush_clients(clients, cars)
+        self._flush_clients(clients, cars)
+        return pairs
+
+    def _flush_clients(self, clients, cars):
+        from shared_models.common_models import Client, Car
+        # Автомобили ссылаются на клиентов - клиенты вставляются первыми
+        self._insert(Client.__table__, clients)
+        self._insert(Car.__table__, cars)
+
+    def _services(self) -> List[tuple]:
+        rows = self.connection.execute(text(
+            "SELECT name, name_ua, default_price, vat_rate FROM services_catalog WHERE is_active = 1"
+        )).fetchall()
+        return [tuple(row) for row in rows] or FALLBACK_SERVICES
+
+    def _order_numbers(self) -> Dict[str, int]:
+        """Последний номер заказа по дням (формат СТО-YYYYMMDD-NNN)"""
+        last = {}
+        for number, in self.connection.execute(text(
+                "SELECT order_number FROM orders WHERE order_number LIKE 'СТО-%'")):
+            parts = number.split('-')
+            if len(parts) == 3 and parts[2].isdigit():
+                last[parts[1]] = max(last.get(parts[1], 0), int(parts[2]))
+        return last
+
+    def seed_orders(self, pairs: List[Tuple[int, int]], days, cum_weights, masters, managers):
+        """Заказы со строками услуг, запчастей и оплатами"""
+        from sto_app.models_sto import Order, OrderStatus
+        cfg, rng = self.config, self.rng
+        order_id = _next_id(self.connection, Order.__table__)
+        services = self._services()
+        last_numbers = self._order_numbers()
+        recent_limit = date.today() - timedelta(days=cfg.recent_days)
+        now = datetime.now()
+
+        # Даты заказов заранее и по порядку - номера за день идут по времени
+        order_days = sorted(rng.choices(days, cum_weights=cum_weights, k=cfg.orders))
+        orders, service_rows, part_rows, payment_rows = [], [], [], []
+        for day in order_days:
+            car_id, client_id = pairs[int(len(pairs) * rng.random() ** cfg.repeat_skew)]
+            received = min(self._random_datetime(day), now)
+            status = _weighted(rng, cfg.old_statuses if day < recent_limit else cfg.recent_statuses)
+            delivery = None
+            if status in ('COMPLETED', 'WAITING_PAYMENT'):
+                delivery = received + timedelta(hours=rng.randint(2, 96))
+
+            day_key = day.strftime('%Y%m%d')
+            last_numbers[day_key] = last_numbers.get(day_key, 0) + 1
+            discount = _weighted(rng, cfg.discount_percents)
+
+            services_kop = vat_kop = parts_kop = 0
+            for _ in range(rng.randint(*cfg.services_per_order)):
+                name, name_ua, price, vat_rate = rng.choice(services)
+                price = round(float(price) * rng.uniform(0.9, 1.3), 2)
+                price_with_vat = round(price * (1 + float(vat_rate or 0) / 100), 2)
+                service_rows.append({'order_id': order_id, 'service_name': name,
+                                     'service_name_ua': name_ua, 'price': price,
+                                     'price_with_vat': price_with_vat})
+                services_kop += to_kopecks(price)
+                vat_kop += to_kopecks(price_with_vat) - to_kopecks(price)
+            for _ in range(rng.randint(*cfg.parts_per_order)):
+                article, part_name, price = rng.choice(PARTS)
+                price = round(price * rng.uniform(0.85, 1.25), 2)
+                unit = PART_UNITS.get(article, 'шт')
+                quantity = rng.choice((4, 5, 6)) if unit == 'л' else rng.choice((1, 1, 1, 2, 4))
+                total = round(price * quantity, 2)
+                part_rows.append({'order_id': order_id, 'article': article, 'part_name': part_name,
+                                  'part_name_ua': part_name, 'unit': unit, 'price': price,
+                                  'quantity': quantity, 'total': total})
+                parts_kop += to_kopecks(total)
+
+            total_kop = order_totals_kopecks(services_kop, parts_kop, vat_kop, discount)['total']
+            self._add_payments(payment_rows, order_id, status, total_kop, received, delivery)
+
+            updated = delivery or received
+            orders.append({
+                'id': order_id, 'order_number': f"СТО-{day_key}-{last_numbers[day_key]:03d}",
+                'client_id': client_id, 'car_id': car_id,
+                'date_received': received, 'date_delivery': delivery,
+                'responsible_person_id': rng.choice(masters), 'manager_id': rng.choice(managers),
+                'status': OrderStatus[status], 'discount_percent': discount,
+                'notes': None, 'created_at': received, 'updated_at': updated,
+            })
+            self.order_ids.append(order_id)
+            order_id += 1
+
+            if len(orders) >= cfg.batch_size:
+                self._flush_orders(orders, service_rows, part_rows, payment_rows)
+        self._flush_orders(orders, service_rows, part_rows, payment_rows)
+
+    def _add_payments(self, rows, order_id, status, total_kop, received, delivery):
+        cfg, rng = self.config, self.rng
+        if status in ('DRAFT', 'CANCELLED') or total_kop <= 0:
+            return
+        prepaid_kop = 0
+        if rng.random() < cfg.prepayment_share:
+            prepaid_kop = total_kop * rng.choice((20, 30, 50)) // 100
+            rows.append(self._payment(order_id, prepaid_kop, True, received))
+        if status == 'COMPLETED' and total_kop > prepaid_kop:
+            rows.append(self._payment(order_id, total_kop - prepaid_kop, False, delivery or received))
+
+    def _payment(self, order_id, amount_kop, is_prepayment, paid_at) -> dict:
+        from sto_app.models_sto import PaymentMethod
+        return {
+            'order_id': order_id, 'amount': amount_kop / 100,
+            'method': PaymentMethod[_weighted(self.rng, self.config.payment_methods)],
+            'is_prepayment': 1 if is_prepayment else 0, 'paid_at': paid_at,
+            'note': None, 'created_at': paid_at, 'updated_at': paid_at,
+        }
+
+    def _flush_orders(self, orders, service_rows, part_rows, payment_rows):
+        from sto_app.models_sto import Order, OrderService, OrderPart, OrderPayment
+        self._insert(Order.__table__, orders)
+        self._insert(OrderService.__table__, service_rows)
+        self._insert(OrderPart.__table__, part_rows)
+        self._insert(OrderPayment.__table__, payment_rows)
+        print(f"🔄 Заказов вставлено: {self.counts.get('orders', 0)}")
+
+    def run(self):
+        now = datetime.now()
+        days, cum_weights = self._day_sampler()
+        masters, managers = self.seed_employees(now)
+        pairs = self.seed_clients_and_cars(days, cum_weights)
+        print(f"🔄 Клиентов: {self.counts.get('clients', 0)}, автомобилей: {self.counts.get('cars', 0)}")
+        if pairs and self.config.orders:
+            self.seed_orders(pairs, days, cum_weights, masters, managers)
+
+
+def seed_database(engine, config: Optional[SeedConfig] = None) -> Dict[str, int]:
+    """
+    Заполнить базу синтетическими данными (одна транзакция).
+    Возвращает количество вставленных строк по таблицам.
+    """
+    from sto_app.models_sto import recalculate_order_totals
+
+    config = config or SeedConfig()
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        last_change = connection.execute(text("SELECT COALESCE(MAX(id), 0) FROM change_log")).scalar()
+        seeder = DataSeeder(connection, config)
+        seeder.run()
+        # Денормализованные итоги новых заказов - тем же пересчетом, что и проверка целостности
+        print("🔄 Расчет итогов заказов...")
+        recalculate_order_totals(connection, seeder.order_ids)
+        # Синтетические данные - не изменения для уведомлений открытых окон
+        connection.execute(text("DELETE FROM change_log WHERE id > :id"), {'id': last_change})
+
+    elapsed = time.perf_counter() - started
+    rows = sum(seeder.counts.values())
+    print(f"✅ Вставлено строк: {rows} за {elapsed:.1f} с ({rows / max(elapsed, 1e-9) * 60:,.0f} строк/мин)")
+    return seeder.counts
@@ -0,0 +1,299 @@
+# config/sql_profiler.py
+"""
+Учет SQL-запросов по действиям интерфейса.
+
+Слушатели before/after_cursor_execute движка (attach) относят каждый
+запрос к текущему действию - верхнему в стеке sql_profiler.action(...)
+текущего потока, например "OrdersView.apply_filters" или
+"OrderDetailsDialog open". По действию копятся число вызовов, запросов,
+суммарное время, самые медленные запросы и статистика по "формам"
+запросов (SQL с замененными литералами).
+
+N+1: если за один вызов действия запрос одной формы выполнен
+N_PLUS_ONE_THRESHOLD раз и больше, форма помечается как подозрительная
+(обычно это ленивая загрузка связи в цикле).
+
+Включается переменной окружения STO_SQL_PROFILE=1 или флажком в окне
+диагностики; выключенный профилировщик стоит одну проверку на запрос.
+Результаты - snapshot() для окна диагностики и dump_json(path); если в
+STO_SQL_PROFILE указан путь к файлу, статистика пишется туда при выходе.
+"""
+
+import heapq
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+NO_ACTION = '(вне действий)'
+N_PLUS_ONE_THRESHOLD = 10
+SLOWEST_LIMIT = 10
+SQL_TEXT_LIMIT = 500
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_POSTCOMPILE = re.compile(r"\(__\[POSTCOMPILE_\w+\]\)")
+_SPACES = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Форма запроса: литералы и списки IN заменены на ?, пробелы схлопнуты"""
+    shape = _STRING_LITERAL.sub('?', statement)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = _POSTCOMPILE.sub('(?...)', shape)
+    shape = _IN_LIST.sub('(?...)', shape)
+    return _SPACES.sub(' ', shape).strip()
+
+
+def _short(text, limit: int = SQL_TEXT_LIMIT) -> str:
+    text = str(text)
+    return text if len(text) <= limit else text[:limit] + '...'
+
+
+class ShapeStats:
+    """Статистика запросов одной формы внутри действия"""
+
+    __slots__ = ('count', 'total_ms', 'max_ms', 'max_per_call')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.max_per_call = 0  # наибольшее число повторов за один вызов действия
+
+    def to_dict(self, shape: str) -> dict:
+        return {
+            'shape': shape,
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'max_ms': round(self.max_ms, 3),
+            'max_per_call': self.max_per_call,
+        }
+
+
+class ActionStats:
+    """Накопленная статистика действия интерфейса"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.statements = 0
+        self.total_ms = 0.0
+        self.shapes: Dict[str, ShapeStats] = {}
+        self._slowest: List[tuple] = []  # куча (ms, порядковый номер, sql, параметры)
+        self._seq = 0
+
+    def record(self, shape: str, statement: str, parameters, elapsed_ms: float):
+        self.statements += 1
+        self.total_ms += elapsed_ms
+        stats = self.shapes.get(shape)
+        if stats is None:
+            stats = self.shapes[shape] = ShapeStats()
+        stats.count += 1
+        stats.total_ms += elapsed_ms
+        stats.max_ms = max(stats.max_ms, elapsed_ms)
+
+        self._seq += 1
+        item = (elapsed_ms, self._seq, statement, parameters)
+        if len(self._slowest) < SLOWEST_LIMIT:
+            heapq.heappush(self._slowest, item)
+        elif elapsed_ms > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, item)
+
+    def slowest(self) -> List[dict]:
+        return [
+            {'ms': round(ms, 3), 'sql': _short(sql), 'parameters': _short(parameters, 200)}
+            for ms, _, sql, parameters in sorted(self._slowest, reverse=True)
+        ]
+
+    def n_plus_one(self) -> List[dict]:
+        """Формы запросов, повторявшиеся в одном вызове не меньше порога"""
+        return [
+            stats.to_dict(shape)
+            for shape, stats in sorted(self.shapes.items(), key=lambda kv: -kv[1].max_per_call)
+            if stats.max_per_call >= N_PLUS_ONE_THRESHOLD
+        ]
+
+    def to_dict(self) -> dict:
+        shapes = sorted(self.shapes.items(), key=lambda kv: -kv[1].total_ms)
+        return {
+            'action': self.name,
+            'calls': self.calls,
+            'statements': self.statements,
+            'total_ms': round(self.total_ms, 3),
+            'avg_statements_per_call': round(self.statements / self.calls, 1) if self.calls else None,
+            'n_plus_one': self.n_plus_one(),
+            'shapes': [stats.to_dict(shape) for shape, stats in shapes],
+            'slowest': self.slowest(),
+        }
+
+
+class _ActionFrame:
+    """Один вызов действия: счетчик форм запросов для поиска N+1"""
+
+    __slots__ = ('stats', 'shape_counts')
+
+    def __init__(self, stats: ActionStats):
+        self.stats = stats
+        self.shape_counts: Dict[str, int] = {}
+
+
+class SqlProfiler:
+    """Профилировщик запросов с привязкой к действиям интерфейса"""
+
+    def __init__(self):
+        value = os.getenv('STO_SQL_PROFILE', '').strip()
+        self.enabled = value not in ('', '0')
+        self.dump_path = value if value not in ('', '0', '1', 'true', 'yes') else None
+        self.started_at = datetime.now()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._actions: Dict[str, ActionStats] = {}
+        self._engines = []
+        # Имена текущих действий по потокам (ведутся и при выключенном учете,
+        # их читает сторож зависаний интерфейса из своего потока)
+        self._active: Dict[int, List[str]] = {}
+
+    # --- Подключение ---
+
+    def attach(self, engine):
+        """Подписаться на выполнение запросов движка"""
+        if engine in self._engines:
+            return
+        event.listen(engine, 'before_cursor_execute', self._before_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_execute)
+        self._engines.append(engine)
+
+    def set_enabled(self, enabled: bool):
+        self.enabled = enabled
+        logger.info(f"Профилирование SQL {'включено' if enabled else 'выключено'}")
+
+    # --- Действия ---
+
+    def _stack(self) -> List[_ActionFrame]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _stats(self, name: str) -> ActionStats:
+        stats = self._actions.get(name)
+        if stats is None:
+            stats = self._actions[name] = ActionStats(name)
+        return stats
+
+    def current_action(self, thread_id: int) -> Optional[str]:
+        """Текущее (самое вложенное) действие потока"""
+        names = self._active.get(thread_id)
+        return names[-1] if names else None
+
+    @contextmanager
+    def action(self, name: str):
+        """Отнести запросы внутри блока к действию name"""
+        names = self._active.setdefault(threading.get_ident(), [])
+        names.append(name)
+        try:
+            with self._profiled_action(name):
+                yield
+        finally:
+            names.pop()
+
+    @contextmanager
+    def _profiled_action(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        with self._lock:
+            stats = self._stats(name)
+            stats.calls += 1
+        frame = _ActionFrame(stats)
+        stack = self._stack()
+        stack.append(frame)
+        try:
+            yield
+        finally:
+            stack.remove(frame)
+            self._finish_frame(frame)
+
+    def _finish_frame(self, frame: _ActionFrame):
+        with self._lock:
+            for shape, count in frame.shape_counts.items():
+                shape_stats = frame.stats.shapes.get(shape)
+                if shape_stats is not None and count > shape_stats.max_per_call:
+                    shape_stats.max_per_call = count
+                    if count >= N_PLUS_ONE_THRESHOLD:
+                        logger.warning(
+                            f"Возможный N+1 в {frame.stats.name}: {count} запросов вида "
+                            f"{_short(shape, 200)}"
+                        )
+
+    # --- Слушатели движка ---
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.enabled:
+            conn.info.setdefault('sql_profiler_start', []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('sql_profiler_start')
+        if not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+        if not self.enabled:
+            return
+
+        shape = statement_shape(statement)
+        stack = self._stack()
+        frame = stack[-1] if stack else None
+        if frame is not None:
+            frame.shape_counts[shape] = frame.shape_counts.get(shape, 0) + 1
+        with self._lock:
+            stats = frame.stats if frame is not None else self._stats(NO_ACTION)
+            stats.record(shape, statement, parameters, elapsed_ms)
+
+    # --- Результаты ---
+
+    def reset(self):
+        with self._lock:
+            self._actions = {}
+            self.started_at = datetime.now()
+
+    def snapshot(self) -> List[dict]:
+        """Статистика действий, по убыванию суммарного времени"""
+        with self._lock:
+            actions = [stats.to_dict() for stats in self._actions.values()]
+        return sorted(actions, key=lambda a: -a['total_ms'])
+
+    def dump_json(self, path: str) -> str:
+        """Записать статистику в JSON-файл"""
+        data = {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'dumped_at': datetime.now().isoformat(timespec='seconds'),
+            'n_plus_one_threshold': N_PLUS_ONE_THRESHOLD,
+            'actions': self.snapshot(),
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return path
+
+    def dump_on_exit(self):
+        """Записать статистику в файл из STO_SQL_PROFILE (при закрытии приложения)"""
+        if not self.dump_path:
+            return
+        try:
+            self.dump_json(self.dump_path)
+            logger.info(f"Статистика SQL записана в {self.dump_path}")
+        except OSError as e:
+            logger.error(f"Не удалось записать статистику SQL: {e}")
+
+
+sql_profiler = SqlProfiler()
@@ -0,0 +1,275 @@
+# config/startup_profiler.py
+"""
+Профилировщик запуска приложения.
+
+Включается флагом командной строки --profile-startup[=файл] или
+переменной окружения STO_PROFILE_STARTUP (1 или путь к отчету).
+Записывает время каждой фазы запуска (profiler.phase(...)) и импортов:
+для каждого впервые загруженного модуля - собственное и полное время,
+как у python -X importtime, плюс сумма по пакетам верхнего уровня.
+
+Для фаз задан бюджет в миллисекундах (DEFAULT_BUDGETS_MS, переопределяется
+переменной STO_STARTUP_BUDGETS="init_database=150,total=800"); превышения
+попадают в отчет и в лог. С флагом --profile-startup-exit (или
+STO_PROFILE_EXIT=1) приложение закрывается сразу после показа окна с
+кодом 3 при превышении бюджета - для проверки регрессий в сборке.
+
+Модуль не зависит от Qt и SQLAlchemy: он подключается в main.py до
+тяжелых импортов. В выключенном состоянии phase() ничего не делает.
+"""
+
+import builtins
+import importlib.util
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_PROCESS_START = time.perf_counter()
+
+DEFAULT_REPORT_PATH = 'startup_profile.txt'
+
+# Фазы запуска (имена используются в main.py и STOApplication.run)
+IMPORTS = 'imports'
+QT_INIT = 'qt_init'
+SPLASH = 'splash'
+INIT_DATABASE = 'init_database'
+TRANSLATIONS = 'translations'
+THEME = 'theme'
+MAIN_WINDOW = 'main_window'
+FIRST_SHOW = 'first_show'
+TOTAL = 'total'
+
+# Бюджет фаз в миллисекундах; цель - окно готово к работе быстрее секунды
+DEFAULT_BUDGETS_MS = {
+    IMPORTS: 400,
+    QT_INIT: 100,
+    SPLASH: 50,
+    INIT_DATABASE: 150,
+    TRANSLATIONS: 30,
+    THEME: 80,
+    MAIN_WINDOW: 250,
+    FIRST_SHOW: 100,
+    TOTAL: 1000,
+}
+
+BUDGET_EXCEEDED_EXIT_CODE = 3
+
+
+@dataclass
+class PhaseTiming:
+    """Время фазы запуска"""
+    name: str
+    start: float  # мс от старта процесса
+    duration: float  # мс
+    depth: int
+
+
+@dataclass
+class ImportTiming:
+    """Время первого импорта модуля"""
+    module: str
+    self_ms: float
+    cumulative_ms: float
+    depth: int
+
+
+def parse_budgets(text: Optional[str]) -> Dict[str, float]:
+    """Разбор строки вида "phase=ms,phase=ms" (некорректные части пропускаются)"""
+    budgets = {}
+    for part in (text or '').split(','):
+        name, sep, value = part.partition('=')
+        if not sep:
+            continue
+        try:
+            budgets[name.strip()] = float(value)
+        except ValueError:
+            logger.warning(f"Некорректный бюджет запуска: {part!r}")
+    return budgets
+
+
+class StartupProfiler:
+    """Замеры фаз и импортов при запуске"""
+
+    def __init__(self):
+        self.enabled = False
+        self.exit_after_startup = False
+        self.report_path = DEFAULT_REPORT_PATH
+        self.budgets: Dict[str, float] = dict(DEFAULT_BUDGETS_MS)
+        self.phases: List[PhaseTiming] = []
+        self.imports: List[ImportTiming] = []
+        self.finished = False
+        self._depth = 0
+        self._import_stack: List[float] = []  # время вложенных импортов по уровням
+        self._original_import = None
+
+    # --- Включение ---
+
+    def configure(self, argv: List[str], environ=os.environ) -> List[str]:
+        """
+        Включить профилирование по флагам/переменным окружения.
+        Возвращает argv без флагов профилировщика.
+        """
+        remaining = []
+        for arg in argv:
+            if arg == '--profile-startup':
+                self.enabled = True
+            elif arg.startswith('--profile-startup='):
+                self.enabled = True
+                self.report_path = arg.split('=', 1)[1] or DEFAULT_REPORT_PATH
+            elif arg == '--profile-startup-exit':
+                self.enabled = True
+                self.exit_after_startup = True
+            else:
+                remaining.append(arg)
+
+        value = environ.get('STO_PROFILE_STARTUP', '').strip()
+        if value and value != '0':
+            self.enabled = True
+            if value not in ('1', 'true', 'yes'):
+                self.report_path = value
+        if environ.get('STO_PROFILE_EXIT', '').strip() not in ('', '0'):
+            self.enabled = self.exit_after_startup = True
+        self.budgets.update(parse_budgets(environ.get('STO_STARTUP_BUDGETS')))
+
+        if self.enabled:
+            self._install_import_hook()
+        return remaining
+
+    # --- Фазы ---
+
+    @contextmanager
+    def phase(self, name: str):
+        """Замер фазы запуска (фазы могут быть вложенными)"""
+        if not self.enabled or self.finished:
+            yield
+            return
+        start = time.perf_counter()
+        timing = PhaseTiming(name, (start - _PROCESS_START) * 1000, 0.0, self._depth)
+        self.phases.append(timing)
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            timing.duration = (time.perf_counter() - start) * 1000
+
+    # --- Импорты ---
+
+    def _install_import_hook(self):
+        if self._original_import is not None:
+            return
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def _remove_import_hook(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import
+        before = len(sys.modules)
+        self._import_stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            nested = self._import_stack.pop()
+            if self._import_stack:
+                self._import_stack[-1] += elapsed
+            # Учитываются только вызовы, которые действительно загрузили модули
+            if len(sys.modules) > before:
+                self.imports.append(ImportTiming(
+                    _resolve(name, globals, level), elapsed - nested, elapsed,
+                    len(self._import_stack)
+                ))
+
+    # --- Отчет ---
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - _PROCESS_START) * 1000
+
+    def import_totals(self) -> Dict[str, float]:
+        """Собственное время импортов по пакетам верхнего уровня"""
+        totals: Dict[str, float] = {}
+        for item in self.imports:
+            package = item.module.split('.', 1)[0]
+            totals[package] = totals.get(package, 0.0) + item.self_ms
+        return dict(sorted(totals.items(), key=lambda kv: -kv[1]))
+
+    def violations(self, total_ms: float) -> List[str]:
+        """Фазы, превысившие бюджет"""
+        durations: Dict[str, float] = {TOTAL: total_ms}
+        for timing in self.phases:
+            durations[timing.name] = durations.get(timing.name, 0.0) + timing.duration
+        return [
+            f"{name}: {durations[name]:.0f} мс > {budget:.0f} мс"
+            for name, budget in self.budgets.items()
+            if name in durations and durations[name] > budget
+        ]
+
+    def format_report(self, total_ms: float, top: int = 30) -> str:
+        lines = [f"Запуск: {total_ms:.0f} мс до готовности окна", "", "Фазы (мс):"]
+        for timing in self.phases:
+            budget = self.budgets.get(timing.name)
+            mark = '' if budget is None else (' !' if timing.duration > budget else '')
+            budget_text = '' if budget is None else f" / {budget:.0f}"
+            lines.append(f"  {'  ' * timing.depth}{timing.name:<24} "
+                         f"{timing.duration:8.1f}{budget_text}{mark}  (с {timing.start:.0f})")
+
+        lines += ["", f"Импорты по пакетам (топ {top}, собственное время, мс):"]
+        for package, ms in list(self.import_totals().items())[:top]:
+            lines.append(f"  {package:<32} {ms:8.1f}")
+
+        lines += ["", f"Самые долгие импорты (топ {top}, мс: собственное | полное):"]
+        for item in sorted(self.imports, key=lambda i: -i.self_ms)[:top]:
+            lines.append(f"  {item.self_ms:8.1f} | {item.cumulative_ms:8.1f}  {item.module}")
+
+        violations = self.violations(total_ms)
+        lines += ["", "Превышения бюджета:" if violations else "Бюджет соблюден"]
+        lines += [f"  {violation}" for violation in violations]
+        return '\n'.join(lines) + '\n'
+
+    def finish(self) -> bool:
+        """
+        Завершить профилирование (вызывается, когда первая вкладка готова)
+        и записать отчет. Возвращает True, если бюджет соблюден.
+        """
+        if not self.enabled or self.finished:
+            return True
+        total_ms = self.total_ms()
+        self.finished = True
+        self._remove_import_hook()
+
+        report = self.format_report(total_ms)
+        try:
+            with open(self.report_path, 'w', encoding='utf-8') as f:
+                f.write(report)
+            logger.info(f"Отчет о запуске ({total_ms:.0f} мс) записан в {self.report_path}")
+        except OSError as e:
+            logger.error(f"Не удалось записать отчет о запуске: {e}")
+
+        violations = self.violations(total_ms)
+        for violation in violations:
+            logger.warning(f"Превышен бюджет запуска - {violation}")
+        return not violations
+
+
+def _resolve(name: str, globals, level: int) -> str:
+    if level and globals:
+        package = globals.get('__package__') or globals.get('__name__', '')
+        try:
+            return importlib.util.resolve_name('.' * level + name, package)
+        except (ImportError, ValueError):
+            pass
+    return name
+
+
+profiler = StartupProfiler()
@@ -6,7 +6,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from config.database import init_database, engine
+from config.database import init_database, engine, repair_order_totals
 from shared_models.base import Base
 from sqlalchemy import text
 
@@ -44,6 +44,39 @@ def check_database():
             count = count_result.scalar()
             print(f"    Записей: {count}")
 
+def seed_data(args):
+    """Заполнение БД синтетическими данными (для нагрузочных проверок)"""
+    from config.seed import SeedConfig, seed_database
+
+    config = SeedConfig(
+        clients=args.clients,
+        orders=args.orders,
+        employees=args.employees,
+        random_seed=args.random_seed,
+        batch_size=args.batch_size
+    )
+    if args.years:
+        start, _, end = args.years.partition('-')
+        config.start_year = int(start)
+        config.end_year = int(end or start)
+
+    print("Инициализация базы данных...")
+    init_database()
+    print(f"Генерация данных: клиентов {config.clients}, заказов {config.orders}, "
+          f"годы {config.start_year}-{config.end_year}, seed {config.random_seed}")
+    counts = seed_database(engine, config)
+    for table, count in counts.items():
+        print(f"  - {table}: {count}")
+
+def repair_totals():
+    """Пересчет и исправление итогов заказов"""
+    print("Проверка итогов заказов...")
+    repaired = repair_order_totals()
+    if repaired:
+        print(f"✓ Исправлено заказов: {repaired}")
+    else:
+        print("✓ Расхождений не найдено")
+
 if __name__ == "__main__":
     import argparse
     
@@ -51,6 +84,14 @@ if __name__ == "__main__":
     parser.add_argument('--reset', action='store_true', help='Полный сброс БД')
     parser.add_argument('--check', action='store_true', help='Проверка состояния БД')
     parser.add_argument('--init', action='store_true', help='Инициализация БД (если не существует)')
+    parser.add_argument('--repair-totals', action='store_true', help='Пересчет итогов заказов')
+    parser.add_argument('--seed', action='store_true', help='Заполнить БД синтетическими данными')
+    parser.add_argument('--clients', type=int, default=10000, help='Количество клиентов (--seed)')
+    parser.add_argument('--orders', type=int, default=50000, help='Количество заказов (--seed)')
+    parser.add_argument('--employees', type=int, default=30, help='Количество сотрудников (--seed)')
+    parser.add_argument('--years', help='Период заказов, например 2020-2025 (--seed)')
+    parser.add_argument('--random-seed', type=int, default=42, help='Зерно генератора (--seed)')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Размер пакета вставки (--seed)')
     
     args = parser.parse_args()
     
@@ -58,6 +99,10 @@ if __name__ == "__main__":
         reset_database()
     elif args.check:
         check_database()
+    elif args.repair_totals:
+        repair_totals()
+    elif args.seed:
+        seed_data(args)
     else:
         print("Инициализация базы данных...")
         init_database()
@@ -11,11 +11,14 @@ import sys
 import os
 import logging
 from pathlib import Path
-from PySide6.QtCore import Qt
 
 # Добавляем текущую директорию в путь
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# Профилировщик запуска подключается до тяжелых импортов (PySide6, SQLAlchemy)
+from config.startup_profiler import profiler, IMPORTS, QT_INIT
+sys.argv = profiler.configure(sys.argv)
+
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -29,6 +32,24 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def take_server_option(argv):
+    """
+    Адрес сервера API для режима клиента: --server URL (убирается из argv)
+    или переменная окружения STO_SERVER_URL. Токен - STO_API_TOKEN.
+    """
+    server_url = os.environ.get('STO_SERVER_URL')
+    rest = []
+    args = iter(argv)
+    for arg in args:
+        if arg == '--server':
+            server_url = next(args, None)
+        elif arg.startswith('--server='):
+            server_url = arg.split('=', 1)[1]
+        else:
+            rest.append(arg)
+    return rest, server_url or None
+
+
 def check_requirements():
     """Проверка необходимых компонентов"""
     try:
@@ -60,17 +81,22 @@ def main():
     """Главная функция"""
     logger.info("=== Запуск СТО Management System v3.0 ===")
     
-    # Проверка требований
-    if not check_requirements():
-        logger.error("Не все требования выполнены. Завершение.")
-        return 1
-    
     try:
-        # Импорт приложения
-        from sto_app.app import STOApplication
+        with profiler.phase(IMPORTS):
+            # Проверка требований
+            if not check_requirements():
+                logger.error("Не все требования выполнены. Завершение.")
+                return 1
+            
+            # Импорт приложения
+            from sto_app.app import STOApplication
         
         # Создание и запуск
-        app = STOApplication(sys.argv)
+        argv, server_url = take_server_option(sys.argv)
+        if server_url:
+            logger.info(f"Режим клиента, сервер: {server_url}")
+        with profiler.phase(QT_INIT):
+            app = STOApplication(argv, server_url, os.environ.get('STO_API_TOKEN'))
        
         
         # Запуск
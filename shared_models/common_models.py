@@ -1,7 +1,8 @@
 # shared_models/common_models.py
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, Float, Date, Numeric
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, Float, Date, Numeric, event
 from sqlalchemy.orm import relationship
 from .base import Base, TimestampMixin
+from .normalize import name_key, phone_digits, plate_key, vin_key, reversed_key
 
 
 class Client(Base, TimestampMixin):
@@ -14,14 +15,29 @@ class Client(Base, TimestampMixin):
     address = Column(Text)
     email = Column(String(255))
     
+    # Ключи поиска по началу строки (shared_models.normalize), заполняются автоматически
+    name_key = Column(String(255), index=True)
+    phone_digits = Column(String(50), index=True)
+    
     # Отношения
     cars = relationship("Car", back_populates="client", cascade="all, delete-orphan")
     orders = relationship("Order", back_populates="client")
     
+    def update_search_keys(self):
+        """Пересчет ключей поиска по имени и телефону"""
+        self.name_key = name_key(self.name)
+        self.phone_digits = phone_digits(self.phone)
+    
     def __repr__(self):
         return f"<Client(id={self.id}, name='{self.name}', phone='{self.phone}')>"
 
 
+@event.listens_for(Client, 'before_insert')
+@event.listens_for(Client, 'before_update')
+def _client_search_keys(mapper, connection, client):
+    client.update_search_keys()
+
+
 class Car(Base, TimestampMixin):
     """Модель автомобиля"""
     __tablename__ = 'cars'
@@ -41,10 +57,22 @@ class Car(Base, TimestampMixin):
     is_active = Column(Integer, default=1)  # Добавлено для CarDialog
     notes = Column(Text)                 # Добавлено для CarDialog
     
+    # Ключи поиска VIN и номера (shared_models.normalize), заполняются автоматически;
+    # vin_rev - перевернутый VIN для поиска по последним символам
+    vin_norm = Column(String(50), index=True)
+    vin_rev = Column(String(50), index=True)
+    plate_norm = Column(String(50), index=True)
+    
     # Отношения
     client = relationship("Client", back_populates="cars")
     orders = relationship("Order", back_populates="car")
     
+    def update_search_keys(self):
+        """Пересчет ключей поиска по VIN и гос. номеру"""
+        self.vin_norm = vin_key(self.vin)
+        self.vin_rev = reversed_key(self.vin_norm)
+        self.plate_norm = plate_key(self.license_plate)
+    
     @property
     def full_name(self):
         """Полное название автомобиля"""
@@ -61,6 +89,12 @@ class Car(Base, TimestampMixin):
         return f"<Car(id={self.id}, brand='{self.brand}', model='{self.model}', vin='{self.vin}')>"
 
 
+@event.listens_for(Car, 'before_insert')
+@event.listens_for(Car, 'before_update')
+def _car_search_keys(mapper, connection, car):
+    car.update_search_keys()
+
+
 class Employee(Base, TimestampMixin):
     """Расширенная модель сотрудника"""
     __tablename__ = 'employees'
@@ -0,0 +1,81 @@
+# shared_models/normalize.py
+"""
+Нормализация текста для индексированного поиска.
+
+Ключи хранятся в отдельных индексированных колонках, поэтому поиск по
+началу строки выполняется диапазонным запросом по индексу
+(key >= prefix AND key < prefix_upper_bound(prefix)) вместо LIKE '%...%'.
+Встроенные lower()/LIKE в SQLite не знают кириллицы, поэтому регистр
+приводится здесь, в Python.
+"""
+
+import re
+from typing import Optional
+
+_SPACES = re.compile(r"\s+")
+_NON_DIGITS = re.compile(r"\D+")
+
+
+def name_key(text: Optional[str]) -> str:
+    """Ключ имени: без учета регистра, ё = е, одиночные пробелы"""
+    if not text:
+        return ""
+    key = text.casefold().replace('ё', 'е')
+    return _SPACES.sub(' ', key).strip()
+
+
+def phone_digits(text: Optional[str]) -> str:
+    """Ключ телефона: только цифры"""
+    if not text:
+        return ""
+    return _NON_DIGITS.sub('', text)
+
+
+def phone_digit_prefixes(text: Optional[str]) -> tuple:
+    """
+    Варианты префикса телефона для поиска.
+
+    Номер, введенный в национальном формате (0XX...), ищется и с кодом
+    страны 38, так как телефоны хранятся в обоих видах.
+    """
+    digits = phone_digits(text)
+    if not digits:
+        return ()
+    if digits.startswith('0'):
+        return digits, '38' + digits
+    return (digits,)
+
+
+def prefix_upper_bound(prefix: str) -> str:
+    """Наименьшая строка, большая всех строк, начинающихся с prefix"""
+    if not prefix:
+        return ""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+# Кириллические буквы, совпадающие по написанию с латинскими (номера и VIN
+# вводят в любой раскладке)
+_HOMOGLYPHS = str.maketrans({
+    'А': 'A', 'В': 'B', 'Е': 'E', 'К': 'K', 'М': 'M', 'Н': 'H', 'О': 'O',
+    'Р': 'P', 'С': 'C', 'Т': 'T', 'У': 'Y', 'Х': 'X', 'І': 'I', 'Ї': 'I',
+})
+# В VIN нет букв I, O, Q - это всегда ошибочно введенные 1 и 0
+_VIN_DIGITS = str.maketrans({'I': '1', 'O': '0', 'Q': '0'})
+_NON_ALNUM = re.compile(r"[\W_]+")
+
+
+def plate_key(text: Optional[str]) -> str:
+    """Ключ гос. номера: верхний регистр, латиница вместо похожей кириллицы, без разделителей"""
+    if not text:
+        return ""
+    return _NON_ALNUM.sub('', text.upper()).translate(_HOMOGLYPHS)
+
+
+def vin_key(text: Optional[str]) -> str:
+    """Ключ VIN: как plate_key, плюс I/O/Q заменены на 1/0/0"""
+    return plate_key(text).translate(_VIN_DIGITS)
+
+
+def reversed_key(key: str) -> str:
+    """Перевернутый ключ: поиск по концу строки как диапазон по индексу"""
+    return key[::-1]
@@ -10,73 +10,75 @@
 - Utils: Утилиты (резервное копирование и др.)
 """
 
-from .app import STOApplication
-from .main_window import MainWindow
+from importlib import import_module
 
-# Модели данных
-from .models_sto import (
-    Order, 
-    OrderService, 
-    OrderPart, 
-    ServiceCatalog, 
-    CarBrand, 
-    OrderStatus
-)
+# Компоненты загружаются при первом обращении (PEP 562): импорт пакета
+# (например, sto_app.services или sto_app.models_sto в пакетных заданиях)
+# не тянет PySide6 и окна.
+_LAZY_ATTRS = {
+    # Основные компоненты
+    'STOApplication': '.app',
+    'MainWindow': '.main_window',
+    
+    # Модели данных
+    'Order': '.models_sto',
+    'OrderService': '.models_sto',
+    'OrderPart': '.models_sto',
+    'ServiceCatalog': '.models_sto',
+    'CarBrand': '.models_sto',
+    'OrderStatus': '.models_sto',
+    
+    # Views (представления)
+    'OrdersView': '.views',
+    'NewOrderView': '.views',
+    'CatalogsView': '.views',
+    'SettingsView': '.views',
+    
+    # Dialogs (диалоги)
+    'ClientDialog': '.dialogs',
+    'CarDialog': '.dialogs',
+    'ServiceDialog': '.dialogs',
+    'PartDialog': '.dialogs',
+    'OrderDetailsDialog': '.dialogs',
+    'AboutDialog': '.dialogs',
+    'SearchDialog': '.dialogs',
+    'CalendarDialog': '.dialogs',
+    'ReportsDialog': '.dialogs',
+    
+    # Utils (утилиты)
+    'BackupManager': '.utils',
+}
+
+# Необязательные компоненты: при ошибке импорта - None
+_OPTIONAL_ATTRS = {
+    'OrdersView', 'NewOrderView', 'CatalogsView', 'SettingsView',
+    'AboutDialog', 'SearchDialog', 'CalendarDialog', 'ReportsDialog',
+    'BackupManager',
+}
 
-# Views (представления)
-try:
-    from .views import (
-        OrdersView,
-        NewOrderView, 
-        CatalogsView,
-        SettingsView
-    )
-except ImportError:
-    # Если views недоступны, устанавливаем None
-    OrdersView = None
-    NewOrderView = None
-    CatalogsView = None
-    SettingsView = None
 
-# Dialogs (диалоги)
-try:
-    from .dialogs import (
-        ClientDialog,
-        CarDialog,
-        ServiceDialog,
-        PartDialog,
-        OrderDetailsDialog,
-        AboutDialog,
-        SearchDialog,
-        CalendarDialog,
-        ReportsDialog
-    )
-except ImportError:
-    # Базовые диалоги должны быть доступны
-    from .dialogs import (
-        ClientDialog,
-        CarDialog, 
-        ServiceDialog,
-        PartDialog,
-        OrderDetailsDialog
-    )
-    # Дополнительные диалоги могут отсутствовать
-    AboutDialog = None
-    SearchDialog = None
-    CalendarDialog = None
-    ReportsDialog = None
+def __getattr__(name):
+    if name == 'themes':
+        # Стили
+        try:
+            value = import_module('.styles.themes', __name__)
+        except ImportError:
+            value = None
+    elif name in _LAZY_ATTRS:
+        try:
+            value = getattr(import_module(_LAZY_ATTRS[name], __name__), name)
+        except (ImportError, AttributeError):
+            if name not in _OPTIONAL_ATTRS:
+                raise
+            value = None
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
 
-# Utils (утилиты)
-try:
-    from .utils import BackupManager
-except ImportError:
-    BackupManager = None
 
-# Стили
-try:
-    from .styles import themes
-except ImportError:
-    themes = None
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
 
 __version__ = '3.0'
 __author__ = 'СТО Management Team'
@@ -0,0 +1,35 @@
+"""
+JSON API для работы нескольких рабочих мест с одной БД.
+
+- server: HTTP-сервер операций (запускается sto_server.py)
+- operations: операции поверх сервисного слоя
+- client: клиент API (ApiClient)
+- remote: сервисы режима клиента для окон (RemoteOrders, RemoteClients, RemoteReports)
+- codec: константы протокола и кодирование значений
+
+Компоненты загружаются при первом обращении: импорт codec (например,
+для разбора аргументов sto_server.py) не подключается к БД.
+"""
+
+from importlib import import_module
+
+_LAZY_ATTRS = {
+    'ApiServer': '.server',
+    'ApiClient': '.client',
+    'ApiError': '.client',
+    'RemoteOrders': '.remote',
+    'RemoteClients': '.remote',
+    'RemoteReports': '.remote',
+    'OPERATIONS': '.operations',
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_LAZY_ATTRS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+__all__ = list(_LAZY_ATTRS)
@@ -0,0 +1,118 @@
+# sto_app/api/client.py
+"""
+Клиент JSON API (только стандартная библиотека).
+
+Соединение HTTP/1.1 держится открытым и переиспользуется (своё на каждый
+поток). Ошибки сервера превращаются в исключения сервисного слоя:
+ValidationError (с полем) и ServiceError, поэтому окна обрабатывают
+их так же, как при работе с локальной БД. Недоступность сервера -
+ApiError.
+"""
+
+import http.client
+import threading
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from ..services.errors import ServiceError, ValidationError
+from .codec import CONTENT_TYPE, DEFAULT_PORT, TOKEN_HEADER, dumps, loads
+
+
+class ApiError(ServiceError):
+    """Сервер недоступен или ответил ошибкой протокола"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+def raise_for_error(error: dict, status: Optional[int] = None):
+    """Исключение по описанию ошибки из ответа сервера"""
+    message = error.get('message', 'Ошибка сервера')
+    if error.get('type') == 'validation':
+        raise ValidationError(error.get('field'), message)
+    if error.get('type') == 'service':
+        raise ServiceError(message)
+    raise ApiError(message, status)
+
+
+class ApiClient:
+    """Вызов операций сервера: call(op, **params), batch([(op, params), ...])"""
+
+    def __init__(self, url: str, token: Optional[str] = None, timeout: float = 30):
+        parts = urlsplit(url if '://' in url else f'http://{url}')
+        if parts.scheme != 'http' or not parts.hostname:
+            raise ValueError(f"Ожидается адрес вида http://host:port: {url}")
+        self.url = f'http://{parts.hostname}:{parts.port or DEFAULT_PORT}'
+        self.host = parts.hostname
+        self.port = parts.port or DEFAULT_PORT
+        self.token = token
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def close(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _request(self, method: str, path: str, payload=None):
+        body = dumps(payload) if payload is not None else None
+        headers = {'Content-Type': CONTENT_TYPE}
+        if self.token:
+            headers[TOKEN_HEADER] = self.token
+
+        # Сервер мог закрыть простаивающее соединение - одна повторная попытка
+        for attempt in (1, 2):
+            connection = self._connection()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                data = loads(response.read())
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self.close()
+                if attempt == 2:
+                    raise ApiError(f'Соединение с сервером {self.url} разорвано')
+            except (OSError, http.client.HTTPException) as e:
+                self.close()
+                raise ApiError(f'Сервер {self.url} недоступен: {e}')
+            except ValueError as e:
+                self.close()
+                raise ApiError(f'Неверный ответ сервера: {e}')
+
+        if response.status != 200:
+            raise_for_error((data or {}).get('error', {}), response.status)
+        return data
+
+    def health(self) -> dict:
+        return self._request('GET', '/api/health')
+
+    def call(self, op: str, **params):
+        return self._request('POST', '/api/call', {'op': op, 'params': params})['result']
+
+    def batch(self, calls: Iterable[Tuple[str, dict]], raise_errors: bool = True) -> List:
+        """
+        Несколько операций одним запросом. Результаты - в порядке вызовов;
+        при raise_errors=False на месте ошибки - исключение (не выбрасывается).
+        """
+        payload = {'calls': [{'op': op, 'params': params} for op, params in calls]}
+        results = []
+        for item in self._request('POST', '/api/batch', payload)['results']:
+            if 'error' in item:
+                try:
+                    raise_for_error(item['error'])
+                except ServiceError as e:
+                    if raise_errors:
+                        raise
+                    results.append(e)
+            else:
+                results.append(item['result'])
+        return results
@@ -0,0 +1,57 @@
+# sto_app/api/codec.py
+"""
+JSON API: общие константы протокола и кодирование значений.
+
+Даты - ISO 8601, Decimal - строкой (без потери точности), Enum - своим
+value. Разбор входных параметров - явными функциями parse_*, каждая
+операция знает типы своих параметров.
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from enum import Enum
+from typing import Optional
+
+CONTENT_TYPE = 'application/json; charset=utf-8'
+TOKEN_HEADER = 'X-STO-Token'
+DEFAULT_PORT = 8765
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Значение не сериализуется в JSON: {type(value).__name__}")
+
+
+def dumps(payload) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, default=_default, separators=(',', ':')).encode('utf-8')
+
+
+def loads(body: bytes):
+    return json.loads(body.decode('utf-8')) if body else None
+
+
+def parse_datetime(value) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def parse_date(value) -> Optional[date]:
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+def parse_decimal(value, default: Decimal = Decimal('0')) -> Decimal:
+    if value is None or value == '':
+        return default
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f"Неверное число: {value}")
@@ -0,0 +1,406 @@
+# sto_app/api/operations.py
+"""
+Операции JSON API поверх сервисного слоя.
+
+Операция - функция (session, **params) -> данные для JSON, без
+ORM-объектов в ответе. write=True - операция меняет БД; сервер выполняет
+такие операции по одной (SQLite допускает одного писателя).
+"""
+
+from dataclasses import asdict, dataclass, fields as dataclass_fields
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from shared_models.common_models import Client, Car, Employee
+from ..models_sto import Order, OrderStatus, PaymentMethod, ServiceCatalog
+from ..services import archive, catalog, changes, clients, orders, reports
+from ..services.errors import ServiceError
+from ..utils.order_lines import DraftChanges, OrderLineItems, PartLine, ServiceLine
+from ..utils.order_view_model import OrderViewModel
+from .codec import parse_date, parse_datetime, parse_decimal
+
+
+@dataclass(frozen=True)
+class Operation:
+    name: str
+    func: Callable
+    write: bool = False
+
+
+OPERATIONS: Dict[str, Operation] = {}
+
+
+def operation(name: str, write: bool = False):
+    """Регистрация операции API"""
+    def register(func):
+        OPERATIONS[name] = Operation(name, func, write)
+        return func
+    return register
+
+
+def _get(session, model, record_id, title: str):
+    record = session.get(model, int(record_id)) if record_id is not None else None
+    if record is None:
+        raise ServiceError(f'{title} не найден: {record_id}')
+    return record
+
+
+# --- Представление записей ---
+
+def order_row(order: Order) -> dict:
+    """Строка списка заказов"""
+    return {
+        'id': order.id,
+        'order_number': order.order_number,
+        'client_id': order.client_id,
+        'car_id': order.car_id,
+        'responsible_person_id': order.responsible_person_id,
+        'date_received': order.date_received,
+        'updated_at': order.updated_at,
+        'status': order.status,
+        'client_name': order.client.name if order.client else None,
+        'car_title': order.car.full_name if order.car else None,
+        'vin': order.car.vin if order.car else None,
+        'total_amount': order.total_amount,
+        'paid_total': order.paid_total,
+        'balance_due': order.balance_due,
+        'responsible_name': order.responsible_person.name if order.responsible_person else None,
+    }
+
+
+def order_view_row(model: OrderViewModel) -> dict:
+    """Данные диалога деталей заказа (суммы строк - в копейках, как в BatchPricing)"""
+    row = asdict(model)
+    row['employee_ids'] = sorted(model.employee_ids)
+    return row
+
+
+def client_row(client: Client) -> dict:
+    return {'id': client.id, 'name': client.name, 'phone': client.phone,
+            'email': client.email, 'address': client.address}
+
+
+def car_row(car: Car) -> dict:
+    return {'id': car.id, 'client_id': car.client_id, 'make': car.make or car.brand, 'model': car.model,
+            'year': car.year, 'vin': car.vin, 'license_plate': car.license_plate, 'color': car.color,
+            'mileage': car.mileage, 'engine_volume': car.engine_volume, 'fuel_type': car.fuel_type,
+            'is_active': car.is_active, 'notes': car.notes}
+
+
+def employee_row(employee: Employee) -> dict:
+    return {'id': employee.id, 'name': employee.name, 'last_name': employee.last_name,
+            'first_name': employee.first_name, 'middle_name': employee.middle_name,
+            'position': employee.position, 'phone': employee.phone, 'email': employee.email,
+            'department': employee.department, 'hire_date': employee.hire_date,
+            'hourly_rate': employee.hourly_rate, 'is_active': employee.is_active}
+
+
+def service_row(service: ServiceCatalog) -> dict:
+    return {'id': service.id, 'name': service.name, 'description': service.description,
+            'category': service.category, 'default_price': service.default_price,
+            'vat_rate': service.vat_rate, 'duration_hours': service.duration_hours,
+            'is_active': service.is_active}
+
+
+# --- Заказы ---
+
+def _filters(params: Optional[dict]) -> dict:
+    filters = dict(params or {})
+    for name in ('date_from', 'date_to'):
+        if filters.get(name):
+            filters[name] = parse_date(filters[name])
+    return filters
+
+
+@operation('orders.list')
+def list_orders(session, filters: Optional[dict] = None) -> List[dict]:
+    return [order_row(order) for order in orders.list_orders(session, _filters(filters))]
+
+
+@operation('orders.get')
+def get_order(session, order_id: int) -> dict:
+    return order_row(_get(session, Order, order_id, 'Заказ'))
+
+
+@operation('orders.view')
+def order_view(session, order_id: int) -> dict:
+    model = orders.order_view(session, int(order_id))
+    if model is None:
+        raise ServiceError(f'Заказ не найден: {order_id}')
+    return order_view_row(model)
+
+
+def _order_fields(values: dict) -> orders.OrderFields:
+    return orders.OrderFields(
+        client_id=values.get('client_id'),
+        car_id=values.get('car_id'),
+        # Как в форме заказа: дата приема по умолчанию - текущая
+        date_received=parse_datetime(values.get('date_received')) or datetime.now(),
+        date_delivery=parse_datetime(values.get('date_delivery')),
+        notes=values.get('notes') or '',
+        discount_percent=parse_decimal(values.get('discount_percent')),
+        prepayment=parse_decimal(values.get('prepayment'))
+    )
+
+
+def _line_items(session, order: Optional[Order], services: list, parts: list) -> OrderLineItems:
+    """
+    Строки заказа из запроса: строки с id обновляют сохраненные (только
+    переданные поля), без id - новые, сохраненные строки, которых нет в
+    запросе, удаляются. Возвращает позиции и списки новых строк (после
+    сохранения у них есть db_id).
+    """
+    items = OrderLineItems()
+    if order is not None:
+        items.load_order(session, order.id)
+
+    def sync(lines, incoming, make_line, update, remove, add):
+        added = []
+        by_id = {line.db_id: index for index, line in enumerate(lines)}
+        keep = {values['id'] for values in incoming if values.get('id') is not None}
+        for index in sorted((i for db_id, i in by_id.items() if db_id not in keep), reverse=True):
+            remove(index)
+        by_id = {line.db_id: index for index, line in enumerate(lines)}
+        for values in incoming:
+            line = make_line(values)
+            if values.get('id') is not None:
+                if values['id'] not in by_id:
+                    raise ServiceError(f"Строка заказа не найдена: {values['id']}")
+                changed = set(values) - {'id'}
+                unknown = changed - {item.name for item in dataclass_fields(line)}
+                if unknown:
+                    raise ValueError(f"Неизвестные поля строки: {', '.join(sorted(unknown))}")
+                if changed:
+                    update(by_id[values['id']], **{name: getattr(line, name) for name in changed})
+            else:
+                add(line)
+                added.append(line)
+        return added
+
+    def service_line(values):
+        return ServiceLine(service_name=values.get('service_name', ''),
+                           service_name_ua=values.get('service_name_ua'),
+                           price=parse_decimal(values.get('price')),
+                           vat_rate=parse_decimal(values.get('vat_rate'), ServiceLine.vat_rate))
+
+    def part_line(values):
+        return PartLine(part_name=values.get('part_name', ''),
+                        part_name_ua=values.get('part_name_ua'),
+                        article=values.get('article'),
+                        unit=values.get('unit') or 'шт',
+                        price=parse_decimal(values.get('price')),
+                        quantity=parse_decimal(values.get('quantity'), PartLine.quantity),
+                        discount_amount=parse_decimal(values.get('discount_amount')))
+
+    new_services = sync(items.services, services or [], service_line,
+                        items.update_service, items.remove_service, items.add_service)
+    new_parts = sync(items.parts, parts or [], part_line,
+                     items.update_part, items.remove_part, items.add_part)
+    return items, new_services, new_parts
+
+
+def _saved_order(order: Order) -> dict:
+    return {'id': order.id, 'order_number': order.order_number, 'status': order.status,
+            'total_amount': order.total_amount, 'balance_due': order.balance_due}
+
+
+def _saved_draft(order: Order, new_services: list, new_parts: list) -> dict:
+    """Сохраненный заказ и id новых строк в порядке запроса"""
+    return dict(order_row(order),
+                new_service_ids=[line.db_id for line in new_services],
+                new_part_ids=[line.db_id for line in new_parts])
+
+
+@operation('orders.save_draft', write=True)
+def save_draft(session, fields: dict, services: Optional[list] = None, parts: Optional[list] = None,
+               order_id: Optional[int] = None) -> dict:
+    order = _get(session, Order, order_id, 'Заказ') if order_id is not None else None
+    items, new_services, new_parts = _line_items(session, order, services, parts)
+    order = orders.save_draft(session, items, _order_fields(fields), order)
+    return _saved_draft(order, new_services, new_parts)
+
+
+@operation('orders.place', write=True)
+def place_order(session, fields: dict, services: Optional[list] = None, parts: Optional[list] = None,
+                order_id: Optional[int] = None, status: Optional[str] = None) -> dict:
+    order = _get(session, Order, order_id, 'Заказ') if order_id is not None else None
+    items, new_services, new_parts = _line_items(session, order, services, parts)
+    order = orders.place_order(session, items, _order_fields(fields), order,
+                               OrderStatus(status) if status else None)
+    return _saved_draft(order, new_services, new_parts)
+
+
+@operation('orders.save_changes', write=True)
+def save_draft_changes(session, changes: dict) -> dict:
+    """
+    Автосохранение черновика: набор изменений (DraftChanges) без объектов
+    строк. Ответ - id и номер заказа и id вставленных строк.
+    """
+    order_fields = dict(changes.get('order_fields') or {})
+    for name in ('date_received', 'date_delivery'):
+        if order_fields.get(name):
+            order_fields[name] = parse_datetime(order_fields[name])
+    draft = DraftChanges(
+        order_id=changes.get('order_id'),
+        order_fields=order_fields,
+        new_services=[(None, values) for values in changes.get('new_services') or []],
+        new_parts=[(None, values) for values in changes.get('new_parts') or []],
+        updated_services=list(changes.get('updated_services') or []),
+        updated_parts=list(changes.get('updated_parts') or []),
+        deleted_service_ids=list(changes.get('deleted_service_ids') or []),
+        deleted_part_ids=list(changes.get('deleted_part_ids') or []),
+    )
+    orders.save_draft_changes(session, draft)
+    return {'order_id': draft.order_id, 'order_number': draft.order_number,
+            'inserted_service_ids': draft.inserted_service_ids,
+            'inserted_part_ids': draft.inserted_part_ids}
+
+
+@operation('orders.start_work', write=True)
+def start_work(session, order_id: int) -> dict:
+    return _saved_order(orders.start_work(session, _get(session, Order, order_id, 'Заказ')))
+
+
+@operation('orders.complete_work', write=True)
+def complete_work(session, order_id: int) -> dict:
+    order = _get(session, Order, order_id, 'Заказ')
+    orders.complete_work(session, order)
+    return _saved_order(order)
+
+
+@operation('orders.payments')
+def order_payments(session, order_id: int) -> List[dict]:
+    return [asdict(row) for row in orders.order_payments(session, int(order_id))]
+
+
+@operation('orders.add_payment', write=True)
+def add_payment(session, order_id: int, amount, method: Optional[str] = None,
+                paid_at: Optional[str] = None, note: Optional[str] = None) -> dict:
+    order = _get(session, Order, order_id, 'Заказ')
+    orders.add_payment(session, order, parse_decimal(amount),
+                       method=PaymentMethod(method) if method else PaymentMethod.CASH,
+                       paid_at=parse_datetime(paid_at), note=note)
+    return order_row(order)
+
+
+# --- Клиенты и автомобили ---
+
+@operation('clients.search')
+def search_clients(session, text: str, limit: int = 10) -> List[dict]:
+    return [client_row(client) for client in clients.find_clients(session, text, limit=limit)]
+
+
+@operation('clients.get')
+def get_client(session, client_id: int) -> dict:
+    return client_row(_get(session, Client, client_id, 'Клиент'))
+
+
+@operation('clients.save', write=True)
+def save_client(session, values: dict, client_id: Optional[int] = None) -> dict:
+    client = _get(session, Client, client_id, 'Клиент') if client_id is not None else None
+    return client_row(clients.save_client(session, client, **values))
+
+
+@operation('clients.history')
+def client_history(session, client_id: int, include_archive: bool = True) -> List[dict]:
+    return [asdict(row) for row in orders.client_history(session, int(client_id), include_archive)]
+
+
+@operation('clients.cars')
+def client_cars(session, client_id: int) -> List[dict]:
+    return [car_row(car) for car in clients.client_cars(session, client_id)]
+
+
+@operation('cars.find_by_vin')
+def find_car_by_vin(session, vin: str, exclude_id: Optional[int] = None) -> Optional[dict]:
+    car = clients.find_car_by_vin(session, vin, exclude_id)
+    return car_row(car) if car else None
+
+
+@operation('cars.save', write=True)
+def save_car(session, values: dict, car_id: Optional[int] = None) -> dict:
+    car = _get(session, Car, car_id, 'Автомобиль') if car_id is not None else None
+    return car_row(clients.save_car(session, car, **values))
+
+
+# --- Справочники ---
+
+@operation('catalog.services')
+def active_services(session) -> List[dict]:
+    return [asdict(record) for record in catalog.active_services(session)]
+
+
+@operation('catalog.search_services')
+def search_services(session, text: str, limit: int = 10) -> List[dict]:
+    return [asdict(record) for record in catalog.search_services(session, text, limit=limit)]
+
+
+@operation('catalog.save_service', write=True)
+def save_service(session, values: dict, service_id: Optional[int] = None) -> dict:
+    service = _get(session, ServiceCatalog, service_id, 'Услуга') if service_id is not None else None
+    for name in ('default_price', 'vat_rate', 'duration_hours'):
+        if values.get(name) is not None:
+            values[name] = parse_decimal(values[name])
+    return service_row(catalog.save_service(session, service, **values))
+
+
+@operation('catalog.delete_service', write=True)
+def delete_service(session, service_id: int) -> None:
+    catalog.delete_service(session, service_id)
+
+
+@operation('catalog.employees')
+def active_employees(session) -> List[dict]:
+    return [asdict(record) for record in catalog.active_employees(session)]
+
+
+@operation('catalog.save_employee', write=True)
+def save_employee(session, values: dict, employee_id: Optional[int] = None) -> dict:
+    employee = _get(session, Employee, employee_id, 'Сотрудник') if employee_id is not None else None
+    if values.get('hire_date'):
+        values['hire_date'] = parse_date(values['hire_date'])
+    if values.get('hourly_rate') is not None:
+        values['hourly_rate'] = parse_decimal(values['hourly_rate'])
+    return employee_row(catalog.save_employee(session, employee, **values))
+
+
+@operation('catalog.delete_employee', write=True)
+def delete_employee(session, employee_id: int) -> None:
+    catalog.delete_employee(session, employee_id)
+
+
+# --- Изменения ---
+
+@operation('changes.since')
+def changes_since(session, since_id: Optional[int] = None) -> Optional[dict]:
+    """Изменения после записи журнала since_id (None - номер последней записи)"""
+    connection = session.connection()
+    if since_id is None:
+        return {'last_id': changes.last_change_id(connection)}
+    change_set = changes.changes_since(connection, int(since_id))
+    return change_set.to_dict() if change_set else None
+
+
+# --- Отчеты ---
+
+@operation('reports.main')
+def main_report(session, title: str, date_from: str, date_to: str) -> dict:
+    """
+    Табличный отчет: исходные значения (суммы в копейках), форматирует
+    клиент. Период, заходящий в архив, читается вместе с архивом.
+    """
+    builder = reports.MAIN_REPORTS.get(title)
+    if builder is None:
+        raise ServiceError(f'Неизвестный отчет: {title}')
+    date_from = parse_date(date_from)
+    report = builder(date_from, parse_date(date_to), archive.reaches(session, date_from))
+    return {'title': report.title, 'headers': report.headers,
+            'rows': [list(row) for row in report.fetch(session)]}
+
+
+@operation('reports.financial')
+def financial_report(session, date_from: str, date_to: str, min_amount: float = 0) -> dict:
+    date_from = parse_date(date_from)
+    report = reports.financial_report(session, date_from, parse_date(date_to), min_amount,
+                                      archive.reaches(session, date_from))
+    return {'periods': [asdict(period) for period in report.periods]}
@@ -0,0 +1,345 @@
+# sto_app/api/remote.py
+"""
+Сервисы для режима клиента: те же вызовы, что у services.orders,
+services.clients, services.reports и services.changes, но через сервер API.
+
+Окна получают такой объект вместо модуля сервиса; аргумент session
+принимается для совместимости и не используется. Строки списка заказов
+(OrderRow) повторяют атрибуты заказа, которые читают таблица и действия
+окна заказов, ClientRecord и CarRecord - атрибуты клиента и автомобиля
+для формы заказа.
+
+Позиции заказа (OrderLineItems) остаются в памяти клиента: сохранение
+передает сохраненные строки только id (измененные - с полями), новые -
+полями, и присваивает строкам id из ответа сервера.
+"""
+
+from dataclasses import asdict, dataclass, fields as dataclass_fields
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from ..models_sto import OrderStatus, PaymentMethod
+from ..services.changes import ChangeSet
+from ..services.orders import OrderFields, PaymentRow
+from ..services.reports import DATE, ENUM, FinancialPeriod, FinancialReport, Report
+from ..utils.order_lines import DraftChanges, OrderLineItems
+from ..utils.order_view_model import CarInfo, ClientInfo, OrderViewModel, PartRow, ServiceRow
+from ..utils.pricing import BatchPricing
+from .client import ApiClient
+from .codec import parse_datetime, parse_decimal
+
+
+@dataclass(frozen=True)
+class NamedRef:
+    """Связанная запись строки: клиент, автомобиль, ответственный"""
+    name: str = ''
+    full_name: str = ''
+    vin: str = ''
+
+
+@dataclass
+class OrderRow:
+    """Заказ из списка, полученного с сервера"""
+    id: int
+    order_number: str
+    client_id: Optional[int]
+    car_id: Optional[int]
+    responsible_person_id: Optional[int]
+    date_received: Optional[datetime]
+    updated_at: Optional[datetime]
+    status: Optional[OrderStatus]
+    total_amount: float
+    paid_total: float
+    balance_due: float
+    client: Optional[NamedRef]
+    car: Optional[NamedRef]
+    responsible_person: Optional[NamedRef]
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'OrderRow':
+        return cls(
+            id=data['id'],
+            order_number=data['order_number'],
+            client_id=data.get('client_id'),
+            car_id=data.get('car_id'),
+            responsible_person_id=data.get('responsible_person_id'),
+            date_received=parse_datetime(data.get('date_received')),
+            updated_at=parse_datetime(data.get('updated_at')),
+            status=OrderStatus(data['status']) if data.get('status') else None,
+            total_amount=data.get('total_amount') or 0.0,
+            paid_total=data.get('paid_total') or 0.0,
+            balance_due=data.get('balance_due') or 0.0,
+            client=NamedRef(name=data['client_name']) if data.get('client_name') is not None else None,
+            car=NamedRef(full_name=data.get('car_title') or '', vin=data.get('vin') or '')
+            if data.get('car_title') is not None else None,
+            responsible_person=NamedRef(name=data['responsible_name'])
+            if data.get('responsible_name') is not None else None,
+        )
+
+
+@dataclass
+class ClientRecord:
+    """Клиент, полученный с сервера"""
+    id: int
+    name: str
+    phone: str
+    email: Optional[str] = None
+    address: Optional[str] = None
+
+
+@dataclass
+class CarRecord:
+    """Автомобиль, полученный с сервера"""
+    id: int
+    client_id: Optional[int]
+    make: Optional[str]
+    model: Optional[str]
+    year: Optional[int] = None
+    vin: Optional[str] = None
+    license_plate: Optional[str] = None
+    color: Optional[str] = None
+    mileage: Optional[int] = None
+    engine_volume: Optional[float] = None
+    fuel_type: Optional[str] = None
+    is_active: bool = True
+    notes: Optional[str] = None
+
+
+def _date(value) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _line_values(line, updated_ids) -> dict:
+    """Строка заказа для запроса: новая - полями, сохраненная - id (измененная - и полями)"""
+    values = {field.name: getattr(line, field.name) for field in dataclass_fields(line)
+              if field.name not in ('db_id', 'dirty')}
+    if line.db_id is None:
+        return values
+    if line.db_id in updated_ids:
+        return dict(values, id=line.db_id)
+    return {'id': line.db_id}
+
+
+def _changes_json(changes: DraftChanges) -> dict:
+    """Набор изменений черновика без объектов строк"""
+    return {
+        'order_id': changes.order_id,
+        'order_fields': changes.order_fields,
+        'new_services': [values for _, values in changes.new_services],
+        'new_parts': [values for _, values in changes.new_parts],
+        'updated_services': changes.updated_services,
+        'updated_parts': changes.updated_parts,
+        'deleted_service_ids': changes.deleted_service_ids,
+        'deleted_part_ids': changes.deleted_part_ids,
+    }
+
+
+def _order_view(data: dict) -> OrderViewModel:
+    """Модель диалога деталей заказа из ответа orders.view"""
+    money = parse_decimal
+    return OrderViewModel(
+        order_id=data['order_id'],
+        updated_at=parse_datetime(data.get('updated_at')),
+        client_id=data.get('client_id'),
+        car_id=data.get('car_id'),
+        employee_ids=frozenset(data.get('employee_ids') or ()),
+        order_number=data.get('order_number') or '',
+        status=OrderStatus(data['status']) if data.get('status') else None,
+        created_at=parse_datetime(data.get('created_at')),
+        date_received=parse_datetime(data.get('date_received')),
+        date_delivery=parse_datetime(data.get('date_delivery')),
+        notes=data.get('notes') or '',
+        client=ClientInfo(**data['client']) if data.get('client') else None,
+        car=CarInfo(**data['car']) if data.get('car') else None,
+        manager_name=data.get('manager_name') or '',
+        responsible_name=data.get('responsible_name') or '',
+        services=[ServiceRow(name=row['name'], vat_rate=money(row['vat_rate']),
+                             price=money(row['price']), price_with_vat=money(row['price_with_vat']))
+                  for row in data.get('services') or []],
+        parts=[PartRow(article=row['article'], name=row['name'], quantity=row['quantity'],
+                       price=money(row['price']), discount=money(row['discount']), total=money(row['total']))
+               for row in data.get('parts') or []],
+        services_pricing=BatchPricing(**data['services_pricing']),
+        parts_pricing=BatchPricing(**data['parts_pricing']),
+        discount_percent=money(data.get('discount_percent')),
+        discount_total=money(data.get('discount_total')),
+        vat_total=money(data.get('vat_total')),
+        total_amount=money(data.get('total_amount')),
+        paid_total=money(data.get('paid_total')),
+        balance_due=money(data.get('balance_due')),
+    )
+
+
+class RemoteOrders:
+    """Заказы через сервер (вместо services.orders)"""
+
+    def __init__(self, client: ApiClient):
+        self.client = client
+
+    def list_orders(self, session, filters: Optional[dict] = None) -> List[OrderRow]:
+        filters = dict(filters or {})
+        for name in ('date_from', 'date_to'):
+            filters[name] = _date(filters.get(name))
+        return [OrderRow.from_json(row) for row in self.client.call('orders.list', filters=filters)]
+
+    def changed_orders(self, session, order_ids, filters: Optional[dict] = None) -> List[OrderRow]:
+        if not order_ids:
+            return []
+        return self.list_orders(session, dict(filters or {}, order_ids=sorted(order_ids)))
+
+    def _change_status(self, op: str, order) -> OrderStatus:
+        saved = self.client.call(op, order_id=order.id)
+        order.status = OrderStatus(saved['status'])
+        order.balance_due = saved['balance_due']
+        return order.status
+
+    def start_work(self, session, order) -> OrderRow:
+        self._change_status('orders.start_work', order)
+        return order
+
+    def complete_work(self, session, order) -> OrderStatus:
+        return self._change_status('orders.complete_work', order)
+
+    def get_order(self, session, order_id: int) -> OrderRow:
+        return OrderRow.from_json(self.client.call('orders.get', order_id=order_id))
+
+    def _save(self, op: str, line_items: OrderLineItems, fields: OrderFields, order, **params) -> OrderRow:
+        """Сохранение формы заказа: поля и все строки, id новых строк - из ответа"""
+        changes = line_items.take_changes(order.id if order is not None else None)
+        updated_services = {values['id'] for values in changes.updated_services}
+        updated_parts = {values['id'] for values in changes.updated_parts}
+        try:
+            saved = self.client.call(
+                op, fields=asdict(fields), order_id=changes.order_id,
+                services=[_line_values(line, updated_services) for line in line_items.services],
+                parts=[_line_values(line, updated_parts) for line in line_items.parts],
+                **params
+            )
+        except Exception:
+            line_items.restore_changes(changes)
+            raise
+        changes.inserted_service_ids = saved['new_service_ids']
+        changes.inserted_part_ids = saved['new_part_ids']
+        line_items.apply_saved_changes(changes)
+        return OrderRow.from_json(saved)
+
+    def save_draft(self, session, line_items: OrderLineItems, fields: OrderFields, order=None) -> OrderRow:
+        return self._save('orders.save_draft', line_items, fields, order)
+
+    def place_order(self, session, line_items: OrderLineItems, fields: OrderFields, order=None,
+                    status: Optional[OrderStatus] = None) -> OrderRow:
+        return self._save('orders.place', line_items, fields, order, status=status)
+
+    def save_draft_changes(self, session, changes: DraftChanges) -> DraftChanges:
+        saved = self.client.call('orders.save_changes', changes=_changes_json(changes))
+        changes.order_id = saved['order_id']
+        changes.order_number = saved['order_number']
+        changes.inserted_service_ids = saved['inserted_service_ids']
+        changes.inserted_part_ids = saved['inserted_part_ids']
+        return changes
+
+    def draft_writer(self, session) -> Callable[[DraftChanges], DraftChanges]:
+        """Запись изменений черновика из фонового потока (у потока свое соединение)"""
+        return lambda changes: self.save_draft_changes(None, changes)
+
+    def order_view(self, session, order_id: int, updated_at: Optional[datetime] = None) -> OrderViewModel:
+        return _order_view(self.client.call('orders.view', order_id=order_id))
+
+    def order_payments(self, session, order_id: int) -> List[PaymentRow]:
+        return [PaymentRow(parse_datetime(row['paid_at']), row['amount'] or 0.0,
+                           PaymentMethod(row['method']) if row.get('method') else None, row.get('note') or '')
+                for row in self.client.call('orders.payments', order_id=order_id)]
+
+    def add_payment(self, session, order, amount, method: PaymentMethod = PaymentMethod.CASH,
+                    paid_at: Optional[datetime] = None, note: Optional[str] = None):
+        saved = self.client.call('orders.add_payment', order_id=order.id, amount=amount,
+                                 method=method, paid_at=_date(paid_at), note=note)
+        order.paid_total = saved['paid_total']
+        order.balance_due = saved['balance_due']
+        order.status = OrderStatus(saved['status']) if saved.get('status') else None
+        return order
+
+
+class RemoteClients:
+    """Клиенты и автомобили через сервер (вместо services.clients)"""
+
+    def __init__(self, client: ApiClient):
+        self.client = client
+
+    def find_clients(self, session, text: str, limit: int = 10) -> List[ClientRecord]:
+        return [ClientRecord(**row) for row in self.client.call('clients.search', text=text, limit=limit)]
+
+    def get_client(self, session, client_id: int) -> ClientRecord:
+        return ClientRecord(**self.client.call('clients.get', client_id=client_id))
+
+    def client_cars(self, session, client_id: int) -> List[CarRecord]:
+        return [CarRecord(**row) for row in self.client.call('clients.cars', client_id=client_id)]
+
+    def find_car_by_vin(self, session, vin: str, exclude_id: Optional[int] = None) -> Optional[CarRecord]:
+        row = self.client.call('cars.find_by_vin', vin=vin, exclude_id=exclude_id)
+        return CarRecord(**row) if row else None
+
+    def save_client(self, session, client=None, **values) -> ClientRecord:
+        return ClientRecord(**self.client.call('clients.save', values=values,
+                                               client_id=client.id if client is not None else None))
+
+    def save_car(self, session, car=None, **values) -> CarRecord:
+        return CarRecord(**self.client.call('cars.save', values=values,
+                                            car_id=car.id if car is not None else None))
+
+
+class RemoteReports:
+    """Отчеты через сервер (вместо запросов к локальной БД)"""
+
+    def __init__(self, client: ApiClient):
+        self.client = client
+
+    def fetch(self, report: Report) -> list:
+        """Строки табличного отчета в том же виде, что дает Report.fetch"""
+        date_from, date_to = report.period
+        result = self.client.call('reports.main', title=report.title,
+                                  date_from=_date(date_from), date_to=_date(date_to))
+        decoders = [_DECODERS.get(column.kind) for column in report.columns]
+        return [tuple(decode(value) if decode and value is not None else value
+                      for decode, value in zip(decoders, row))
+                for row in result['rows']]
+
+    def financial_report(self, session, date_from, date_to, min_amount: float = 0) -> FinancialReport:
+        result = self.client.call('reports.financial', date_from=_date(date_from),
+                                  date_to=_date(date_to), min_amount=min_amount)
+        return FinancialReport(tuple(FinancialPeriod(**period) for period in result['periods']))
+
+
+class RemoteChangeFeed:
+    """Изменения через сервер (вместо services.changes.ChangeFeed)"""
+
+    # Опрос идет из GUI-потока - недоступный сервер не должен надолго блокировать окно
+    POLL_TIMEOUT = 2
+
+    def __init__(self, client: ApiClient):
+        self.client = ApiClient(client.url, client.token, timeout=self.POLL_TIMEOUT)
+        self.last_id = None
+
+    def open(self):
+        self.last_id = self.client.call('changes.since')['last_id']
+
+    def close(self):
+        self.client.close()
+
+    def poll(self) -> Optional[ChangeSet]:
+        if self.last_id is None:
+            self.open()
+            return None
+        result = self.client.call('changes.since', since_id=self.last_id)
+        if result is None:
+            return None
+        change_set = ChangeSet.from_dict(result)
+        self.last_id = change_set.last_id
+        return change_set
+
+
+# Значения отчетов, которые JSON передает строками
+_DECODERS = {
+    DATE: parse_datetime,
+    ENUM: OrderStatus,
+}
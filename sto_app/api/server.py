@@ -0,0 +1,261 @@
+# sto_app/api/server.py
+"""
+Сервер JSON API: один процесс владеет файлом БД, рабочие места
+обращаются к нему по HTTP вместо открытия SQLite на сетевом диске.
+
+Протокол (HTTP/1.1, соединения keep-alive):
+    GET  /api/health                         -> {"status": "ok", ...}
+    POST /api/call   {"op": ..., "params": {...}}   -> {"result": ...}
+    POST /api/batch  {"calls": [{"op", "params"}, ...]}
+                     -> {"results": [{"result": ...} | {"error": {...}}, ...]}
+
+Пакет выполняется одной сессией (одно соединение из пула) по порядку;
+каждая операция коммитит сама, ошибка одной не отменяет остальные.
+
+Ошибки: {"error": {"type", "message", "field"?}} с кодом 400 (запрос),
+401 (токен), 404 (операция), 409 (ServiceError), 422 (ValidationError),
+500 (прочее).
+
+Запросы обслуживаются потоками (ThreadingHTTPServer), соединения с БД
+берутся из пула движка (config.database). Изменяющие операции
+выполняются по одной под блокировкой - SQLite допускает одного писателя.
+Журнал WAL (чтение параллельно с записью) включается только по запросу
+и только для локального файла, см. prepare_engine.
+"""
+
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+from ..services.errors import ServiceError, ValidationError
+from .codec import CONTENT_TYPE, TOKEN_HEADER, dumps, loads
+from .operations import OPERATIONS
+
+logger = logging.getLogger(__name__)
+
+API_VERSION = 1
+MAX_BODY_BYTES = 10 * 1024 * 1024
+MAX_BATCH_CALLS = 500
+
+
+# Файловые системы сетевых дисков (Linux, /proc/mounts)
+_NETWORK_FILESYSTEMS = {'nfs', 'nfs4', 'cifs', 'smbfs', 'smb3', 'afs', '9p', 'fuse.sshfs', 'davfs'}
+
+
+def is_network_path(path: str) -> bool:
+    """Лежит ли файл на сетевом диске (UNC, сетевой диск Windows, NFS/SMB)"""
+    if str(path).startswith(('\\\\', '//')):
+        return True
+    path = os.path.abspath(path)
+    if sys.platform == 'win32':
+        import ctypes
+        drive = os.path.splitdrive(path)[0] + '\\'
+        return ctypes.windll.kernel32.GetDriveTypeW(drive) == 4  # DRIVE_REMOTE
+    try:
+        with open('/proc/mounts', encoding='utf-8') as mounts:
+            points = [(line.split()[1], line.split()[2]) for line in mounts if len(line.split()) > 2]
+    except OSError:
+        return False
+    # Файловая система самой длинной точки монтирования, содержащей путь
+    mount_point, fs_type = '', ''
+    for point, fs in points:
+        if (path == point or path.startswith(point.rstrip('/') + '/')) and len(point) > len(mount_point):
+            mount_point, fs_type = point, fs
+    return fs_type in _NETWORK_FILESYSTEMS
+
+
+def prepare_engine(engine, busy_timeout_ms: int = 5000, wal: bool = False) -> bool:
+    """
+    Настройка SQLite для сервера: ожидание блокировки вместо немедленной
+    ошибки "database is locked"; wal=True - журнал WAL (чтение не ждет
+    записи). Режим WAL хранится в файле БД, а на сетевом диске SQLite его
+    не поддерживает - для такого файла он не включается (ServiceError).
+    Возвращает True, если WAL включен: при остановке сервера нужно вызвать
+    restore_journal_mode, чтобы файл снова можно было открывать напрямую.
+    """
+    if engine.url.get_backend_name() != 'sqlite':
+        return False
+    from sqlalchemy import event
+
+    database = engine.url.database
+    if wal and database and database != ':memory:' and is_network_path(database):
+        raise ServiceError(f'Журнал WAL не поддерживается для файла на сетевом диске: {database}')
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f'PRAGMA busy_timeout = {int(busy_timeout_ms)}')
+        cursor.close()
+
+    if not wal:
+        # Файл мог остаться в режиме WAL после прежней версии сервера
+        with engine.connect() as connection:
+            mode = connection.exec_driver_sql('PRAGMA journal_mode').scalar()
+        if str(mode).lower() == 'wal':
+            restore_journal_mode(engine)
+        return False
+    engine.dispose()
+    with engine.connect() as connection:
+        connection.exec_driver_sql('PRAGMA journal_mode = WAL')
+    return True
+
+
+def restore_journal_mode(engine):
+    """Вернуть файлу БД обычный журнал (DELETE) после работы сервера в режиме WAL"""
+    engine.dispose()
+    with engine.connect() as connection:
+        mode = connection.exec_driver_sql('PRAGMA journal_mode = DELETE').scalar()
+    engine.dispose()
+    if str(mode).lower() != 'delete':
+        logger.warning(f"Журнал БД остался в режиме {mode}: файл открыт другим процессом")
+
+
+class ApiRequestError(Exception):
+    """Ошибка запроса с HTTP-кодом"""
+
+    def __init__(self, status: HTTPStatus, error_type: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.error_type = error_type
+        self.message = message
+
+
+def _error(error_type: str, message: str, **extra) -> dict:
+    return {'type': error_type, 'message': message, **extra}
+
+
+class ApiServer(ThreadingHTTPServer):
+    """HTTP-сервер операций API"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: Tuple[str, int], session_factory=None, token: Optional[str] = None):
+        super().__init__(address, ApiRequestHandler)
+        if session_factory is None:
+            from config.database import SessionLocal
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+        self.token = token
+        self.write_lock = threading.Lock()
+        self.started_at = time.time()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def execute(self, session, call) -> Tuple[HTTPStatus, dict]:
+        """Выполнить одну операцию: (HTTP-код, {"result"} или {"error"})"""
+        if not isinstance(call, dict) or not isinstance(call.get('op'), str):
+            return HTTPStatus.BAD_REQUEST, {'error': _error('request', 'Ожидается {"op": ..., "params": {...}}')}
+        operation = OPERATIONS.get(call['op'])
+        if operation is None:
+            return HTTPStatus.NOT_FOUND, {'error': _error('unknown_operation', f"Неизвестная операция: {call['op']}")}
+        params = call.get('params') or {}
+        if not isinstance(params, dict):
+            return HTTPStatus.BAD_REQUEST, {'error': _error('request', 'params должен быть объектом')}
+
+        try:
+            if operation.write:
+                with self.write_lock:
+                    result = operation.func(session, **params)
+            else:
+                result = operation.func(session, **params)
+            return HTTPStatus.OK, {'result': result}
+
+        except ValidationError as e:
+            return HTTPStatus.UNPROCESSABLE_ENTITY, {'error': _error('validation', e.message, field=e.field)}
+        except ServiceError as e:
+            return HTTPStatus.CONFLICT, {'error': _error('service', str(e))}
+        except (TypeError, ValueError, KeyError) as e:
+            session.rollback()
+            return HTTPStatus.BAD_REQUEST, {'error': _error('request', f'{call["op"]}: {e}')}
+        except Exception as e:
+            session.rollback()
+            logger.exception(f"Ошибка операции {call['op']}")
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': _error('internal', str(e))}
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов API (keep-alive)"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'STOServer/3.0'
+    server: ApiServer
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def _send(self, status: HTTPStatus, payload: dict):
+        body = dumps(payload)
+        self.send_response(status)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _check_token(self):
+        if self.server.token is None:
+            return
+        token = self.headers.get(TOKEN_HEADER, '')
+        if not hmac.compare_digest(token.encode(), self.server.token.encode()):
+            raise ApiRequestError(HTTPStatus.UNAUTHORIZED, 'auth', 'Неверный токен доступа')
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            raise ApiRequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, 'request', 'Слишком большой запрос')
+        body = self.rfile.read(length)
+        try:
+            return loads(body)
+        except ValueError as e:
+            raise ApiRequestError(HTTPStatus.BAD_REQUEST, 'request', f'Неверный JSON: {e}')
+
+    def do_GET(self):
+        try:
+            self._check_token()
+            if self.path != '/api/health':
+                raise ApiRequestError(HTTPStatus.NOT_FOUND, 'request', f'Неизвестный путь: {self.path}')
+            self._send(HTTPStatus.OK, {
+                'status': 'ok',
+                'api_version': API_VERSION,
+                'uptime': round(time.time() - self.server.started_at, 1),
+                'operations': sorted(OPERATIONS),
+            })
+        except ApiRequestError as e:
+            self._send(e.status, {'error': _error(e.error_type, e.message)})
+
+    def do_POST(self):
+        try:
+            self._check_token()
+            payload = self._read_json()
+            if self.path == '/api/call':
+                self._send(*self._call(payload))
+            elif self.path == '/api/batch':
+                self._send(HTTPStatus.OK, self._batch(payload))
+            else:
+                raise ApiRequestError(HTTPStatus.NOT_FOUND, 'request', f'Неизвестный путь: {self.path}')
+        except ApiRequestError as e:
+            self._send(e.status, {'error': _error(e.error_type, e.message)})
+
+    def _call(self, payload):
+        with self.server.session_factory() as session:
+            return self.server.execute(session, payload)
+
+    def _batch(self, payload) -> dict:
+        calls = payload.get('calls') if isinstance(payload, dict) else None
+        if not isinstance(calls, list):
+            raise ApiRequestError(HTTPStatus.BAD_REQUEST, 'request', 'Ожидается {"calls": [...]}')
+        if len(calls) > MAX_BATCH_CALLS:
+            raise ApiRequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, 'request',
+                                  f'Не более {MAX_BATCH_CALLS} операций в пакете')
+        with self.server.session_factory() as session:
+            return {'results': [self.server.execute(session, call)[1] for call in calls]}
+
@@ -1,19 +1,22 @@
 # sto_app/app.py
 import sys
 import os
-from PySide6.QtWidgets import QApplication, QSplashScreen
+from PySide6.QtWidgets import QApplication, QMessageBox, QSplashScreen
 from PySide6.QtCore import Qt, QTimer, QTranslator, QLocale
 from PySide6.QtGui import QPixmap, QIcon
 
 from .main_window import MainWindow
 from .styles.themes import apply_theme
+from .utils.ui_watchdog import UiWatchdog
 from config.database import init_database, engine
+from config.startup_profiler import (profiler, SPLASH, INIT_DATABASE, TRANSLATIONS, THEME,
+                                     MAIN_WINDOW, FIRST_SHOW, BUDGET_EXCEEDED_EXIT_CODE)
 
 
 class STOApplication(QApplication):
     """Главный класс приложения СТО"""
     
-    def __init__(self, argv):
+    def __init__(self, argv, server_url=None, api_token=None):
         super().__init__(argv)
         
         # Установка основных параметров
@@ -29,41 +32,75 @@ class STOApplication(QApplication):
         self.splash = None
         self.main_window = None
         
+        # Режим клиента: данные через сервер API вместо локальной БД
+        self.server_url = server_url
+        self.api_token = api_token
+        self.api_client = None
+        
+        # Сторож зависаний цикла событий (STO_UI_WATCHDOG)
+        self.ui_watchdog = UiWatchdog(parent=self)
+        self.aboutToQuit.connect(self.stop_watchdog)
+        
     def run(self):
         """Запуск приложения"""
         # Показываем заставку
-        self.show_splash()
+        with profiler.phase(SPLASH):
+            self.show_splash()
         
-        # Инициализация БД
-        self.splash_message("Инициализация базы данных...")
-        try:
-            init_database()
-        except Exception as e:
-            print(f"Ошибка инициализации БД: {e}")
-            return 1
+        # Инициализация БД (в режиме клиента - подключение к серверу)
+        if self.server_url:
+            self.splash_message("Подключение к серверу...")
+            if not self.connect_server():
+                return 1
+        else:
+            self.splash_message("Инициализация базы данных...")
+            try:
+                with profiler.phase(INIT_DATABASE):
+                    init_database()
+            except Exception as e:
+                print(f"Ошибка инициализации БД: {e}")
+                return 1
         
         # Загрузка переводов
         self.splash_message("Загрузка языковых файлов...")
-        self.load_translations()
+        with profiler.phase(TRANSLATIONS):
+            self.load_translations()
         
         # Применение темы
         self.splash_message("Применение темы...")
-        settings = self.main_window.settings if self.main_window else None
-        theme = settings.value('theme', 'light') if settings else 'light'
-        apply_theme(self, theme)
+        with profiler.phase(THEME):
+            settings = self.main_window.settings if self.main_window else None
+            theme = settings.value('theme', 'light') if settings else 'light'
+            apply_theme(self, theme)
         
         # Создание главного окна
         self.splash_message("Загрузка интерфейса...")
-        self.main_window = MainWindow()
+        with profiler.phase(MAIN_WINDOW):
+            self.main_window = MainWindow(api_client=self.api_client)
         
         # Подключение сигналов темы
         self.main_window.theme_changed.connect(lambda t: apply_theme(self, t))
         
-        # Закрытие заставки и показ главного окна
-        QTimer.singleShot(1000, self.finish_loading)
+        # Первая вкладка уже готова - закрываем заставку сразу
+        self.finish_loading()
         
         return self.exec()
     
+    def connect_server(self):
+        """Подключение к серверу API (режим клиента)"""
+        from .api.client import ApiClient, ApiError
+        try:
+            self.api_client = ApiClient(self.server_url, self.api_token)
+            self.api_client.health()
+            return True
+        except (ValueError, ApiError) as e:
+            print(f"Ошибка подключения к серверу: {e}")
+            if self.splash:
+                self.splash.close()
+            QMessageBox.critical(None, "Ошибка подключения",
+                                 f"Не удалось подключиться к серверу {self.server_url}:\n\n{e}")
+            return False
+    
     def show_splash(self):
         """Показать заставку при загрузке"""
         splash_pixmap = QPixmap('resources/images/splash.png')
@@ -91,9 +128,32 @@ class STOApplication(QApplication):
     
     def finish_loading(self):
         """Завершение загрузки"""
-        if self.splash:
-            self.splash.finish(self.main_window)
-        self.main_window.show()
+        with profiler.phase(FIRST_SHOW):
+            if self.splash:
+                self.splash.finish(self.main_window)
+            self.main_window.show()
+        if profiler.enabled:
+            # Отчет - после обработки событий показа (окно отрисовано)
+            QTimer.singleShot(0, self.finish_profiling)
+        # Остальные вкладки создаются по первому открытию; вероятную
+        # следующую готовим в простое после показа окна
+        self.main_window.start_prefetch()
+        # Изменения из других экземпляров приложения - опрос в простое
+        self.main_window.change_notifier.start()
+        
+        if self.ui_watchdog.configure_from_env():
+            self.ui_watchdog.start(self.main_window.current_context)
+    
+    def stop_watchdog(self):
+        """Остановить сторож зависаний и записать отчет"""
+        self.ui_watchdog.stop()
+        self.ui_watchdog.write_report()
+    
+    def finish_profiling(self):
+        """Записать отчет профилировщика запуска"""
+        within_budget = profiler.finish()
+        if profiler.exit_after_startup:
+            self.exit(0 if within_budget else BUDGET_EXCEEDED_EXIT_CODE)
     
     def load_translations(self):
         """Загрузка переводов"""
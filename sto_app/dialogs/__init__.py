@@ -7,11 +7,13 @@ from .car_dialog import CarDialog
 from .service_dialog import ServiceDialog
 from .part_dialog import PartDialog
 from .order_details_dialog import OrderDetailsDialog
+from .payment_dialog import PaymentDialog
 
 __all__ = [
     'ClientDialog', 
     'CarDialog', 
     'ServiceDialog', 
     'PartDialog',
-    'OrderDetailsDialog'
+    'OrderDetailsDialog',
+    'PaymentDialog'
 ]
\ No newline at end of file
@@ -21,7 +21,11 @@ class CalendarDialog(QDialog):
     def __init__(self, db_session: Session, parent=None):
         super().__init__(parent)
         self.db_session = db_session
-        
+        # Заказы по датам; заполняется в load_orders, но читается уже при построении панели
+        self.orders_by_date = {}
+        # Форматы подсветки по цвету - общие для всех дат
+        self._date_formats = {}
+
         self.setWindowTitle('📅 Календарь заказов')
         self.setMinimumSize(900, 700)
         self.resize(1100, 800)
@@ -176,6 +180,7 @@ class CalendarDialog(QDialog):
         """Настройка соединений сигналов"""
         self.calendar.selectionChanged.connect(self.on_date_selected)
         self.calendar.clicked.connect(self.on_date_clicked)
+        self.calendar.currentPageChanged.connect(self.update_calendar_highlighting)
         
         self.status_filter.currentTextChanged.connect(self.on_filter_changed)
         self.period_filter.currentTextChanged.connect(self.on_period_changed)
@@ -214,23 +219,31 @@ class CalendarDialog(QDialog):
         except Exception as e:
             QMessageBox.critical(self, 'Ошибка', f'Ошибка загрузки заказов: {e}')
             
-    def update_calendar_highlighting(self):
-        """Обновление подсветки календаря"""
+    def update_calendar_highlighting(self, *args):
+        """Обновление подсветки календаря (только видимая страница)"""
         # Очищаем предыдущую подсветку
-        default_format = QTextCharFormat()
-        self.calendar.setDateTextFormat(QDate(), default_format)
-        
-        # Подсвечиваем даты с заказами
-        for date, orders in self.orders_by_date.items():
-            qdate = QDate(date.year, date.month, date.day)
-            
-            # Определяем цвет по статусам заказов
+        self.calendar.setDateTextFormat(QDate(), QTextCharFormat())
+        
+        # Страница показывает 6 недель вокруг месяца - подсвечиваем только их,
+        # остальные даты подсветятся при перелистывании (currentPageChanged)
+        first_day = QDate(self.calendar.yearShown(), self.calendar.monthShown(), 1).toPython()
+        for offset in range(-7, 42):
+            date = first_day + timedelta(days=offset)
+            orders = self.orders_by_date.get(date)
+            if orders:
+                qdate = QDate(date.year, date.month, date.day)
+                self.calendar.setDateTextFormat(qdate, self.date_format(self.get_date_color(orders)))
+                
+    def date_format(self, color):
+        """Формат даты с заказами (по цвету статуса)"""
+        format = self._date_formats.get(color)
+        if format is None:
             format = QTextCharFormat()
-            format.setBackground(QColor(self.get_date_color(orders)))
+            format.setBackground(QColor(color))
             format.setForeground(QColor('#ffffff'))
             format.setFontWeight(75)  # Bold
-            
-            self.calendar.setDateTextFormat(qdate, format)
+            self._date_formats[color] = format
+        return format
             
     def get_date_color(self, orders):
         """Получить цвет для даты на основе статусов заказов"""
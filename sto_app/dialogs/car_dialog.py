@@ -11,19 +11,21 @@
 
 import re
 import logging
-from typing import Optional, List
+from typing import Optional
 
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, 
     QLineEdit, QTextEdit, QPushButton, QMessageBox, QLabel,
-    QComboBox, QSpinBox, QCheckBox
+    QComboBox, QSpinBox, QCheckBox, QCompleter
 )
-from PySide6.QtCore import Qt, QRegularExpression
+from PySide6.QtCore import Qt, QRegularExpression, QStringListModel
 from PySide6.QtGui import QRegularExpressionValidator
 
 from shared_models.common_models import Car, Client
+from sto_app.utils.reference_cache import reference_cache, CAR_BRANDS
+from sto_app.services import clients as clients_service
+from sto_app.widgets import reference_model, ClientPicker
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import select
 
 
 class CarDialog(QDialog):
@@ -33,12 +35,17 @@ class CarDialog(QDialog):
     Поддерживает два режима:
     - Создание нового автомобиля (car=None, client_id может быть указан)
     - Редактирование существующего автомобиля (car=Car объект)
+    
+    Автомобиль сохраняется сервисом service: services.clients или
+    api.remote.RemoteClients в режиме клиента (без сессии БД).
     """
     
-    def __init__(self, parent=None, car: Optional[Car] = None, client_id: Optional[int] = None):
+    def __init__(self, parent=None, car: Optional[Car] = None, client_id: Optional[int] = None,
+                 service=clients_service):
         super().__init__(parent)
         self.car = car
         self.client_id = client_id
+        self.service = service
         self.db_session = parent.db_session if parent else None
         
         # ИСПРАВЛЕНИЕ: если car это int, то это ID, загружаем объект
@@ -64,10 +71,6 @@ class CarDialog(QDialog):
         # Логгер для отслеживания операций
         self.logger = logging.getLogger(__name__)
         
-        # Список клиентов для ComboBox
-        self.clients: List[Client] = []
-        
-        self._load_clients()
         self._setup_ui()
         self._setup_validators()
         self._connect_signals()
@@ -81,24 +84,6 @@ class CarDialog(QDialog):
         if parent:
             self._center_on_parent(parent)
 
-    def _load_clients(self):
-        """Загрузка списка клиентов из базы данных."""
-        if not self.db_session:
-            return
-        
-        try:
-            stmt = select(Client).order_by(Client.name)
-            result = self.db_session.execute(stmt)
-            self.clients = result.scalars().all()
-            
-        except SQLAlchemyError as e:
-            self.logger.error(f"Ошибка при загрузке клиентов: {e}")
-            QMessageBox.warning(
-                self,
-                "Предупреждение",
-                "Не удалось загрузить список клиентов из базы данных."
-            )
-
     def _setup_ui(self):
         """Настройка пользовательского интерфейса."""
         layout = QVBoxLayout(self)
@@ -114,16 +99,9 @@ class CarDialog(QDialog):
         form_layout = QFormLayout()
         form_layout.setSpacing(12)
         
-        # Выбор клиента
-        self.client_combo = QComboBox()
-        self.client_combo.setMinimumHeight(30)
-        self.client_combo.addItem("-- Выберите клиента --", None)
-        
-        for client in self.clients:
-            display_text = f"{client.name} ({client.phone})"
-            self.client_combo.addItem(display_text, client.id)
-        
-        form_layout.addRow("Клиент*:", self.client_combo)
+        # Выбор клиента (поиск по вводу, без загрузки всех клиентов)
+        self.client_picker = ClientPicker(self.db_session, clients=self.service)
+        form_layout.addRow("Клиент*:", self.client_picker)
         
         # Марка автомобиля
         self.make_edit = QLineEdit()
@@ -131,12 +109,23 @@ class CarDialog(QDialog):
         self.make_edit.setPlaceholderText("Toyota, BMW, Mercedes и т.д.")
         form_layout.addRow("Марка*:", self.make_edit)
         
+        # Подсказки марок и моделей из справочника (общий кэш)
+        if self.db_session:
+            brand_completer = QCompleter(reference_model(self.db_session, CAR_BRANDS), self)
+            brand_completer.setCaseSensitivity(Qt.CaseInsensitive)
+            self.make_edit.setCompleter(brand_completer)
+        
         # Модель автомобиля
         self.model_edit = QLineEdit()
         self.model_edit.setMaxLength(50)
         self.model_edit.setPlaceholderText("Camry, X5, E-Class и т.д.")
         form_layout.addRow("Модель*:", self.model_edit)
         
+        self.car_models = QStringListModel(self)
+        model_completer = QCompleter(self.car_models, self)
+        model_completer.setCaseSensitivity(Qt.CaseInsensitive)
+        self.model_edit.setCompleter(model_completer)
+        
         # Год выпуска
         self.year_spin = QSpinBox()
         self.year_spin.setRange(1950, 2030)
@@ -240,11 +229,19 @@ class CarDialog(QDialog):
         self.cancel_button.clicked.connect(self.reject)
         
         # Валидация при изменении данных
-        self.client_combo.currentIndexChanged.connect(self._validate_form)
+        self.client_picker.client_changed.connect(self._validate_form)
         self.make_edit.textChanged.connect(self._validate_form)
+        self.make_edit.textChanged.connect(self._update_model_suggestions)
         self.model_edit.textChanged.connect(self._validate_form)
         self.vin_edit.textChanged.connect(self._validate_form)
 
+    def _update_model_suggestions(self, make: str):
+        """Подсказки моделей для введенной марки."""
+        if not self.db_session:
+            return
+        car_brand = reference_cache.car_brands(self.db_session).find(make)
+        self.car_models.setStringList(car_brand.get_models_list() if car_brand else [])
+
     def _format_vin(self, text: str):
         """Форматирование VIN номера в верхний регистр."""
         formatted_text = text.upper()
@@ -259,10 +256,7 @@ class CarDialog(QDialog):
             return
         
         # Выбор клиента
-        for i in range(self.client_combo.count()):
-            if self.client_combo.itemData(i) == self.car.client_id:
-                self.client_combo.setCurrentIndex(i)
-                break
+        self.client_picker.set_client_id(self.car.client_id)
         
         # Заполнение остальных полей
         self.make_edit.setText(self.car.make or "")
@@ -284,18 +278,15 @@ class CarDialog(QDialog):
         self.notes_edit.setPlainText(self.car.notes or "")
 
     def _select_client_by_id(self, client_id: int):
-        """Выбор клиента по ID в ComboBox."""
-        for i in range(self.client_combo.count()):
-            if self.client_combo.itemData(i) == client_id:
-                self.client_combo.setCurrentIndex(i)
-                break
+        """Выбор клиента по ID (один запрос по первичному ключу)."""
+        self.client_picker.set_client_id(client_id)
 
     def _validate_form(self):
         """Валидация формы и активация кнопки сохранения."""
         is_valid = True
         
         # Проверка выбора клиента
-        if self.client_combo.currentData() is None:
+        if self.client_picker.currentData() is None:
             is_valid = False
         
         # Проверка обязательных полей
@@ -323,13 +314,13 @@ class CarDialog(QDialog):
             bool: True если данные корректны, False в противном случае
         """
         # Проверка выбора клиента
-        if self.client_combo.currentData() is None:
+        if self.client_picker.currentData() is None:
             QMessageBox.warning(
                 self,
                 "Ошибка валидации",
                 "Необходимо выбрать клиента для автомобиля."
             )
-            self.client_combo.setFocus()
+            self.client_picker.setFocus()
             return False
         
         # Проверка марки
@@ -418,18 +409,14 @@ class CarDialog(QDialog):
         Returns:
             bool: True если VIN уникален, False если уже существует
         """
-        if not self.db_session:
+        if not self.db_session and self.service is clients_service:
             return True  # Если нет сессии, пропускаем проверку
         
         try:
-            stmt = select(Car).where(Car.vin == vin)
-            
-            # Если редактируем существующий автомобиль, исключаем его из проверки
-            if self.is_edit_mode and self.car:
-                stmt = stmt.where(Car.id != self.car.id)
-            
-            result = self.db_session.execute(stmt)
-            existing_car = result.scalar_one_or_none()
+            # Сравнение по нормализованному VIN (регистр, раскладка, разделители);
+            # редактируемый автомобиль исключается из проверки
+            exclude_id = self.car.id if self.is_edit_mode and self.car else None
+            existing_car = self.service.find_car_by_vin(self.db_session, vin, exclude_id)
             
             return existing_car is None
             
@@ -444,7 +431,7 @@ class CarDialog(QDialog):
         Returns:
             bool: True если сохранение прошло успешно, False в противном случае
         """
-        if not self.db_session:
+        if not self.db_session and self.service is clients_service:
             QMessageBox.critical(
                 self,
                 "Ошибка",
@@ -454,7 +441,7 @@ class CarDialog(QDialog):
         
         try:
             # Получение данных из полей
-            client_id = self.client_combo.currentData()
+            client_id = self.client_picker.currentData()
             make = self.make_edit.text().strip()
             model = self.model_edit.text().strip()
             year = self.year_spin.value()
@@ -475,49 +462,27 @@ class CarDialog(QDialog):
             is_active = self.is_active_check.isChecked()
             notes = self.notes_edit.toPlainText().strip() or None
             
-            if self.is_edit_mode:
-                # Обновление существующего автомобиля
-                self.car.client_id = client_id
-                self.car.make = make
-                self.car.model = model
-                self.car.year = year
-                self.car.vin = vin
-                self.car.license_plate = license_plate
-                self.car.color = color
-                self.car.mileage = mileage
-                self.car.engine_volume = engine_volume
-                self.car.fuel_type = fuel_type
-                self.car.is_active = is_active
-                self.car.notes = notes
-                
-                self.logger.info(f"Обновлен автомобиль ID: {self.car.id}")
-            else:
-                # Создание нового автомобиля
-                self.car = Car(
-                    client_id=client_id,
-                    make=make,
-                    model=model,
-                    year=year,
-                    vin=vin,
-                    license_plate=license_plate,
-                    color=color,
-                    mileage=mileage,
-                    engine_volume=engine_volume,
-                    fuel_type=fuel_type,
-                    is_active=is_active,
-                    notes=notes
-                )
-                self.db_session.add(self.car)
-                
-                self.logger.info("Создан новый автомобиль")
-            
-            # Сохранение в БД
-            self.db_session.commit()
+            # Создание (car=None) или обновление автомобиля
+            self.car = self.service.save_car(
+                self.db_session,
+                self.car if self.is_edit_mode else None,
+                client_id=client_id,
+                make=make,
+                model=model,
+                year=year,
+                vin=vin,
+                license_plate=license_plate,
+                color=color,
+                mileage=mileage,
+                engine_volume=engine_volume,
+                fuel_type=fuel_type,
+                is_active=is_active,
+                notes=notes
+            )
             
             return True
             
         except SQLAlchemyError as e:
-            self.db_session.rollback()
             self.logger.error(f"Ошибка при сохранении автомобиля: {e}")
             
             QMessageBox.critical(
@@ -528,7 +493,6 @@ class CarDialog(QDialog):
             return False
         
         except Exception as e:
-            self.db_session.rollback()
             self.logger.error(f"Неожиданная ошибка при сохранении автомобиля: {e}")
             
             QMessageBox.critical(
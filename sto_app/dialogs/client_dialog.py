@@ -23,6 +23,9 @@ from PySide6.QtGui import QRegularExpressionValidator
 from shared_models.common_models import Client
 from sqlalchemy.exc import SQLAlchemyError
 
+from sto_app.services import ValidationError, clients as clients_service
+from sto_app.services.clients import validate_client
+
 
 class ClientDialog(QDialog):
     """
@@ -31,11 +34,15 @@ class ClientDialog(QDialog):
     Поддерживает два режима:
     - Создание нового клиента (client=None)
     - Редактирование существующего клиента (client=Client объект)
+    
+    Клиент сохраняется сервисом service: services.clients или
+    api.remote.RemoteClients в режиме клиента (без сессии БД).
     """
     
-    def __init__(self, parent=None, client: Optional[Client] = None):
+    def __init__(self, parent=None, client: Optional[Client] = None, service=clients_service):
         super().__init__(parent)
         self.client = client
+        self.service = service
         self.db_session = parent.db_session if parent else None
         self.is_edit_mode = client is not None
         
@@ -185,60 +192,20 @@ class ClientDialog(QDialog):
         Returns:
             bool: True если данные корректны, False в противном случае
         """
-        # Проверка имени
-        name = self.name_edit.text().strip()
-        if not name:
-            QMessageBox.warning(
-                self, 
-                "Ошибка валидации", 
-                "Имя клиента является обязательным полем."
-            )
-            self.name_edit.setFocus()
-            return False
-        
-        if len(name) < 2:
-            QMessageBox.warning(
-                self,
-                "Ошибка валидации",
-                "Имя клиента должно содержать минимум 2 символа."
-            )
-            self.name_edit.setFocus()
-            return False
-        
-        # Проверка телефона
-        phone = self.phone_edit.text().strip()
-        if not phone:
-            QMessageBox.warning(
-                self,
-                "Ошибка валидации",
-                "Номер телефона является обязательным полем."
-            )
-            self.phone_edit.setFocus()
-            return False
-        
-        phone_pattern = r"^\+380\d{9}$"
-        if not re.match(phone_pattern, phone):
-            QMessageBox.warning(
-                self,
-                "Ошибка валидации",
-                "Номер телефона должен быть в формате +380XXXXXXXXX"
+        try:
+            validate_client(
+                self.name_edit.text().strip(),
+                self.phone_edit.text().strip(),
+                self.email_edit.text().strip()
             )
-            self.phone_edit.setFocus()
+        except ValidationError as e:
+            QMessageBox.warning(self, "Ошибка валидации", e.message)
+            field_edit = {'name': self.name_edit, 'phone': self.phone_edit,
+                          'email': self.email_edit}.get(e.field)
+            if field_edit is not None:
+                field_edit.setFocus()
             return False
         
-        # Проверка email (если указан)
-        email = self.email_edit.text().strip()
-        if email:
-            email_pattern = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
-            if not re.match(email_pattern, email):
-                QMessageBox.warning(
-                    self,
-                    "Ошибка валидации",
-                    "Введите корректный email адрес."
-                )
-                self.email_edit.setFocus()
-                return False
-        
         return True
 
     def save_data(self) -> bool:
@@ -248,7 +215,7 @@ class ClientDialog(QDialog):
         Returns:
             bool: True если сохранение прошло успешно, False в противном случае
         """
-        if not self.db_session:
+        if not self.db_session and self.service is clients_service:
             QMessageBox.critical(
                 self,
                 "Ошибка",
@@ -257,39 +224,23 @@ class ClientDialog(QDialog):
             return False
         
         try:
-            # Получение данных из полей
-            name = self.name_edit.text().strip()
-            phone = self.phone_edit.text().strip()
-            email = self.email_edit.text().strip() or None
-            address = self.address_edit.toPlainText().strip() or None
-            
-            if self.is_edit_mode:
-                # Обновление существующего клиента
-                self.client.name = name
-                self.client.phone = phone
-                self.client.email = email
-                self.client.address = address
-                
-                self.logger.info(f"Обновлен клиент ID: {self.client.id}")
-            else:
-                # Создание нового клиента
-                self.client = Client(
-                    name=name,
-                    phone=phone,
-                    email=email,
-                    address=address
-                )
-                self.db_session.add(self.client)
-                
-                self.logger.info("Создан новый клиент")
-            
-            # Сохранение в БД
-            self.db_session.commit()
+            # Создание (client=None) или обновление клиента
+            self.client = self.service.save_client(
+                self.db_session,
+                self.client if self.is_edit_mode else None,
+                name=self.name_edit.text().strip(),
+                phone=self.phone_edit.text().strip(),
+                email=self.email_edit.text().strip() or None,
+                address=self.address_edit.toPlainText().strip() or None
+            )
             
             return True
             
+        except ValidationError as e:
+            QMessageBox.warning(self, "Ошибка валидации", e.message)
+            return False
+        
         except SQLAlchemyError as e:
-            self.db_session.rollback()
             self.logger.error(f"Ошибка при сохранении клиента: {e}")
             
             QMessageBox.critical(
@@ -300,7 +251,6 @@ class ClientDialog(QDialog):
             return False
         
         except Exception as e:
-            self.db_session.rollback()
             self.logger.error(f"Неожиданная ошибка при сохранении клиента: {e}")
             
             QMessageBox.critical(
@@ -0,0 +1,267 @@
+# sto_app/dialogs/diagnostics_dialog.py
+"""
+Окно диагностики: SQL-запросы по действиям интерфейса и зависания.
+
+Вкладка SQL показывает статистику config.sql_profiler: по каждому
+действию число вызовов и запросов, суммарное время и подозрения на N+1;
+для выбранного действия - формы запросов и самые медленные запросы.
+Вкладка зависаний - места, где сторож (utils.ui_watchdog) ловил
+блокировку цикла событий, по убыванию суммарного времени.
+"""
+
+import logging
+from datetime import datetime
+
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                               QCheckBox, QTableWidget, QTableWidgetItem, QHeaderView,
+                               QSplitter, QTabWidget, QFileDialog, QMessageBox,
+                               QAbstractItemView, QApplication, QWidget, QTextEdit)
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor
+
+from config.sql_profiler import sql_profiler, N_PLUS_ONE_THRESHOLD
+
+
+def _item(value, align_right=False) -> QTableWidgetItem:
+    item = QTableWidgetItem(str(value))
+    if align_right:
+        item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+    return item
+
+
+class DiagnosticsDialog(QDialog):
+    """Статистика SQL-запросов по действиям и зависаний интерфейса"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.logger = logging.getLogger(__name__)
+        self.actions = []
+        self.stalls = []
+
+        self.setWindowTitle('Диагностика')
+        self.setMinimumSize(1000, 650)
+
+        self.setup_ui()
+        self.refresh()
+        self.refresh_stalls()
+
+    def setup_ui(self):
+        """Настройка интерфейса"""
+        layout = QVBoxLayout(self)
+
+        tabs = QTabWidget()
+        tabs.addTab(self.create_sql_tab(), 'SQL-запросы')
+        tabs.addTab(self.create_stalls_tab(), 'Зависания интерфейса')
+        layout.addWidget(tabs)
+
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        close_btn = QPushButton('Закрыть')
+        close_btn.clicked.connect(self.accept)
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+
+    def create_sql_tab(self) -> QWidget:
+        """Статистика запросов по действиям"""
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+
+        controls = QHBoxLayout()
+        self.enabled_cb = QCheckBox('Профилирование запросов включено')
+        self.enabled_cb.setChecked(sql_profiler.enabled)
+        self.enabled_cb.toggled.connect(self.on_enabled_toggled)
+        controls.addWidget(self.enabled_cb)
+
+        self.info_label = QLabel()
+        controls.addWidget(self.info_label)
+        controls.addStretch()
+
+        self.refresh_btn = QPushButton('🔄 Обновить')
+        self.refresh_btn.clicked.connect(self.refresh)
+        controls.addWidget(self.refresh_btn)
+
+        self.reset_btn = QPushButton('Сбросить')
+        self.reset_btn.clicked.connect(self.reset_stats)
+        controls.addWidget(self.reset_btn)
+
+        self.save_btn = QPushButton('💾 Сохранить JSON...')
+        self.save_btn.clicked.connect(self.save_json)
+        controls.addWidget(self.save_btn)
+        layout.addLayout(controls)
+
+        splitter = QSplitter(Qt.Vertical)
+
+        self.actions_table = QTableWidget(0, 6)
+        self.actions_table.setHorizontalHeaderLabels(
+            ['Действие', 'Вызовов', 'Запросов', 'Запросов за вызов', 'Время, мс', 'N+1']
+        )
+        self._setup_table(self.actions_table, stretch_column=0)
+        self.actions_table.itemSelectionChanged.connect(self.show_action_details)
+        splitter.addWidget(self.actions_table)
+
+        details = QTabWidget()
+        self.shapes_table = QTableWidget(0, 5)
+        self.shapes_table.setHorizontalHeaderLabels(
+            ['Макс. за вызов', 'Всего', 'Время, мс', 'Макс., мс', 'Запрос']
+        )
+        self._setup_table(self.shapes_table, stretch_column=4)
+        details.addTab(self.shapes_table, 'Формы запросов')
+
+        self.slowest_table = QTableWidget(0, 3)
+        self.slowest_table.setHorizontalHeaderLabels(['Время, мс', 'Запрос', 'Параметры'])
+        self._setup_table(self.slowest_table, stretch_column=1)
+        details.addTab(self.slowest_table, 'Медленные запросы')
+        splitter.addWidget(details)
+
+        layout.addWidget(splitter)
+        return widget
+
+    def create_stalls_tab(self) -> QWidget:
+        """Места зависаний цикла событий"""
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+
+        controls = QHBoxLayout()
+        self.stalls_label = QLabel()
+        controls.addWidget(self.stalls_label)
+        controls.addStretch()
+        refresh_btn = QPushButton('🔄 Обновить')
+        refresh_btn.clicked.connect(self.refresh_stalls)
+        controls.addWidget(refresh_btn)
+        layout.addLayout(controls)
+
+        splitter = QSplitter(Qt.Vertical)
+        self.stalls_table = QTableWidget(0, 6)
+        self.stalls_table.setHorizontalHeaderLabels(
+            ['Место', 'Раз', 'Всего, мс', 'Макс., мс', 'Окна', 'Действия']
+        )
+        self._setup_table(self.stalls_table, stretch_column=0)
+        self.stalls_table.itemSelectionChanged.connect(self.show_stall_stack)
+        splitter.addWidget(self.stalls_table)
+
+        self.stall_stack = QTextEdit()
+        self.stall_stack.setReadOnly(True)
+        self.stall_stack.setLineWrapMode(QTextEdit.NoWrap)
+        self.stall_stack.setStyleSheet('font-family: monospace;')
+        splitter.addWidget(self.stall_stack)
+        layout.addWidget(splitter)
+        return widget
+
+    def _setup_table(self, table: QTableWidget, stretch_column: int):
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.setSelectionMode(QAbstractItemView.SingleSelection)
+        table.setAlternatingRowColors(True)
+        table.verticalHeader().setVisible(False)
+        header = table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(stretch_column, QHeaderView.Stretch)
+
+    def on_enabled_toggled(self, checked):
+        sql_profiler.set_enabled(checked)
+        self.refresh()
+
+    def refresh(self):
+        """Перечитать статистику профилировщика"""
+        self.actions = sql_profiler.snapshot()
+        started = sql_profiler.started_at.strftime('%d.%m.%Y %H:%M:%S')
+        total = sum(action['statements'] for action in self.actions)
+        self.info_label.setText(f'Запросов: {total} с {started}')
+
+        self.actions_table.setRowCount(len(self.actions))
+        for row, action in enumerate(self.actions):
+            suspects = len(action['n_plus_one'])
+            per_call = action['avg_statements_per_call']
+            self.actions_table.setItem(row, 0, _item(action['action']))
+            self.actions_table.setItem(row, 1, _item(action['calls'], True))
+            self.actions_table.setItem(row, 2, _item(action['statements'], True))
+            self.actions_table.setItem(row, 3, _item('' if per_call is None else per_call, True))
+            self.actions_table.setItem(row, 4, _item(f"{action['total_ms']:.1f}", True))
+            n_plus_one_item = _item(f'⚠️ {suspects}' if suspects else '')
+            if suspects:
+                n_plus_one_item.setForeground(QColor(Qt.red))
+            self.actions_table.setItem(row, 5, n_plus_one_item)
+
+        if self.actions:
+            self.actions_table.selectRow(0)
+        else:
+            self.shapes_table.setRowCount(0)
+            self.slowest_table.setRowCount(0)
+
+    def show_action_details(self):
+        """Формы запросов и медленные запросы выбранного действия"""
+        row = self.actions_table.currentRow()
+        if not 0 <= row < len(self.actions):
+            return
+        action = self.actions[row]
+
+        shapes = action['shapes']
+        self.shapes_table.setRowCount(len(shapes))
+        for i, shape in enumerate(shapes):
+            per_call_item = _item(shape['max_per_call'], True)
+            if shape['max_per_call'] >= N_PLUS_ONE_THRESHOLD:
+                per_call_item.setForeground(QColor(Qt.red))
+            self.shapes_table.setItem(i, 0, per_call_item)
+            self.shapes_table.setItem(i, 1, _item(shape['count'], True))
+            self.shapes_table.setItem(i, 2, _item(f"{shape['total_ms']:.1f}", True))
+            self.shapes_table.setItem(i, 3, _item(f"{shape['max_ms']:.1f}", True))
+            shape_item = _item(shape['shape'])
+            shape_item.setToolTip(shape['shape'])
+            self.shapes_table.setItem(i, 4, shape_item)
+
+        slowest = action['slowest']
+        self.slowest_table.setRowCount(len(slowest))
+        for i, statement in enumerate(slowest):
+            self.slowest_table.setItem(i, 0, _item(f"{statement['ms']:.1f}", True))
+            sql_item = _item(statement['sql'])
+            sql_item.setToolTip(statement['sql'])
+            self.slowest_table.setItem(i, 1, sql_item)
+            self.slowest_table.setItem(i, 2, _item(statement['parameters']))
+
+    def refresh_stalls(self):
+        """Перечитать зависания из сторожа приложения"""
+        watchdog = getattr(QApplication.instance(), 'ui_watchdog', None)
+        self.stalls = watchdog.summary() if watchdog is not None else []
+        if watchdog is None:
+            self.stalls_label.setText('Сторож зависаний не запущен')
+        else:
+            self.stalls_label.setText(
+                f'Зависаний: {len(watchdog.stalls)} (порог {watchdog.threshold_ms:.0f} мс)'
+            )
+
+        self.stalls_table.setRowCount(len(self.stalls))
+        for row, entry in enumerate(self.stalls):
+            self.stalls_table.setItem(row, 0, _item(entry['site']))
+            self.stalls_table.setItem(row, 1, _item(entry['count'], True))
+            self.stalls_table.setItem(row, 2, _item(f"{entry['total_ms']:.0f}", True))
+            self.stalls_table.setItem(row, 3, _item(f"{entry['max_ms']:.0f}", True))
+            self.stalls_table.setItem(row, 4, _item(', '.join(entry['contexts'])))
+            self.stalls_table.setItem(row, 5, _item(', '.join(entry['actions'])))
+        if self.stalls:
+            self.stalls_table.selectRow(0)
+        else:
+            self.stall_stack.clear()
+
+    def show_stall_stack(self):
+        row = self.stalls_table.currentRow()
+        if 0 <= row < len(self.stalls):
+            self.stall_stack.setPlainText(self.stalls[row]['stack'])
+
+    def reset_stats(self):
+        sql_profiler.reset()
+        self.refresh()
+
+    def save_json(self):
+        """Сохранить статистику в JSON"""
+        default_name = f"sql_profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, 'Сохранить статистику запросов', default_name, 'JSON (*.json)'
+        )
+        if not file_path:
+            return
+        try:
+            sql_profiler.dump_json(file_path)
+            QMessageBox.information(self, 'Успех', f'Статистика сохранена:\n{file_path}')
+        except OSError as e:
+            self.logger.error(f"Ошибка сохранения статистики SQL: {e}")
+            QMessageBox.critical(self, 'Ошибка', f'Не удалось сохранить статистику: {e}')
@@ -11,22 +11,32 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, QDate
 from PySide6.QtGui import QFont, QPixmap
 from PySide6.QtPrintSupport import QPrinter, QPrintDialog
-from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
-from sto_app.models_sto import Order, OrderService, OrderPart
-from shared_models.common_models import Client, Car, Employee
-from decimal import Decimal
+from sto_app.models_sto import OrderStatus
+from sto_app.services import ServiceError, orders as orders_service
 import logging
 
+from sto_app.utils.pricing import from_kopecks
+from config.sql_profiler import sql_profiler
+
 
 class OrderDetailsDialog(QDialog):
-    """Диалог просмотра полных деталей заказа"""
+    """
+    Диалог просмотра полных деталей заказа.
+    
+    Данные заказа дает сервис service (services.orders или
+    api.remote.RemoteOrders в режиме клиента, без сессии БД).
+    """
     
-    def __init__(self, parent=None, order_id: int = None):
+    def __init__(self, parent=None, order_id: int = None, updated_at=None, read_only: bool = True,
+                 service=orders_service):
         super().__init__(parent)
         self.order_id = order_id
+        self.updated_at = updated_at
+        self.read_only = read_only
+        self.service = service
         self.db_session = parent.db_session if parent else None
-        self.order = None
+        self.order = None  # OrderViewModel
         
         self.setWindowTitle("Детали заказа")
         self.setModal(True)
@@ -35,33 +45,31 @@ class OrderDetailsDialog(QDialog):
         
         self.logger = logging.getLogger(__name__)
         
-        if not self.order_id or not self.db_session:
+        if not self.order_id or (not self.db_session and self.service is orders_service):
             QMessageBox.critical(self, "Ошибка", "Не указан ID заказа или сессия БД")
             return
             
-        self._load_order_data()
-        if self.order:
-            self._setup_ui()
-            self._populate_data()
+        with sql_profiler.action('OrderDetailsDialog open'):
+            self._load_order_data()
+            if self.order:
+                self._setup_ui()
+                self._populate_data()
         
         if parent:
             self._center_on_parent(parent)
     
     def _load_order_data(self):
-        """Загрузка данных заказа из БД"""
+        """Загрузка модели заказа (из кэша или фиксированным числом запросов)"""
         try:
-            # Загружаем заказ с связанными данными
-            stmt = select(Order).where(Order.id == self.order_id)
-            result = self.db_session.execute(stmt)
-            self.order = result.scalar_one_or_none()
+            self.order = self.service.order_view(self.db_session, self.order_id, self.updated_at)
             
             if not self.order:
                 QMessageBox.warning(self, "Предупреждение", "Заказ не найден")
                 return
                 
-            self.logger.info(f"Загружен заказ #{self.order.id}")
+            self.logger.info(f"Загружен заказ #{self.order.order_id}")
             
-        except SQLAlchemyError as e:
+        except (SQLAlchemyError, ServiceError) as e:
             self.logger.error(f"Ошибка загрузки заказа: {e}")
             QMessageBox.critical(self, "Ошибка БД", f"Не удалось загрузить заказ: {e}")
     
@@ -83,18 +91,18 @@ class OrderDetailsDialog(QDialog):
         header_layout.addStretch()
         
         # Статус заказа
-        status_label = QLabel(f"Статус: {self.order.status}")
+        status_label = QLabel(f"Статус: {self.order.status_text}")
         status_font = QFont()
         status_font.setPointSize(12)
         status_font.setBold(True)
         status_label.setFont(status_font)
         
         # Цвет статуса
-        if self.order.status == 'completed':
+        if self.order.status == OrderStatus.COMPLETED:
             status_label.setStyleSheet("color: green;")
-        elif self.order.status == 'in_progress':
+        elif self.order.status == OrderStatus.IN_WORK:
             status_label.setStyleSheet("color: orange;")
-        elif self.order.status == 'draft':
+        elif self.order.status == OrderStatus.DRAFT:
             status_label.setStyleSheet("color: gray;")
         else:
             status_label.setStyleSheet("color: blue;")
@@ -153,8 +161,11 @@ class OrderDetailsDialog(QDialog):
         order_layout.addRow("Номер заказа:", QLabel(str(self.order.order_number)))
         order_layout.addRow("Дата создания:", QLabel(self.order.created_at.strftime("%d.%m.%Y %H:%M") if self.order.created_at else ""))
         order_layout.addRow("Дата обновления:", QLabel(self.order.updated_at.strftime("%d.%m.%Y %H:%M") if self.order.updated_at else ""))
-        order_layout.addRow("Статус:", QLabel(self.order.status or ""))
-        order_layout.addRow("Приоритет:", QLabel(self.order.priority or ""))
+        order_layout.addRow("Статус:", QLabel(self.order.status_text))
+        order_layout.addRow("Дата приёма:", QLabel(self.order.date_received.strftime("%d.%m.%Y %H:%M") if self.order.date_received else ""))
+        order_layout.addRow("Дата выдачи:", QLabel(self.order.date_delivery.strftime("%d.%m.%Y %H:%M") if self.order.date_delivery else ""))
+        order_layout.addRow("Менеджер:", QLabel(self.order.manager_name))
+        order_layout.addRow("Ответственный:", QLabel(self.order.responsible_name))
         
         layout.addWidget(order_group)
         
@@ -163,10 +174,10 @@ class OrderDetailsDialog(QDialog):
             client_group = QGroupBox("Информация о клиенте")
             client_layout = QFormLayout(client_group)
             
-            client_layout.addRow("ФИО:", QLabel(f"{self.order.client.last_name} {self.order.client.first_name} {self.order.client.middle_name or ''}".strip()))
-            client_layout.addRow("Телефон:", QLabel(self.order.client.phone or ""))
-            client_layout.addRow("Email:", QLabel(self.order.client.email or ""))
-            client_layout.addRow("Адрес:", QLabel(self.order.client.address or ""))
+            client_layout.addRow("ФИО:", QLabel(self.order.client.name))
+            client_layout.addRow("Телефон:", QLabel(self.order.client.phone))
+            client_layout.addRow("Email:", QLabel(self.order.client.email))
+            client_layout.addRow("Адрес:", QLabel(self.order.client.address))
             
             layout.addWidget(client_group)
         
@@ -175,28 +186,15 @@ class OrderDetailsDialog(QDialog):
             car_group = QGroupBox("Информация об автомобиле")
             car_layout = QFormLayout(car_group)
             
-            car_layout.addRow("Марка и модель:", QLabel(f"{self.order.car.make} {self.order.car.model}"))
+            car_layout.addRow("Марка и модель:", QLabel(self.order.car.title))
             car_layout.addRow("Год выпуска:", QLabel(str(self.order.car.year) if self.order.car.year else ""))
-            car_layout.addRow("VIN:", QLabel(self.order.car.vin or ""))
-            car_layout.addRow("Гос. номер:", QLabel(self.order.car.license_plate or ""))
-            car_layout.addRow("Цвет:", QLabel(self.order.car.color or ""))
+            car_layout.addRow("VIN:", QLabel(self.order.car.vin))
+            car_layout.addRow("Гос. номер:", QLabel(self.order.car.license_plate))
+            car_layout.addRow("Цвет:", QLabel(self.order.car.color))
             car_layout.addRow("Пробег:", QLabel(f"{self.order.car.mileage} км" if self.order.car.mileage else ""))
             
             layout.addWidget(car_group)
         
-        # Описание проблемы
-        if self.order.description:
-            desc_group = QGroupBox("Описание проблемы")
-            desc_layout = QVBoxLayout(desc_group)
-            
-            desc_text = QTextEdit()
-            desc_text.setPlainText(self.order.description)
-            desc_text.setReadOnly(True)
-            desc_text.setMaximumHeight(100)
-            desc_layout.addWidget(desc_text)
-            
-            layout.addWidget(desc_group)
-        
         # Комментарии
         if self.order.notes:
             notes_group = QGroupBox("Комментарии")
@@ -320,9 +318,12 @@ class OrderDetailsDialog(QDialog):
         """)
         
         self.grand_subtotal_label = QLabel("0.00 грн")
+        self.grand_parts_label = QLabel("0.00 грн")
         self.grand_vat_label = QLabel("0.00 грн")
         self.grand_discount_label = QLabel("0.00 грн")
         self.grand_total_label = QLabel("0.00 грн")
+        self.grand_paid_label = QLabel("0.00 грн")
+        self.grand_balance_label = QLabel("0.00 грн")
         
         # Увеличиваем шрифт для итоговых сумм
         font = QFont()
@@ -333,174 +334,106 @@ class OrderDetailsDialog(QDialog):
         self.grand_total_label.setStyleSheet("color: #2E8B57;")
         
         totals_layout.addRow("Услуги:", self.grand_subtotal_label)
-        totals_layout.addRow("НДС:", self.grand_vat_label)
-        totals_layout.addRow("Запчасти:", QLabel("см. вкладку"))
+        totals_layout.addRow("Запчасти:", self.grand_parts_label)
+        totals_layout.addRow("НДС (справочно):", self.grand_vat_label)
         totals_layout.addRow("Общая скидка:", self.grand_discount_label)
         totals_layout.addRow("ИТОГО К ОПЛАТЕ:", self.grand_total_label)
+        totals_layout.addRow("Оплачено:", self.grand_paid_label)
+        totals_layout.addRow("Остаток:", self.grand_balance_label)
         
         layout.addWidget(totals_group)
     
     def _populate_data(self):
-        """Заполнение данными"""
-        try:
-            self._populate_services()
-            self._populate_parts()
-            self._calculate_totals()
-            
-        except SQLAlchemyError as e:
-            self.logger.error(f"Ошибка заполнения данных: {e}")
-            QMessageBox.critical(self, "Ошибка БД", f"Ошибка заполнения данных: {e}")
+        """Заполнение данными из модели заказа (без обращений к БД)"""
+        self._populate_services()
+        self._populate_parts()
+        self._calculate_totals()
     
     def _populate_services(self):
         """Заполнение таблицы услуг"""
-        try:
-            # Загружаем услуги заказа
-            stmt = select(OrderService).where(OrderService.order_id == self.order_id)
-            result = self.db_session.execute(stmt)
-            services = result.scalars().all()
+        services = self.order.services
+        self.services_table.setRowCount(len(services))
+        
+        for row, service in enumerate(services):
+            # Название услуги
+            self.services_table.setItem(row, 0, QTableWidgetItem(service.name))
             
-            self.services_table.setRowCount(len(services))
+            # Цена
+            price_item = QTableWidgetItem(f"{service.price:.2f}")
+            price_item.setTextAlignment(Qt.AlignRight)
+            self.services_table.setItem(row, 1, price_item)
             
-            for row, service in enumerate(services):
-                # Название услуги
-                service_name = service.service_catalog.name if service.service_catalog else "Услуга"
-                self.services_table.setItem(row, 0, QTableWidgetItem(service_name))
-                
-                # Цена
-                price = float(service.price) if service.price else 0.0
-                price_item = QTableWidgetItem(f"{price:.2f}")
-                price_item.setTextAlignment(Qt.AlignRight)
-                self.services_table.setItem(row, 1, price_item)
-                
-                # НДС %
-                vat_rate = float(service.vat_rate) if service.vat_rate else 20.0
-                vat_item = QTableWidgetItem(f"{vat_rate:.0f}%")
-                vat_item.setTextAlignment(Qt.AlignCenter)
-                self.services_table.setItem(row, 2, vat_item)
-                
-                # Цена с НДС
-                price_with_vat = price * (1 + vat_rate / 100)
-                price_vat_item = QTableWidgetItem(f"{price_with_vat:.2f}")
-                price_vat_item.setTextAlignment(Qt.AlignRight)
-                self.services_table.setItem(row, 3, price_vat_item)
-                
-                # Исполнитель
-                executor = ""
-                if service.employee:
-                    executor = f"{service.employee.last_name} {service.employee.first_name}"
-                self.services_table.setItem(row, 4, QTableWidgetItem(executor))
-                
-                # Статус
-                status = service.status if hasattr(service, 'status') and service.status else "Назначена"
-                self.services_table.setItem(row, 5, QTableWidgetItem(status))
-                
-        except SQLAlchemyError as e:
-            self.logger.error(f"Ошибка загрузки услуг: {e}")
+            # НДС %
+            vat_item = QTableWidgetItem(f"{service.vat_rate:.0f}%")
+            vat_item.setTextAlignment(Qt.AlignCenter)
+            self.services_table.setItem(row, 2, vat_item)
+            
+            # Цена с НДС
+            price_vat_item = QTableWidgetItem(f"{service.price_with_vat:.2f}")
+            price_vat_item.setTextAlignment(Qt.AlignRight)
+            self.services_table.setItem(row, 3, price_vat_item)
+            
+            # Исполнитель
+            self.services_table.setItem(row, 4, QTableWidgetItem(self.order.responsible_name))
+            
+            # Статус
+            self.services_table.setItem(row, 5, QTableWidgetItem("Назначена"))
     
     def _populate_parts(self):
         """Заполнение таблицы запчастей"""
-        try:
-            # Загружаем запчасти заказа
-            stmt = select(OrderPart).where(OrderPart.order_id == self.order_id)
-            result = self.db_session.execute(stmt)
-            parts = result.scalars().all()
-            
-            self.parts_table.setRowCount(len(parts))
-            
-            for row, part in enumerate(parts):
-                # Артикул
-                self.parts_table.setItem(row, 0, QTableWidgetItem(part.part_number or ""))
-                
-                # Наименование
-                self.parts_table.setItem(row, 1, QTableWidgetItem(part.name or ""))
-                
-                # Количество
-                qty_item = QTableWidgetItem(str(part.quantity))
-                qty_item.setTextAlignment(Qt.AlignCenter)
-                self.parts_table.setItem(row, 2, qty_item)
-                
-                # Цена за шт.
-                unit_price = float(part.unit_price) if part.unit_price else 0.0
-                price_item = QTableWidgetItem(f"{unit_price:.2f}")
-                price_item.setTextAlignment(Qt.AlignRight)
-                self.parts_table.setItem(row, 3, price_item)
-                
-                # Скидка
-                discount = float(part.discount) if part.discount else 0.0
-                discount_item = QTableWidgetItem(f"{discount:.2f}")
-                discount_item.setTextAlignment(Qt.AlignRight)
-                self.parts_table.setItem(row, 4, discount_item)
-                
-                # Общая стоимость
-                total_cost = (unit_price * part.quantity) - discount
-                total_item = QTableWidgetItem(f"{total_cost:.2f}")
-                total_item.setTextAlignment(Qt.AlignRight)
-                self.parts_table.setItem(row, 5, total_item)
-                
-        except SQLAlchemyError as e:
-            self.logger.error(f"Ошибка загрузки запчастей: {e}")
+        parts = self.order.parts
+        self.parts_table.setRowCount(len(parts))
+        
+        for row, part in enumerate(parts):
+            # Артикул
+            self.parts_table.setItem(row, 0, QTableWidgetItem(part.article))
+            
+            # Наименование
+            self.parts_table.setItem(row, 1, QTableWidgetItem(part.name))
+            
+            # Количество
+            qty_item = QTableWidgetItem(f"{part.quantity:g}")
+            qty_item.setTextAlignment(Qt.AlignCenter)
+            self.parts_table.setItem(row, 2, qty_item)
+            
+            # Цена за шт.
+            price_item = QTableWidgetItem(f"{part.price:.2f}")
+            price_item.setTextAlignment(Qt.AlignRight)
+            self.parts_table.setItem(row, 3, price_item)
+            
+            # Скидка
+            discount_item = QTableWidgetItem(f"{part.discount:.2f}")
+            discount_item.setTextAlignment(Qt.AlignRight)
+            self.parts_table.setItem(row, 4, discount_item)
+            
+            # Общая стоимость
+            total_item = QTableWidgetItem(f"{part.total:.2f}")
+            total_item.setTextAlignment(Qt.AlignRight)
+            self.parts_table.setItem(row, 5, total_item)
     
     def _calculate_totals(self):
-        """Расчет итоговых сумм"""
-        try:
-            # Расчет по услугам
-            services_subtotal = 0.0
-            services_vat = 0.0
-            services_total = 0.0
-            
-            for row in range(self.services_table.rowCount()):
-                price_item = self.services_table.item(row, 1)
-                vat_item = self.services_table.item(row, 3)
-                
-                if price_item and vat_item:
-                    price = float(price_item.text())
-                    price_with_vat = float(vat_item.text())
-                    
-                    services_subtotal += price
-                    services_total += price_with_vat
-            
-            services_vat = services_total - services_subtotal
-            
-            self.services_subtotal_label.setText(f"{services_subtotal:.2f} грн")
-            self.services_vat_label.setText(f"{services_vat:.2f} грн")
-            self.services_total_label.setText(f"{services_total:.2f} грн")
-            
-            # Расчет по запчастям
-            parts_subtotal = 0.0
-            parts_discount = 0.0
-            parts_total = 0.0
-            
-            for row in range(self.parts_table.rowCount()):
-                price_item = self.parts_table.item(row, 3)
-                qty_item = self.parts_table.item(row, 2)
-                discount_item = self.parts_table.item(row, 4)
-                
-                if price_item and qty_item:
-                    unit_price = float(price_item.text())
-                    quantity = int(qty_item.text())
-                    discount = float(discount_item.text()) if discount_item else 0.0
-                    
-                    subtotal = unit_price * quantity
-                    total = subtotal - discount
-                    
-                    parts_subtotal += subtotal
-                    parts_discount += discount
-                    parts_total += total
-            
-            self.parts_subtotal_label.setText(f"{parts_subtotal:.2f} грн")
-            self.parts_discount_label.setText(f"{parts_discount:.2f} грн")
-            self.parts_total_label.setText(f"{parts_total:.2f} грн")
-            
-            # Общие итоги
-            grand_total = services_total + parts_total
-            
-            self.grand_subtotal_label.setText(f"{services_subtotal:.2f} грн")
-            self.grand_vat_label.setText(f"{services_vat:.2f} грн")
-            self.grand_discount_label.setText(f"{parts_discount:.2f} грн")
-            self.grand_total_label.setText(f"{grand_total:.2f} грн")
-            
-        except (ValueError, AttributeError) as e:
-            self.logger.error(f"Ошибка расчета итогов: {e}")
+        """Итоговые суммы из модели заказа"""
+        services = self.order.services_pricing
+        parts = self.order.parts_pricing
+        
+        services_total = from_kopecks(services.total_kop + services.vat_kop)
+        
+        self.services_subtotal_label.setText(f"{services.total:.2f} грн")
+        self.services_vat_label.setText(f"{services.vat:.2f} грн")
+        self.services_total_label.setText(f"{services_total:.2f} грн")
+        
+        self.parts_subtotal_label.setText(f"{parts.subtotal:.2f} грн")
+        self.parts_discount_label.setText(f"{parts.discount:.2f} грн")
+        self.parts_total_label.setText(f"{parts.total:.2f} грн")
+        
+        # Общие итоги - сохраненные итоги заказа
+        self.grand_subtotal_label.setText(f"{services.total:.2f} грн")
+        self.grand_parts_label.setText(f"{parts.total:.2f} грн")
+        self.grand_vat_label.setText(f"{self.order.vat_total:.2f} грн")
+        self.grand_discount_label.setText(f"{self.order.discount_total:.2f} грн")
+        self.grand_total_label.setText(f"{self.order.total_amount:.2f} грн")
+        self.grand_paid_label.setText(f"{self.order.paid_total:.2f} грн")
+        self.grand_balance_label.setText(f"{self.order.balance_due:.2f} грн")
     
     def print_order(self):
         """Печать заказа в PDF"""
@@ -548,7 +481,7 @@ class OrderDetailsDialog(QDialog):
             <div class="header">
                 <h1>ЗАКАЗ №{self.order.order_number}</h1>
                 <p>Дата: {self.order.created_at.strftime('%d.%m.%Y %H:%M') if self.order.created_at else ''}</p>
-                <p>Статус: {self.order.status}</p>
+                <p>Статус: {self.order.status_text}</p>
             </div>
         """
         
@@ -557,9 +490,9 @@ class OrderDetailsDialog(QDialog):
             html += f"""
             <div class="section">
                 <h3>КЛИЕНТ</h3>
-                <p><strong>ФИО:</strong> {self.order.client.last_name} {self.order.client.first_name} {self.order.client.middle_name or ''}</p>
-                <p><strong>Телефон:</strong> {self.order.client.phone or ''}</p>
-                <p><strong>Email:</strong> {self.order.client.email or ''}</p>
+                <p><strong>ФИО:</strong> {self.order.client.name}</p>
+                <p><strong>Телефон:</strong> {self.order.client.phone}</p>
+                <p><strong>Email:</strong> {self.order.client.email}</p>
             </div>
             """
         
@@ -568,15 +501,15 @@ class OrderDetailsDialog(QDialog):
             html += f"""
             <div class="section">
                 <h3>АВТОМОБИЛЬ</h3>
-                <p><strong>Марка и модель:</strong> {self.order.car.make} {self.order.car.model}</p>
+                <p><strong>Марка и модель:</strong> {self.order.car.title}</p>
                 <p><strong>Год:</strong> {self.order.car.year or ''}</p>
-                <p><strong>VIN:</strong> {self.order.car.vin or ''}</p>
-                <p><strong>Гос. номер:</strong> {self.order.car.license_plate or ''}</p>
+                <p><strong>VIN:</strong> {self.order.car.vin}</p>
+                <p><strong>Гос. номер:</strong> {self.order.car.license_plate}</p>
             </div>
             """
         
         # Услуги
-        if self.services_table.rowCount() > 0:
+        if self.order.services:
             html += """
             <div class="section">
                 <h3>УСЛУГИ</h3>
@@ -590,20 +523,14 @@ class OrderDetailsDialog(QDialog):
                     </tr>
             """
             
-            for row in range(self.services_table.rowCount()):
-                service = self.services_table.item(row, 0).text()
-                price = self.services_table.item(row, 1).text()
-                vat_rate = self.services_table.item(row, 2).text()
-                price_vat = self.services_table.item(row, 3).text()
-                executor = self.services_table.item(row, 4).text()
-                
+            for service in self.order.services:
                 html += f"""
                 <tr>
-                    <td>{service}</td>
-                    <td class="right">{price}</td>
-                    <td class="right">{vat_rate}</td>
-                    <td class="right">{price_vat}</td>
-                    <td>{executor}</td>
+                    <td>{service.name}</td>
+                    <td class="right">{service.price:.2f}</td>
+                    <td class="right">{service.vat_rate:.0f}%</td>
+                    <td class="right">{service.price_with_vat:.2f}</td>
+                    <td>{self.order.responsible_name}</td>
                 </tr>
                 """
             
@@ -618,7 +545,7 @@ class OrderDetailsDialog(QDialog):
             """
         
         # Запчасти
-        if self.parts_table.rowCount() > 0:
+        if self.order.parts:
             html += """
             <div class="section">
                 <h3>ЗАПЧАСТИ</h3>
@@ -633,22 +560,15 @@ class OrderDetailsDialog(QDialog):
                     </tr>
             """
             
-            for row in range(self.parts_table.rowCount()):
-                part_number = self.parts_table.item(row, 0).text()
-                name = self.parts_table.item(row, 1).text()
-                quantity = self.parts_table.item(row, 2).text()
-                unit_price = self.parts_table.item(row, 3).text()
-                discount = self.parts_table.item(row, 4).text()
-                total_cost = self.parts_table.item(row, 5).text()
-                
+            for part in self.order.parts:
                 html += f"""
                 <tr>
-                    <td>{part_number}</td>
-                    <td>{name}</td>
-                    <td class="right">{quantity}</td>
-                    <td class="right">{unit_price}</td>
-                    <td class="right">{discount}</td>
-                    <td class="right">{total_cost}</td>
+                    <td>{part.article}</td>
+                    <td>{part.name}</td>
+                    <td class="right">{part.quantity:g}</td>
+                    <td class="right">{part.price:.2f}</td>
+                    <td class="right">{part.discount:.2f}</td>
+                    <td class="right">{part.total:.2f}</td>
                 </tr>
                 """
             
@@ -674,15 +594,7 @@ class OrderDetailsDialog(QDialog):
         </div>
         """
         
-        # Описание и комментарии
-        if self.order.description:
-            html += f"""
-            <div class="section">
-                <h3>ОПИСАНИЕ ПРОБЛЕМЫ</h3>
-                <p>{self.order.description}</p>
-            </div>
-            """
-        
+        # Комментарии
         if self.order.notes:
             html += f"""
             <div class="section">
@@ -21,6 +21,7 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, Signal
 
 from sto_app.models_sto import OrderPart
+from sto_app.utils.pricing import price_line
 from sqlalchemy.exc import SQLAlchemyError
 
 
@@ -31,15 +32,20 @@ class PartDialog(QDialog):
     Поддерживает два режима:
     - Добавление новой запчасти в заказ (order_part=None)
     - Редактирование существующей запчасти в заказе (order_part=OrderPart объект)
+    
+    При defer_save=True диалог ничего не пишет в БД: данные строки забирает
+    вызывающий код через get_line_data().
     """
     
     # Сигнал для обновления итоговой стоимости в родительском окне
     part_cost_changed = Signal()
     
-    def __init__(self, parent=None, order_part: Optional[OrderPart] = None, order_id: Optional[int] = None):
+    def __init__(self, parent=None, order_part: Optional[OrderPart] = None, order_id: Optional[int] = None,
+                 defer_save: bool = False):
         super().__init__(parent)
         self.order_part = order_part
         self.order_id = order_id
+        self.defer_save = defer_save
         self.db_session = parent.db_session if parent else None
         self.is_edit_mode = order_part is not None
         
@@ -235,32 +241,26 @@ class PartDialog(QDialog):
         
         self._calculate_total()
 
+    def _line_pricing(self):
+        """Расчет строки единым движком цен (pricing.price_line)."""
+        discount_value = self.discount_spin.value()
+        is_fixed = self.fixed_discount_check.isChecked()
+        return price_line(
+            self.unit_price_spin.value(),
+            self.quantity_spin.value(),
+            discount_percent=0 if is_fixed else discount_value,
+            discount_amount=discount_value if is_fixed else 0
+        )
+
     def _calculate_total(self):
         """Расчет итоговой стоимости запчасти."""
         try:
-            unit_price = Decimal(str(self.unit_price_spin.value()))
-            quantity = Decimal(str(self.quantity_spin.value()))
-            discount_value = Decimal(str(self.discount_spin.value()))
-            
-            # Расчет стоимости с учетом количества
-            subtotal = unit_price * quantity
-            
-            # Применение скидки
-            if self.fixed_discount_check.isChecked():
-                # Фиксированная скидка в гривнах
-                total = subtotal - discount_value
-            else:
-                # Процентная скидка
-                discount_amount = subtotal * (discount_value / Decimal('100'))
-                total = subtotal - discount_amount
-            
-            # Итоговая сумма не может быть отрицательной
-            total = max(total, Decimal('0'))
+            total = self._line_pricing().total
             
             self.total_cost_label.setText(f"{total:.2f} грн")
             
             # Цветовая индикация
-            if discount_value > 0:
+            if self.discount_spin.value() > 0:
                 self.total_cost_label.setStyleSheet("font-weight: bold; color: #FF6B35; font-size: 14px;")
             else:
                 self.total_cost_label.setStyleSheet("font-weight: bold; color: #2E7D32; font-size: 14px;")
@@ -435,6 +435,11 @@ class PartDialog(QDialog):
         if not self.validate_data():
             return
         
+        if self.defer_save:
+            self.part_cost_changed.emit()
+            self.accept()
+            return
+        
         if self.save_data():
             QMessageBox.information(self, "Успех", "Запчасть успешно сохранена!")
             self.accept()
@@ -443,23 +448,21 @@ class PartDialog(QDialog):
         """Получение объекта запчасти заказа после сохранения."""
         return self.order_part
 
+    def get_line_data(self) -> dict:
+        """Получение данных строки запчасти без записи в БД."""
+        return {
+            'part_name': self.name_edit.text().strip(),
+            'article': self.part_number_edit.text().strip() or None,
+            'unit': self.unit_combo.currentText(),
+            'price': Decimal(str(self.unit_price_spin.value())),
+            'quantity': Decimal(str(self.quantity_spin.value())),
+            'discount_amount': self._line_pricing().discount,
+        }
+
     def get_total_cost(self) -> Decimal:
         """Получение итоговой стоимости запчасти."""
         try:
-            unit_price = Decimal(str(self.unit_price_spin.value()))
-            quantity = Decimal(str(self.quantity_spin.value()))
-            discount_value = Decimal(str(self.discount_spin.value()))
-            
-            subtotal = unit_price * quantity
-            
-            if self.fixed_discount_check.isChecked():
-                total = subtotal - discount_value
-            else:
-                discount_amount = subtotal * (discount_value / Decimal('100'))
-                total = subtotal - discount_amount
-            
-            return max(total, Decimal('0'))
-            
+            return self._line_pricing().total
         except Exception:
             return Decimal('0')
 
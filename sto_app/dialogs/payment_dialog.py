@@ -0,0 +1,129 @@
+"""
+Диалог добавления оплаты по заказу.
+
+Оплата добавляется в журнал оплат (OrderPayment) сервисом заказов
+(services.orders или api.remote.RemoteOrders в режиме клиента); остаток
+заказа пересчитывается при сохранении.
+"""
+
+import logging
+
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QDoubleSpinBox,
+    QComboBox, QDateTimeEdit, QLineEdit, QPushButton, QMessageBox, QLabel,
+    QTableWidget, QTableWidgetItem, QHeaderView
+)
+from PySide6.QtCore import Qt, QDateTime
+from sqlalchemy.exc import SQLAlchemyError
+
+from sto_app.models_sto import Order, PaymentMethod
+from sto_app.services import ServiceError, ValidationError, orders as orders_service
+
+
+class PaymentDialog(QDialog):
+    """Диалог добавления оплаты с историей оплат заказа"""
+
+    def __init__(self, parent, order: Order, service=orders_service):
+        super().__init__(parent)
+        self.order = order
+        self.service = service
+        self.db_session = parent.db_session
+        self.logger = logging.getLogger(__name__)
+
+        self.setWindowTitle(f"Оплата заказа {order.order_number}")
+        self.setModal(True)
+        self.resize(520, 420)
+
+        self._setup_ui()
+        self._load_history()
+
+    def _setup_ui(self):
+        """Настройка интерфейса"""
+        layout = QVBoxLayout(self)
+        layout.setSpacing(10)
+
+        info_label = QLabel(
+            f"Сумма заказа: {self.order.total_amount or 0:.2f} ₴    "
+            f"Оплачено: {self.order.paid_total or 0:.2f} ₴    "
+            f"Остаток: {self.order.balance_due or 0:.2f} ₴"
+        )
+        info_label.setStyleSheet("font-weight: bold;")
+        layout.addWidget(info_label)
+
+        form_layout = QFormLayout()
+
+        self.amount_spin = QDoubleSpinBox()
+        self.amount_spin.setRange(0.01, 9999999)
+        self.amount_spin.setDecimals(2)
+        self.amount_spin.setSuffix(" ₴")
+        self.amount_spin.setValue(max(self.order.balance_due or 0, 0.01))
+        form_layout.addRow("Сумма*:", self.amount_spin)
+
+        self.method_combo = QComboBox()
+        for method in PaymentMethod:
+            self.method_combo.addItem(method.value, method)
+        form_layout.addRow("Способ оплаты:", self.method_combo)
+
+        self.paid_at_edit = QDateTimeEdit(QDateTime.currentDateTime())
+        self.paid_at_edit.setCalendarPopup(True)
+        self.paid_at_edit.setDisplayFormat("dd.MM.yyyy hh:mm")
+        form_layout.addRow("Дата оплаты:", self.paid_at_edit)
+
+        self.note_edit = QLineEdit()
+        self.note_edit.setPlaceholderText("Комментарий (необязательно)")
+        form_layout.addRow("Комментарий:", self.note_edit)
+
+        layout.addLayout(form_layout)
+
+        # История оплат
+        layout.addWidget(QLabel("История оплат:"))
+        self.history_table = QTableWidget(0, 4)
+        self.history_table.setHorizontalHeaderLabels(['Дата', 'Сумма', 'Способ', 'Комментарий'])
+        self.history_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.history_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
+        layout.addWidget(self.history_table)
+
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addStretch()
+
+        self.save_button = QPushButton("💰 Добавить оплату")
+        self.save_button.setDefault(True)
+        self.save_button.clicked.connect(self.save_payment)
+        buttons_layout.addWidget(self.save_button)
+
+        self.cancel_button = QPushButton("Отмена")
+        self.cancel_button.clicked.connect(self.reject)
+        buttons_layout.addWidget(self.cancel_button)
+
+        layout.addLayout(buttons_layout)
+
+    def _load_history(self):
+        """Загрузка истории оплат заказа"""
+        payments = self.service.order_payments(self.db_session, self.order.id)
+
+        self.history_table.setRowCount(len(payments))
+        for row, payment in enumerate(payments):
+            self.history_table.setItem(row, 0, QTableWidgetItem(payment.paid_at.strftime('%d.%m.%Y %H:%M')))
+            amount_item = QTableWidgetItem(f"{payment.amount:.2f} ₴")
+            amount_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            self.history_table.setItem(row, 1, amount_item)
+            self.history_table.setItem(row, 2, QTableWidgetItem(payment.method.value if payment.method else ''))
+            self.history_table.setItem(row, 3, QTableWidgetItem(payment.note))
+
+    def save_payment(self):
+        """Запись оплаты в журнал"""
+        try:
+            self.order = self.service.add_payment(
+                self.db_session,
+                self.order,
+                self.amount_spin.value(),
+                method=self.method_combo.currentData(),
+                paid_at=self.paid_at_edit.dateTime().toPython(),
+                note=self.note_edit.text().strip() or None
+            )
+            self.accept()
+        except ValidationError as e:
+            QMessageBox.warning(self, "Предупреждение", e.message)
+        except (SQLAlchemyError, ServiceError) as e:
+            self.logger.error(f"Ошибка сохранения оплаты: {e}")
+            QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить оплату: {e}")
@@ -4,24 +4,30 @@ from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout,
                               QGroupBox, QListWidget, QListWidgetItem, QTextEdit,
                               QProgressBar, QCheckBox, QSpinBox, QMessageBox,
                               QFileDialog, QTabWidget, QWidget, QTableWidget,
-                              QTableWidgetItem, QHeaderView)
+                              QTableWidgetItem, QHeaderView, QTableView)
 from PySide6.QtCore import Qt, QDate, QThread, Signal, QTimer
 from PySide6.QtGui import QFont
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract, and_
 from datetime import datetime, timedelta
 import json
 
-from sto_app.models_sto import Order, OrderService, OrderPart, OrderStatus
-from shared_models.common_models import Client, Car, Employee
+from sto_app.models_sto import OrderStatus
+from sto_app.utils.pricing import from_kopecks
+from sto_app.services import archive, reports
+from sto_app.widgets import ReportTableModel
+from config.sql_profiler import sql_profiler
 
 
 class ReportsDialog(QDialog):
     """Диалог генерации отчетов"""
     
-    def __init__(self, db_session: Session, parent=None):
+    def __init__(self, db_session: Session, parent=None, remote_reports=None):
         super().__init__(parent)
         self.db_session = db_session
+        # Режим клиента: отчеты строит сервер API (api.remote.RemoteReports)
+        self.remote_reports = remote_reports
+        # Последний отчет прочитал и архив заказов
+        self.report_used_archive = False
         
         self.setWindowTitle('📊 Генерация отчетов')
         self.setMinimumSize(900, 700)
@@ -160,8 +166,17 @@ class ReportsDialog(QDialog):
         preview_group = QGroupBox('Предварительный просмотр')
         preview_layout = QVBoxLayout(preview_group)
         
-        self.main_preview_table = QTableWidget()
+        # Просмотр через модель: один запрос, текст ячеек - при отрисовке,
+        # сортировка по заголовку - в БД
+        self.main_preview_model = ReportTableModel(self)
+        self.main_preview_table = QTableView()
+        self.main_preview_table.setModel(self.main_preview_model)
         self.main_preview_table.setAlternatingRowColors(True)
+        self.main_preview_table.setEditTriggers(QTableView.NoEditTriggers)
+        self.main_preview_table.setSelectionBehavior(QTableView.SelectRows)
+        self.main_preview_table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.main_preview_table.setSortingEnabled(True)
+        self.main_preview_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         preview_layout.addWidget(self.main_preview_table)
         
         layout.addWidget(preview_group)
@@ -305,7 +320,7 @@ class ReportsDialog(QDialog):
         # Очищаем превью при изменении параметров
         current_tab = self.tab_widget.currentIndex()
         if current_tab == 0:  # Основные отчеты
-            self.main_preview_table.setRowCount(0)
+            self.main_preview_model.clear()
         elif current_tab == 1:  # Финансовые
             self.financial_preview_table.setRowCount(0)
             self.financial_summary.clear()
@@ -319,18 +334,21 @@ class ReportsDialog(QDialog):
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
         self.generate_btn.setEnabled(False)
+        self.report_used_archive = False
         
         try:
-            if current_tab == 0:  # Основные отчеты
-                self.generate_main_report()
-            elif current_tab == 1:  # Финансовые
-                self.generate_financial_report()
-            elif current_tab == 2:  # Аналитика
-                self.generate_analytics_report()
+            with sql_profiler.action('ReportsDialog.generate_report'):
+                if current_tab == 0:  # Основные отчеты
+                    self.generate_main_report()
+                elif current_tab == 1:  # Финансовые
+                    self.generate_financial_report()
+                elif current_tab == 2:  # Аналитика
+                    self.generate_analytics_report()
                 
             self.export_btn.setEnabled(True)
             self.print_btn.setEnabled(True)
-            self.status_label.setText('Отчет сгенерирован успешно')
+            self.status_label.setText('Отчет сгенерирован успешно' +
+                                      (' (включая архив заказов)' if self.report_used_archive else ''))
             
         except Exception as e:
             QMessageBox.critical(self, 'Ошибка', f'Ошибка генерации отчета: {e}')
@@ -348,168 +366,112 @@ class ReportsDialog(QDialog):
         
         self.progress_bar.setValue(20)
         self.status_label.setText('Загрузка данных...')
+        use_archive = self._report_archive(date_from)
         
         if report_type == 'Заказы по периоду':
-            self.generate_orders_report(date_from, date_to)
+            self.generate_orders_report(date_from, date_to, use_archive)
         elif report_type == 'Статистика по статусам':
-            self.generate_status_report(date_from, date_to)
+            self.generate_status_report(date_from, date_to, use_archive)
         elif report_type == 'Отчет по клиентам':
-            self.generate_clients_report(date_from, date_to)
+            self.generate_clients_report(date_from, date_to, use_archive)
         elif report_type == 'Популярные услуги':
-            self.generate_services_report(date_from, date_to)
+            self.generate_services_report(date_from, date_to, use_archive)
             
         self.progress_bar.setValue(100)
         
-    def generate_orders_report(self, date_from, date_to):
-        """Генерация отчета по заказам"""
-        # Получаем заказы за период
-        orders = self.db_session.query(Order).filter(
-            and_(
-                Order.date_received >= date_from,
-                Order.date_received <= date_to
-            )
-        ).all()
-        
-        # Настраиваем таблицу
-        self.main_preview_table.setColumnCount(6)
-        self.main_preview_table.setHorizontalHeaderLabels([
-            '№ заказа', 'Дата', 'Клиент', 'Автомобиль', 'Статус', 'Сумма'
-        ])
+    def _show_main_preview(self, columns, statement, stretch=(), sort_column=-1, sort_order=Qt.AscendingOrder):
+        """Показать отчет в таблице предварительного просмотра"""
+        self.main_preview_model.set_report(self.db_session, columns, statement)
+        self._setup_preview_header(stretch, sort_column, sort_order)
         
-        # Заполняем данные
-        self.main_preview_table.setRowCount(len(orders))
-        
-        for row, order in enumerate(orders):
-            self.main_preview_table.setItem(row, 0, QTableWidgetItem(order.order_number or ''))
-            self.main_preview_table.setItem(row, 1, QTableWidgetItem(
-                order.date_received.strftime('%d.%m.%Y') if order.date_received else ''
-            ))
-            self.main_preview_table.setItem(row, 2, QTableWidgetItem(
-                order.client.name if order.client else 'Неизвестен'
-            ))
-            self.main_preview_table.setItem(row, 3, QTableWidgetItem(
-                f"{order.car.brand} {order.car.model}" if order.car else 'Неизвестен'
-            ))
-            self.main_preview_table.setItem(row, 4, QTableWidgetItem(
-                order.status.value if order.status else 'Неизвестен'
-            ))
-            
-            amount_item = QTableWidgetItem(f'{order.total_amount or 0:.2f} ₴')
-            amount_item.setTextAlignment(Qt.AlignRight)
-            self.main_preview_table.setItem(row, 5, amount_item)
-            
-        # Настраиваем ширину колонок
+    def _setup_preview_header(self, stretch=(), sort_column=-1, sort_order=Qt.AscendingOrder):
+        """Индикатор сортировки и растягиваемые колонки таблицы просмотра"""
+        # Индикатор сортировки отражает ORDER BY запроса и не должен перезапускать его
         header = self.main_preview_table.horizontalHeader()
-        header.setSectionResizeMode(2, QHeaderView.Stretch)
-        header.setSectionResizeMode(3, QHeaderView.Stretch)
-        
-    def generate_status_report(self, date_from, date_to):
-        """Генерация отчета по статусам"""
-        # Группируем по статусам
-        status_counts = {}
-        status_amounts = {}
+        header.blockSignals(True)
+        header.setSortIndicator(sort_column, sort_order)
+        header.blockSignals(False)
+        header.setSectionResizeMode(QHeaderView.Interactive)
+        for column in stretch:
+            header.setSectionResizeMode(column, QHeaderView.Stretch)
+        
+    def _report_archive(self, date_from) -> bool:
+        """Период заходит в архив заказов (в режиме клиента это решает сервер)"""
+        self.report_used_archive = self.remote_reports is None and archive.reaches(self.db_session, date_from)
+        return self.report_used_archive
+        
+    def _show_report(self, report, stretch=()):
+        """Показать табличный отчет сервисного слоя"""
+        sort_order = Qt.DescendingOrder if report.descending else Qt.AscendingOrder
+        if self.remote_reports is not None:
+            self.main_preview_model.set_rows(report.columns, self.remote_reports.fetch(report))
+            self._setup_preview_header(stretch, report.sort_column, sort_order)
+            return
+        self._show_main_preview(report.columns, report.statement, stretch=stretch,
+                                sort_column=report.sort_column, sort_order=sort_order)
+        
+    def generate_orders_report(self, date_from, date_to, use_archive=False):
+        """Генерация отчета по заказам"""
+        self._show_report(reports.orders_report(date_from, date_to, use_archive), stretch=(2, 3))
         
-        for status in OrderStatus:
-            count = self.db_session.query(Order).filter(
-                and_(
-                    Order.status == status,
-                    Order.date_received >= date_from,
-                    Order.date_received <= date_to
-                )
-            ).count()
-            
-            amount = self.db_session.query(func.sum(Order.total_amount)).filter(
-                and_(
-                    Order.status == status,
-                    Order.date_received >= date_from,
-                    Order.date_received <= date_to
-                )
-            ).scalar() or 0
-            
-            status_counts[status.value] = count
-            status_amounts[status.value] = float(amount)
+    def generate_status_report(self, date_from, date_to, use_archive=False):
+        """Генерация отчета по статусам (один GROUP BY)"""
+        self._show_report(reports.status_report(date_from, date_to, use_archive))
             
-        # Настраиваем таблицу
-        self.main_preview_table.setColumnCount(4)
-        self.main_preview_table.setHorizontalHeaderLabels([
-            'Статус', 'Количество', 'Сумма', 'Процент'
-        ])
+    def generate_financial_report(self):
+        """Генерация финансового отчета (по итогам, хранящимся в заказах)"""
+        self.status_label.setText('Генерация финансового отчета...')
+        self.progress_bar.setValue(20)
         
-        total_count = sum(status_counts.values())
-        total_amount = sum(status_amounts.values())
+        date_from = self.date_from.date().toPython()
+        date_to = self.date_to.date().toPython()
+        if self.remote_reports is not None:
+            report = self.remote_reports.financial_report(self.db_session, date_from, date_to,
+                                                          min_amount=self.min_amount_spin.value())
+        else:
+            report = reports.financial_report(self.db_session, date_from, date_to,
+                                              min_amount=self.min_amount_spin.value(),
+                                              archive=self._report_archive(date_from))
         
-        # Заполняем данные
-        self.main_preview_table.setRowCount(len(status_counts))
+        self.progress_bar.setValue(60)
         
-        for row, (status, count) in enumerate(status_counts.items()):
-            self.main_preview_table.setItem(row, 0, QTableWidgetItem(status))
-            
-            count_item = QTableWidgetItem(str(count))
-            count_item.setTextAlignment(Qt.AlignCenter)
-            self.main_preview_table.setItem(row, 1, count_item)
-            
-            amount_item = QTableWidgetItem(f'{status_amounts[status]:.2f} ₴')
-            amount_item.setTextAlignment(Qt.AlignRight)
-            self.main_preview_table.setItem(row, 2, amount_item)
-            
-            percent = (count / total_count * 100) if total_count > 0 else 0
-            percent_item = QTableWidgetItem(f'{percent:.1f}%')
-            percent_item.setTextAlignment(Qt.AlignCenter)
-            self.main_preview_table.setItem(row, 3, percent_item)
-            
-    def generate_financial_report(self):
-        """Генерация финансового отчета"""
-        self.status_label.setText('Генерация финансового отчета...')
-        self.progress_bar.setValue(50)
+        services_share, parts_share = report.shares()
+        vat_line = f'<p><b>НДС (справочно):</b> {from_kopecks(report.vat):,.2f} ₴</p>' if self.include_vat_cb.isChecked() else ''
         
-        # Заглушка для финансового отчета
-        summary_text = """
+        summary_text = f"""
 <h3>💰 Финансовая сводка</h3>
-<p><b>Общий доход:</b> 125,450.00 ₴</p>
-<p><b>Услуги:</b> 89,320.00 ₴ (71%)</p>
-<p><b>Запчасти:</b> 36,130.00 ₴ (29%)</p>
-<p><b>Средний чек:</b> 2,845.00 ₴</p>
-<p><b>Количество заказов:</b> 44</p>
-
-<h4>🎯 Ключевые показатели:</h4>
-<ul>
-<li>Рост доходов: +15% к предыдущему периоду</li>
-<li>Конверсия: 85%</li>
-<li>Средний срок выполнения: 3.2 дня</li>
-</ul>
+<p><b>Общий доход:</b> {from_kopecks(report.total):,.2f} ₴</p>
+<p><b>Услуги:</b> {from_kopecks(report.services):,.2f} ₴ ({services_share:.0f}%)</p>
+<p><b>Запчасти:</b> {from_kopecks(report.parts):,.2f} ₴ ({parts_share:.0f}%)</p>
+<p><b>Скидки:</b> {from_kopecks(report.discounts):,.2f} ₴</p>
+{vat_line}
+<p><b>Средний чек:</b> {from_kopecks(report.average_check):,.2f} ₴</p>
+<p><b>Количество заказов:</b> {report.orders}</p>
+<p><b>Оплачено:</b> {from_kopecks(report.paid):,.2f} ₴</p>
+<p><b>Задолженность:</b> {from_kopecks(report.debt):,.2f} ₴</p>
         """
         
         self.financial_summary.setHtml(summary_text)
         
-        # Настраиваем таблицу детализации
-        self.financial_preview_table.setColumnCount(4)
-        self.financial_preview_table.setHorizontalHeaderLabels([
-            'Период', 'Доходы', 'Расходы', 'Прибыль'
-        ])
+        # Детализация по месяцам
+        headers = ['Период', 'Заказов', 'Услуги', 'Запчасти', 'Скидки', 'Доходы', 'Оплачено']
+        self.financial_preview_table.setColumnCount(len(headers))
+        self.financial_preview_table.setHorizontalHeaderLabels(headers)
+        self.financial_preview_table.setRowCount(len(report.periods))
         
-        # Заглушка данных
-        data = [
-            ('Неделя 1', '28,500.00', '12,300.00', '16,200.00'),
-            ('Неделя 2', '31,200.00', '14,500.00', '16,700.00'),
-            ('Неделя 3', '29,800.00', '13,200.00', '16,600.00'),
-            ('Неделя 4', '35,950.00', '15,800.00', '20,150.00')
-        ]
-        
-        self.financial_preview_table.setRowCount(len(data))
-        for row, (period, income, expense, profit) in enumerate(data):
-            self.financial_preview_table.setItem(row, 0, QTableWidgetItem(period))
-            
-            income_item = QTableWidgetItem(f'{income} ₴')
-            income_item.setTextAlignment(Qt.AlignRight)
-            self.financial_preview_table.setItem(row, 1, income_item)
+        for row, period in enumerate(report.periods):
+            self.financial_preview_table.setItem(row, 0, QTableWidgetItem(period.period or ''))
             
-            expense_item = QTableWidgetItem(f'{expense} ₴')
-            expense_item.setTextAlignment(Qt.AlignRight)
-            self.financial_preview_table.setItem(row, 2, expense_item)
+            count_item = QTableWidgetItem(str(period.orders))
+            count_item.setTextAlignment(Qt.AlignCenter)
+            self.financial_preview_table.setItem(row, 1, count_item)
             
-            profit_item = QTableWidgetItem(f'{profit} ₴')
-            profit_item.setTextAlignment(Qt.AlignRight)
-            self.financial_preview_table.setItem(row, 3, profit_item)
+            # Колонки: услуги, запчасти, скидки, доходы, оплачено (НДС не выводится)
+            amounts = (period.services, period.parts, period.discounts, period.total, period.paid)
+            for column, amount in enumerate(amounts, start=2):
+                amount_item = QTableWidgetItem(f'{from_kopecks(amount):,.2f} ₴')
+                amount_item.setTextAlignment(Qt.AlignRight)
+                self.financial_preview_table.setItem(row, column, amount_item)
             
         self.progress_bar.setValue(100)
         
@@ -554,80 +516,13 @@ class ReportsDialog(QDialog):
         self.analytics_results.setHtml(analytics_text)
         self.progress_bar.setValue(100)
         
-    def generate_clients_report(self, date_from, date_to):
+    def generate_clients_report(self, date_from, date_to, use_archive=False):
         """Генерация отчета по клиентам"""
-        # Получаем клиентов с заказами за период
-        clients_data = self.db_session.query(
-            Client.name,
-            func.count(Order.id).label('orders_count'),
-            func.sum(Order.total_amount).label('total_amount')
-        ).join(Order).filter(
-            and_(
-                Order.date_received >= date_from,
-                Order.date_received <= date_to
-            )
-        ).group_by(Client.id).all()
-        
-        # Настраиваем таблицу
-        self.main_preview_table.setColumnCount(3)
-        self.main_preview_table.setHorizontalHeaderLabels([
-            'Клиент', 'Количество заказов', 'Общая сумма'
-        ])
-        
-        # Заполняем данные
-        self.main_preview_table.setRowCount(len(clients_data))
-        
-        for row, (name, count, amount) in enumerate(clients_data):
-            self.main_preview_table.setItem(row, 0, QTableWidgetItem(name))
-            
-            count_item = QTableWidgetItem(str(count))
-            count_item.setTextAlignment(Qt.AlignCenter)
-            self.main_preview_table.setItem(row, 1, count_item)
-            
-            amount_item = QTableWidgetItem(f'{float(amount or 0):.2f} ₴')
-            amount_item.setTextAlignment(Qt.AlignRight)
-            self.main_preview_table.setItem(row, 2, amount_item)
-            
-    def generate_services_report(self, date_from, date_to):
-        """Генерация отчета по услугам"""
-        # Получаем статистику по услугам
-        services_data = self.db_session.query(
-            OrderService.service_name,
-            func.count(OrderService.id).label('count'),
-            func.sum(OrderService.price_with_vat).label('total_amount')
-        ).join(Order).filter(
-            and_(
-                Order.date_received >= date_from,
-                Order.date_received <= date_to
-            )
-        ).group_by(OrderService.service_name).order_by(
-            func.count(OrderService.id).desc()
-        ).all()
-        
-        # Настраиваем таблицу
-        self.main_preview_table.setColumnCount(4)
-        self.main_preview_table.setHorizontalHeaderLabels([
-            'Услуга', 'Количество', 'Общая сумма', 'Средняя цена'
-        ])
-        
-        # Заполняем данные
-        self.main_preview_table.setRowCount(len(services_data))
-        
-        for row, (service_name, count, total_amount) in enumerate(services_data):
-            self.main_preview_table.setItem(row, 0, QTableWidgetItem(service_name))
-            
-            count_item = QTableWidgetItem(str(count))
-            count_item.setTextAlignment(Qt.AlignCenter)
-            self.main_preview_table.setItem(row, 1, count_item)
-            
-            total_item = QTableWidgetItem(f'{float(total_amount or 0):.2f} ₴')
-            total_item.setTextAlignment(Qt.AlignRight)
-            self.main_preview_table.setItem(row, 2, total_item)
+        self._show_report(reports.clients_report(date_from, date_to, use_archive), stretch=(0,))
             
-            avg_price = float(total_amount or 0) / count if count > 0 else 0
-            avg_item = QTableWidgetItem(f'{avg_price:.2f} ₴')
-            avg_item.setTextAlignment(Qt.AlignRight)
-            self.main_preview_table.setItem(row, 3, avg_item)
+    def generate_services_report(self, date_from, date_to, use_archive=False):
+        """Генерация отчета по услугам (самые частые услуги сверху)"""
+        self._show_report(reports.services_report(date_from, date_to, use_archive), stretch=(0,))
             
     def export_report(self):
         """Экспорт отчета"""
@@ -6,10 +6,17 @@ from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout,
 from PySide6.QtCore import Qt, QDate, Signal
 from PySide6.QtGui import QFont
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, select
 
 from shared_models.common_models import Client, Car, Employee
 from sto_app.models_sto import Order, OrderService, OrderPart, ServiceCatalog
+from sto_app.utils.car_search import car_identifier_condition
+from sto_app.utils.fuzzy_search import service_index
+from sto_app.services import archive
+from sto_app.services.orders import client_history
+from config.sql_profiler import sql_profiler
+
+ARCHIVED_ORDER = 'Заказ (архив)'
 
 
 class SearchDialog(QDialog):
@@ -74,6 +81,12 @@ class SearchDialog(QDialog):
         self.exact_match_cb = QCheckBox('Точное совпадение')
         filters_layout.addWidget(self.exact_match_cb)
         
+        # Архив закрытых заказов читается только по запросу
+        self.include_archive_cb = QCheckBox('Заказы из архива')
+        self.include_archive_cb.setEnabled(archive.is_available(self.db_session))
+        self.include_archive_cb.setToolTip('Искать заказы и историю клиента также в архиве закрытых заказов')
+        filters_layout.addWidget(self.include_archive_cb)
+        
         filters_layout.addStretch()
         
         search_layout.addRow('Опции:', filters_layout)
@@ -175,23 +188,24 @@ class SearchDialog(QDialog):
         exact_match = self.exact_match_cb.isChecked()
         
         try:
-            results = []
+            with sql_profiler.action('SearchDialog.perform_search'):
+                results = []
             
-            # Выбираем методы поиска
-            if search_type in ['Все категории', 'Клиенты']:
-                results.extend(self.search_clients(query, case_sensitive, exact_match))
+                # Выбираем методы поиска
+                if search_type in ['Все категории', 'Клиенты']:
+                    results.extend(self.search_clients(query, case_sensitive, exact_match))
                 
-            if search_type in ['Все категории', 'Автомобили']:
-                results.extend(self.search_cars(query, case_sensitive, exact_match))
+                if search_type in ['Все категории', 'Автомобили']:
+                    results.extend(self.search_cars(query, case_sensitive, exact_match))
                 
-            if search_type in ['Все категории', 'Заказы']:
-                results.extend(self.search_orders(query, case_sensitive, exact_match))
+                if search_type in ['Все категории', 'Заказы']:
+                    results.extend(self.search_orders(query, case_sensitive, exact_match))
                 
-            if search_type in ['Все категории', 'Услуги']:
-                results.extend(self.search_services(query, case_sensitive, exact_match))
+                if search_type in ['Все категории', 'Услуги']:
+                    results.extend(self.search_services(query, case_sensitive, exact_match))
                 
-            if search_type in ['Все категории', 'Сотрудники']:
-                results.extend(self.search_employees(query, case_sensitive, exact_match))
+                if search_type in ['Все категории', 'Сотрудники']:
+                    results.extend(self.search_employees(query, case_sensitive, exact_match))
                 
             # Отображаем результаты
             self.display_results(results)
@@ -253,19 +267,21 @@ class SearchDialog(QDialog):
         """Поиск автомобилей"""
         results = []
         
-        # Формируем условия поиска
+        # VIN и гос. номер - по нормализованным ключам (поиск по индексу,
+        # регистр и раскладка не важны)
+        cars = self.db_session.query(Car).filter(
+            car_identifier_condition(query, exact=exact_match)
+        ).all()
+        
+        # Марка и модель - отдельным запросом
         if exact_match:
             if case_sensitive:
                 conditions = [
-                    Car.vin == query,
-                    Car.license_plate == query,
                     Car.brand == query,
                     Car.model == query
                 ]
             else:
                 conditions = [
-                    Car.vin.ilike(query),
-                    Car.license_plate.ilike(query),
                     Car.brand.ilike(query),
                     Car.model.ilike(query)
                 ]
@@ -273,20 +289,18 @@ class SearchDialog(QDialog):
             pattern = f'%{query}%'
             if case_sensitive:
                 conditions = [
-                    Car.vin.like(pattern),
-                    Car.license_plate.like(pattern),
                     Car.brand.like(pattern),
                     Car.model.like(pattern)
                 ]
             else:
                 conditions = [
-                    Car.vin.ilike(pattern),
-                    Car.license_plate.ilike(pattern),
                     Car.brand.ilike(pattern),
                     Car.model.ilike(pattern)
                 ]
         
-        cars = self.db_session.query(Car).filter(or_(*conditions)).all()
+        found_ids = {car.id for car in cars}
+        cars += [car for car in self.db_session.query(Car).filter(or_(*conditions)).all()
+                 if car.id not in found_ids]
         
         for car in cars:
             results.append({
@@ -300,29 +314,28 @@ class SearchDialog(QDialog):
             
         return results
         
+    def _order_conditions(self, orders, query, case_sensitive, exact_match):
+        """Условия поиска заказов (orders - модель рабочей БД или архива)"""
+        if exact_match:
+            if case_sensitive:
+                return [orders.order_number == query]
+            return [orders.order_number.ilike(query)]
+        pattern = f'%{query}%'
+        if case_sensitive:
+            return [
+                orders.order_number.like(pattern),
+                orders.notes.like(pattern)
+            ]
+        return [
+            orders.order_number.ilike(pattern),
+            orders.notes.ilike(pattern)
+        ]
+        
     def search_orders(self, query, case_sensitive, exact_match):
         """Поиск заказов"""
         results = []
         
-        # Формируем условия поиска
-        if exact_match:
-            if case_sensitive:
-                conditions = [Order.order_number == query]
-            else:
-                conditions = [Order.order_number.ilike(query)]
-        else:
-            pattern = f'%{query}%'
-            if case_sensitive:
-                conditions = [
-                    Order.order_number.like(pattern),
-                    Order.notes.like(pattern)
-                ]
-            else:
-                conditions = [
-                    Order.order_number.ilike(pattern),
-                    Order.notes.ilike(pattern)
-                ]
-        
+        conditions = self._order_conditions(Order, query, case_sensitive, exact_match)
         orders = self.db_session.query(Order).filter(or_(*conditions)).all()
         
         for order in orders:
@@ -337,47 +350,79 @@ class SearchDialog(QDialog):
                 'date': order.date_received.strftime('%d.%m.%Y') if order.date_received else '',
                 'object': order
             })
+        
+        if self.include_archive_cb.isChecked():
+            results.extend(self.search_archived_orders(query, case_sensitive, exact_match))
             
         return results
         
+    def search_archived_orders(self, query, case_sensitive, exact_match):
+        """Поиск заказов в архиве (строки только для просмотра)"""
+        archived = archive.archive_entity(Order)
+        rows = self.db_session.execute(
+            select(archived.id, archived.order_number, archived.date_received, archived.total_amount,
+                   Client.name.label('client_name'), Car.brand, Car.model)
+            .select_from(archived)
+            .outerjoin(Client, archived.client_id == Client.id)
+            .outerjoin(Car, archived.car_id == Car.id)
+            .where(or_(*self._order_conditions(archived, query, case_sensitive, exact_match)))
+        ).all()
+        
+        return [{
+            'type': ARCHIVED_ORDER,
+            'id': row.id,
+            'main_info': f'№ {row.order_number} | {row.client_name or "Неизвестно"}',
+            'additional': f'🚗 {row.brand or ""} {row.model or ""} | 💰 {row.total_amount or 0:.2f} ₴',
+            'date': row.date_received.strftime('%d.%m.%Y') if row.date_received else '',
+            'object': row
+        } for row in rows]
+        
     def search_services(self, query, case_sensitive, exact_match):
         """Поиск услуг"""
-        results = []
-        
         # Формируем условия поиска
         if exact_match:
             if case_sensitive:
                 conditions = [ServiceCatalog.name == query]
             else:
                 conditions = [ServiceCatalog.name.ilike(query)]
-        else:
+        elif case_sensitive:
             pattern = f'%{query}%'
-            if case_sensitive:
-                conditions = [
-                    ServiceCatalog.name.like(pattern),
-                    ServiceCatalog.description.like(pattern),
-                    ServiceCatalog.synonyms.like(pattern)
-                ]
-            else:
-                conditions = [
-                    ServiceCatalog.name.ilike(pattern),
-                    ServiceCatalog.description.ilike(pattern),
-                    ServiceCatalog.synonyms.ilike(pattern)
-                ]
+            conditions = [
+                ServiceCatalog.name.like(pattern),
+                ServiceCatalog.description.like(pattern),
+                ServiceCatalog.synonyms.like(pattern)
+            ]
+        else:
+            return self._fuzzy_search_services(query)
         
         services = self.db_session.query(ServiceCatalog).filter(or_(*conditions)).all()
-        
-        for service in services:
-            results.append({
-                'type': 'Услуга',
-                'id': service.id,
-                'main_info': service.name,
-                'additional': f'💰 {service.price:.2f} ₴ | {service.description or ""}',
-                'date': service.created_at.strftime('%d.%m.%Y') if hasattr(service, 'created_at') else '',
-                'object': service
-            })
-            
-        return results
+        return [self._service_result(service) for service in services]
+    
+    def _fuzzy_search_services(self, query):
+        """Нечеткий поиск услуг по названию и синонимам, затем по описанию"""
+        matches = service_index.search(self.db_session, query, limit=50, active_only=False)
+        ids = [match.record.id for match in matches]
+        found = {service.id: service for service in
+                 self.db_session.query(ServiceCatalog).filter(ServiceCatalog.id.in_(ids)).all()} if ids else {}
+        services = [found[service_id] for service_id in ids if service_id in found]
+        
+        # Описание в индекс не входит - подстрока, как раньше
+        services += self.db_session.query(ServiceCatalog).filter(
+            ServiceCatalog.description.ilike(f'%{query}%'),
+            ServiceCatalog.id.notin_(ids)
+        ).all()
+        return [self._service_result(service) for service in services]
+    
+    def _service_result(self, service):
+        """Строка результата поиска для услуги"""
+        return {
+            'type': 'Услуга',
+            'id': service.id,
+            'main_info': service.name,
+            'additional': f'💰 {service.price:.2f} ₴ | {service.description or ""}',
+            'date': service.created_at.strftime('%d.%m.%Y') if hasattr(service, 'created_at') else '',
+            'object': service
+        }
         
     def search_employees(self, query, case_sensitive, exact_match):
         """Поиск сотрудников"""
@@ -500,10 +545,38 @@ class SearchDialog(QDialog):
                 obj = type_item.data(Qt.UserRole)
                 item_type = type_item.text()
                 
+                if isinstance(obj, Client):
+                    self.show_client_history(obj)
+                    return
+                
                 # Здесь можно добавить логику просмотра деталей
                 QMessageBox.information(
                     self, 
                     'Просмотр', 
                     f'Просмотр деталей для {item_type} будет реализован в следующей версии'
                 )
-            
\ No newline at end of file
+            
+    def show_client_history(self, client, limit=30):
+        """История заказов клиента (с архивом - если отмечено)"""
+        try:
+            with sql_profiler.action('SearchDialog.show_client_history'):
+                history = client_history(self.db_session, client.id,
+                                         include_archive=self.include_archive_cb.isChecked())
+        except Exception as e:
+            QMessageBox.critical(self, 'Ошибка', f'Ошибка загрузки истории: {e}')
+            return
+        
+        if not history:
+            QMessageBox.information(self, 'История клиента', f'У клиента {client.name} нет заказов')
+            return
+        
+        lines = [
+            f"{row.date_received:%d.%m.%Y}  № {row.order_number}  {row.car_title}  "
+            f"{row.total_amount:.2f} ₴  {row.status.value if row.status else ''}"
+            f"{'  (архив)' if row.archived else ''}"
+            for row in history[:limit]
+        ]
+        if len(history) > limit:
+            lines.append(f'... и еще {len(history) - limit}')
+        QMessageBox.information(self, 'История клиента',
+                                f'{client.name}: заказов {len(history)}\n\n' + '\n'.join(lines))
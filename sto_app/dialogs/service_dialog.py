@@ -22,10 +22,12 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QFont
 
-from shared_models.common_models import Employee
-from sto_app.models_sto import ServiceCatalog, OrderService
+from sto_app.models_sto import OrderService
+from sto_app.utils.pricing import price_line
+from sto_app.utils.reference_cache import (reference_cache, ReferenceTable, ServiceRecord,
+                                           SERVICES, EMPLOYEES)
+from sto_app.widgets import reference_model
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import select
 
 
 class ServiceDialog(QDialog):
@@ -35,15 +37,20 @@ class ServiceDialog(QDialog):
     Поддерживает два режима:
     - Добавление новой услуги в заказ (order_service=None)
     - Редактирование существующей услуги в заказе (order_service=OrderService объект)
+    
+    При defer_save=True диалог ничего не пишет в БД: данные строки забирает
+    вызывающий код через get_line_data() (редактор заказа хранит строки в памяти).
     """
     
     # Сигнал для обновления итоговой стоимости в родительском окне
     service_cost_changed = Signal()
     
-    def __init__(self, parent=None, order_service: Optional[OrderService] = None, order_id: Optional[int] = None):
+    def __init__(self, parent=None, order_service: Optional[OrderService] = None, order_id: Optional[int] = None,
+                 defer_save: bool = False):
         super().__init__(parent)
         self.order_service = order_service
         self.order_id = order_id
+        self.defer_save = defer_save
         self.db_session = parent.db_session if parent else None
         self.is_edit_mode = order_service is not None
         
@@ -55,9 +62,10 @@ class ServiceDialog(QDialog):
         # Логгер для отслеживания операций
         self.logger = logging.getLogger(__name__)
         
-        # Списки для ComboBox
-        self.services: List[ServiceCatalog] = []
-        self.employees: List[Employee] = []
+        # Справочники из общего кэша (активные записи, отсортированы по имени)
+        self.services_table: Optional[ReferenceTable] = None
+        self.services: List[ServiceRecord] = []
+        self.employees = []
         
         self._load_data()
         self._setup_ui()
@@ -73,20 +81,14 @@ class ServiceDialog(QDialog):
             self._center_on_parent(parent)
 
     def _load_data(self):
-        """Загрузка данных из базы данных."""
+        """Загрузка справочников (из кэша; БД читается только после изменений каталога)."""
         if not self.db_session:
             return
         
         try:
-            # Загрузка каталога услуг
-            stmt = select(ServiceCatalog).where(ServiceCatalog.is_active == True).order_by(ServiceCatalog.name)
-            result = self.db_session.execute(stmt)
-            self.services = result.scalars().all()
-            
-            # Загрузка сотрудников
-            stmt = select(Employee).where(Employee.is_active == True).order_by(Employee.name)
-            result = self.db_session.execute(stmt)
-            self.employees = result.scalars().all()
+            self.services_table = reference_cache.services(self.db_session)
+            self.services = list(self.services_table.ordered('name'))
+            self.employees = list(reference_cache.employees(self.db_session).ordered('name'))
             
         except SQLAlchemyError as e:
             self.logger.error(f"Ошибка при загрузке данных: {e}")
@@ -115,11 +117,10 @@ class ServiceDialog(QDialog):
         # Выбор услуги из каталога
         self.service_combo = QComboBox()
         self.service_combo.setMinimumHeight(30)
-        self.service_combo.addItem("-- Выберите услугу --", None)
-        
-        for service in self.services:
-            display_text = f"{service.name} - {service.price:.2f} грн"
-            self.service_combo.addItem(display_text, service.id)
+        if self.db_session:
+            self.service_combo.setModel(reference_model(self.db_session, SERVICES, "-- Выберите услугу --"))
+        else:
+            self.service_combo.addItem("-- Выберите услугу --", None)
         
         service_layout.addRow("Услуга*:", self.service_combo)
         
@@ -131,11 +132,10 @@ class ServiceDialog(QDialog):
         
         # Исполнитель
         self.employee_combo = QComboBox()
-        self.employee_combo.addItem("-- Не назначен --", None)
-        
-        for employee in self.employees:
-            display_text = f"{employee.name} ({employee.position or 'Сотрудник'})"
-            self.employee_combo.addItem(display_text, employee.id)
+        if self.db_session:
+            self.employee_combo.setModel(reference_model(self.db_session, EMPLOYEES, "-- Не назначен --"))
+        else:
+            self.employee_combo.addItem("-- Не назначен --", None)
         
         service_layout.addRow("Исполнитель:", self.employee_combo)
         
@@ -264,12 +264,7 @@ class ServiceDialog(QDialog):
         service_id = self.service_combo.currentData()
         
         if service_id:
-            # Найти выбранную услугу
-            selected_service = None
-            for service in self.services:
-                if service.id == service_id:
-                    selected_service = service
-                    break
+            selected_service = self.get_selected_service()
             
             if selected_service:
                 # ✅ ИСПРАВЛЕНО: используем правильные поля модели
@@ -297,32 +292,26 @@ class ServiceDialog(QDialog):
         
         self._calculate_total()
 
+    def _line_pricing(self):
+        """Расчет строки единым движком цен (pricing.price_line)."""
+        discount_value = self.discount_spin.value()
+        is_fixed = self.fixed_discount_check.isChecked()
+        return price_line(
+            self.base_price_spin.value(),
+            self.quantity_spin.value(),
+            discount_percent=0 if is_fixed else discount_value,
+            discount_amount=discount_value if is_fixed else 0
+        )
+
     def _calculate_total(self):
         """Расчет итоговой стоимости услуги."""
         try:
-            base_price = Decimal(str(self.base_price_spin.value()))
-            quantity = Decimal(str(self.quantity_spin.value()))
-            discount_value = Decimal(str(self.discount_spin.value()))
-            
-            # Расчет стоимости с учетом количества
-            subtotal = base_price * quantity
-            
-            # Применение скидки
-            if self.fixed_discount_check.isChecked():
-                # Фиксированная скидка в гривнах
-                total = subtotal - discount_value
-            else:
-                # Процентная скидка
-                discount_amount = subtotal * (discount_value / Decimal('100'))
-                total = subtotal - discount_amount
-            
-            # Итоговая сумма не может быть отрицательной
-            total = max(total, Decimal('0'))
+            total = self._line_pricing().total
             
             self.total_price_label.setText(f"{total:.2f} грн")
             
             # Цветовая индикация
-            if discount_value > 0:
+            if self.discount_spin.value() > 0:
                 self.total_price_label.setStyleSheet("font-weight: bold; color: #FF6B35; font-size: 14px;")
             else:
                 self.total_price_label.setStyleSheet("font-weight: bold; color: #2E7D32; font-size: 14px;")
@@ -439,11 +428,7 @@ class ServiceDialog(QDialog):
             # ИСПРАВЛЕНИЕ: получаем название услуги из каталога
             service_name = "Услуга"  # значение по умолчанию
             if service_catalog_id:
-                selected_service = None
-                for service in self.services:
-                    if service.id == service_catalog_id:
-                        selected_service = service
-                        break
+                selected_service = self.get_selected_service()
                 if selected_service:
                     service_name = selected_service.name
             
@@ -518,6 +503,11 @@ class ServiceDialog(QDialog):
         if not self.validate_data():
             return
         
+        if self.defer_save:
+            self.service_cost_changed.emit()
+            self.accept()
+            return
+        
         if self.save_data():
             QMessageBox.information(
                 self,
@@ -535,6 +525,27 @@ class ServiceDialog(QDialog):
         """
         return self.order_service
 
+    def get_selected_service(self) -> Optional[ServiceRecord]:
+        """Получение выбранной услуги каталога."""
+        if self.services_table is None:
+            return None
+        return self.services_table.get(self.service_combo.currentData())
+
+    def get_line_data(self) -> dict:
+        """
+        Получение данных строки услуги без записи в БД.
+        
+        Returns:
+            dict: service_name, service_name_ua, price (итог с учетом количества и скидки), vat_rate
+        """
+        service = self.get_selected_service()
+        return {
+            'service_name': service.name if service else "Услуга",
+            'service_name_ua': service.name_ua if service else None,
+            'price': self.get_total_cost(),
+            'vat_rate': Decimal(str(service.vat_rate if service and service.vat_rate is not None else 20)),
+        }
+
     def get_total_cost(self) -> Decimal:
         """
         Получение итоговой стоимости услуги.
@@ -543,20 +554,7 @@ class ServiceDialog(QDialog):
             Decimal: Итоговая стоимость услуги
         """
         try:
-            base_price = Decimal(str(self.base_price_spin.value()))
-            quantity = Decimal(str(self.quantity_spin.value()))
-            discount_value = Decimal(str(self.discount_spin.value()))
-            
-            subtotal = base_price * quantity
-            
-            if self.fixed_discount_check.isChecked():
-                total = subtotal - discount_value
-            else:
-                discount_amount = subtotal * (discount_value / Decimal('100'))
-                total = subtotal - discount_amount
-            
-            return max(total, Decimal('0'))
-            
+            return self._line_pricing().total
         except Exception:
             return Decimal('0')
 
@@ -578,8 +576,8 @@ if __name__ == "__main__":
     from PySide6.QtWidgets import QApplication
     from sqlalchemy import create_engine
     from sqlalchemy.orm import sessionmaker
-    from shared_models.common_models import Base
-    from sto_app.models_sto import Base as STOBase
+    from shared_models.common_models import Base, Employee
+    from sto_app.models_sto import Base as STOBase, ServiceCatalog
     
     app = QApplication(sys.argv)
     
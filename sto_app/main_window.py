@@ -3,7 +3,7 @@ import logging
 logger = logging.getLogger(__name__)
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                               QTabWidget, QToolBar, QStatusBar, QMessageBox,
-                              QSplitter, QLabel, QMenuBar, QMenu)
+                              QSplitter, QLabel, QMenuBar, QMenu, QApplication)
 from PySide6.QtCore import Qt, QSettings, Signal, QTimer
 from PySide6.QtGui import QAction, QIcon, QKeySequence
 from PySide6.QtCore import QSize
@@ -13,17 +13,12 @@ import sys
 import os
 import logging
 
-# Импорт вкладок
-from .views.orders_view import OrdersView
-from .views.new_order_view import NewOrderView
-from .views.catalogs_view import CatalogsView
-from .views.settings_view import SettingsView
-
-# Импорт диалогов
-from .dialogs.about_dialog import AboutDialog
+# Вкладки и диалоги импортируются при первом обращении
+from .widgets.lazy_tabs import LazyTabWidget
 
 # База данных
 from config.database import SessionLocal
+from config.sql_profiler import sql_profiler
 
 logger = logging.getLogger(__name__)
 
@@ -35,9 +30,13 @@ class MainWindow(QMainWindow):
     theme_changed = Signal(str)
     language_changed = Signal(str)
     
-    def __init__(self):
+    def __init__(self, api_client=None):
         super().__init__()
-        self.db_session = SessionLocal()
+        # Режим клиента: данные через сервер API (sto_server.py), локальная БД не открывается
+        self.api_client = api_client
+        self.db_session = SessionLocal() if api_client is None else None
+        # Действия, которым нужна локальная БД (в режиме клиента отключаются)
+        self.local_actions = []
         self.settings = QSettings('STOApp', 'MainWindow')
         
         self.setWindowTitle('СТО Management System v3.0')
@@ -50,6 +49,8 @@ class MainWindow(QMainWindow):
         except Exception as e:
             logger.warning(f"Не удалось загрузить иконку приложения: {e}")
         
+        self._connected_views = set()
+        self.change_notifier = self._create_change_notifier()
         self.setup_ui()
         self.load_settings()
         self.setup_connections()
@@ -75,28 +76,98 @@ class MainWindow(QMainWindow):
         # Панель инструментов
         self.create_toolbar()
         
-        # Вкладки
-        self.tab_widget = QTabWidget()
+        # Вкладки: представление (и его загрузка из БД) создается при
+        # первой активации, сразу - только первая вкладка
+        self.tab_widget = LazyTabWidget()
         self.tab_widget.setTabPosition(QTabWidget.TabPosition.North)
         self.tab_widget.setMovable(True)
-        
-        # Создаем вкладки
-        self.orders_view = OrdersView(self.db_session)
-        self.new_order_view = NewOrderView(self.db_session)
-        self.catalogs_view = CatalogsView(self.db_session)
-        self.settings_view = SettingsView(self.db_session)
-        
-        # Добавляем вкладки
-        self.tab_widget.addTab(self.orders_view, self._get_icon('orders'), 'Заказы')
-        self.tab_widget.addTab(self.new_order_view, self._get_icon('new_order'), 'Новый заказ')
-        self.tab_widget.addTab(self.catalogs_view, self._get_icon('catalog'), 'Справочники')
-        self.tab_widget.addTab(self.settings_view, self._get_icon('settings'), 'Настройки')
+        self.tab_widget.view_created.connect(self._connect_view)
+        
+        self.tab_widget.add_lazy_tab('orders', self._create_orders_view,
+                                     self._get_icon('orders'), 'Заказы')
+        self.tab_widget.add_lazy_tab('new_order', self._create_new_order_view,
+                                     self._get_icon('new_order'), 'Новый заказ')
+        if self.api_client is None:
+            self.tab_widget.add_lazy_tab('catalogs', self._create_catalogs_view,
+                                         self._get_icon('catalog'), 'Справочники')
+            self.tab_widget.add_lazy_tab('settings', self._create_settings_view,
+                                         self._get_icon('settings'), 'Настройки')
+        else:
+            for action in self.local_actions:
+                action.setEnabled(False)
+                action.setStatusTip('Недоступно в режиме клиента')
         
         main_layout.addWidget(self.tab_widget)
         
         # Статусная строка
         self.create_status_bar()
         
+    def _create_orders_view(self):
+        from .views.orders_view import OrdersView
+        if self.api_client is not None:
+            from .api.remote import RemoteOrders
+            return OrdersView(None, RemoteOrders(self.api_client))
+        with sql_profiler.action('OrdersView open'):
+            return OrdersView(self.db_session)
+        
+    def _create_new_order_view(self):
+        from .views.new_order_view import NewOrderView
+        if self.api_client is not None:
+            from .api.remote import RemoteClients, RemoteOrders
+            return NewOrderView(None, service=RemoteOrders(self.api_client),
+                                clients=RemoteClients(self.api_client))
+        with sql_profiler.action('NewOrderView open'):
+            return NewOrderView(self.db_session)
+        
+    def _create_catalogs_view(self):
+        from .views.catalogs_view import CatalogsView
+        with sql_profiler.action('CatalogsView open'):
+            return CatalogsView(self.db_session)
+        
+    def _create_settings_view(self):
+        from .views.settings_view import SettingsView
+        with sql_profiler.action('SettingsView open'):
+            return SettingsView(self.db_session)
+        
+    # Обращение к вкладке создает ее представление, если его еще нет
+    @property
+    def orders_view(self):
+        return self.tab_widget.ensure_view('orders')
+        
+    @property
+    def new_order_view(self):
+        return self.tab_widget.ensure_view('new_order')
+        
+    @property
+    def catalogs_view(self):
+        return self.tab_widget.ensure_view('catalogs')
+        
+    @property
+    def settings_view(self):
+        return self.tab_widget.ensure_view('settings')
+        
+    def current_context(self) -> str:
+        """Активное окно для сторожа зависаний: модальный диалог или вкладка"""
+        modal = QApplication.activeModalWidget()
+        if modal is not None:
+            return type(modal).__name__
+        return type(self.tab_widget.currentWidget()).__name__
+        
+    def _create_change_notifier(self):
+        """Уведомления об изменениях из других экземпляров (запускает STOApplication)"""
+        from .utils.change_notifier import ChangeNotifier
+        if self.api_client is not None:
+            from .api.remote import RemoteChangeFeed
+            feed = RemoteChangeFeed(self.api_client)
+        else:
+            from .services.changes import ChangeFeed
+            feed = ChangeFeed()
+        return ChangeNotifier(feed, ChangeNotifier.interval_from_env(), self)
+        
+    def start_prefetch(self):
+        """Предзагрузка вкладки, которая скорее всего понадобится следующей"""
+        self.tab_widget.start_prefetch(['new_order'])
+        
     def _get_icon(self, icon_name):
         """Безопасное получение иконки"""
         icon_path = f'resources/icons/{icon_name}.png'
@@ -126,11 +197,13 @@ class MainWindow(QMainWindow):
         import_action.setShortcut(QKeySequence('Ctrl+I'))
         import_action.triggered.connect(self.import_data)
         file_menu.addAction(import_action)
+        self.local_actions.append(import_action)
         
         export_action = QAction(self._get_icon('export'), '&Экспорт данных...', self)
         export_action.setShortcut(QKeySequence('Ctrl+E'))
         export_action.triggered.connect(self.export_data)
         file_menu.addAction(export_action)
+        self.local_actions.append(export_action)
         
         file_menu.addSeparator()
         
@@ -147,6 +220,7 @@ class MainWindow(QMainWindow):
         find_action.setShortcut(QKeySequence.Find)
         find_action.triggered.connect(self.show_search)
         edit_menu.addAction(find_action)
+        self.local_actions.append(find_action)
         
         # Меню Вид
         view_menu = QMenu('&Вид', self)
@@ -183,6 +257,7 @@ class MainWindow(QMainWindow):
         calendar_action.setShortcut(QKeySequence('Ctrl+K'))
         calendar_action.triggered.connect(self.show_calendar)
         tools_menu.addAction(calendar_action)
+        self.local_actions.append(calendar_action)
         
         reports_action = QAction(self._get_icon('reports'), '&Отчеты', self)
         reports_action.setShortcut(QKeySequence('Ctrl+R'))
@@ -194,6 +269,12 @@ class MainWindow(QMainWindow):
         backup_action = QAction(self._get_icon('backup'), '&Резервное копирование', self)
         backup_action.triggered.connect(self.backup_database)
         tools_menu.addAction(backup_action)
+        self.local_actions.append(backup_action)
+        
+        diagnostics_action = QAction(self._get_icon('diagnostics'), '&Диагностика', self)
+        diagnostics_action.setShortcut(QKeySequence('Ctrl+Shift+D'))
+        diagnostics_action.triggered.connect(self.show_diagnostics)
+        tools_menu.addAction(diagnostics_action)
         
         # Меню Справка
         help_menu = QMenu('&Справка', self)
@@ -226,6 +307,7 @@ class MainWindow(QMainWindow):
         search_action = QAction(self._get_icon('search'), 'Поиск', self)
         search_action.triggered.connect(self.show_search)
         toolbar.addAction(search_action)
+        self.local_actions.append(search_action)
         
         toolbar.addSeparator()
         
@@ -233,6 +315,7 @@ class MainWindow(QMainWindow):
         calendar_action = QAction(self._get_icon('calendar'), 'Календарь', self)
         calendar_action.triggered.connect(self.show_calendar)
         toolbar.addAction(calendar_action)
+        self.local_actions.append(calendar_action)
         
         # Отчеты
         reports_action = QAction(self._get_icon('reports'), 'Отчеты', self)
@@ -264,6 +347,11 @@ class MainWindow(QMainWindow):
         self.user_label = QLabel('Пользователь: Администратор')
         self.status_bar.addPermanentWidget(self.user_label)
         
+        if self.api_client is not None:
+            self.status_bar.addPermanentWidget(QLabel(' | '))
+            self.server_label = QLabel(f'Сервер: {self.api_client.url}')
+            self.status_bar.addPermanentWidget(self.server_label)
+        
         self.status_bar.addPermanentWidget(QLabel(' | '))
         
         self.time_label = QLabel()
@@ -282,23 +370,32 @@ class MainWindow(QMainWindow):
         
     def setup_connections(self):
         """Настройка соединений сигналов"""
+        # Вкладки, созданные до подключения view_created (первая вкладка)
+        for key, view in self.tab_widget.created_views().items():
+            self._connect_view(key, view)
+            
+    def _connect_view(self, key, view):
+        """Связать сигналы только что созданной вкладки"""
+        if key in self._connected_views:
+            return
+        self._connected_views.add(key)
         try:
-            # Связываем сигналы из вкладок
-            if hasattr(self.orders_view, 'status_message'):
-                self.orders_view.status_message.connect(self.show_status_message)
-                
-            if hasattr(self.new_order_view, 'status_message'):
-                self.new_order_view.status_message.connect(self.show_status_message)
+            if hasattr(view, 'status_message'):
+                view.status_message.connect(self.show_status_message)
                 
-            if hasattr(self.new_order_view, 'order_saved'):
-                self.new_order_view.order_saved.connect(self.on_order_saved)
+            if key == 'new_order' and hasattr(view, 'order_saved'):
+                view.order_saved.connect(self.on_order_saved)
+            
+            # Изменения из других экземпляров приложения
+            if hasattr(view, 'apply_changes'):
+                self.change_notifier.changed.connect(view.apply_changes)
             
             # Сигналы изменения настроек
-            if hasattr(self.settings_view, 'theme_changed'):
-                self.settings_view.theme_changed.connect(self.change_theme)
-                
-            if hasattr(self.settings_view, 'language_changed'):
-                self.settings_view.language_changed.connect(self.change_language)
+            if key == 'settings':
+                if hasattr(view, 'theme_changed'):
+                    view.theme_changed.connect(self.change_theme)
+                if hasattr(view, 'language_changed'):
+                    view.language_changed.connect(self.change_language)
                 
         except Exception as e:
             logger.error(f"Ошибка настройки соединений: {e}")
@@ -315,15 +412,18 @@ class MainWindow(QMainWindow):
         
     def on_order_saved(self):
         """Обработка сохранения заказа"""
-        if hasattr(self.orders_view, 'refresh_orders'):
-            self.orders_view.refresh_orders()
+        # Еще не открытая вкладка заказов загрузит данные при создании
+        orders_view = self.tab_widget.created_view('orders')
+        if orders_view is not None and hasattr(orders_view, 'refresh_orders'):
+            orders_view.refresh_orders()
         self.tab_widget.setCurrentWidget(self.orders_view)
         
     def show_search(self):
         """Показать диалог поиска"""
         try:
             from .dialogs.search_dialog import SearchDialog
-            dialog = SearchDialog(self, self.db_session)
+            with sql_profiler.action('SearchDialog open'):
+                dialog = SearchDialog(self.db_session, self)
             dialog.exec()
         except ImportError as e:
             logger.error(f"Ошибка импорта SearchDialog: {e}")
@@ -333,7 +433,8 @@ class MainWindow(QMainWindow):
         """Показать календарь записей"""
         try:
             from .dialogs.calendar_dialog import CalendarDialog
-            dialog = CalendarDialog(self, self.db_session)
+            with sql_profiler.action('CalendarDialog open'):
+                dialog = CalendarDialog(self.db_session, self)
             dialog.exec()
         except ImportError as e:
             logger.error(f"Ошибка импорта CalendarDialog: {e}")
@@ -343,13 +444,28 @@ class MainWindow(QMainWindow):
         """Показать окно отчетов"""
         try:
             from .dialogs.reports_dialog import ReportsDialog
-            dialog = ReportsDialog(self.db_session, self)
+            remote_reports = None
+            if self.api_client is not None:
+                from .api.remote import RemoteReports
+                remote_reports = RemoteReports(self.api_client)
+            with sql_profiler.action('ReportsDialog open'):
+                dialog = ReportsDialog(self.db_session, self, remote_reports)
             dialog.exec()
         except ImportError as e:
             logger.error(f"Ошибка импорта ReportsDialog: {e}")
             QMessageBox.information(self, 'Информация', 'Система отчетов временно недоступна')
 
         
+    def show_diagnostics(self):
+        """Показать статистику SQL-запросов и зависаний интерфейса"""
+        try:
+            from .dialogs.diagnostics_dialog import DiagnosticsDialog
+            dialog = DiagnosticsDialog(self)
+            dialog.exec()
+        except ImportError as e:
+            logger.error(f"Ошибка импорта DiagnosticsDialog: {e}")
+            QMessageBox.information(self, 'Информация', 'Диагностика временно недоступна')
+            
     def print_current(self):
         """Печать текущего документа"""
         current_widget = self.tab_widget.currentWidget()
@@ -439,6 +555,7 @@ class MainWindow(QMainWindow):
     def show_about(self):
         """Показать информацию о программе"""
         try:
+            from .dialogs.about_dialog import AboutDialog
             dialog = AboutDialog(self)
             dialog.exec()
         except Exception as e:
@@ -448,10 +565,13 @@ class MainWindow(QMainWindow):
     def refresh_all_views(self):
         """Обновить все представления"""
         try:
-            if hasattr(self.orders_view, 'refresh_orders'):
-                self.orders_view.refresh_orders()
-            if hasattr(self.catalogs_view, 'refresh_data'):
-                self.catalogs_view.refresh_data()
+            # Несозданные вкладки и так загрузят свежие данные
+            orders_view = self.tab_widget.created_view('orders')
+            if orders_view is not None and hasattr(orders_view, 'refresh_orders'):
+                orders_view.refresh_orders()
+            catalogs_view = self.tab_widget.created_view('catalogs')
+            if catalogs_view is not None and hasattr(catalogs_view, 'refresh_data'):
+                catalogs_view.refresh_data()
         except Exception as e:
             logger.error(f"Ошибка обновления представлений: {e}")
             
@@ -459,9 +579,11 @@ class MainWindow(QMainWindow):
         """Автосохранение"""
         try:
             # Сохраняем текущий заказ если он в процессе редактирования
-            if (self.tab_widget.currentWidget() == self.new_order_view and 
-                hasattr(self.new_order_view, 'save_draft')):
-                self.new_order_view.save_draft()
+            new_order_view = self.tab_widget.created_view('new_order')
+            if (new_order_view is not None and
+                self.tab_widget.currentWidget() == new_order_view and 
+                hasattr(new_order_view, 'autosave')):
+                new_order_view.autosave()
         except Exception as e:
             logger.error(f"Ошибка автосохранения: {e}")
             
@@ -496,8 +618,9 @@ class MainWindow(QMainWindow):
         """Обработка закрытия окна"""
         try:
             # Проверяем несохраненные изменения
-            if (hasattr(self.new_order_view, 'has_unsaved_changes') and 
-                self.new_order_view.has_unsaved_changes()):
+            new_order_view = self.tab_widget.created_view('new_order')
+            if (hasattr(new_order_view, 'has_unsaved_changes') and 
+                new_order_view.has_unsaved_changes()):
                 reply = QMessageBox.question(
                     self, 'Несохраненные изменения',
                     'Есть несохраненные изменения. Сохранить перед выходом?',
@@ -505,18 +628,22 @@ class MainWindow(QMainWindow):
                 )
                 
                 if reply == QMessageBox.Save:
-                    if hasattr(self.new_order_view, 'save_order'):
-                        self.new_order_view.save_order()
+                    if hasattr(new_order_view, 'save_order'):
+                        new_order_view.save_order()
                 elif reply == QMessageBox.Cancel:
                     event.ignore()
                     return
                     
             # Сохраняем настройки
             self.save_settings()
+            sql_profiler.dump_on_exit()
             
-            # Закрываем соединение с БД
+            # Закрываем соединение с БД (или с сервером в режиме клиента)
+            self.change_notifier.stop()
             if self.db_session:
                 self.db_session.close()
+            if self.api_client is not None:
+                self.api_client.close()
             
             # Останавливаем таймеры
             if hasattr(self, 'time_timer'):
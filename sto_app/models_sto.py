@@ -1,7 +1,9 @@
 # sto_app/models_sto.py
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, Float, DateTime, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import (Column, Integer, String, ForeignKey, Text, Float, DateTime, Enum,
+                        bindparam, case, event, func, select, update)
+from sqlalchemy.orm import Session, relationship
 from shared_models.base import Base, TimestampMixin
+from sto_app.utils.pricing import order_totals_kopecks, sql_kopecks, to_kopecks
 import enum
 
 
@@ -14,6 +16,13 @@ class OrderStatus(enum.Enum):
     CANCELLED = "Скасовано"
 
 
+class PaymentMethod(enum.Enum):
+    """Способы оплаты"""
+    CASH = "Готівка"
+    CARD = "Картка"
+    TRANSFER = "Безготівковий"
+
+
 class Order(Base, TimestampMixin):
     """Модель заказа"""
     __tablename__ = 'orders'
@@ -32,8 +41,19 @@ class Order(Base, TimestampMixin):
     status = Column(Enum(OrderStatus), default=OrderStatus.DRAFT, nullable=False)
     
     total_amount = Column(Float, default=0.0)
+    # Суммы оплат - производные от журнала оплат (OrderPayment)
     prepayment = Column(Float, default=0.0)
     additional_payment = Column(Float, default=0.0)
+    # Остаток к оплате (индекс обслуживает фильтр "только неоплаченные")
+    balance_due = Column(Float, default=0.0, index=True)
+    
+    # Денормализованные итоги (пересчитываются при коммите, см. recalculate_order_totals)
+    discount_percent = Column(Float, default=0.0)
+    services_total = Column(Float, default=0.0)
+    parts_total = Column(Float, default=0.0)
+    vat_total = Column(Float, default=0.0)
+    discount_total = Column(Float, default=0.0)
+    paid_total = Column(Float, default=0.0)
     
     notes = Column(Text)
     
@@ -42,15 +62,12 @@ class Order(Base, TimestampMixin):
     car = relationship("Car", back_populates="orders")
     services = relationship("OrderService", back_populates="order", cascade="all, delete-orphan")
     parts = relationship("OrderPart", back_populates="order", cascade="all, delete-orphan")
+    payments = relationship("OrderPayment", back_populates="order", cascade="all, delete-orphan",
+                            order_by="OrderPayment.paid_at")
     
     responsible_person = relationship("Employee", foreign_keys=[responsible_person_id])
     manager = relationship("Employee", foreign_keys=[manager_id])
     
-    @property
-    def balance_due(self):
-        """Остаток к оплате"""
-        return self.total_amount - self.prepayment - self.additional_payment
-    
     def __repr__(self):
         return f"<Order(id={self.id}, number='{self.order_number}', status={self.status.value})>"
 
@@ -60,7 +77,7 @@ class OrderService(Base):
     __tablename__ = 'order_services'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    order_id = Column(Integer, ForeignKey('orders.id'), nullable=False)
+    order_id = Column(Integer, ForeignKey('orders.id'), nullable=False, index=True)
     service_name = Column(String(500), nullable=False)
     service_name_ua = Column(String(500))
     price = Column(Float, nullable=False)
@@ -80,7 +97,7 @@ class OrderPart(Base):
     __tablename__ = 'order_parts'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    order_id = Column(Integer, ForeignKey('orders.id'), nullable=False)
+    order_id = Column(Integer, ForeignKey('orders.id'), nullable=False, index=True)
     article = Column(String(100))
     part_name = Column(String(500), nullable=False)
     part_name_ua = Column(String(500))
@@ -98,6 +115,25 @@ class OrderPart(Base):
         return self.total
 
 
+class OrderPayment(Base, TimestampMixin):
+    """Журнал оплат по заказу (записи только добавляются, исправления - отдельными записями)"""
+    __tablename__ = 'order_payments'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    order_id = Column(Integer, ForeignKey('orders.id'), nullable=False, index=True)
+    amount = Column(Float, nullable=False)
+    method = Column(Enum(PaymentMethod), default=PaymentMethod.CASH, nullable=False)
+    is_prepayment = Column(Integer, default=0)
+    paid_at = Column(DateTime, default=func.now(), nullable=False)
+    note = Column(Text)
+    
+    # Отношения
+    order = relationship("Order", back_populates="payments")
+    
+    def __repr__(self):
+        return f"<OrderPayment(id={self.id}, order_id={self.order_id}, amount={self.amount})>"
+
+
 class ServiceCatalog(Base, TimestampMixin):
     """ИСПРАВЛЕННЫЙ каталог услуг с поддержкой дефолтных цен"""
     __tablename__ = 'services_catalog'  # ИСПРАВЛЕНО: было **tablename**
@@ -145,4 +181,173 @@ class CarBrand(Base):
     
     def get_models_list(self):
         """Получить список моделей"""
-        return [m.strip() for m in self.models.split(',')] if self.models else []
\ No newline at end of file
+        return [m.strip() for m in self.models.split(',')] if self.models else []
+
+
+# ---------------------------------------------------------------------------
+# Денормализованные итоги заказа
+# ---------------------------------------------------------------------------
+
+ORDER_TOTAL_COLUMNS = ('services_total', 'parts_total', 'vat_total', 'discount_total',
+                       'total_amount', 'prepayment', 'additional_payment', 'paid_total',
+                       'balance_due')
+
+# Поля заказа, от которых зависят итоги
+_ORDER_TOTALS_SOURCES = ('discount_percent',)
+
+_TOUCHED_ORDERS_KEY = 'sto_touched_orders'
+_CHANGED_ORDERS_KEY = 'sto_changed_orders'
+_orders_committed_callbacks = []
+_RECALC_CHUNK = 500
+
+
+def touch_order_totals(session: Session, *order_ids):
+    """Пометить заказы для пересчета итогов при коммите (для массовых UPDATE/DELETE)"""
+    order_ids = {order_id for order_id in order_ids if order_id}
+    session.info.setdefault(_TOUCHED_ORDERS_KEY, set()).update(order_ids)
+    session.info.setdefault(_CHANGED_ORDERS_KEY, set()).update(order_ids)
+
+
+def on_orders_committed(callback):
+    """
+    Подписка на зафиксированные изменения заказов.
+
+    callback(order_ids) вызывается после коммита любой сессии, изменившей
+    заказы, их строки или оплаты (в потоке этой сессии).
+    """
+    _orders_committed_callbacks.append(callback)
+    return callback
+
+
+def _rows_by_order(connection, query, order_ids):
+    """Строки запроса по заказам: {order_id: (значение1, значение2, ...)}"""
+    result = {}
+    chunks = [None] if order_ids is None else [
+        order_ids[i:i + _RECALC_CHUNK] for i in range(0, len(order_ids), _RECALC_CHUNK)
+    ]
+    for chunk in chunks:
+        stmt = query if chunk is None else query.where(query.selected_columns[0].in_(chunk))
+        for row in connection.execute(stmt):
+            result[row[0]] = tuple(value or 0 for value in row[1:])
+    return result
+
+
+def recalculate_order_totals(connection, order_ids=None) -> list:
+    """
+    Пересчет денормализованных итогов заказов одним проходом.
+
+    Суммы строк и оплат берутся агрегатами в копейках, итоги считаются тем же
+    движком цен, что и в интерфейсе (order_totals_kopecks). Записываются
+    только заказы, итоги которых разошлись с сохраненными. order_ids=None -
+    все заказы (проверка целостности). Возвращает id исправленных заказов.
+    """
+    if order_ids is not None:
+        order_ids = sorted(set(order_ids))
+        if not order_ids:
+            return []
+
+    services = _rows_by_order(connection, select(
+        OrderService.order_id,
+        func.sum(sql_kopecks(OrderService.price)),
+        func.sum(sql_kopecks(func.coalesce(OrderService.price_with_vat, OrderService.price))
+                 - sql_kopecks(OrderService.price))
+    ).group_by(OrderService.order_id), order_ids)
+
+    parts = _rows_by_order(connection, select(
+        OrderPart.order_id,
+        func.sum(sql_kopecks(func.coalesce(OrderPart.total, OrderPart.price * OrderPart.quantity)))
+    ).group_by(OrderPart.order_id), order_ids)
+
+    payment_kop = sql_kopecks(OrderPayment.amount)
+    payments = _rows_by_order(connection, select(
+        OrderPayment.order_id,
+        func.sum(case((OrderPayment.is_prepayment == 1, payment_kop), else_=0)),
+        func.sum(case((OrderPayment.is_prepayment == 1, 0), else_=payment_kop))
+    ).group_by(OrderPayment.order_id), order_ids)
+
+    orders = _rows_by_order(connection, select(
+        Order.id, Order.discount_percent,
+        *(getattr(Order, name) for name in ORDER_TOTAL_COLUMNS)
+    ), order_ids)
+
+    updates = []
+    for order_id, row in orders.items():
+        services_kop, vat_kop = services.get(order_id, (0, 0))
+        parts_kop, = parts.get(order_id, (0,))
+        prepayment_kop, additional_kop = payments.get(order_id, (0, 0))
+        totals = order_totals_kopecks(services_kop, parts_kop, vat_kop, row[0],
+                                      prepayment_kop + additional_kop)
+        values = {
+            'services_total': totals['services_total'],
+            'parts_total': totals['parts_total'],
+            'vat_total': totals['vat_total'],
+            'discount_total': totals['discount_total'],
+            'total_amount': totals['total'],
+            'prepayment': prepayment_kop,
+            'additional_payment': additional_kop,
+            'paid_total': totals['paid_total'],
+            'balance_due': totals['balance_due'],
+        }
+        stored = dict(zip(ORDER_TOTAL_COLUMNS, row[1:]))
+        if any(to_kopecks(stored[name]) != values[name] for name in ORDER_TOTAL_COLUMNS):
+            updates.append({'order_pk': order_id,
+                            **{name: kop / 100 for name, kop in values.items()}})
+
+    if updates:
+        table = Order.__table__
+        connection.execute(
+            update(table).where(table.c.id == bindparam('order_pk')).values(
+                {name: bindparam(name) for name in ORDER_TOTAL_COLUMNS}
+            ),
+            updates
+        )
+    return [row['order_pk'] for row in updates]
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_touched_orders(session, flush_context):
+    """Сбор заказов, строки или оплаты которых изменились во flush"""
+    touched = session.info.setdefault(_TOUCHED_ORDERS_KEY, set())
+    changed = session.info.setdefault(_CHANGED_ORDERS_KEY, set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (OrderService, OrderPart, OrderPayment)):
+            if obj.order_id:
+                touched.add(obj.order_id)
+                changed.add(obj.order_id)
+        elif isinstance(obj, Order):
+            changed.add(obj.id)
+            if obj in session.deleted:
+                continue
+            state = obj._sa_instance_state
+            if obj in session.new or any(
+                state.attrs[name].history.has_changes() for name in _ORDER_TOTALS_SOURCES
+            ):
+                touched.add(obj.id)
+
+
+@event.listens_for(Session, 'before_commit')
+def _recalculate_touched_orders(session):
+    """Пересчет итогов помеченных заказов в той же транзакции"""
+    session.flush()
+    order_ids = session.info.pop(_TOUCHED_ORDERS_KEY, None)
+    if order_ids:
+        changed = recalculate_order_totals(session.connection(), order_ids)
+        # Объекты в сессии должны увидеть новые итоги
+        for obj in session.identity_map.values():
+            if isinstance(obj, Order) and obj.id in changed:
+                session.expire(obj, list(ORDER_TOTAL_COLUMNS) + ['updated_at'])
+
+
+@event.listens_for(Session, 'after_commit')
+def _notify_orders_committed(session):
+    """Оповещение подписчиков о зафиксированных изменениях заказов"""
+    order_ids = session.info.pop(_CHANGED_ORDERS_KEY, None)
+    if order_ids:
+        for callback in _orders_committed_callbacks:
+            callback(order_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_touched_orders(session):
+    session.info.pop(_TOUCHED_ORDERS_KEY, None)
+    session.info.pop(_CHANGED_ORDERS_KEY, None)
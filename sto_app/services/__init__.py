@@ -0,0 +1,32 @@
+"""
+Сервисный слой СТО без зависимости от Qt.
+
+Бизнес-логика, которую вызывают окна и которую можно использовать без
+интерфейса (пакетные задания, замеры, фоновые процессы):
+- orders: список заказов, сохранение черновика/заказа, смена статусов
+- clients: проверка и сохранение клиентов и автомобилей, поиск
+- catalog: каталог услуг и сотрудники
+- reports: запросы отчетов
+- backup: резервное копирование и восстановление
+- changes: изменения данных из других процессов (журнал изменений)
+- replication: обмен изменениями между площадками (пакеты синхронизации)
+- archive: перенос закрытых заказов в архивную БД и чтение истории
+
+Импорт пакета не загружает PySide6.
+"""
+
+from .errors import ServiceError, ValidationError
+from . import orders, clients, catalog, reports, backup, changes, replication, archive
+
+__all__ = [
+    'ServiceError',
+    'ValidationError',
+    'orders',
+    'clients',
+    'catalog',
+    'reports',
+    'backup',
+    'changes',
+    'replication',
+    'archive'
+]
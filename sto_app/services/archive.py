@@ -0,0 +1,304 @@
+# sto_app/services/archive.py
+"""
+Архив закрытых заказов: рабочая (горячая) и архивная (холодная) БД.
+
+Завершенные без долга и отмененные заказы старше порога переносятся
+вместе со строками услуг, запчастей и оплат в файл архива
+(config.database.ARCHIVE_DATABASE). Он подключен к каждому соединению
+схемой archive, поэтому перенос - обычные INSERT ... SELECT между
+схемами. Список заказов, проверки и обычные отчеты читают только рабочую
+БД, и она не растет с годами. Запросы, которым нужна история (отчеты за
+архивный период, поиск с архивом, история клиента), читают объединение
+рабочих и архивных таблиц (history_entity).
+
+Перенос идет пакетами, каждый пакет - две транзакции: копия в архив,
+затем удаление из рабочей БД. В режиме WAL транзакция по двум файлам не
+атомарна, поэтому порядок такой, чтобы сбой оставил заказ в обеих БД, а
+не потерял его. Рабочая БД главнее: копии заказов, которые есть в ней,
+удаляются из архива в начале каждого запуска. Удаление из рабочей БД не
+считается удалением для репликации (sync_state.importing).
+"""
+
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import Column, MetaData, Table, select, text, union_all
+from sqlalchemy.orm import aliased
+
+from ..models_sto import OrderStatus
+from .errors import ServiceError, ValidationError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_DAYS = 365
+ARCHIVE_BATCH = 500
+
+# Строки заказа: копируются после заказа, удаляются перед ним
+LINE_TABLES = ('order_services', 'order_parts', 'order_payments')
+
+_ARCHIVE_METADATA = MetaData()
+
+# Закрытый заказ: отменен или завершен без долга. Последние строки таблиц
+# остаются в рабочей БД - SQLite выдает новые id после наибольшего, и id
+# архивных строк не повторятся.
+_LAST_LINES = ''.join(
+    f"\n    AND o.id NOT IN (SELECT order_id FROM main.{table} WHERE id = (SELECT MAX(id) FROM main.{table}))"
+    for table in LINE_TABLES)
+_ARCHIVABLE = f"""
+    o.date_received < :cutoff
+    AND (o.status = '{OrderStatus.CANCELLED.name}'
+         OR (o.status = '{OrderStatus.COMPLETED.name}' AND COALESCE(o.balance_due, 0) <= 0))
+    AND o.id < (SELECT MAX(id) FROM main.orders){_LAST_LINES}
+"""
+
+# Заказ не менялся после копирования в архив
+_UNCHANGED = """
+    a.updated_at IS o.updated_at AND a.status IS o.status AND a.total_amount IS o.total_amount
+    AND a.paid_total IS o.paid_total AND a.balance_due IS o.balance_due
+"""
+
+
+@dataclass
+class ArchiveResult:
+    """Итог переноса заказов в архив"""
+    cutoff: datetime
+    orders: int = 0
+    lines: Dict[str, int] = field(default_factory=dict)
+    batches: int = 0
+    changed: int = 0     # изменены во время переноса - остались в рабочей БД
+    recovered: int = 0   # копии после прерванного переноса
+
+
+@dataclass
+class ArchiveStatus:
+    path: Optional[str]
+    hot_orders: int
+    archived_orders: int
+    oldest: Optional[datetime]
+    newest: Optional[datetime]
+    eligible: int
+
+
+def _schema():
+    from config.database import ARCHIVE_SCHEMA
+    return ARCHIVE_SCHEMA
+
+
+def is_available(connection) -> bool:
+    """Архив подключен к соединению (connection или сессия) и создан init_database"""
+    schema = _schema()
+    if not any(row[1] == schema for row in connection.execute(text("PRAGMA database_list"))):
+        return False
+    return connection.execute(text(
+        f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = 'orders'")).first() is not None
+
+
+def _require_archive(connection):
+    from config.database import ARCHIVE_DATABASE
+
+    if not is_available(connection):
+        raise ServiceError(f"Архив заказов недоступен: {ARCHIVE_DATABASE or 'нужна БД SQLite в файле'}")
+
+
+# --- Чтение истории ---
+
+@lru_cache(maxsize=None)
+def archive_table(table: Table) -> Table:
+    """Таблица архива с колонками модели (для запросов)"""
+    return Table(table.name, _ARCHIVE_METADATA,
+                 *(Column(column.name, column.type, primary_key=column.primary_key) for column in table.columns),
+                 schema=_schema())
+
+
+def archive_entity(model):
+    """Модель заказа или строки заказа, читающая только архив"""
+    # Колонки архивной таблицы сопоставляются с атрибутами модели по именам
+    return aliased(model, archive_table(model.__table__), name=f'{model.__tablename__}_archive',
+                   adapt_on_names=True)
+
+
+def history_entity(model):
+    """Модель, читающая рабочую таблицу и архив вместе (только для чтения)"""
+    table = model.__table__
+    archived = archive_table(table)
+    history = union_all(
+        select(*table.columns),
+        select(*(archived.c[column.name] for column in table.columns)),
+    ).subquery(f'{table.name}_history')
+    return aliased(model, history, name=f'{table.name}_history')
+
+
+def _as_datetime(value) -> Optional[datetime]:
+    """Дата или значение из SQLite (строка ISO) -> datetime"""
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return datetime.combine(value, time.min)
+
+
+def _cutoff(days: int) -> datetime:
+    return datetime.combine(date.today() - timedelta(days=days), time.min)
+
+
+def reaches(session, date_from) -> bool:
+    """Нужен ли архив запросу с началом периода date_from"""
+    if date_from is None or not is_available(session):
+        return False
+    newest = _as_datetime(session.execute(text(f"SELECT MAX(date_received) FROM {_schema()}.orders")).scalar())
+    return newest is not None and _as_datetime(date_from) <= newest
+
+
+# --- Перенос ---
+
+def _columns(connection, table: str) -> str:
+    return ', '.join(row[1] for row in connection.execute(text(f"PRAGMA main.table_info({table})")))
+
+
+def _id_list(ids) -> str:
+    return ', '.join(str(int(row_id)) for row_id in ids)
+
+
+def _drop_archived(connection, ids_sql: str):
+    archive = _schema()
+    for table in LINE_TABLES:
+        connection.execute(text(f"DELETE FROM {archive}.{table} WHERE order_id IN ({ids_sql})"))
+    connection.execute(text(f"DELETE FROM {archive}.orders WHERE id IN ({ids_sql})"))
+
+
+def _set_sync_paused(connection, paused: bool):
+    # Перенос между рабочей БД и архивом - не изменение данных для других площадок
+    connection.execute(text("UPDATE sync_state SET importing = :paused"), {'paused': int(paused)})
+
+
+def _recover(connection) -> int:
+    """Удалить из архива копии заказов, которые есть в рабочей БД"""
+    duplicates = [row[0] for row in connection.execute(text(
+        f"SELECT id FROM {_schema()}.orders WHERE id IN (SELECT id FROM main.orders)"))]
+    if duplicates:
+        _drop_archived(connection, _id_list(duplicates))
+    return len(duplicates)
+
+
+def archivable_ids(connection, cutoff: datetime) -> List[int]:
+    return [row[0] for row in connection.execute(
+        text(f"SELECT o.id FROM main.orders o WHERE {_ARCHIVABLE} ORDER BY o.id"), {'cutoff': str(cutoff)})]
+
+
+def archive_orders(engine, days: int = DEFAULT_ARCHIVE_DAYS, batch_size: int = ARCHIVE_BATCH,
+                   progress: Optional[Callable[[ArchiveResult], None]] = None) -> ArchiveResult:
+    """
+    Перенести закрытые заказы с датой приема старше days дней в архив
+    пакетами по batch_size заказов. progress(result) - после каждого пакета.
+    """
+    if days < 1:
+        # Номера заказов уникальны только в рабочей БД и содержат дату приема
+        raise ValidationError('days', 'Порог архивации - не меньше одного дня')
+    result = ArchiveResult(cutoff=_cutoff(days))
+    archive = _schema()
+
+    with engine.begin() as connection:
+        _require_archive(connection)
+        result.recovered = _recover(connection)
+        ids = archivable_ids(connection, result.cutoff)
+        columns = {table: _columns(connection, table) for table in ('orders',) + LINE_TABLES}
+
+    for start in range(0, len(ids), batch_size):
+        ids_sql = _id_list(ids[start:start + batch_size])
+
+        # 1. Копия в архив (условия проверяются заново - заказ мог измениться)
+        with engine.begin() as connection:
+            connection.execute(text(f"""
+                INSERT INTO {archive}.orders ({columns['orders']})
+                SELECT {columns['orders']} FROM main.orders o WHERE o.id IN ({ids_sql}) AND {_ARCHIVABLE}
+            """), {'cutoff': str(result.cutoff)})
+            for table in LINE_TABLES:
+                connection.execute(text(f"""
+                    INSERT INTO {archive}.{table} ({columns[table]})
+                    SELECT {columns[table]} FROM main.{table}
+                    WHERE order_id IN (SELECT id FROM {archive}.orders WHERE id IN ({ids_sql}))
+                """))
+
+        # 2. Удаление из рабочей БД заказов, не изменившихся после копирования
+        with engine.begin() as connection:
+            moved = [row[0] for row in connection.execute(text(f"""
+                SELECT o.id FROM main.orders o JOIN {archive}.orders a ON a.id = o.id
+                WHERE o.id IN ({ids_sql}) AND {_UNCHANGED}
+            """))]
+            _set_sync_paused(connection, True)
+            if moved:
+                moved_sql = _id_list(moved)
+                for table in LINE_TABLES:
+                    deleted = connection.execute(text(
+                        f"DELETE FROM main.{table} WHERE order_id IN ({moved_sql})")).rowcount
+                    result.lines[table] = result.lines.get(table, 0) + deleted
+                connection.execute(text(f"DELETE FROM main.orders WHERE id IN ({moved_sql})"))
+            _set_sync_paused(connection, False)
+            result.changed += _recover(connection)
+
+        result.orders += len(moved)
+        result.batches += 1
+        if progress:
+            progress(result)
+
+    logger.info(f"В архив перенесено заказов: {result.orders} (до {result.cutoff:%d.%m.%Y})")
+    return result
+
+
+def restore_order(engine, order_number: str) -> int:
+    """Вернуть заказ из архива в рабочую БД (например, для гарантийной доработки), вернуть id"""
+    archive = _schema()
+
+    with engine.begin() as connection:
+        _require_archive(connection)
+        order_id = connection.execute(text(f"SELECT id FROM {archive}.orders WHERE order_number = :number"),
+                                      {'number': order_number}).scalar()
+        if order_id is None:
+            raise ServiceError(f'Заказ {order_number} не найден в архиве')
+        if connection.execute(text("SELECT 1 FROM main.orders WHERE order_number = :number"),
+                              {'number': order_number}).first():
+            raise ServiceError(f'Заказ {order_number} уже есть в рабочей БД')
+
+        _set_sync_paused(connection, True)
+        for table in ('orders',) + LINE_TABLES:
+            columns = _columns(connection, table)
+            key = 'id' if table == 'orders' else 'order_id'
+            connection.execute(text(f"""
+                INSERT INTO main.{table} ({columns})
+                SELECT {columns} FROM {archive}.{table} WHERE {key} = :id
+            """), {'id': order_id})
+        _set_sync_paused(connection, False)
+
+    # Копия в архиве удаляется отдельно: при сбое заказ останется в рабочей БД
+    with engine.begin() as connection:
+        _drop_archived(connection, _id_list([order_id]))
+    logger.info(f"Заказ {order_number} возвращен из архива")
+    return order_id
+
+
+def archive_status(connection, days: int = DEFAULT_ARCHIVE_DAYS) -> ArchiveStatus:
+    """Размер рабочей БД и архива, заказы, которые можно перенести"""
+    from config.database import ARCHIVE_DATABASE
+
+    _require_archive(connection)
+    archive = _schema()
+    archived, oldest, newest = connection.execute(text(
+        f"SELECT COUNT(*), MIN(date_received), MAX(date_received) FROM {archive}.orders")).one()
+    return ArchiveStatus(
+        path=ARCHIVE_DATABASE,
+        hot_orders=connection.execute(text("SELECT COUNT(*) FROM main.orders")).scalar(),
+        archived_orders=archived,
+        oldest=_as_datetime(oldest),
+        newest=_as_datetime(newest),
+        eligible=connection.execute(text(f"SELECT COUNT(*) FROM main.orders o WHERE {_ARCHIVABLE}"),
+                                    {'cutoff': str(_cutoff(days))}).scalar(),
+    )
+
+
+def is_archived_uid(connection, sync_uid: str) -> bool:
+    """Заказ с этим ключом репликации лежит в архиве"""
+    return connection.execute(text(f"SELECT 1 FROM {_schema()}.orders WHERE sync_uid = :uid"),
+                              {'uid': sync_uid}).first() is not None
@@ -0,0 +1,157 @@
+# sto_app/services/backup.py
+"""
+Резервное копирование и восстановление: ZIP с копией БД, архива заказов
+(если он есть), метаданными и (по желанию) каталогом resources.
+
+progress(percent, message) вызывается по ходу работы; фоновые потоки
+интерфейса (utils.backup_manager) передают его в свои сигналы.
+"""
+
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import zipfile
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+from .errors import ServiceError
+
+logger = logging.getLogger(__name__)
+
+APP_VERSION = '3.0'
+DATABASE_ARCNAME = 'database.db'
+ARCHIVE_ARCNAME = 'archive.db'
+METADATA_ARCNAME = 'metadata.json'
+RESTORED_DATABASE_NAME = 'sto_management.db'
+
+Progress = Callable[[int, str], None]
+
+
+def _no_progress(percent: int, message: str):
+    pass
+
+
+def copy_database(source_path: str, target_path: str):
+    """
+    Копия БД через backup API SQLite: согласованный снимок, даже если
+    в это время приложение пишет в базу
+    """
+    with closing(sqlite3.connect(source_path)) as source, closing(sqlite3.connect(target_path)) as target:
+        source.backup(target)
+
+
+def _archive_path(database_path) -> str:
+    from config.database import archive_path_for
+    return archive_path_for(str(database_path))
+
+
+def create_backup(backup_path: str, database_path: str, include_files: bool = True,
+                  progress: Optional[Progress] = None, archive_path: Optional[str] = None) -> dict:
+    """
+    Создать архив резервной копии, вернуть его метаданные. archive_path -
+    архив заказов (по умолчанию - файл рядом с БД)
+    """
+    progress = progress or _no_progress
+    progress(0, 'Подготовка к созданию резервной копии...')
+    archive_path = archive_path or _archive_path(database_path)
+    include_archive = os.path.exists(archive_path) and os.path.getsize(archive_path) > 0
+
+    temp_dir = Path(backup_path).parent / 'temp_backup'
+    temp_dir.mkdir(exist_ok=True)
+    try:
+        progress(20, 'Копирование базы данных...')
+        copy_database(database_path, str(temp_dir / DATABASE_ARCNAME))
+        if include_archive:
+            progress(30, 'Копирование архива заказов...')
+            copy_database(archive_path, str(temp_dir / ARCHIVE_ARCNAME))
+
+        progress(40, 'Создание метаданных...')
+        metadata = {
+            'created_at': datetime.now().isoformat(),
+            'database_size': os.path.getsize(database_path),
+            'app_version': APP_VERSION,
+            'backup_type': 'full' if include_files else 'database_only',
+            'files_included': include_files,
+            'archive_included': include_archive
+        }
+        with open(temp_dir / METADATA_ARCNAME, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2, ensure_ascii=False)
+
+        if include_files:
+            progress(60, 'Копирование файлов ресурсов...')
+            resources_dir = Path('resources')
+            if resources_dir.exists():
+                shutil.copytree(resources_dir, temp_dir / 'resources')
+
+        progress(80, 'Создание архива...')
+        with zipfile.ZipFile(backup_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            for file_path in temp_dir.rglob('*'):
+                if file_path.is_file():
+                    zipf.write(file_path, file_path.relative_to(temp_dir))
+
+        progress(100, 'Резервная копия создана успешно')
+        logger.info(f"Резервная копия создана: {backup_path}")
+        return metadata
+    finally:
+        if temp_dir.exists():
+            shutil.rmtree(temp_dir)
+
+
+def restore_backup(backup_path: str, restore_to: str, progress: Optional[Progress] = None) -> Path:
+    """
+    Восстановить БД (архив заказов и resources - если есть в копии) в каталог restore_to.
+    Текущие файлы БД сохраняются рядом с расширением .db.backup. Возвращает путь к БД.
+    """
+    progress = progress or _no_progress
+    progress(0, 'Проверка архива...')
+    if not zipfile.is_zipfile(backup_path):
+        raise ServiceError('Неверный формат архива')
+
+    temp_dir = Path(restore_to) / 'temp_restore'
+    temp_dir.mkdir(exist_ok=True)
+    try:
+        progress(20, 'Извлечение архива...')
+        with zipfile.ZipFile(backup_path, 'r') as zipf:
+            zipf.extractall(temp_dir)
+
+        metadata_path = temp_dir / METADATA_ARCNAME
+        if metadata_path.exists():
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+            progress(20, f'Восстановление из резервной копии от {metadata.get("created_at", "неизвестно")}')
+
+        progress(60, 'Восстановление базы данных...')
+        db_source = temp_dir / DATABASE_ARCNAME
+        if not db_source.exists():
+            raise ServiceError('База данных не найдена в архиве')
+        db_target = Path(restore_to) / RESTORED_DATABASE_NAME
+        if db_target.exists():
+            shutil.copy2(db_target, db_target.with_suffix('.db.backup'))
+        shutil.copy2(db_source, db_target)
+
+        archive_source = temp_dir / ARCHIVE_ARCNAME
+        if archive_source.exists():
+            progress(70, 'Восстановление архива заказов...')
+            archive_target = Path(_archive_path(db_target))
+            if archive_target.exists():
+                shutil.copy2(archive_target, archive_target.with_suffix('.db.backup'))
+            shutil.copy2(archive_source, archive_target)
+
+        resources_source = temp_dir / 'resources'
+        if resources_source.exists():
+            progress(80, 'Восстановление файлов ресурсов...')
+            resources_target = Path(restore_to) / 'resources'
+            if resources_target.exists():
+                shutil.rmtree(resources_target)
+            shutil.copytree(resources_source, resources_target)
+
+        progress(100, 'Восстановление завершено')
+        logger.info(f"Данные восстановлены из {backup_path}")
+        return db_target
+    finally:
+        if temp_dir.exists():
+            shutil.rmtree(temp_dir)
@@ -0,0 +1,110 @@
+# sto_app/services/catalog.py
+"""
+Справочники: каталог услуг и сотрудники.
+
+Чтение - из общего кэша справочников (utils.reference_cache), который
+сбрасывается после коммита изменений. Ошибки БД (в том числе
+IntegrityError при удалении используемой записи) передаются вызывающему.
+"""
+
+import logging
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from shared_models.common_models import Employee
+from ..models_sto import ServiceCatalog
+from ..utils.fuzzy_search import service_index
+from ..utils.reference_cache import reference_cache
+from .errors import ServiceError, ValidationError
+
+logger = logging.getLogger(__name__)
+
+SERVICE_FIELDS = ('name', 'description', 'category', 'default_price', 'vat_rate',
+                  'duration_hours', 'is_active')
+EMPLOYEE_FIELDS = ('last_name', 'first_name', 'middle_name', 'phone', 'email', 'position',
+                   'department', 'hire_date', 'hourly_rate', 'is_active')
+
+
+def _apply(instance, allowed, values: dict):
+    for name, value in values.items():
+        if name not in allowed:
+            raise ValueError(f"Неизвестное поле: {name}")
+        if hasattr(instance, name):
+            setattr(instance, name, value)
+
+
+def _commit(session: Session, instance):
+    try:
+        session.commit()
+        return instance
+    except Exception:
+        session.rollback()
+        raise
+
+
+# --- Услуги ---
+
+def save_service(session: Session, service: Optional[ServiceCatalog] = None, **values) -> ServiceCatalog:
+    """Создание (service=None) или обновление услуги каталога"""
+    name = values.get('name', service.name if service else '')
+    if not (name or '').strip():
+        raise ValidationError('name', 'Введите название услуги')
+    if service is None:
+        service = ServiceCatalog()
+        session.add(service)
+    _apply(service, SERVICE_FIELDS, values)
+    return _commit(session, service)
+
+
+def delete_service(session: Session, service_id: int):
+    service = session.get(ServiceCatalog, service_id)
+    if service is None:
+        raise ServiceError('Услуга не найдена')
+    session.delete(service)
+    _commit(session, service)
+
+
+def active_services(session: Session) -> List:
+    """Активные услуги по названию (записи кэша справочников)"""
+    return list(reference_cache.services(session).ordered('name'))
+
+
+def search_services(session: Session, text: str, limit: int = 10) -> List:
+    """Поиск услуги по названию или синониму с учетом опечаток"""
+    return [match.record for match in service_index.search(session, text, limit=limit)]
+
+
+# --- Сотрудники ---
+
+def save_employee(session: Session, employee: Optional[Employee] = None, **values) -> Employee:
+    """Создание (employee=None) или обновление сотрудника"""
+    last_name = values.get('last_name', employee.last_name if employee else '')
+    first_name = values.get('first_name', employee.first_name if employee else '')
+    position = values.get('position', employee.position if employee else '')
+    if not last_name or not first_name:
+        raise ValidationError('last_name', 'Введите фамилию и имя сотрудника')
+    if not position:
+        raise ValidationError('position', 'Введите должность сотрудника')
+
+    if employee is None:
+        employee = Employee()
+        session.add(employee)
+    # name обязателен в схеме; role дублирует должность для совместимости
+    employee.name = f"{last_name} {first_name}"
+    employee.role = position
+    _apply(employee, EMPLOYEE_FIELDS, values)
+    return _commit(session, employee)
+
+
+def delete_employee(session: Session, employee_id: int):
+    employee = session.get(Employee, employee_id)
+    if employee is None:
+        raise ServiceError('Сотрудник не найден')
+    session.delete(employee)
+    _commit(session, employee)
+
+
+def active_employees(session: Session) -> List:
+    """Активные сотрудники по фамилии (записи кэша справочников)"""
+    return list(reference_cache.employees(session).ordered('last_name'))
@@ -0,0 +1,131 @@
+# sto_app/services/changes.py
+"""
+Изменения данных из других процессов (второй экземпляр приложения,
+sales_app, сервер API, sto_cli).
+
+Триггеры (config.database.CHANGE_LOG_SOURCES) записывают каждую
+вставку, изменение и удаление в таблицу change_log: таблица, id строки
+(для строк, услуг, запчастей и оплат заказа - id заказа) и операция.
+Номер записи журнала растет, поэтому "изменения с N" - выборка по
+первичному ключу.
+
+ChangeFeed держит отдельное соединение и опрашивает PRAGMA
+data_version: значение меняется, только когда другое соединение
+зафиксировало запись в файл. Пока изменений нет, опрос не читает
+таблиц; журнал читается только после записи.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Больше изменившихся строк за один опрос - окнам проще перечитать все
+MAX_CHANGED_ROWS = 500
+
+_CHANGES_SINCE = text("""
+    SELECT table_name, row_id, MAX(id) FROM change_log
+    WHERE id > :last_id
+    GROUP BY table_name, row_id
+    LIMIT :limit
+""")
+
+
+@dataclass(frozen=True)
+class ChangeSet:
+    """
+    Изменения после записи журнала since_id до last_id включительно.
+    reset=True - изменений слишком много (или журнал очищен), строки не
+    перечислены, окна перечитывают данные целиком.
+    """
+    since_id: int
+    last_id: int
+    rows: Dict[str, FrozenSet[int]] = field(default_factory=dict)
+    reset: bool = False
+
+    def ids(self, table: str) -> FrozenSet[int]:
+        return self.rows.get(table, frozenset())
+
+    def touches(self, *tables) -> bool:
+        return self.reset or any(table in self.rows for table in tables)
+
+    def to_dict(self) -> dict:
+        return {'since_id': self.since_id, 'last_id': self.last_id, 'reset': self.reset,
+                'rows': {table: sorted(ids) for table, ids in self.rows.items()}}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ChangeSet':
+        return cls(data['since_id'], data['last_id'],
+                   {table: frozenset(ids) for table, ids in data['rows'].items()},
+                   data['reset'])
+
+
+def last_change_id(connection) -> int:
+    """Номер последней записи журнала (0 - журнал пуст)"""
+    return connection.execute(text("SELECT COALESCE(MAX(id), 0) FROM change_log")).scalar()
+
+
+def changes_since(connection, since_id: int, limit: int = MAX_CHANGED_ROWS) -> Optional[ChangeSet]:
+    """Изменения после записи since_id или None, если их нет"""
+    last_id = last_change_id(connection)
+    if last_id <= since_id:
+        return None
+
+    first_id = connection.execute(text("SELECT MIN(id) FROM change_log")).scalar()
+    if first_id > since_id + 1:
+        # Записи после since_id уже удалены из журнала - перечня изменений нет
+        return ChangeSet(since_id, last_id, reset=True)
+
+    rows: Dict[str, set] = {}
+    count = 0
+    for table, row_id, change_id in connection.execute(
+            _CHANGES_SINCE, {'last_id': since_id, 'limit': limit + 1}):
+        # Запись могла появиться после last_id - такие строки войдут в следующий опрос
+        if change_id <= last_id:
+            rows.setdefault(table, set()).add(row_id)
+            count += 1
+    if count > limit:
+        return ChangeSet(since_id, last_id, reset=True)
+    return ChangeSet(since_id, last_id, {table: frozenset(ids) for table, ids in rows.items()})
+
+
+class ChangeFeed:
+    """Опрос изменений локальной БД: poll() -> ChangeSet или None"""
+
+    def __init__(self, engine=None):
+        if engine is None:
+            from config.database import engine
+        self.engine = engine
+        self.connection = None
+        self.data_version = None
+        self.last_id = 0
+
+    def open(self):
+        # Отдельное соединение: data_version отслеживает записи остальных соединений
+        self.connection = self.engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+        self.data_version = self._data_version()
+        self.last_id = last_change_id(self.connection)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def _data_version(self) -> int:
+        return self.connection.execute(text("PRAGMA data_version")).scalar()
+
+    def poll(self) -> Optional[ChangeSet]:
+        if self.connection is None:
+            self.open()
+            return None
+        version = self._data_version()
+        if version == self.data_version:
+            return None
+        self.data_version = version
+        change_set = changes_since(self.connection, self.last_id)
+        if change_set is not None:
+            self.last_id = change_set.last_id
+        return change_set
@@ -0,0 +1,93 @@
+# sto_app/services/clients.py
+"""
+Клиенты и их автомобили: проверка, сохранение и поиск.
+
+Поиск - по индексированным ключам (utils.client_search, utils.car_search).
+"""
+
+import logging
+import re
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from shared_models.common_models import Client, Car
+from ..utils.car_search import find_car_by_vin
+from ..utils.client_search import find_clients
+from .errors import ValidationError
+
+logger = logging.getLogger(__name__)
+
+PHONE_PATTERN = re.compile(r"^\+380\d{9}$")
+EMAIL_PATTERN = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+
+CLIENT_FIELDS = ('name', 'phone', 'email', 'address')
+CAR_FIELDS = ('client_id', 'make', 'model', 'year', 'vin', 'license_plate', 'color',
+              'mileage', 'engine_volume', 'fuel_type', 'is_active', 'notes')
+
+
+def validate_client(name: str, phone: str, email: Optional[str] = None):
+    """Проверка полей клиента (ValidationError с именем поля)"""
+    if not name:
+        raise ValidationError('name', 'Имя клиента является обязательным полем.')
+    if len(name) < 2:
+        raise ValidationError('name', 'Имя клиента должно содержать минимум 2 символа.')
+    if not phone:
+        raise ValidationError('phone', 'Номер телефона является обязательным полем.')
+    if not PHONE_PATTERN.match(phone):
+        raise ValidationError('phone', 'Номер телефона должен быть в формате +380XXXXXXXXX')
+    if email and not EMAIL_PATTERN.match(email):
+        raise ValidationError('email', 'Введите корректный email адрес.')
+
+
+def _save(session: Session, model, instance, allowed, values: dict, title: str):
+    unknown = set(values) - set(allowed)
+    if unknown:
+        raise ValueError(f"Неизвестные поля: {', '.join(sorted(unknown))}")
+    try:
+        if instance is None:
+            instance = model(**values)
+            session.add(instance)
+            session.commit()
+            logger.info(f"Создан {title} ID: {instance.id}")
+        else:
+            for name, value in values.items():
+                setattr(instance, name, value)
+            session.commit()
+            logger.info(f"Обновлен {title} ID: {instance.id}")
+        return instance
+    except Exception:
+        session.rollback()
+        raise
+
+
+def save_client(session: Session, client: Optional[Client] = None, **values) -> Client:
+    """Создание (client=None) или обновление клиента"""
+    validate_client(values.get('name', client.name if client else ''),
+                    values.get('phone', client.phone if client else ''),
+                    values.get('email'))
+    return _save(session, Client, client, CLIENT_FIELDS, values, 'клиент')
+
+
+def save_car(session: Session, car: Optional[Car] = None, **values) -> Car:
+    """Создание (car=None) или обновление автомобиля"""
+    return _save(session, Car, car, CAR_FIELDS, values, 'автомобиль')
+
+
+def get_client(session: Session, client_id: int) -> Optional[Client]:
+    return session.get(Client, client_id)
+
+
+def client_cars(session: Session, client_id: int):
+    return session.query(Car).filter_by(client_id=client_id).all()
+
+
+__all__ = [
+    'validate_client',
+    'save_client',
+    'save_car',
+    'get_client',
+    'client_cars',
+    'find_clients',
+    'find_car_by_vin',
+]
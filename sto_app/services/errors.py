@@ -0,0 +1,15 @@
+# sto_app/services/errors.py
+"""Ошибки сервисного слоя (сообщения - для показа пользователю)"""
+
+
+class ServiceError(Exception):
+    """Операция не может быть выполнена"""
+
+
+class ValidationError(ServiceError):
+    """Некорректные данные; field - имя поля формы"""
+
+    def __init__(self, field: str, message: str):
+        super().__init__(message)
+        self.field = field
+        self.message = message
@@ -0,0 +1,333 @@
+# sto_app/services/orders.py
+"""
+Заказы: выборка списка, сохранение черновика и заказа, смена статусов,
+просмотр и оплаты.
+
+Позиции заказа передаются как OrderLineItems (utils.order_lines), поля
+формы - как OrderFields; итоги считаются по позициям в памяти.
+Автосохранение пишет только набор изменений (DraftChanges) из фонового
+потока. Функции коммитят сами и откатывают сессию при ошибке.
+
+Список заказов читает только рабочую БД; история клиента - и архив
+(services.archive).
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, List, Optional
+
+from sqlalchemy import desc, func, select
+from sqlalchemy.orm import Session, joinedload
+
+from shared_models.common_models import Client, Car
+from ..models_sto import Order, OrderPart, OrderPayment, OrderService, OrderStatus, PaymentMethod
+from ..utils import payments
+from ..utils.car_search import car_identifier_condition
+from ..utils.order_lines import (PART_COLUMNS, SERVICE_COLUMNS, DraftChanges, OrderLineItems,
+                                 apply_draft_changes, next_order_number)
+from ..utils.order_view_model import OrderViewModel, order_view_cache
+from ..utils.pricing import ZERO, OrderTotals, to_kopecks
+from . import archive
+from .errors import ServiceError, ValidationError
+
+logger = logging.getLogger(__name__)
+
+ALL_STATUSES = 'Все'
+
+# Поля заказа, которые пишет форма и автосохранение черновика
+DRAFT_FIELDS = ('client_id', 'car_id', 'date_received', 'date_delivery', 'notes',
+                'discount_percent', 'total_amount', 'prepayment')
+
+
+@dataclass
+class OrderFields:
+    """Поля заказа из формы"""
+    client_id: Optional[int]
+    car_id: Optional[int] = None
+    date_received: Optional[datetime] = None
+    date_delivery: Optional[datetime] = None
+    notes: str = ''
+    discount_percent: Decimal = ZERO
+    prepayment: Decimal = ZERO
+
+
+# --- Список заказов ---
+
+def orders_query(session: Session, filters: Optional[dict] = None):
+    """
+    Запрос списка заказов (с клиентом, автомобилем и ответственным).
+
+    Фильтры: status (значение OrderStatus или "Все"), client_search,
+    vin_search (VIN или гос. номер), date_from, date_to, only_unpaid,
+    order_ids (только эти заказы).
+    """
+    query = session.query(Order).options(
+        joinedload(Order.client),
+        joinedload(Order.car),
+        joinedload(Order.responsible_person)
+    )
+
+    if filters:
+        if filters.get('status') and filters['status'] != ALL_STATUSES:
+            query = query.filter(Order.status == OrderStatus(filters['status']))
+
+        if filters.get('client_search'):
+            search_term = f"%{filters['client_search']}%"
+            query = query.join(Client).filter(Client.name.ilike(search_term))
+
+        if filters.get('vin_search'):
+            # Начало/конец VIN или начало гос. номера - поиск по индексу
+            query = query.join(Car).filter(car_identifier_condition(filters['vin_search']))
+
+        if filters.get('date_from'):
+            query = query.filter(Order.date_received >= filters['date_from'])
+
+        if filters.get('date_to'):
+            query = query.filter(Order.date_received <= filters['date_to'])
+
+        if filters.get('only_unpaid'):
+            query = query.filter(Order.balance_due > 0)
+
+        if filters.get('order_ids') is not None:
+            query = query.filter(Order.id.in_(filters['order_ids']))
+
+    return query.order_by(desc(Order.date_received))
+
+
+def list_orders(session: Session, filters: Optional[dict] = None):
+    return orders_query(session, filters).all()
+
+
+def get_order(session: Session, order_id: int) -> Optional[Order]:
+    return session.get(Order, order_id)
+
+
+def changed_orders(session: Session, order_ids, filters: Optional[dict] = None):
+    """
+    Заказы из order_ids, которые проходят фильтры списка, перечитанные из
+    БД (изменены другим процессом - объекты сессии обновляются)
+    """
+    if not order_ids:
+        return []
+    filters = dict(filters or {}, order_ids=sorted(order_ids))
+    return orders_query(session, filters).populate_existing().all()
+
+
+@dataclass(frozen=True)
+class HistoryRow:
+    """Заказ в истории клиента (archived - из архива, только для просмотра)"""
+    id: int
+    order_number: str
+    date_received: Optional[datetime]
+    status: Optional[OrderStatus]
+    total_amount: float
+    balance_due: float
+    car_title: str
+    archived: bool = False
+
+
+def client_history(session: Session, client_id: int, include_archive: bool = True) -> List[HistoryRow]:
+    """Заказы клиента, новые сверху; include_archive - вместе с перенесенными в архив"""
+    sources = [(Order, False)]
+    if include_archive and archive.is_available(session):
+        sources.append((archive.archive_entity(Order), True))
+
+    rows = []
+    for orders, archived in sources:
+        statement = select(
+            orders.id, orders.order_number, orders.date_received, orders.status,
+            orders.total_amount, orders.balance_due, Car.brand, Car.model
+        ).select_from(orders).outerjoin(Car, orders.car_id == Car.id).where(orders.client_id == client_id)
+        rows += [HistoryRow(row.id, row.order_number, row.date_received, row.status,
+                            row.total_amount or 0.0, row.balance_due or 0.0,
+                            f"{row.brand or ''} {row.model or ''}".strip(), archived)
+                 for row in session.execute(statement)]
+    return sorted(rows, key=lambda row: row.date_received or datetime.min, reverse=True)
+
+
+# --- Сохранение ---
+
+def order_totals(line_items: OrderLineItems, fields: OrderFields) -> OrderTotals:
+    """Итоги заказа по позициям в памяти"""
+    return line_items.totals(discount_percent=fields.discount_percent, prepayment=fields.prepayment)
+
+
+def save_draft(session: Session, line_items: OrderLineItems, fields: OrderFields,
+               order: Optional[Order] = None) -> Order:
+    """
+    Сохранение черновика: новый заказ получает номер, поля и итоги
+    берутся из формы, строки синхронизируются с БД (только изменения).
+    """
+    if not fields.client_id:
+        raise ValidationError('client_id', 'Выберите клиента')
+
+    try:
+        if order is None:
+            order = Order()
+            order.order_number = next_order_number(session)
+            session.add(order)
+
+        order.client_id = fields.client_id
+        if fields.car_id:
+            order.car_id = fields.car_id
+        order.date_received = fields.date_received
+        order.date_delivery = fields.date_delivery
+        order.notes = fields.notes
+        order.status = OrderStatus.DRAFT
+
+        totals = order_totals(line_items, fields)
+        order.discount_percent = float(totals.discount_percent)
+        order.total_amount = float(totals.total)
+        line_items.save_to_order(session, order, {'prepayment': float(totals.prepayment)})
+
+        session.commit()
+        return order
+    except Exception:
+        session.rollback()
+        raise
+
+
+def place_order(session: Session, line_items: OrderLineItems, fields: OrderFields,
+                order: Optional[Order] = None, status: Optional[OrderStatus] = None) -> Order:
+    """Сохранение заказа: черновик и затем статус (по умолчанию - в работе)"""
+    if not fields.client_id or not fields.car_id:
+        raise ValidationError('car_id', 'Выберите клиента и автомобиль')
+
+    order = save_draft(session, line_items, fields, order)
+    try:
+        order.status = status or OrderStatus.IN_WORK
+        session.commit()
+        return order
+    except Exception:
+        session.rollback()
+        raise
+
+
+def _check_draft_changes(session: Session, changes: DraftChanges):
+    """
+    Проверка набора изменений, пришедшего извне: только поля формы и
+    колонки строк, обновляемые и удаляемые строки - этого заказа
+    """
+    unknown = set(changes.order_fields) - set(DRAFT_FIELDS)
+    for values in [values for _, values in changes.new_services] + changes.updated_services:
+        unknown |= set(values) - set(SERVICE_COLUMNS) - {'id'}
+    for values in [values for _, values in changes.new_parts] + changes.updated_parts:
+        unknown |= set(values) - set(PART_COLUMNS) - {'id'}
+    if unknown:
+        raise ValueError(f"Неизвестные поля: {', '.join(sorted(unknown))}")
+
+    if changes.order_id is None:
+        if not changes.order_fields.get('client_id'):
+            raise ValidationError('client_id', 'Выберите клиента')
+    elif session.get(Order, changes.order_id) is None:
+        raise ServiceError(f'Заказ не найден: {changes.order_id}')
+
+    for model, ids in ((OrderService, [values['id'] for values in changes.updated_services] +
+                        changes.deleted_service_ids),
+                       (OrderPart, [values['id'] for values in changes.updated_parts] +
+                        changes.deleted_part_ids)):
+        if not ids:
+            continue
+        found = session.execute(
+            select(func.count()).select_from(model)
+            .where(model.id.in_(ids), model.order_id == changes.order_id)
+        ).scalar()
+        if found != len(set(ids)):
+            raise ServiceError(f'Строки не принадлежат заказу {changes.order_id}')
+
+
+def save_draft_changes(session: Session, changes: DraftChanges) -> DraftChanges:
+    """
+    Запись набора изменений черновика (автосохранение). Новый заказ
+    получает id и номер, вставленные строки - id (в том же changes).
+    """
+    try:
+        _check_draft_changes(session, changes)
+        apply_draft_changes(session, changes)
+        session.commit()
+        return changes
+    except Exception:
+        session.rollback()
+        raise
+
+
+def draft_writer(session: Session) -> Callable[[DraftChanges], DraftChanges]:
+    """Запись изменений черновика для фонового потока: своя сессия на движке session"""
+    bind = session.get_bind()
+
+    def write(changes: DraftChanges) -> DraftChanges:
+        with Session(bind=bind) as worker_session:
+            return save_draft_changes(worker_session, changes)
+    return write
+
+
+# --- Просмотр и оплаты ---
+
+def order_view(session: Session, order_id: int, updated_at: Optional[datetime] = None) -> Optional[OrderViewModel]:
+    """Данные заказа для диалога деталей (кэш по order_id и updated_at)"""
+    return order_view_cache.get(session, order_id, updated_at)
+
+
+@dataclass(frozen=True)
+class PaymentRow:
+    """Запись журнала оплат заказа"""
+    paid_at: datetime
+    amount: float
+    method: Optional[PaymentMethod]
+    note: str
+
+
+def order_payments(session: Session, order_id: int) -> List[PaymentRow]:
+    """Оплаты заказа по дате"""
+    statement = select(OrderPayment.paid_at, OrderPayment.amount, OrderPayment.method, OrderPayment.note) \
+        .where(OrderPayment.order_id == order_id).order_by(OrderPayment.paid_at)
+    return [PaymentRow(row.paid_at, row.amount or 0.0, row.method, row.note or '')
+            for row in session.execute(statement)]
+
+
+def add_payment(session: Session, order: Order, amount, method: PaymentMethod = PaymentMethod.CASH,
+                paid_at: Optional[datetime] = None, note: Optional[str] = None) -> Order:
+    """Оплата по заказу; оплаченная сумма и остаток пересчитываются при коммите"""
+    if not to_kopecks(amount):
+        raise ValidationError('amount', 'Укажите сумму оплаты')
+    try:
+        payments.add_payment(session, order.id, amount, method=method, paid_at=paid_at, note=note)
+        session.commit()
+        logger.info(f"Оплата {amount:.2f} по заказу {order.order_number}")
+        return order
+    except Exception:
+        session.rollback()
+        raise
+
+
+# --- Статусы ---
+
+def start_work(session: Session, order: Order) -> Order:
+    """Черновик -> в работе"""
+    if order.status != OrderStatus.DRAFT:
+        raise ServiceError(f'Заказ {order.order_number} не является черновиком')
+    try:
+        order.status = OrderStatus.IN_WORK
+        session.commit()
+        return order
+    except Exception:
+        session.rollback()
+        raise
+
+
+def complete_work(session: Session, order: Order) -> OrderStatus:
+    """В работе -> завершен или ожидает оплату (если есть остаток)"""
+    if order.status != OrderStatus.IN_WORK:
+        raise ServiceError(f'Заказ {order.order_number} не в работе')
+    try:
+        if order.balance_due > 0:
+            order.status = OrderStatus.WAITING_PAYMENT
+        else:
+            order.status = OrderStatus.COMPLETED
+        session.commit()
+        return order.status
+    except Exception:
+        session.rollback()
+        raise
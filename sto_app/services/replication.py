@@ -0,0 +1,501 @@
+# sto_app/services/replication.py
+"""
+Репликация между площадками через файлы пакетов изменений.
+
+У каждой площадки своя БД. Записи справочников, клиентов, автомобилей и
+заказов имеют глобальный ключ sync_uid ("<площадка>-<id>") и версию
+(sync_clock, sync_site): логические часы Лампорта площадки, которая
+последней изменила запись. Версии и ключи ставят триггеры
+(config.database.migrate_sync_if_needed), поэтому изменения из окон,
+sales_app, sto_cli и сервера API учитываются одинаково; удаления
+записываются в sync_tombstones.
+
+Пакет для соседней площадки - записи, измененные здесь после часов,
+которые соседняя площадка подтвердила (ack в ее последнем пакете).
+Неподтвержденные изменения повторяются в каждом пакете, повторный импорт
+ничего не меняет, поэтому потерянный файл не теряет данных. Пакет несет
+только изменения своей площадки (схема на две площадки); новую площадку
+создают из копии БД существующей (init_site).
+
+Импорт детерминирован: побеждает большая версия (часы, затем код
+площадки), одинаково на обеих площадках. Заказ переносится целиком -
+со строками услуг, запчастей и оплат. Справочники и автомобили (VIN),
+созданные на обеих площадках независимо, совпадают по естественному
+ключу; чужой sync_uid запоминается в sync_aliases. Заказы по номеру не
+объединяются никогда: это разные заказы со своими деньгами, поэтому
+пришедший заказ с занятым здесь номером получает номер с кодом своей
+площадки ("<номер>-A").
+
+Заказы, перенесенные в архив (services.archive), не удаляются у соседней
+площадки и не возвращаются из ее пакетов в рабочую БД.
+
+Пакет - JSON Lines в gzip: заголовок, затем записи по таблицам в
+порядке зависимостей, затем удаления. Значения передаются в том виде, в
+котором хранятся в SQLite.
+"""
+
+import gzip
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from . import archive
+from .errors import ServiceError, ValidationError
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT = 'sto-sync'
+BUNDLE_VERSION = 1
+SITE_ID_PATTERN = re.compile(r'^[A-Z0-9]{1,8}$')
+
+# Служебные колонки - не переносятся как данные записи
+_LOCAL_COLUMNS = {'id', 'sync_uid', 'sync_clock', 'sync_site'}
+_LINE_SKIP_COLUMNS = {'id', 'order_id'}
+EXPORT_BATCH = 500
+
+
+@dataclass(frozen=True)
+class SyncTable:
+    """Реплицируемая таблица: ссылки (колонка -> таблица), естественный ключ, строки заказа"""
+    name: str
+    references: Dict[str, str] = field(default_factory=dict)
+    required: Tuple[str, ...] = ()
+    natural_key: Optional[str] = None
+    lines: Tuple[str, ...] = ()
+    unique_number: Optional[str] = None
+
+
+# В порядке зависимостей (совпадает с config.database.SYNC_TABLES)
+SYNC_TABLES = (
+    SyncTable('car_brands', natural_key='brand'),
+    SyncTable('services_catalog', natural_key='name'),
+    SyncTable('employees'),
+    SyncTable('clients'),
+    SyncTable('cars', {'client_id': 'clients'}, required=('client_id',), natural_key='vin'),
+    SyncTable('orders',
+              {'client_id': 'clients', 'car_id': 'cars',
+               'responsible_person_id': 'employees', 'manager_id': 'employees'},
+              required=('client_id', 'car_id'), unique_number='order_number',
+              lines=('order_services', 'order_parts', 'order_payments')),
+)
+TABLES = {table.name: table for table in SYNC_TABLES}
+
+
+@dataclass
+class SyncPeer:
+    site_id: str
+    imported_clock: int
+    acked_clock: int
+    imported_at: Optional[str]
+    pending: int = 0
+
+
+@dataclass
+class SyncStatus:
+    site_id: str
+    clock: int
+    peers: List[SyncPeer]
+
+
+@dataclass
+class SyncResult:
+    """Итог экспорта или импорта пакета"""
+    site_id: str
+    peer_id: str
+    since: int = 0
+    until: int = 0
+    counts: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, key: str, amount: int = 1):
+        self.counts[key] = self.counts.get(key, 0) + amount
+
+
+def validate_site_id(site_id: str) -> str:
+    site_id = (site_id or '').strip().upper()
+    if not SITE_ID_PATTERN.match(site_id):
+        raise ValidationError('site_id', 'Код площадки - 1-8 латинских букв или цифр')
+    return site_id
+
+
+def site_state(connection) -> Tuple[str, int]:
+    """Код площадки и ее часы"""
+    row = connection.execute(text("SELECT site_id, clock FROM sync_state")).first()
+    if row is None:
+        raise ServiceError('Репликация не настроена: выполните "sto_cli.py sync init --site КОД"')
+    return row.site_id, row.clock
+
+
+def _columns(connection, table: str) -> List[str]:
+    return [row[1] for row in connection.execute(text(f"PRAGMA table_info({table})"))]
+
+
+def open_bundle(path, mode: str = 'r', compressed: Optional[bool] = None):
+    """Файл пакета: gzip (по умолчанию - для имени .gz) или обычный текст"""
+    if compressed is None:
+        compressed = str(path).endswith('.gz')
+    if compressed:
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+# --- Настройка площадки ---
+
+def init_site(connection, site_id: str) -> SyncResult:
+    """
+    Включить репликацию на этой БД под кодом site_id.
+
+    Существующие записи получают ключи и версию 1 - первый пакет для новой
+    площадки переносит их полностью. Если БД - копия другой площадки (уже
+    настроена под другим кодом), она становится новой площадкой, которой
+    изменения исходной площадки до момента копии уже известны.
+    """
+    site_id = validate_site_id(site_id)
+    current = connection.execute(text("SELECT site_id, clock FROM sync_state")).first()
+    result = SyncResult(site_id, current.site_id if current else '')
+
+    if current is None:
+        connection.execute(text("INSERT INTO sync_state (site_id, clock, importing) VALUES (:site, 1, 0)"),
+                           {'site': site_id})
+        for table in SYNC_TABLES:
+            updated = connection.execute(text(f"""
+                UPDATE {table.name} SET sync_uid = :site || '-' || id, sync_clock = 1, sync_site = :site
+                WHERE sync_uid IS NULL
+            """), {'site': site_id}).rowcount
+            result.add(table.name, updated)
+        return result
+
+    if current.site_id == site_id:
+        raise ServiceError(f'Площадка {site_id} уже настроена')
+
+    # Копия БД площадки current.site_id
+    connection.execute(text("UPDATE sync_state SET site_id = :site"), {'site': site_id})
+    connection.execute(text("DELETE FROM sync_peers WHERE site_id = :site"), {'site': site_id})
+    connection.execute(text("""
+        INSERT OR REPLACE INTO sync_peers (site_id, imported_clock, acked_clock, imported_at)
+        VALUES (:peer, :clock, 0, :now)
+    """), {'peer': current.site_id, 'clock': current.clock, 'now': datetime.now().isoformat(sep=' ', timespec='seconds')})
+    result.until = current.clock
+    return result
+
+
+def _pending_count(connection, site_id: str, since: int) -> int:
+    params = {'site': site_id, 'since': since}
+    count = sum(connection.execute(text(
+        f"SELECT COUNT(*) FROM {table.name} WHERE sync_site = :site AND sync_clock > :since"), params).scalar()
+        for table in SYNC_TABLES)
+    return count + connection.execute(text(
+        "SELECT COUNT(*) FROM sync_tombstones WHERE sync_site = :site AND sync_clock > :since"), params).scalar()
+
+
+def sync_status(connection) -> SyncStatus:
+    """Код площадки, часы и состояние обмена с соседними площадками"""
+    site_id, clock = site_state(connection)
+    peers = [SyncPeer(row.site_id, row.imported_clock, row.acked_clock, row.imported_at)
+             for row in connection.execute(text("SELECT * FROM sync_peers ORDER BY site_id"))]
+    for peer in peers:
+        peer.pending = _pending_count(connection, site_id, peer.acked_clock)
+    return SyncStatus(site_id, clock, peers)
+
+
+# --- Экспорт ---
+
+def _select_changed(table: SyncTable, columns: List[str]) -> str:
+    values = []
+    for column in columns:
+        if column in _LOCAL_COLUMNS:
+            continue
+        target = table.references.get(column)
+        if target:
+            # Ссылка передается ключом sync_uid записи
+            values.append(f"(SELECT r.sync_uid FROM {target} r WHERE r.id = t.{column}) AS {column}")
+        else:
+            values.append(f"t.{column}")
+    return f"""
+        SELECT t.id AS _id, t.sync_uid AS _uid, t.sync_clock AS _clock, t.sync_site AS _site, {', '.join(values)}
+        FROM {table.name} t
+        WHERE t.sync_site = :site AND t.sync_clock > :since AND t.sync_clock <= :until
+        ORDER BY t.sync_clock
+    """
+
+
+def _order_lines(connection, table: SyncTable, order_ids: List[int]) -> Dict[int, Dict[str, list]]:
+    lines: Dict[int, Dict[str, list]] = {order_id: {} for order_id in order_ids}
+    placeholders = ', '.join(str(int(order_id)) for order_id in order_ids)
+    for line_table in table.lines:
+        for row in connection.execute(text(
+                f"SELECT * FROM {line_table} WHERE order_id IN ({placeholders}) ORDER BY id")).mappings():
+            values = {key: value for key, value in row.items() if key not in _LINE_SKIP_COLUMNS}
+            lines[row['order_id']].setdefault(line_table, []).append(values)
+    return lines
+
+
+def export_bundle(connection, peer_id: str, stream, since: Optional[int] = None) -> SyncResult:
+    """
+    Записать в stream (текст) пакет для площадки peer_id: изменения этой
+    площадки после подтвержденных соседней (или после since)
+    """
+    site_id, clock = site_state(connection)
+    peer_id = validate_site_id(peer_id)
+    if peer_id == site_id:
+        raise ValidationError('peer_id', 'Пакет для своей же площадки')
+
+    peer = connection.execute(text("SELECT imported_clock, acked_clock FROM sync_peers WHERE site_id = :peer"),
+                              {'peer': peer_id}).first()
+    result = SyncResult(site_id, peer_id,
+                        since=since if since is not None else (peer.acked_clock if peer else 0),
+                        until=clock)
+    params = {'site': site_id, 'since': result.since, 'until': result.until}
+
+    header = {'format': BUNDLE_FORMAT, 'version': BUNDLE_VERSION, 'from': site_id, 'to': peer_id,
+              'since': result.since, 'until': result.until, 'ack': peer.imported_clock if peer else 0,
+              'created_at': datetime.now().isoformat(timespec='seconds')}
+    stream.write(json.dumps(header, ensure_ascii=False) + '\n')
+
+    for table in SYNC_TABLES:
+        rows = connection.execute(text(_select_changed(table, _columns(connection, table.name))), params)
+        while True:
+            batch = rows.mappings().fetchmany(EXPORT_BATCH)
+            if not batch:
+                break
+            lines = _order_lines(connection, table, [row['_id'] for row in batch]) if table.lines else {}
+            for row in batch:
+                record = {'table': table.name, 'uid': row['_uid'], 'clock': row['_clock'], 'site': row['_site'],
+                          'row': {key: value for key, value in row.items() if not key.startswith('_')}}
+                if table.lines:
+                    record['lines'] = lines[row['_id']]
+                stream.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+            result.add(table.name, len(batch))
+
+    for row in connection.execute(text("""
+            SELECT table_name, sync_uid, sync_clock, sync_site FROM sync_tombstones
+            WHERE sync_site = :site AND sync_clock > :since AND sync_clock <= :until
+            ORDER BY sync_clock
+    """), params):
+        stream.write(json.dumps({'table': row.table_name, 'uid': row.sync_uid, 'clock': row.sync_clock,
+                                 'site': row.sync_site, 'deleted': True}, ensure_ascii=False) + '\n')
+        result.add('deleted')
+    return result
+
+
+# --- Импорт ---
+
+class _Importer:
+    """Применение записей пакета (одна транзакция, триггеры версий выключены)"""
+
+    def __init__(self, connection, result: SyncResult):
+        self.connection = connection
+        self.result = result
+        self.columns = {table.name: set(_columns(connection, table.name)) for table in SYNC_TABLES}
+        for table in SYNC_TABLES:
+            for line_table in table.lines:
+                self.columns[line_table] = set(_columns(connection, line_table))
+        self.max_clock = 0
+        self.archive = archive.is_available(connection)
+
+    def _local(self, table: str, uid: str):
+        """Локальная запись по sync_uid или по псевдониму"""
+        row = self.connection.execute(text(
+            f"SELECT id, sync_uid, sync_clock, sync_site FROM {table} WHERE sync_uid = :uid"), {'uid': uid}).first()
+        if row is not None:
+            return row
+        return self.connection.execute(text(f"""
+            SELECT t.id, t.sync_uid, t.sync_clock, t.sync_site FROM sync_aliases a
+            JOIN {table} t ON t.sync_uid = a.local_uid
+            WHERE a.table_name = :table AND a.sync_uid = :uid
+        """), {'table': table, 'uid': uid}).first()
+
+    def _by_natural_key(self, table: SyncTable, uid: str, values: dict):
+        value = values.get(table.natural_key) if table.natural_key else None
+        if value in (None, ''):
+            return None
+        row = self.connection.execute(text(
+            f"SELECT id, sync_uid, sync_clock, sync_site FROM {table.name} WHERE {table.natural_key} = :value"),
+            {'value': value}).first()
+        if row is not None:
+            # Та же запись, созданная на обеих площадках независимо
+            self.connection.execute(text(
+                "INSERT OR REPLACE INTO sync_aliases (table_name, sync_uid, local_uid) VALUES (:table, :uid, :local)"),
+                {'table': table.name, 'uid': uid, 'local': row.sync_uid})
+            self.result.add('merged')
+        return row
+
+    def _free_number(self, table: SyncTable, uid: str, values: dict, row_id: Optional[int]):
+        """Номер, занятый здесь другой записью, -> номер с кодом площадки записи"""
+        column = table.unique_number
+        number = values.get(column) if column else None
+        if number in (None, ''):
+            return
+        candidate, attempt = number, 1
+        while self.connection.execute(text(
+                f"SELECT 1 FROM {table.name} WHERE {column} = :number AND id IS NOT :id"),
+                {'number': candidate, 'id': row_id}).first() is not None:
+            site = uid.split('-', 1)[0]
+            candidate = f"{number}-{site}" if attempt == 1 else f"{number}-{site}{attempt}"
+            attempt += 1
+        if candidate != number:
+            logger.info(f"Репликация: {table.name} {uid} - номер {number} занят, запись получает {candidate}")
+            values[column] = candidate
+            self.result.add('renumbered')
+
+    def _tombstone(self, table: str, uid: str):
+        return self.connection.execute(text(
+            "SELECT sync_clock, sync_site FROM sync_tombstones WHERE table_name = :table AND sync_uid = :uid"),
+            {'table': table, 'uid': uid}).first()
+
+    def _resolve_references(self, table: SyncTable, values: dict) -> bool:
+        """Ключи ссылок -> локальные id; False - нет обязательной ссылки"""
+        for column, target in table.references.items():
+            uid = values.get(column)
+            if uid is None:
+                continue
+            local = self._local(target, uid)
+            if local is None and column in table.required:
+                logger.warning(f"Репликация: {table.name} пропущена, нет записи {target} {uid}")
+                return False
+            values[column] = local.id if local is not None else None
+        return True
+
+    def apply(self, record: dict):
+        table = TABLES.get(record.get('table'))
+        if table is None:
+            raise ServiceError(f"Неизвестная таблица в пакете: {record.get('table')}")
+        version = (record['clock'], record['site'])
+        self.max_clock = max(self.max_clock, record['clock'])
+        if record.get('deleted'):
+            self._delete(table, record['uid'], version)
+        else:
+            self._upsert(table, record, version)
+
+    def _upsert(self, table: SyncTable, record: dict, version: tuple):
+        uid = record['uid']
+        values = {key: value for key, value in record['row'].items() if key in self.columns[table.name]}
+        local = self._local(table.name, uid) or self._by_natural_key(table, uid, values)
+        if local is None and table.lines and self.archive and archive.is_archived_uid(self.connection, uid):
+            # Заказ перенесен здесь в архив - закрытая история не возвращается в рабочую БД
+            self.result.add('archived')
+            return
+        tombstone = self._tombstone(table.name, uid) if local is None else None
+
+        if local is not None and (local.sync_clock or 0, local.sync_site or '') >= version:
+            self.result.add('skipped')
+            return
+        if tombstone is not None and (tombstone.sync_clock, tombstone.sync_site) >= version:
+            # Удалена здесь позже этого изменения
+            self.result.add('skipped')
+            return
+        if not self._resolve_references(table, values):
+            self.result.add('missing_reference')
+            return
+        self._free_number(table, uid, values, local.id if local is not None else None)
+
+        params = dict(values, sync_clock=version[0], sync_site=version[1])
+        if local is None:
+            params['sync_uid'] = uid
+            columns = ', '.join(params)
+            row_id = self.connection.execute(text(
+                f"INSERT INTO {table.name} ({columns}) VALUES ({', '.join(':' + name for name in params)}) RETURNING id"),
+                params).scalar()
+            if tombstone is not None:
+                self.connection.execute(text(
+                    "DELETE FROM sync_tombstones WHERE table_name = :table AND sync_uid = :uid"),
+                    {'table': table.name, 'uid': uid})
+            self.result.add('inserted')
+        else:
+            row_id = local.id
+            assignments = ', '.join(f"{name} = :{name}" for name in params)
+            self.connection.execute(text(f"UPDATE {table.name} SET {assignments} WHERE id = :_id"),
+                                    dict(params, _id=row_id))
+            self.result.add('updated')
+
+        if table.lines:
+            self._replace_lines(table, row_id, record.get('lines') or {})
+        self.result.add(table.name)
+
+    def _replace_lines(self, table: SyncTable, order_id: int, lines: Dict[str, list]):
+        for line_table in table.lines:
+            self.connection.execute(text(f"DELETE FROM {line_table} WHERE order_id = :id"), {'id': order_id})
+            rows = [dict({key: value for key, value in line.items() if key in self.columns[line_table]},
+                         order_id=order_id)
+                    for line in lines.get(line_table, [])]
+            for columns in {tuple(row) for row in rows}:
+                same = [row for row in rows if tuple(row) == columns]
+                self.connection.execute(text(
+                    f"INSERT INTO {line_table} ({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)})"),
+                    same)
+
+    def _delete(self, table: SyncTable, uid: str, version: tuple):
+        local = self._local(table.name, uid)
+        if local is not None and (local.sync_clock or 0, local.sync_site or '') > version:
+            # Изменена здесь позже удаления - запись остается и вернется на другую площадку
+            self.result.add('skipped')
+            return
+        tombstone = self._tombstone(table.name, uid)
+        if tombstone is None or (tombstone.sync_clock, tombstone.sync_site) < version:
+            self.connection.execute(text("""
+                INSERT OR REPLACE INTO sync_tombstones (table_name, sync_uid, sync_clock, sync_site)
+                VALUES (:table, :uid, :clock, :site)
+            """), {'table': table.name, 'uid': uid, 'clock': version[0], 'site': version[1]})
+        if local is not None:
+            for line_table in table.lines:
+                self.connection.execute(text(f"DELETE FROM {line_table} WHERE order_id = :id"), {'id': local.id})
+            self.connection.execute(text(f"DELETE FROM {table.name} WHERE id = :id"), {'id': local.id})
+            self.result.add('deleted')
+
+
+def read_header(line: str) -> dict:
+    try:
+        header = json.loads(line)
+    except ValueError:
+        header = None
+    if not isinstance(header, dict) or header.get('format') != BUNDLE_FORMAT:
+        raise ServiceError('Файл не является пакетом репликации СТО')
+    if header.get('version') != BUNDLE_VERSION:
+        raise ServiceError(f"Неподдерживаемая версия пакета: {header.get('version')}")
+    return header
+
+
+def import_bundle(connection, lines: Iterable[str]) -> SyncResult:
+    """
+    Применить пакет соседней площадки (строки файла). Вызывающий код
+    выполняет все в одной транзакции и коммитит после успешного импорта.
+    """
+    site_id, _ = site_state(connection)
+    lines = iter(lines)
+    header = read_header(next(lines, ''))
+    if header['to'] != site_id:
+        raise ServiceError(f"Пакет для площадки {header['to']}, а это площадка {site_id}")
+    if header['from'] == site_id:
+        raise ServiceError('Пакет создан этой же площадкой')
+
+    result = SyncResult(site_id, header['from'], since=header['since'], until=header['until'])
+    peer = connection.execute(text("SELECT imported_clock FROM sync_peers WHERE site_id = :peer"),
+                              {'peer': header['from']}).first()
+    if peer is not None and header['since'] > peer.imported_clock:
+        # Пропущен более ранний пакет - изменения между ними не дошли бы
+        raise ServiceError(f"Пакет начинается с часов {header['since']}, а импортировано до "
+                           f"{peer.imported_clock}: нужен пакет с более ранним началом")
+
+    connection.execute(text("UPDATE sync_state SET importing = 1"))
+    importer = _Importer(connection, result)
+    for line in lines:
+        if line.strip():
+            importer.apply(json.loads(line))
+
+    # Часы Лампорта: следующие изменения здесь будут новее принятых
+    connection.execute(text("UPDATE sync_state SET clock = MAX(clock, :clock), importing = 0"),
+                       {'clock': max(importer.max_clock, header['until'])})
+    connection.execute(text("""
+        INSERT INTO sync_peers (site_id, imported_clock, acked_clock, imported_at)
+        VALUES (:peer, :until, :ack, :now)
+        ON CONFLICT (site_id) DO UPDATE SET
+            imported_clock = MAX(imported_clock, excluded.imported_clock),
+            acked_clock = MAX(acked_clock, excluded.acked_clock),
+            imported_at = excluded.imported_at
+    """), {'peer': header['from'], 'until': header['until'], 'ack': header['ack'],
+           'now': datetime.now().isoformat(sep=' ', timespec='seconds')})
+    return result
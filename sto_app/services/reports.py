@@ -0,0 +1,276 @@
+# sto_app/services/reports.py
+"""
+Отчеты: описание колонок и запросы.
+
+Каждый отчет - один SELECT только нужных колонок (Report.statement) и
+описание колонок (ReportColumn) с видом значения для форматирования.
+Окно отчетов показывает их через ReportTableModel; без интерфейса
+строки читаются Report.fetch / Report.formatted_rows или потоком
+Report.stream.
+
+Денежные суммы в запросах - целые копейки (pricing.sql_kopecks).
+
+archive=True - отчет читает заказы рабочей БД вместе с архивом
+(services.archive); нужен ли архив периоду, решает archive.reaches.
+"""
+
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Integer, and_, case, cast, func, select
+from sqlalchemy.orm import Session
+
+from shared_models.common_models import Client, Car
+from ..models_sto import Order, OrderService, OrderStatus
+from ..utils.pricing import average_kopecks, from_kopecks, sql_kopecks
+from .archive import history_entity
+
+TEXT = 'text'
+DATE = 'date'
+MONEY = 'money'      # целые копейки
+COUNT = 'count'
+PERCENT = 'percent'
+ENUM = 'enum'        # Enum со строковым value
+
+
+@dataclass(frozen=True)
+class ReportColumn:
+    """Колонка отчета: заголовок, SQL-выражение и вид значения"""
+    header: str
+    expression: object
+    kind: str = TEXT
+    empty: str = ''  # текст для NULL
+
+    def format(self, value) -> str:
+        if value is None:
+            return self.empty
+        if self.kind == MONEY:
+            return f'{from_kopecks(value):.2f} ₴'
+        if self.kind == DATE:
+            return value.strftime('%d.%m.%Y')
+        if self.kind == PERCENT:
+            return f'{value:.1f}%'
+        if self.kind == ENUM:
+            return value.value
+        return str(value)
+
+
+@dataclass(frozen=True)
+class Report:
+    """Табличный отчет: колонки и запрос"""
+    title: str
+    columns: Sequence[ReportColumn]
+    statement: object
+    # Колонка, по которой запрос уже отсортирован, и направление
+    sort_column: int = -1
+    descending: bool = False
+    # Параметры построителя отчета (по ним отчет строится заново на сервере API)
+    period: Tuple = ()
+    archive: bool = False
+
+    @property
+    def headers(self) -> List[str]:
+        return [column.header for column in self.columns]
+
+    def fetch(self, session: Session) -> list:
+        return session.execute(self.statement).all()
+
+    def stream(self, session: Session, batch_size: int = 1000) -> Iterator:
+        """Строки отчета пакетами по batch_size, без чтения всего результата в память"""
+        return session.execute(self.statement.execution_options(yield_per=batch_size))
+
+    def format_row(self, row) -> List[str]:
+        return [column.format(value) for column, value in zip(self.columns, row)]
+
+    def formatted_rows(self, session: Session) -> List[List[str]]:
+        return [self.format_row(row) for row in self.fetch(session)]
+
+
+def _orders(archive: bool):
+    return history_entity(Order) if archive else Order
+
+
+def _period(orders, date_from, date_to):
+    return and_(orders.date_received >= date_from, orders.date_received <= date_to)
+
+
+def _statement(columns):
+    return select(*[column.expression for column in columns])
+
+
+def orders_report(date_from, date_to, archive: bool = False) -> Report:
+    """Заказы за период"""
+    orders = _orders(archive)
+    car_title = case(
+        (Car.id.is_(None), None),
+        else_=func.coalesce(Car.brand, '') + ' ' + func.coalesce(Car.model, '')
+    )
+    columns = [
+        ReportColumn('№ заказа', orders.order_number.label('order_number')),
+        ReportColumn('Дата', orders.date_received.label('date_received'), DATE),
+        ReportColumn('Клиент', Client.name.label('client_name'), empty='Неизвестен'),
+        ReportColumn('Автомобиль', car_title.label('car_title'), empty='Неизвестен'),
+        ReportColumn('Статус', orders.status.label('status'), ENUM, empty='Неизвестен'),
+        ReportColumn('Сумма', sql_kopecks(orders.total_amount).label('amount'), MONEY),
+    ]
+    # Один запрос нужных колонок вместо загрузки заказов с клиентом и автомобилем
+    statement = _statement(columns).select_from(orders).outerjoin(
+        Client, orders.client_id == Client.id
+    ).outerjoin(
+        Car, orders.car_id == Car.id
+    ).where(_period(orders, date_from, date_to))
+    return Report('Заказы по периоду', columns, statement, period=(date_from, date_to), archive=archive)
+
+
+def status_report(date_from, date_to, archive: bool = False) -> Report:
+    """Количество и сумма заказов по статусам (один GROUP BY)"""
+    orders = _orders(archive)
+    count = func.count(orders.id)
+    columns = [
+        ReportColumn('Статус', orders.status.label('status'), ENUM, empty='Неизвестен'),
+        ReportColumn('Количество', count.label('orders_count'), COUNT),
+        ReportColumn('Сумма', func.coalesce(func.sum(sql_kopecks(orders.total_amount)), 0).label('amount'), MONEY),
+        ReportColumn('Процент', (count * 100.0 / func.sum(count).over()).label('percent'), PERCENT),
+    ]
+    statement = _statement(columns).where(_period(orders, date_from, date_to)).group_by(orders.status)
+    return Report('Статистика по статусам', columns, statement, period=(date_from, date_to), archive=archive)
+
+
+def clients_report(date_from, date_to, archive: bool = False) -> Report:
+    """Клиенты с заказами за период"""
+    orders = _orders(archive)
+    columns = [
+        ReportColumn('Клиент', Client.name.label('client_name')),
+        ReportColumn('Количество заказов', func.count(orders.id).label('orders_count'), COUNT),
+        ReportColumn('Общая сумма', func.sum(sql_kopecks(orders.total_amount)).label('total_amount'), MONEY),
+    ]
+    statement = _statement(columns).select_from(Client).join(
+        orders, orders.client_id == Client.id
+    ).where(_period(orders, date_from, date_to)).group_by(Client.id)
+    return Report('Отчет по клиентам', columns, statement, period=(date_from, date_to), archive=archive)
+
+
+def services_report(date_from, date_to, archive: bool = False) -> Report:
+    """Услуги за период, самые частые сверху"""
+    orders = _orders(archive)
+    services = history_entity(OrderService) if archive else OrderService
+    count = func.count(services.id)
+    total = func.sum(sql_kopecks(services.price_with_vat))
+    columns = [
+        ReportColumn('Услуга', services.service_name.label('service_name')),
+        ReportColumn('Количество', count.label('services_count'), COUNT),
+        ReportColumn('Общая сумма', total.label('total_amount'), MONEY),
+        # Средняя цена в копейках с округлением, как average_kopecks
+        ReportColumn('Средняя цена', cast(func.round(total * 1.0 / count), Integer).label('avg_price'), MONEY),
+    ]
+    statement = _statement(columns).join(
+        orders, services.order_id == orders.id
+    ).where(_period(orders, date_from, date_to)).group_by(services.service_name).order_by(count.desc())
+    return Report('Популярные услуги', columns, statement, sort_column=1, descending=True,
+                  period=(date_from, date_to), archive=archive)
+
+
+# Отчеты основной вкладки по названию
+MAIN_REPORTS = {
+    'Заказы по периоду': orders_report,
+    'Статистика по статусам': status_report,
+    'Отчет по клиентам': clients_report,
+    'Популярные услуги': services_report,
+}
+
+
+# --- Финансовый отчет ---
+
+@dataclass(frozen=True)
+class FinancialPeriod:
+    """Итоги за месяц (суммы в копейках)"""
+    period: Optional[str]
+    orders: int
+    services: int
+    parts: int
+    discounts: int
+    vat: int
+    total: int
+    paid: int
+
+
+@dataclass(frozen=True)
+class FinancialReport:
+    """Финансовый отчет по месяцам и итог за период"""
+    periods: Tuple[FinancialPeriod, ...]
+
+    def _sum(self, name: str) -> int:
+        return sum(getattr(period, name) for period in self.periods)
+
+    @property
+    def orders(self) -> int:
+        return self._sum('orders')
+
+    @property
+    def services(self) -> int:
+        return self._sum('services')
+
+    @property
+    def parts(self) -> int:
+        return self._sum('parts')
+
+    @property
+    def discounts(self) -> int:
+        return self._sum('discounts')
+
+    @property
+    def vat(self) -> int:
+        return self._sum('vat')
+
+    @property
+    def total(self) -> int:
+        return self._sum('total')
+
+    @property
+    def paid(self) -> int:
+        return self._sum('paid')
+
+    @property
+    def debt(self) -> int:
+        return self.total - self.paid
+
+    @property
+    def average_check(self) -> int:
+        return average_kopecks(self.total, self.orders)
+
+    def shares(self) -> Tuple[float, float]:
+        """Доли услуг и запчастей, %"""
+        subtotal = self.services + self.parts
+        if not subtotal:
+            return 0, 0
+        return self.services / subtotal * 100, self.parts / subtotal * 100
+
+
+def financial_report(session: Session, date_from, date_to, min_amount: float = 0,
+                     archive: bool = False) -> FinancialReport:
+    """Финансовый отчет по итогам, хранящимся в заказах (без отмененных)"""
+    orders = _orders(archive)
+    period = func.strftime('%Y-%m', orders.date_received)
+
+    # Одна строка на заказ, строки услуг и запчастей не читаются
+    rows = session.query(
+        period.label('period'),
+        func.count(orders.id),
+        func.sum(sql_kopecks(orders.services_total)),
+        func.sum(sql_kopecks(orders.parts_total)),
+        func.sum(sql_kopecks(orders.discount_total)),
+        func.sum(sql_kopecks(orders.vat_total)),
+        func.sum(sql_kopecks(orders.total_amount)),
+        func.sum(sql_kopecks(orders.paid_total))
+    ).filter(
+        and_(
+            orders.status != OrderStatus.CANCELLED,
+            _period(orders, date_from, date_to),
+            orders.total_amount >= min_amount
+        )
+    ).group_by(period).order_by(period).all()
+
+    return FinancialReport(tuple(
+        FinancialPeriod(name, count, *(amount or 0 for amount in amounts))
+        for name, count, *amounts in rows
+    ))
@@ -1,17 +1,30 @@
 """
 Утилиты для модуля СТО.
+
+Модули utils без Qt (pricing, order_lines, поиск, кэш справочников)
+импортируются напрямую; менеджер резервного копирования (Qt) загружается
+при первом обращении к нему.
 """
 
-# Менеджер резервного копирования
-try:
-    from .backup import BackupManager, BackupWorker, RestoreWorker
-except ImportError:
-    BackupManager = None
-    BackupWorker = None
-    RestoreWorker = None
+from importlib import import_module
+
+_BACKUP_ATTRS = ('BackupManager', 'BackupWorker', 'RestoreWorker')
+
+
+def __getattr__(name):
+    if name not in _BACKUP_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Менеджер резервного копирования
+    try:
+        value = getattr(import_module('.backup_manager', __name__), name)
+    except ImportError:
+        value = None
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     'BackupManager',
     'BackupWorker', 
     'RestoreWorker'
-]
\ No newline at end of file
+]
@@ -1,6 +1,5 @@
 # sto_app/utils/backup.py
 import os
-import shutil
 import zipfile
 import sqlite3
 import json
@@ -12,6 +11,9 @@ from typing import List, Dict, Optional
 from PySide6.QtCore import QObject, Signal, QThread, QTimer
 from PySide6.QtWidgets import QMessageBox, QProgressDialog, QApplication
 
+from ..services.backup import create_backup, restore_backup
+from ..services.errors import ServiceError
+
 
 logger = logging.getLogger(__name__)
 
@@ -29,67 +31,15 @@ class BackupWorker(QThread):
         self.database_path = database_path
         self.include_files = include_files
         
+    def _report(self, percent: int, message: str):
+        self.status_updated.emit(message)
+        self.progress_updated.emit(percent)
+        
     def run(self):
         """Выполнение резервного копирования"""
         try:
-            self.status_updated.emit('Подготовка к созданию резервной копии...')
-            self.progress_updated.emit(0)
-            
-            # Создаем временную директорию
-            temp_dir = Path(self.backup_path).parent / 'temp_backup'
-            temp_dir.mkdir(exist_ok=True)
-            
-            try:
-                # Копируем базу данных
-                self.status_updated.emit('Копирование базы данных...')
-                self.progress_updated.emit(20)
-                
-                db_backup_path = temp_dir / 'database.db'
-                shutil.copy2(self.database_path, db_backup_path)
-                
-                # Создаем метаданные
-                self.status_updated.emit('Создание метаданных...')
-                self.progress_updated.emit(40)
-                
-                metadata = {
-                    'created_at': datetime.now().isoformat(),
-                    'database_size': os.path.getsize(self.database_path),
-                    'app_version': '3.0',
-                    'backup_type': 'full' if self.include_files else 'database_only',
-                    'files_included': self.include_files
-                }
-                
-                with open(temp_dir / 'metadata.json', 'w', encoding='utf-8') as f:
-                    json.dump(metadata, f, indent=2, ensure_ascii=False)
-                
-                # Копируем файлы ресурсов (если нужно)
-                if self.include_files:
-                    self.status_updated.emit('Копирование файлов ресурсов...')
-                    self.progress_updated.emit(60)
-                    
-                    resources_dir = Path('resources')
-                    if resources_dir.exists():
-                        shutil.copytree(resources_dir, temp_dir / 'resources')
-                
-                # Создаем архив
-                self.status_updated.emit('Создание архива...')
-                self.progress_updated.emit(80)
-                
-                with zipfile.ZipFile(self.backup_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                    for file_path in temp_dir.rglob('*'):
-                        if file_path.is_file():
-                            arcname = file_path.relative_to(temp_dir)
-                            zipf.write(file_path, arcname)
-                
-                self.progress_updated.emit(100)
-                self.status_updated.emit('Резервная копия создана успешно')
-                self.backup_completed.emit(True, f'Резервная копия сохранена: {self.backup_path}')
-                
-            finally:
-                # Очищаем временную директорию
-                if temp_dir.exists():
-                    shutil.rmtree(temp_dir)
-                    
+            create_backup(self.backup_path, self.database_path, self.include_files, self._report)
+            self.backup_completed.emit(True, f'Резервная копия сохранена: {self.backup_path}')
         except Exception as e:
             logger.error(f"Ошибка создания резервной копии: {e}")
             self.backup_completed.emit(False, f'Ошибка: {str(e)}')
@@ -107,75 +57,17 @@ class RestoreWorker(QThread):
         self.backup_path = backup_path
         self.restore_to = restore_to
         
+    def _report(self, percent: int, message: str):
+        self.status_updated.emit(message)
+        self.progress_updated.emit(percent)
+        
     def run(self):
         """Выполнение восстановления"""
         try:
-            self.status_updated.emit('Проверка архива...')
-            self.progress_updated.emit(0)
-            
-            # Проверяем архив
-            if not zipfile.is_zipfile(self.backup_path):
-                self.restore_completed.emit(False, 'Неверный формат архива')
-                return
-                
-            # Создаем временную директорию
-            temp_dir = Path(self.restore_to) / 'temp_restore'
-            temp_dir.mkdir(exist_ok=True)
-            
-            try:
-                # Извлекаем архив
-                self.status_updated.emit('Извлечение архива...')
-                self.progress_updated.emit(20)
-                
-                with zipfile.ZipFile(self.backup_path, 'r') as zipf:
-                    zipf.extractall(temp_dir)
-                
-                # Проверяем метаданные
-                metadata_path = temp_dir / 'metadata.json'
-                if metadata_path.exists():
-                    with open(metadata_path, 'r', encoding='utf-8') as f:
-                        metadata = json.load(f)
-                    
-                    self.status_updated.emit(f'Восстановление из резервной копии от {metadata.get("created_at", "неизвестно")}')
-                
-                # Восстанавливаем базу данных
-                self.status_updated.emit('Восстановление базы данных...')
-                self.progress_updated.emit(60)
-                
-                db_source = temp_dir / 'database.db'
-                if db_source.exists():
-                    db_target = Path(self.restore_to) / 'sto_management.db'
-                    
-                    # Создаем резервную копию текущей БД
-                    if db_target.exists():
-                        backup_current = db_target.with_suffix('.db.backup')
-                        shutil.copy2(db_target, backup_current)
-                    
-                    shutil.copy2(db_source, db_target)
-                else:
-                    self.restore_completed.emit(False, 'База данных не найдена в архиве')
-                    return
-                
-                # Восстанавливаем файлы ресурсов
-                resources_source = temp_dir / 'resources'
-                if resources_source.exists():
-                    self.status_updated.emit('Восстановление файлов ресурсов...')
-                    self.progress_updated.emit(80)
-                    
-                    resources_target = Path(self.restore_to) / 'resources'
-                    if resources_target.exists():
-                        shutil.rmtree(resources_target)
-                    shutil.copytree(resources_source, resources_target)
-                
-                self.progress_updated.emit(100)
-                self.status_updated.emit('Восстановление завершено')
-                self.restore_completed.emit(True, 'Данные восстановлены успешно')
-                
-            finally:
-                # Очищаем временную директорию
-                if temp_dir.exists():
-                    shutil.rmtree(temp_dir)
-                    
+            restore_backup(self.backup_path, self.restore_to, self._report)
+            self.restore_completed.emit(True, 'Данные восстановлены успешно')
+        except ServiceError as e:
+            self.restore_completed.emit(False, str(e))
         except Exception as e:
             logger.error(f"Ошибка восстановления: {e}")
             self.restore_completed.emit(False, f'Ошибка: {str(e)}')
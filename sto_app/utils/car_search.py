@@ -0,0 +1,52 @@
+# sto_app/utils/car_search.py
+"""
+Поиск автомобилей по VIN и гос. номеру.
+
+Условия строятся по индексированным ключам Car.vin_norm, Car.vin_rev и
+Car.plate_norm (см. shared_models.normalize): точное совпадение, начало
+VIN или номера и конец VIN (обычно вводят последние 6 символов) - всё это
+поиск по индексу. Раскладка, регистр, пробелы и дефисы не важны.
+"""
+
+from typing import Optional
+
+from sqlalchemy import and_, false, or_, select
+
+from shared_models.common_models import Car
+from shared_models.normalize import (plate_key, prefix_upper_bound, reversed_key,
+                                     vin_key)
+
+
+def _prefix_range(column, prefix: str):
+    return and_(column >= prefix, column < prefix_upper_bound(prefix))
+
+
+def car_identifier_condition(text: str, exact: bool = False):
+    """
+    Условие поиска автомобиля по VIN или гос. номеру.
+
+    exact=True - полное совпадение ключа; иначе совпадение по началу VIN,
+    по концу VIN или по началу номера.
+    """
+    vin = vin_key(text)
+    plate = plate_key(text)
+    if not vin and not plate:
+        return false()
+    if exact:
+        return or_(Car.vin_norm == vin, Car.plate_norm == plate)
+    return or_(
+        _prefix_range(Car.vin_norm, vin),
+        _prefix_range(Car.vin_rev, reversed_key(vin)),
+        _prefix_range(Car.plate_norm, plate)
+    )
+
+
+def find_car_by_vin(session, vin: str, exclude_id: Optional[int] = None) -> Optional[Car]:
+    """Автомобиль с тем же VIN (с учетом нормализации), кроме exclude_id"""
+    key = vin_key(vin)
+    if not key:
+        return None
+    stmt = select(Car).where(Car.vin_norm == key)
+    if exclude_id is not None:
+        stmt = stmt.where(Car.id != exclude_id)
+    return session.execute(stmt.limit(1)).scalar_one_or_none()
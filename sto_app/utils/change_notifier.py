@@ -0,0 +1,107 @@
+# sto_app/utils/change_notifier.py
+"""
+Уведомления окон об изменениях, сделанных другими экземплярами
+приложения (services.changes).
+
+Таймер в GUI-потоке опрашивает источник изменений (ChangeFeed локальной
+БД или api.remote.RemoteChangeFeed в режиме клиента) и рассылает
+сигнал changed(ChangeSet). Окна обновляют только перечисленные строки;
+при ChangeSet.reset - перечитывают данные целиком.
+
+Кэш справочников (reference_cache) и моделей заказов (order_view_cache)
+сбрасывается здесь же: они следят только за коммитами своего процесса.
+
+Настройка: STO_CHANGE_POLL_MS - период опроса (0 - выключить).
+"""
+
+import logging
+import os
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from ..services.changes import ChangeSet
+from .order_view_model import order_view_cache
+from .reference_cache import CAR_BRANDS, EMPLOYEES, SERVICES, reference_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_MS = 1000
+
+# Таблица журнала -> справочник кэша
+_REFERENCE_TABLES = {
+    'services_catalog': SERVICES,
+    'employees': EMPLOYEES,
+    'car_brands': CAR_BRANDS,
+}
+
+# Таблицы журнала, данные которых копируются в модели заказов
+_ORDER_VIEW_TABLES = ('clients', 'cars', 'employees')
+
+
+class ChangeNotifier(QObject):
+    """Опрос изменений по таймеру и рассылка changed(ChangeSet)"""
+
+    changed = Signal(object)
+
+    def __init__(self, feed, interval_ms: int = DEFAULT_POLL_MS, parent=None):
+        super().__init__(parent)
+        self.feed = feed
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.poll)
+
+    @classmethod
+    def interval_from_env(cls, default: int = DEFAULT_POLL_MS) -> int:
+        value = os.environ.get('STO_CHANGE_POLL_MS', '').strip()
+        try:
+            return max(int(value), 0) if value else default
+        except ValueError:
+            logger.warning(f"Неверное значение STO_CHANGE_POLL_MS: {value}")
+            return default
+
+    def start(self):
+        if self.timer.interval() <= 0:
+            return
+        try:
+            self.feed.open()
+        except Exception as e:
+            logger.error(f"Уведомления об изменениях отключены: {e}")
+            return
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+        self.feed.close()
+
+    def poll(self):
+        try:
+            change_set = self.feed.poll()
+        except Exception as e:
+            # Сервер или файл БД временно недоступны - повторим при следующем опросе
+            logger.warning(f"Ошибка опроса изменений: {e}")
+            return
+        if change_set is None:
+            return
+
+        self._invalidate_references(change_set)
+        self._invalidate_order_views(change_set)
+        logger.debug(f"Изменения {change_set.since_id}..{change_set.last_id}: "
+                     f"{'все' if change_set.reset else {t: len(ids) for t, ids in change_set.rows.items()}}")
+        self.changed.emit(change_set)
+
+    def _invalidate_references(self, change_set: ChangeSet):
+        if change_set.reset:
+            reference_cache.invalidate()
+            return
+        kinds = [kind for table, kind in _REFERENCE_TABLES.items() if table in change_set.rows]
+        if kinds:
+            reference_cache.invalidate(*kinds)
+
+    def _invalidate_order_views(self, change_set: ChangeSet):
+        # updated_at хранится с точностью до секунды - две правки за секунду ключ не меняют
+        if change_set.reset:
+            order_view_cache.invalidate()
+            return
+        order_view_cache.invalidate(change_set.ids('orders'))
+        for table in _ORDER_VIEW_TABLES:
+            order_view_cache.invalidate_related(table, change_set.ids(table))
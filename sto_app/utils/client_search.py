@@ -0,0 +1,40 @@
+# sto_app/utils/client_search.py
+"""
+Поиск клиентов по началу имени или телефона.
+
+Условия строятся как диапазоны по индексированным ключам Client.name_key и
+Client.phone_digits (см. shared_models.normalize), поэтому каждый запрос -
+поиск по индексу, а не полный просмотр таблицы клиентов.
+"""
+
+from typing import List
+
+from sqlalchemy import and_, false, or_, select
+
+from shared_models.common_models import Client
+from shared_models.normalize import (name_key, phone_digit_prefixes,
+                                     prefix_upper_bound)
+
+
+def _prefix_range(column, prefix: str):
+    return and_(column >= prefix, column < prefix_upper_bound(prefix))
+
+
+def client_search_condition(text: str):
+    """Условие: имя или телефон клиента начинается с введенного текста"""
+    conditions = []
+    key = name_key(text)
+    if key:
+        conditions.append(_prefix_range(Client.name_key, key))
+    for digits in phone_digit_prefixes(text):
+        conditions.append(_prefix_range(Client.phone_digits, digits))
+    return or_(*conditions) if conditions else false()
+
+
+def find_clients(session, text: str, limit: int = 10) -> List[Client]:
+    """Первые клиенты (по имени), найденные по началу имени или телефона"""
+    stmt = (select(Client)
+            .where(client_search_condition(text))
+            .order_by(Client.name_key, Client.id)
+            .limit(limit))
+    return list(session.execute(stmt).scalars())
@@ -0,0 +1,47 @@
+# sto_app/utils/draft_autosave.py
+"""
+Фоновое автосохранение черновиков заказов.
+
+UI-поток только снимает набор изменений (DraftChanges), запись выполняется
+в отдельном потоке функцией сервиса заказов (draft_writer): своя сессия на
+том же движке БД или вызов сервера в режиме клиента.
+"""
+
+import logging
+import time
+from typing import Callable
+
+from PySide6.QtCore import QThread, Signal
+
+from .order_lines import DraftChanges
+
+
+logger = logging.getLogger(__name__)
+
+
+class DraftSaveWorker(QThread):
+    """Рабочий поток записи изменений черновика"""
+
+    save_completed = Signal(bool, str)  # success, message
+
+    def __init__(self, write: Callable[[DraftChanges], DraftChanges], changes: DraftChanges, parent=None):
+        super().__init__(parent)
+        self.write = write
+        self.changes = changes
+        self.success = False
+        self.error = None
+        self.handled = False
+
+    def run(self):
+        """Запись изменений (функция записи сама коммитит или откатывает)"""
+        started = time.perf_counter()
+        try:
+            self.write(self.changes)
+            self.success = True
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            logger.debug(f"Автосохранение заказа {self.changes.order_id}: {elapsed_ms:.1f} мс")
+            self.save_completed.emit(True, "")
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"Ошибка автосохранения черновика: {e}")
+            self.save_completed.emit(False, self.error)
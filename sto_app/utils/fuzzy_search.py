@@ -0,0 +1,182 @@
+# sto_app/utils/fuzzy_search.py
+"""
+Нечеткий поиск по триграммам (устойчивый к опечаткам).
+
+Каждый термин (название, украинское название, отдельный синоним)
+раскладывается на триграммы по словам, как в pg_trgm: "масло" ->
+"  м", " ма", "мас", "асл", "сло", "ло ". Инвертированный индекс
+триграмма -> термины позволяет найти кандидатов, не перебирая весь
+каталог: оцениваются только термины, у которых есть общие триграммы с
+запросом.
+
+Оценка - доля триграмм запроса, найденных в термине (как word_similarity
+в pg_trgm), при равенстве выше термин с большим сходством Жаккара.
+Русские и украинские написания сближаются заменой і/ї/є/ґ/ё.
+
+Индекс каталога услуг (service_index) привязан к версии справочника в
+reference_cache и обновляется пошагово: пересчитываются только
+добавленные, измененные и удаленные услуги.
+"""
+
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Generic, Iterable, List, Optional, Set, Tuple, TypeVar
+
+from shared_models.normalize import name_key
+from .reference_cache import reference_cache, ServiceRecord
+
+_FOLD = str.maketrans({'і': 'и', 'ї': 'и', 'є': 'е', 'ґ': 'г', 'ы': 'и', 'э': 'е'})
+
+R = TypeVar('R')
+
+
+def fold_text(text: Optional[str]) -> str:
+    """Нормализация для триграмм: регистр, ё/і/ї/є/ґ/ы/э, только буквы и цифры"""
+    key = name_key(text).translate(_FOLD)
+    return ''.join(ch if ch.isalnum() else ' ' for ch in key)
+
+
+def trigrams(text: Optional[str]) -> Set[str]:
+    """Множество триграмм строки (слова дополняются пробелами)"""
+    result = set()
+    for word in fold_text(text).split():
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+@dataclass(frozen=True)
+class FuzzyMatch(Generic[R]):
+    """Результат поиска: запись, оценка и совпавший термин"""
+    record: R
+    score: float
+    similarity: float
+    term: str
+
+
+class TrigramIndex(Generic[R]):
+    """
+    Инвертированный индекс триграмм по записям с несколькими терминами.
+
+    Записи добавляются и удаляются по одной (add/remove), поэтому индекс
+    можно поддерживать в актуальном состоянии без полной перестройки.
+    """
+
+    def __init__(self):
+        self._records: Dict[int, R] = {}
+        self._terms: Dict[int, Tuple[int, str, int]] = {}  # term_id -> (record_id, термин, число триграмм)
+        self._record_terms: Dict[int, List[int]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._next_term_id = 0
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, record_id):
+        return record_id in self._records
+
+    def add(self, record_id: int, record: R, terms: Iterable[str]):
+        """Добавить (или заменить) запись с ее терминами"""
+        self.remove(record_id)
+        self._records[record_id] = record
+        term_ids = []
+        for term in dict.fromkeys(t.strip() for t in terms if t and t.strip()):
+            grams = trigrams(term)
+            if not grams:
+                continue
+            term_id = self._next_term_id
+            self._next_term_id += 1
+            self._terms[term_id] = (record_id, term, len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(term_id)
+            term_ids.append(term_id)
+        self._record_terms[record_id] = term_ids
+
+    def remove(self, record_id: int):
+        """Удалить запись из индекса"""
+        if self._records.pop(record_id, None) is None:
+            return
+        for term_id in self._record_terms.pop(record_id, ()):
+            _, term, _ = self._terms.pop(term_id)
+            for gram in trigrams(term):
+                postings = self._postings.get(gram)
+                if postings is not None:
+                    postings.discard(term_id)
+                    if not postings:
+                        del self._postings[gram]
+
+    def search(self, query: str, limit: int = 20, threshold: float = 0.5) -> List[FuzzyMatch[R]]:
+        """Записи, похожие на запрос, по убыванию оценки (у записи учитывается лучший термин)"""
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+
+        shared = Counter()
+        for gram in query_grams:
+            postings = self._postings.get(gram)
+            if postings:
+                shared.update(postings)
+
+        size = len(query_grams)
+        min_shared = threshold * size
+        best: Dict[int, Tuple[float, float, str]] = {}
+        for term_id, count in shared.items():
+            if count < min_shared:
+                continue
+            record_id, term, term_size = self._terms[term_id]
+            score = count / size
+            similarity = count / (size + term_size - count)
+            if (score, similarity) > best.get(record_id, (0.0, 0.0, ''))[:2]:
+                best[record_id] = (score, similarity, term)
+
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0], -item[1][1], item[1][2]))
+        return [
+            FuzzyMatch(self._records[record_id], score, similarity, term)
+            for record_id, (score, similarity, term) in ranked[:limit]
+        ]
+
+
+def service_terms(service: ServiceRecord) -> List[str]:
+    """Термины услуги: название, название на украинском и каждый синоним отдельно"""
+    return [service.name, service.name_ua, *service.synonyms.split(',')]
+
+
+class ServiceFuzzyIndex:
+    """Индекс каталога услуг, синхронизируемый с версией справочника"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = None
+        self.index: TrigramIndex[ServiceRecord] = TrigramIndex()
+        self._indexed: Dict[int, ServiceRecord] = {}
+
+    def sync(self, session):
+        """Обновить индекс, если каталог изменился (только разница)"""
+        table = reference_cache.services(session)
+        with self._lock:
+            if table.version == self.version:
+                return
+            current = table.by_id
+            for record_id in set(self._indexed) - set(current):
+                self.index.remove(record_id)
+                del self._indexed[record_id]
+            for record_id, record in current.items():
+                if self._indexed.get(record_id) != record:
+                    self.index.add(record_id, record, service_terms(record))
+                    self._indexed[record_id] = record
+            self.version = table.version
+
+    def search(self, session, query: str, limit: int = 20, threshold: float = 0.5,
+               active_only: bool = True) -> List[FuzzyMatch[ServiceRecord]]:
+        """Услуги, похожие на запрос, по убыванию сходства"""
+        self.sync(session)
+        with self._lock:
+            # Запас на неактивные услуги, которые будут отброшены
+            matches = self.index.search(query, limit * 2 if active_only else limit, threshold)
+        if active_only:
+            matches = [m for m in matches if m.record.is_active]
+        return matches[:limit]
+
+
+service_index = ServiceFuzzyIndex()
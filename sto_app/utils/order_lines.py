@@ -0,0 +1,440 @@
+# sto_app/utils/order_lines.py
+"""
+Модель позиций заказа в памяти.
+
+Редактор заказа держит услуги и запчасти здесь, а не в таблицах QTableWidget
+и не в БД. Промежуточные суммы (услуги, запчасти, НДС) поддерживаются
+инкрементально (в целых копейках): добавление, изменение и удаление строки
+меняют их за O(1), поэтому пересчет скидки и предоплаты не зависит от
+количества строк. Все денежные правила - в pricing.py.
+
+База данных используется только при загрузке заказа (load_order)
+и при сохранении (save_to_order / take_changes + apply_draft_changes).
+Строки помечаются как измененные, поэтому при сохранении формируется
+минимальный набор INSERT/UPDATE/DELETE.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from sqlalchemy import select, update, delete
+
+from ..models_sto import Order, OrderService, OrderPart, OrderStatus, touch_order_totals
+from .payments import sync_prepayment
+from .pricing import (ZERO, DEFAULT_VAT_RATE, OrderTotals, to_decimal, round_money,
+                      to_kopecks, from_kopecks, price_line, price_order, vat_rate_from_prices)
+
+logger = logging.getLogger(__name__)
+
+# Колонки строк заказа, которые пишет набор изменений (DraftChanges)
+SERVICE_COLUMNS = ('service_name', 'service_name_ua', 'price', 'price_with_vat')
+PART_COLUMNS = ('article', 'part_name', 'part_name_ua', 'unit', 'price', 'quantity', 'total')
+
+
+@dataclass
+class ServiceLine:
+    """Строка услуги в заказе"""
+    service_name: str
+    price: Decimal
+    service_name_ua: Optional[str] = None
+    vat_rate: Decimal = DEFAULT_VAT_RATE
+    db_id: Optional[int] = None
+    dirty: bool = field(default=False, compare=False, repr=False)
+
+    @property
+    def pricing(self):
+        return price_line(self.price, vat_rate=self.vat_rate)
+
+    @property
+    def total(self) -> Decimal:
+        return self.pricing.total
+
+    @property
+    def vat_amount(self) -> Decimal:
+        return self.pricing.vat
+
+    @property
+    def price_with_vat(self) -> Decimal:
+        return self.pricing.total_with_vat
+
+
+@dataclass
+class PartLine:
+    """Строка запчасти в заказе"""
+    part_name: str
+    price: Decimal
+    quantity: Decimal = Decimal('1')
+    article: Optional[str] = None
+    unit: str = 'шт'
+    part_name_ua: Optional[str] = None
+    discount_amount: Decimal = ZERO
+    db_id: Optional[int] = None
+    dirty: bool = field(default=False, compare=False, repr=False)
+
+    @property
+    def pricing(self):
+        return price_line(self.price, self.quantity, discount_amount=self.discount_amount)
+
+    @property
+    def total(self) -> Decimal:
+        return self.pricing.total
+
+
+@dataclass
+class DraftChanges:
+    """
+    Минимальный набор изменений черновика заказа.
+
+    Снимок делается в UI-потоке (OrderLineItems.take_changes), а записывается
+    в любом потоке функцией apply_draft_changes со своей сессией.
+    """
+    order_id: Optional[int] = None
+    order_fields: dict = field(default_factory=dict)
+    new_services: list = field(default_factory=list)      # [(ServiceLine, values)]
+    new_parts: list = field(default_factory=list)         # [(PartLine, values)]
+    updated_services: list = field(default_factory=list)  # [values с id]
+    updated_parts: list = field(default_factory=list)
+    deleted_service_ids: list = field(default_factory=list)
+    deleted_part_ids: list = field(default_factory=list)
+
+    # Заполняется при записи
+    order_number: Optional[str] = None
+    inserted_service_ids: list = field(default_factory=list)
+    inserted_part_ids: list = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not (self.order_fields or self.new_services or self.new_parts or
+                    self.updated_services or self.updated_parts or
+                    self.deleted_service_ids or self.deleted_part_ids)
+
+
+class OrderLineItems:
+    """Услуги и запчасти редактируемого заказа с инкрементальными итогами"""
+
+    def __init__(self):
+        self.services: List[ServiceLine] = []
+        self.parts: List[PartLine] = []
+
+        # Промежуточные суммы в копейках
+        self._services_kop = 0
+        self._parts_kop = 0
+        self._vat_kop = 0
+
+        # Идентификаторы строк, удаленных после загрузки (удаляются при сохранении)
+        self._removed_service_ids: List[int] = []
+        self._removed_part_ids: List[int] = []
+
+    # --- Услуги ---
+
+    def add_service(self, line: ServiceLine) -> int:
+        """Добавление услуги, возвращает индекс строки"""
+        self.services.append(line)
+        self._services_kop += to_kopecks(line.total)
+        self._vat_kop += to_kopecks(line.vat_amount)
+        return len(self.services) - 1
+
+    def update_service(self, index: int, **changes) -> ServiceLine:
+        """Изменение полей услуги"""
+        line = self.services[index]
+        self._services_kop -= to_kopecks(line.total)
+        self._vat_kop -= to_kopecks(line.vat_amount)
+        for name, value in changes.items():
+            setattr(line, name, value)
+        # Новая строка тоже помечается: ее могут менять, пока идет вставка снимка
+        line.dirty = True
+        self._services_kop += to_kopecks(line.total)
+        self._vat_kop += to_kopecks(line.vat_amount)
+        return line
+
+    def remove_service(self, index: int) -> ServiceLine:
+        """Удаление услуги по индексу строки"""
+        line = self.services.pop(index)
+        self._services_kop -= to_kopecks(line.total)
+        self._vat_kop -= to_kopecks(line.vat_amount)
+        if line.db_id is not None:
+            self._removed_service_ids.append(line.db_id)
+        return line
+
+    # --- Запчасти ---
+
+    def add_part(self, line: PartLine) -> int:
+        """Добавление запчасти, возвращает индекс строки"""
+        self.parts.append(line)
+        self._parts_kop += to_kopecks(line.total)
+        return len(self.parts) - 1
+
+    def update_part(self, index: int, **changes) -> PartLine:
+        """Изменение полей запчасти"""
+        line = self.parts[index]
+        self._parts_kop -= to_kopecks(line.total)
+        for name, value in changes.items():
+            setattr(line, name, value)
+        line.dirty = True
+        self._parts_kop += to_kopecks(line.total)
+        return line
+
+    def remove_part(self, index: int) -> PartLine:
+        """Удаление запчасти по индексу строки"""
+        line = self.parts.pop(index)
+        self._parts_kop -= to_kopecks(line.total)
+        if line.db_id is not None:
+            self._removed_part_ids.append(line.db_id)
+        return line
+
+    # --- Итоги ---
+
+    @property
+    def services_total(self) -> Decimal:
+        return from_kopecks(self._services_kop)
+
+    @property
+    def parts_total(self) -> Decimal:
+        return from_kopecks(self._parts_kop)
+
+    @property
+    def vat_total(self) -> Decimal:
+        return from_kopecks(self._vat_kop)
+
+    def totals(self, discount_percent=0, prepayment=0) -> OrderTotals:
+        """Итоги заказа с учетом скидки и предоплаты (без обхода строк)"""
+        return price_order(self._services_kop, self._parts_kop, self._vat_kop,
+                           discount_percent=discount_percent, prepayment=prepayment)
+
+    @property
+    def is_dirty(self) -> bool:
+        """Есть ли несохраненные изменения строк"""
+        if self._removed_service_ids or self._removed_part_ids:
+            return True
+        return any(line.db_id is None or line.dirty for line in self.services) or \
+            any(line.db_id is None or line.dirty for line in self.parts)
+
+    def clear(self):
+        """Очистка всех строк"""
+        self.services.clear()
+        self.parts.clear()
+        self._services_kop = 0
+        self._parts_kop = 0
+        self._vat_kop = 0
+        self._removed_service_ids.clear()
+        self._removed_part_ids.clear()
+
+    # --- Работа с БД ---
+
+    def load_order(self, session, order_id: int):
+        """Загрузка строк заказа из БД (два запроса при открытии заказа)"""
+        self.clear()
+
+        services = session.execute(
+            select(OrderService).where(OrderService.order_id == order_id).order_by(OrderService.id)
+        ).scalars().all()
+        for service in services:
+            self.add_service(ServiceLine(
+                service_name=service.service_name,
+                service_name_ua=service.service_name_ua,
+                price=to_decimal(service.price),
+                vat_rate=vat_rate_from_prices(service.price, service.price_with_vat),
+                db_id=service.id
+            ))
+
+        parts = session.execute(
+            select(OrderPart).where(OrderPart.order_id == order_id).order_by(OrderPart.id)
+        ).scalars().all()
+        for part in parts:
+            price = to_decimal(part.price)
+            quantity = to_decimal(part.quantity)
+            discount = ZERO
+            if part.total is not None:
+                discount = max(price_line(price, quantity).subtotal - round_money(part.total), ZERO)
+            self.add_part(PartLine(
+                part_name=part.part_name,
+                part_name_ua=part.part_name_ua,
+                article=part.article,
+                unit=part.unit or 'шт',
+                price=price,
+                quantity=quantity,
+                discount_amount=discount,
+                db_id=part.id
+            ))
+
+    def save_to_order(self, session, order, order_fields: Optional[dict] = None):
+        """
+        Синхронизация строк с БД для указанного заказа (в текущей сессии).
+
+        Пишутся только новые, измененные и удаленные строки.
+        Коммит выполняет вызывающий код.
+        """
+        if order.id is None:
+            session.add(order)
+            session.flush()
+
+        changes = self.take_changes(order.id, order_fields)
+        try:
+            apply_draft_changes(session, changes)
+        except Exception:
+            self.restore_changes(changes)
+            raise
+        self.apply_saved_changes(changes)
+
+    def take_changes(self, order_id: Optional[int], order_fields: Optional[dict] = None) -> DraftChanges:
+        """
+        Снимок несохраненных изменений строк со сбросом флагов.
+
+        Новые строки остаются без db_id до apply_saved_changes,
+        при ошибке записи изменения возвращаются через restore_changes.
+        Строка, измененная во время записи, снова помечается и после
+        apply_saved_changes уходит в следующее сохранение как UPDATE.
+        """
+        changes = DraftChanges(order_id=order_id, order_fields=dict(order_fields or {}))
+
+        for line in self.services:
+            if line.db_id is None:
+                changes.new_services.append((line, self._service_values(line)))
+            elif line.dirty:
+                changes.updated_services.append(self._service_values(line, id=line.db_id))
+            line.dirty = False
+        for line in self.parts:
+            if line.db_id is None:
+                changes.new_parts.append((line, self._part_values(line)))
+            elif line.dirty:
+                changes.updated_parts.append(self._part_values(line, id=line.db_id))
+            line.dirty = False
+
+        changes.deleted_service_ids = list(self._removed_service_ids)
+        changes.deleted_part_ids = list(self._removed_part_ids)
+        self._removed_service_ids.clear()
+        self._removed_part_ids.clear()
+        return changes
+
+    def restore_changes(self, changes: DraftChanges):
+        """Возврат изменений после неудачной записи"""
+        updated_services = {values['id'] for values in changes.updated_services}
+        updated_parts = {values['id'] for values in changes.updated_parts}
+        for line in self.services:
+            if line.db_id in updated_services:
+                line.dirty = True
+        for line in self.parts:
+            if line.db_id in updated_parts:
+                line.dirty = True
+        self._removed_service_ids.extend(changes.deleted_service_ids)
+        self._removed_part_ids.extend(changes.deleted_part_ids)
+
+    def apply_saved_changes(self, changes: DraftChanges):
+        """
+        Присвоение идентификаторов вставленным строкам.
+
+        Строки, удаленные из редактора пока шла запись, попадают
+        в список на удаление при следующем сохранении.
+        """
+        inserted = list(zip(changes.new_services, changes.inserted_service_ids)) + \
+            list(zip(changes.new_parts, changes.inserted_part_ids))
+        for (line, _), db_id in inserted:
+            line.db_id = db_id
+
+        present_services = {id(item) for item in self.services}
+        present_parts = {id(item) for item in self.parts}
+        for (line, _), db_id in zip(changes.new_services, changes.inserted_service_ids):
+            if id(line) not in present_services:
+                self._removed_service_ids.append(db_id)
+        for (line, _), db_id in zip(changes.new_parts, changes.inserted_part_ids):
+            if id(line) not in present_parts:
+                self._removed_part_ids.append(db_id)
+
+    @staticmethod
+    def _service_values(line: ServiceLine, **extra) -> dict:
+        pricing = line.pricing
+        values = {
+            'service_name': line.service_name,
+            'service_name_ua': line.service_name_ua,
+            'price': float(pricing.total),
+            'price_with_vat': float(pricing.total_with_vat),
+        }
+        values.update(extra)
+        return values
+
+    @staticmethod
+    def _part_values(line: PartLine, **extra) -> dict:
+        values = {
+            'article': line.article,
+            'part_name': line.part_name,
+            'part_name_ua': line.part_name_ua,
+            'unit': line.unit,
+            'price': float(round_money(line.price)),
+            'quantity': float(line.quantity),
+            'total': float(line.pricing.total),
+        }
+        values.update(extra)
+        return values
+
+
+def next_order_number(session, today: Optional[datetime] = None) -> str:
+    """
+    Следующий номер заказа за день в формате СТО-YYYYMMDD-NNN; при
+    настроенной репликации - СТО-<площадка>-YYYYMMDD-NNN, у каждой
+    площадки своя нумерация
+    """
+    from config.database import local_site_id
+
+    site_id = local_site_id(session)
+    prefix = f'СТО-{site_id}-' if site_id else 'СТО-'
+    date_str = (today or datetime.now()).strftime('%Y%m%d')
+    last_number = session.execute(
+        select(Order.order_number)
+        .where(Order.order_number.like(f'{prefix}{date_str}-%'))
+        .order_by(Order.order_number.desc())
+        .limit(1)
+    ).scalar()
+
+    new_num = int(last_number.split('-')[-1]) + 1 if last_number else 1
+    return f'{prefix}{date_str}-{new_num:03d}'
+
+
+def apply_draft_changes(session, changes: DraftChanges):
+    """
+    Запись набора изменений черновика.
+
+    Заказ без id создается (с новым номером), у существующего обновляются
+    только измененные поля. Строки: пакетные DELETE/UPDATE и INSERT новых.
+    Предоплата из формы записывается в журнал оплат корректирующей записью.
+    Коммит выполняет вызывающий код.
+    """
+    order_fields = dict(changes.order_fields)
+    prepayment = order_fields.pop('prepayment', None)
+
+    if changes.order_id is None:
+        order = Order(status=OrderStatus.DRAFT, **order_fields)
+        order.order_number = next_order_number(session)
+        session.add(order)
+        session.flush()
+        changes.order_id = order.id
+        changes.order_number = order.order_number
+    elif order_fields:
+        session.execute(
+            update(Order).where(Order.id == changes.order_id).values(**order_fields)
+        )
+
+    if prepayment is not None:
+        sync_prepayment(session, changes.order_id, prepayment)
+
+    # Массовые UPDATE/DELETE не видны событиям flush - итоги заказа пересчитаются при коммите
+    touch_order_totals(session, changes.order_id)
+
+    if changes.deleted_service_ids:
+        session.execute(delete(OrderService).where(OrderService.id.in_(changes.deleted_service_ids)))
+    if changes.deleted_part_ids:
+        session.execute(delete(OrderPart).where(OrderPart.id.in_(changes.deleted_part_ids)))
+
+    if changes.updated_services:
+        session.execute(update(OrderService), changes.updated_services)
+    if changes.updated_parts:
+        session.execute(update(OrderPart), changes.updated_parts)
+
+    new_services = [OrderService(order_id=changes.order_id, **values) for _, values in changes.new_services]
+    new_parts = [OrderPart(order_id=changes.order_id, **values) for _, values in changes.new_parts]
+    if new_services or new_parts:
+        session.add_all(new_services + new_parts)
+        session.flush()
+    changes.inserted_service_ids = [obj.id for obj in new_services]
+    changes.inserted_part_ids = [obj.id for obj in new_parts]
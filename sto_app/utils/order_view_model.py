@@ -0,0 +1,315 @@
+# sto_app/utils/order_view_model.py
+"""
+Модель представления заказа для просмотра и печати.
+
+Заказ со всеми связанными данными читается фиксированным числом запросов
+(заказ с клиентом, автомобилем и сотрудниками - одним JOIN, услуги и
+запчасти - по одному SELECT ... IN) и превращается в простые данные без
+ORM-объектов. Такие данные можно кэшировать по (order_id, updated_at):
+повторное открытие того же заказа не обращается к БД.
+
+Правка клиента, автомобиля или сотрудника не меняет orders.updated_at,
+поэтому модели с такими данными вытесняются явно: после коммита своего
+процесса (слушатели сессии ниже) и по журналу изменений других процессов
+(utils.change_notifier).
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from shared_models.common_models import Car, Client, Employee
+from ..models_sto import Order, OrderStatus, on_orders_committed
+from .pricing import (BatchPricing, price_batch, vat_rate_from_prices, to_kopecks,
+                      from_kopecks, round_money, to_decimal)
+
+
+@dataclass(frozen=True)
+class ClientInfo:
+    """Данные клиента заказа"""
+    name: str
+    phone: str
+    email: str
+    address: str
+
+
+@dataclass(frozen=True)
+class CarInfo:
+    """Данные автомобиля заказа"""
+    make: str
+    model: str
+    year: Optional[int]
+    vin: str
+    license_plate: str
+    color: str
+    mileage: Optional[int]
+
+    @property
+    def title(self) -> str:
+        return f"{self.make} {self.model}".strip()
+
+
+@dataclass(frozen=True)
+class ServiceRow:
+    """Строка услуги (суммы уже рассчитаны)"""
+    name: str
+    vat_rate: Decimal
+    price: Decimal
+    price_with_vat: Decimal
+
+
+@dataclass(frozen=True)
+class PartRow:
+    """Строка запчасти (суммы уже рассчитаны)"""
+    article: str
+    name: str
+    quantity: float
+    price: Decimal
+    discount: Decimal
+    total: Decimal
+
+
+@dataclass
+class OrderViewModel:
+    """Данные заказа для диалога деталей и печати"""
+    order_id: int
+    updated_at: Optional[datetime]
+    client_id: Optional[int]
+    car_id: Optional[int]
+    employee_ids: frozenset
+    order_number: str
+    status: Optional[OrderStatus]
+    created_at: Optional[datetime]
+    date_received: Optional[datetime]
+    date_delivery: Optional[datetime]
+    notes: str
+    client: Optional[ClientInfo]
+    car: Optional[CarInfo]
+    manager_name: str
+    responsible_name: str
+    services: List[ServiceRow] = field(default_factory=list)
+    parts: List[PartRow] = field(default_factory=list)
+    services_pricing: BatchPricing = field(default_factory=lambda: price_batch([]))
+    parts_pricing: BatchPricing = field(default_factory=lambda: price_batch([]))
+    discount_percent: Decimal = Decimal('0')
+    discount_total: Decimal = Decimal('0')
+    vat_total: Decimal = Decimal('0')
+    total_amount: Decimal = Decimal('0')
+    paid_total: Decimal = Decimal('0')
+    balance_due: Decimal = Decimal('0')
+
+    @property
+    def status_text(self) -> str:
+        return self.status.value if self.status else ''
+
+    @property
+    def cache_key(self):
+        return self.order_id, self.updated_at
+
+    def uses(self, table: str, ids) -> bool:
+        """Содержит ли модель данные записей таблицы clients, cars или employees"""
+        if table == 'clients':
+            return self.client_id in ids
+        if table == 'cars':
+            return self.car_id in ids
+        if table == 'employees':
+            return not self.employee_ids.isdisjoint(ids)
+        return False
+
+
+def _build_view_model(order: Order) -> OrderViewModel:
+    """Перенос данных заказа в модель представления"""
+    services = list(order.services)
+    parts = list(order.parts)
+
+    # Услуги и запчасти считаются пакетно, как и во всей системе
+    vat_rates = [vat_rate_from_prices(s.price, s.price_with_vat) for s in services]
+    services_pricing = price_batch([s.price for s in services], vat_rates=vat_rates)
+
+    # Скидка строки запчасти - разница между ценой * количество и сохраненной суммой
+    prices = [p.price for p in parts]
+    quantities = [p.quantity for p in parts]
+    base = price_batch(prices, quantities)
+    discounts = [
+        from_kopecks(max(subtotal - to_kopecks(part.total), 0)) if part.total is not None else 0
+        for subtotal, part in zip(base.subtotals, parts)
+    ]
+    parts_pricing = price_batch(prices, quantities, discount_amounts=discounts)
+
+    service_rows = []
+    for row, service in enumerate(services):
+        line = services_pricing.line(row)
+        service_rows.append(ServiceRow(
+            name=service.service_name or "Услуга",
+            vat_rate=vat_rates[row],
+            price=line.total,
+            price_with_vat=line.total_with_vat
+        ))
+
+    part_rows = []
+    for row, part in enumerate(parts):
+        line = parts_pricing.line(row)
+        part_rows.append(PartRow(
+            article=part.article or "",
+            name=part.part_name or "",
+            quantity=part.quantity or 0,
+            price=round_money(part.price),
+            discount=line.discount,
+            total=line.total
+        ))
+
+    client = order.client
+    car = order.car
+    return OrderViewModel(
+        order_id=order.id,
+        updated_at=order.updated_at,
+        client_id=order.client_id,
+        car_id=order.car_id,
+        employee_ids=frozenset(filter(None, (order.manager_id, order.responsible_person_id))),
+        order_number=order.order_number or "",
+        status=order.status,
+        created_at=order.created_at,
+        date_received=order.date_received,
+        date_delivery=order.date_delivery,
+        notes=order.notes or "",
+        client=ClientInfo(
+            name=client.name or "",
+            phone=client.phone or "",
+            email=client.email or "",
+            address=client.address or ""
+        ) if client else None,
+        car=CarInfo(
+            make=car.make or car.brand or "",
+            model=car.model or "",
+            year=car.year,
+            vin=car.vin or "",
+            license_plate=car.license_plate or "",
+            color=car.color or "",
+            mileage=car.mileage
+        ) if car else None,
+        manager_name=order.manager.full_name if order.manager else "",
+        responsible_name=order.responsible_person.full_name if order.responsible_person else "",
+        services=service_rows,
+        parts=part_rows,
+        services_pricing=services_pricing,
+        parts_pricing=parts_pricing,
+        discount_percent=to_decimal(order.discount_percent),
+        discount_total=round_money(order.discount_total),
+        vat_total=round_money(order.vat_total),
+        total_amount=round_money(order.total_amount),
+        paid_total=round_money(order.paid_total),
+        balance_due=round_money(order.balance_due)
+    )
+
+
+def load_order_view_model(session, order_id: int) -> Optional[OrderViewModel]:
+    """Загрузка заказа со связанными данными за 3 запроса"""
+    stmt = select(Order).where(Order.id == order_id).options(
+        joinedload(Order.client),
+        joinedload(Order.car),
+        joinedload(Order.manager),
+        joinedload(Order.responsible_person),
+        selectinload(Order.services),
+        selectinload(Order.parts)
+    )
+    order = session.execute(stmt).unique().scalar_one_or_none()
+    if order is None:
+        return None
+    return _build_view_model(order)
+
+
+class OrderViewModelCache:
+    """
+    LRU-кэш моделей представления заказов.
+
+    Ключ - (order_id, updated_at). Если вызывающий код знает updated_at
+    (например, из строки списка заказов), повторное открытие заказа не
+    делает ни одного запроса. Заказы, измененные в этом процессе,
+    вытесняются сразу после коммита, вместе с заказами измененных
+    клиентов, автомобилей и сотрудников (invalidate_related).
+    """
+
+    def __init__(self, max_size: int = 32):
+        self.max_size = max_size
+        self._items = OrderedDict()  # order_id -> OrderViewModel
+        self._lock = threading.Lock()
+
+    def get(self, session, order_id: int, updated_at: Optional[datetime] = None) -> Optional[OrderViewModel]:
+        """Модель заказа из кэша или из БД"""
+        if updated_at is None:
+            updated_at = session.execute(
+                select(Order.updated_at).where(Order.id == order_id)
+            ).scalar_one_or_none()
+
+        with self._lock:
+            model = self._items.get(order_id)
+            if model is not None and model.updated_at == updated_at:
+                self._items.move_to_end(order_id)
+                return model
+
+        model = load_order_view_model(session, order_id)
+        if model is not None:
+            self.put(model)
+        return model
+
+    def put(self, model: OrderViewModel):
+        with self._lock:
+            self._items[model.order_id] = model
+            self._items.move_to_end(model.order_id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, order_ids=None):
+        """Вытеснить указанные заказы (None - все)"""
+        with self._lock:
+            if order_ids is None:
+                self._items.clear()
+                return
+            for order_id in order_ids:
+                self._items.pop(order_id, None)
+
+    def invalidate_related(self, table: str, ids: Iterable[int]):
+        """Вытеснить заказы с данными указанных клиентов, автомобилей или сотрудников"""
+        ids = frozenset(ids)
+        if not ids:
+            return
+        with self._lock:
+            stale = [order_id for order_id, model in self._items.items() if model.uses(table, ids)]
+            for order_id in stale:
+                del self._items[order_id]
+
+
+order_view_cache = OrderViewModelCache()
+on_orders_committed(order_view_cache.invalidate)
+
+# Связанные записи, данные которых копируются в модель заказа
+_RELATED_TABLES = {Client: 'clients', Car: 'cars', Employee: 'employees'}
+_CHANGED_RELATED_KEY = 'sto_changed_order_view_related'
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_related(session, flush_context):
+    """Сбор клиентов, автомобилей и сотрудников, измененных во flush"""
+    for obj in list(session.dirty) + list(session.deleted):
+        table = _RELATED_TABLES.get(type(obj))
+        if table and obj.id is not None:
+            changed: Dict[str, set] = session.info.setdefault(_CHANGED_RELATED_KEY, {})
+            changed.setdefault(table, set()).add(obj.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_related(session):
+    changed = session.info.pop(_CHANGED_RELATED_KEY, None)
+    for table, ids in (changed or {}).items():
+        order_view_cache.invalidate_related(table, ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changed_related(session):
+    session.info.pop(_CHANGED_RELATED_KEY, None)
@@ -0,0 +1,56 @@
+# sto_app/utils/payments.py
+"""
+Журнал оплат заказов.
+
+Оплаты только добавляются: исправление суммы - это новая запись
+(в том числе отрицательная). Суммы оплат, paid_total и balance_due
+заказа пересчитываются при коммите (см. recalculate_order_totals).
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func, select
+
+from ..models_sto import OrderPayment, PaymentMethod
+from .pricing import from_kopecks, sql_kopecks, to_kopecks
+
+
+def add_payment(session, order_id: int, amount, method: PaymentMethod = PaymentMethod.CASH,
+                paid_at: Optional[datetime] = None, note: Optional[str] = None,
+                is_prepayment: bool = False) -> OrderPayment:
+    """Добавить оплату в журнал (коммит выполняет вызывающий код)"""
+    payment = OrderPayment(
+        order_id=order_id,
+        amount=float(from_kopecks(to_kopecks(amount))),
+        method=method,
+        paid_at=paid_at or datetime.now(),
+        note=note,
+        is_prepayment=1 if is_prepayment else 0
+    )
+    session.add(payment)
+    return payment
+
+
+def prepayment_kopecks(session, order_id: int) -> int:
+    """Сумма предоплат заказа по журналу, в копейках"""
+    return session.execute(
+        select(func.coalesce(func.sum(sql_kopecks(OrderPayment.amount)), 0)).where(
+            OrderPayment.order_id == order_id,
+            OrderPayment.is_prepayment == 1
+        )
+    ).scalar()
+
+
+def sync_prepayment(session, order_id: int, amount) -> Optional[OrderPayment]:
+    """
+    Привести сумму предоплат к значению из формы заказа.
+
+    Разница записывается корректирующей записью журнала;
+    если сумма не изменилась, ничего не пишется.
+    """
+    difference = to_kopecks(amount) - prepayment_kopecks(session, order_id)
+    if not difference:
+        return None
+    return add_payment(session, order_id, from_kopecks(difference), is_prepayment=True,
+                       note='Предоплата' if difference > 0 else 'Корректировка предоплаты')
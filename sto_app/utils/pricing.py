@@ -0,0 +1,297 @@
+# sto_app/utils/pricing.py
+"""
+Единый расчет цен, скидок и НДС.
+
+Все суммы внутри считаются в целых копейках, проценты - в сотых долях
+процента (базисных пунктах), количество - в тысячных долях. Округление
+одно для всей системы: половина копейки округляется от нуля.
+
+Принимаются Decimal, float, int и строки; результат - Decimal с двумя
+знаками (или int-копейки для пакетных расчетов). Пакетные функции
+(price_batch / price_lines) принимают колонки или список строк,
+один раз переводят их в целые числа и считают все строки за один проход
+целочисленной арифметикой. Суммы по БД удобно брать сразу в копейках:
+sql_kopecks(column).
+"""
+
+import math
+from dataclasses import dataclass
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Iterable, List, Optional, Sequence
+
+from sqlalchemy import Integer, cast, func
+
+ZERO = Decimal('0')
+CENT = Decimal('0.01')
+HUNDRED = Decimal('100')
+DEFAULT_VAT_RATE = Decimal('20')
+
+KOPECKS = 100          # копеек в гривне
+BASIS_POINTS = 10000   # 100% в сотых долях процента
+QUANTITY_SCALE = 1000  # точность количества - 0.001
+
+
+def to_decimal(value) -> Decimal:
+    """Преобразование числа (float/str/int/None) в Decimal без артефактов float"""
+    if value is None:
+        return ZERO
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+def round_money(value) -> Decimal:
+    """Округление денежной суммы до копеек"""
+    return to_decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _scaled(value, scale: int) -> int:
+    """Число в целых единицах масштаба (копейки, б.п., тысячные)"""
+    if value is None:
+        return 0
+    if isinstance(value, int):
+        return value * scale
+    if isinstance(value, float):
+        # Быстрый путь: точное деление пополам решает Decimal
+        scaled = value * scale
+        if abs(abs(scaled - math.trunc(scaled)) - 0.5) > 1e-6:
+            return round(scaled)
+    return int((to_decimal(value) * scale).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def to_kopecks(value) -> int:
+    """Сумма в гривнах -> целые копейки"""
+    return _scaled(value, KOPECKS)
+
+
+def from_kopecks(kopecks: int) -> Decimal:
+    """Целые копейки -> сумма в гривнах (Decimal, 2 знака)"""
+    return Decimal(kopecks).scaleb(-2)
+
+
+def _div_round(numerator: int, denominator: int) -> int:
+    """Целочисленное деление с округлением половины от нуля"""
+    quotient, remainder = divmod(abs(numerator), denominator)
+    if remainder * 2 >= denominator:
+        quotient += 1
+    return quotient if numerator >= 0 else -quotient
+
+
+def percent_of_kopecks(amount_kop: int, percent) -> int:
+    """Процент от суммы в копейках"""
+    return _div_round(amount_kop * _scaled(percent, 100), BASIS_POINTS)
+
+
+def percent_of(amount, percent) -> Decimal:
+    """Процент от суммы в гривнах"""
+    return from_kopecks(percent_of_kopecks(to_kopecks(amount), percent))
+
+
+def average_kopecks(total_kop: int, count: int) -> int:
+    """Среднее значение в копейках"""
+    return _div_round(total_kop, count) if count else 0
+
+
+def vat_rate_from_prices(price, price_with_vat, default=DEFAULT_VAT_RATE) -> Decimal:
+    """Ставка НДС (%) по сохраненным цене и цене с НДС"""
+    price = to_decimal(price)
+    if not price or price_with_vat is None:
+        return to_decimal(default)
+    return round_money((to_decimal(price_with_vat) / price - 1) * HUNDRED)
+
+
+def sql_kopecks(column):
+    """SQL-выражение: значение денежной колонки в целых копейках"""
+    return cast(func.round(column * KOPECKS), Integer)
+
+
+def format_money(value, currency: str = '₴') -> str:
+    """Форматирование суммы (Decimal/float или int-копейки через from_kopecks)"""
+    return f"{round_money(value):.2f} {currency}".rstrip()
+
+
+@dataclass
+class LinePricing:
+    """Результат расчета одной строки"""
+    subtotal: Decimal
+    discount: Decimal
+    total: Decimal
+    vat: Decimal
+
+    @property
+    def total_with_vat(self) -> Decimal:
+        return self.total + self.vat
+
+
+@dataclass
+class BatchPricing:
+    """Результат пакетного расчета строк (колонки в копейках)"""
+    subtotals: List[int]
+    discounts: List[int]
+    totals: List[int]
+    vats: List[int]
+
+    def __len__(self):
+        return len(self.totals)
+
+    def line(self, index: int) -> LinePricing:
+        return LinePricing(
+            subtotal=from_kopecks(self.subtotals[index]),
+            discount=from_kopecks(self.discounts[index]),
+            total=from_kopecks(self.totals[index]),
+            vat=from_kopecks(self.vats[index])
+        )
+
+    @property
+    def subtotal_kop(self) -> int:
+        return sum(self.subtotals)
+
+    @property
+    def discount_kop(self) -> int:
+        return sum(self.discounts)
+
+    @property
+    def total_kop(self) -> int:
+        return sum(self.totals)
+
+    @property
+    def vat_kop(self) -> int:
+        return sum(self.vats)
+
+    @property
+    def subtotal(self) -> Decimal:
+        return from_kopecks(self.subtotal_kop)
+
+    @property
+    def discount(self) -> Decimal:
+        return from_kopecks(self.discount_kop)
+
+    @property
+    def total(self) -> Decimal:
+        return from_kopecks(self.total_kop)
+
+    @property
+    def vat(self) -> Decimal:
+        return from_kopecks(self.vat_kop)
+
+
+def _column(values: Optional[Sequence], size: int, scale: int, default) -> List[int]:
+    """Колонка значений в целых единицах масштаба"""
+    if values is None:
+        return [_scaled(default, scale)] * size
+    return [_scaled(value, scale) for value in values]
+
+
+def price_batch(prices: Sequence, quantities: Optional[Sequence] = None,
+                discount_percents: Optional[Sequence] = None,
+                discount_amounts: Optional[Sequence] = None,
+                vat_rates: Optional[Sequence] = None) -> BatchPricing:
+    """
+    Пакетный расчет строк по колонкам.
+
+    Для каждой строки: subtotal = цена * количество, скидка = процент
+    от subtotal + фиксированная сумма (не больше subtotal),
+    total = subtotal - скидка, НДС = ставка от total.
+    """
+    size = len(prices)
+    price_kop = [_scaled(price, KOPECKS) for price in prices]
+    qty_milli = _column(quantities, size, QUANTITY_SCALE, 1)
+    percent_bp = _column(discount_percents, size, 100, 0)
+    fixed_kop = _column(discount_amounts, size, KOPECKS, 0)
+    vat_bp = _column(vat_rates, size, 100, 0)
+
+    subtotals = [_div_round(p * q, QUANTITY_SCALE) for p, q in zip(price_kop, qty_milli)]
+    discounts = [
+        min(_div_round(s * bp, BASIS_POINTS) + fixed, s) if s > 0 else 0
+        for s, bp, fixed in zip(subtotals, percent_bp, fixed_kop)
+    ]
+    totals = [s - d for s, d in zip(subtotals, discounts)]
+    vats = [_div_round(t * bp, BASIS_POINTS) for t, bp in zip(totals, vat_bp)]
+
+    return BatchPricing(subtotals=subtotals, discounts=discounts, totals=totals, vats=vats)
+
+
+def price_lines(lines: Iterable, price: str = 'price', quantity: Optional[str] = 'quantity',
+                discount_percent: Optional[str] = None, discount_amount: Optional[str] = None,
+                vat_rate: Optional[str] = None) -> BatchPricing:
+    """
+    Пакетный расчет для списка строк (объектов или словарей).
+
+    Имена полей передаются явно; None - поле не используется.
+    """
+    lines = list(lines)
+
+    def column(name):
+        if name is None:
+            return None
+        return [line.get(name) if isinstance(line, dict) else getattr(line, name, None) for line in lines]
+
+    return price_batch(
+        column(price),
+        quantities=[1 if q is None else q for q in column(quantity)] if quantity else None,
+        discount_percents=column(discount_percent),
+        discount_amounts=column(discount_amount),
+        vat_rates=column(vat_rate)
+    )
+
+
+def price_line(price, quantity=1, discount_percent=0, discount_amount=0, vat_rate=0) -> LinePricing:
+    """Расчет одной строки (те же правила, что и в price_batch)"""
+    return price_batch([price], [quantity], [discount_percent], [discount_amount], [vat_rate]).line(0)
+
+
+@dataclass
+class OrderTotals:
+    """Итоги заказа"""
+    services_total: Decimal
+    parts_total: Decimal
+    subtotal: Decimal
+    discount_percent: Decimal
+    discount_amount: Decimal
+    vat_total: Decimal
+    total: Decimal
+    prepayment: Decimal
+    balance: Decimal
+
+
+def order_totals_kopecks(services_kop: int, parts_kop: int, vat_kop: int,
+                         discount_percent=0, paid_kop: int = 0) -> dict:
+    """Итоги заказа в копейках (для пакетной обработки и сверки)"""
+    subtotal = services_kop + parts_kop
+    discount = percent_of_kopecks(subtotal, discount_percent)
+    vat = vat_kop - percent_of_kopecks(vat_kop, discount_percent)
+    total = subtotal - discount
+    return {
+        'services_total': services_kop,
+        'parts_total': parts_kop,
+        'subtotal': subtotal,
+        'discount_total': discount,
+        'vat_total': vat,
+        'total': total,
+        'paid_total': paid_kop,
+        'balance_due': total - paid_kop,
+    }
+
+
+def price_order(services_kop: int, parts_kop: int, vat_kop: int,
+                discount_percent=0, prepayment=0) -> OrderTotals:
+    """
+    Итоги заказа по суммам строк.
+
+    Скидка заказа - процент от суммы услуг и запчастей, НДС
+    уменьшается пропорционально скидке. НДС показывается справочно
+    и в итог не добавляется.
+    """
+    totals = order_totals_kopecks(services_kop, parts_kop, vat_kop,
+                                  discount_percent, to_kopecks(prepayment))
+    return OrderTotals(
+        services_total=from_kopecks(totals['services_total']),
+        parts_total=from_kopecks(totals['parts_total']),
+        subtotal=from_kopecks(totals['subtotal']),
+        discount_percent=to_decimal(discount_percent),
+        discount_amount=from_kopecks(totals['discount_total']),
+        vat_total=from_kopecks(totals['vat_total']),
+        total=from_kopecks(totals['total']),
+        prepayment=from_kopecks(totals['paid_total']),
+        balance=from_kopecks(totals['balance_due'])
+    )
@@ -0,0 +1,242 @@
+# sto_app/utils/reference_cache.py
+"""
+Общий кэш справочников: каталог услуг, сотрудники, марки автомобилей.
+
+Справочники читаются из БД один раз и хранятся как неизменяемые записи
+(не ORM-объекты, поэтому их можно отдавать любой сессии и любому окну).
+У каждого справочника есть номер версии: коммит, изменивший справочник,
+увеличивает версию, и при следующем обращении справочник перечитывается.
+Массовые UPDATE/DELETE, не проходящие через flush, должны вызывать
+reference_cache.invalidate(...) явно. Изменения, сделанные другими
+процессами, сбрасывают кэш через utils.change_notifier.
+
+Для каждого справочника заранее построены порядок сортировки и словари
+поиска по id и по имени (без учета регистра).
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Callable, Dict, Generic, Optional, Tuple, TypeVar
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from shared_models.common_models import Employee
+from ..models_sto import CarBrand, ServiceCatalog
+
+
+logger = logging.getLogger(__name__)
+
+SERVICES = 'services'
+EMPLOYEES = 'employees'
+CAR_BRANDS = 'car_brands'
+
+
+@dataclass(frozen=True)
+class ServiceRecord:
+    """Услуга каталога"""
+    id: int
+    name: str
+    name_ua: str
+    default_price: float
+    vat_rate: float
+    duration_hours: float
+    description: str
+    category: str
+    synonyms: str
+    is_active: bool
+
+    @property
+    def price(self) -> float:
+        """Совместимость с ServiceCatalog.price"""
+        return self.default_price
+
+    @property
+    def price_with_vat(self) -> Decimal:
+        return Decimal(str(self.default_price)) * (1 + Decimal(str(self.vat_rate)) / 100)
+
+
+@dataclass(frozen=True)
+class EmployeeRecord:
+    """Сотрудник"""
+    id: int
+    name: str
+    full_name: str
+    first_name: str
+    last_name: str
+    position: str
+    role: str
+    phone: str
+    is_active: bool
+
+
+@dataclass(frozen=True)
+class CarBrandRecord:
+    """Марка автомобиля со списком моделей"""
+    id: int
+    brand: str
+    models: Tuple[str, ...]
+
+    @property
+    def name(self) -> str:
+        return self.brand
+
+    def get_models_list(self):
+        return list(self.models)
+
+
+def _service_record(service: ServiceCatalog) -> ServiceRecord:
+    return ServiceRecord(
+        id=service.id,
+        name=service.name or "",
+        name_ua=service.name_ua or "",
+        default_price=float(service.default_price or 0),
+        vat_rate=float(service.vat_rate if service.vat_rate is not None else 20),
+        duration_hours=float(service.duration_hours or 1.0),
+        description=service.description or "",
+        category=service.category or "",
+        synonyms=service.synonyms or "",
+        is_active=bool(service.is_active)
+    )
+
+
+def _employee_record(employee: Employee) -> EmployeeRecord:
+    return EmployeeRecord(
+        id=employee.id,
+        name=employee.name or "",
+        full_name=employee.full_name,
+        first_name=employee.first_name or "",
+        last_name=employee.last_name or "",
+        position=employee.position or employee.role or "",
+        role=employee.role or "",
+        phone=employee.phone or "",
+        is_active=bool(employee.is_active)
+    )
+
+
+def _car_brand_record(car_brand: CarBrand) -> CarBrandRecord:
+    return CarBrandRecord(id=car_brand.id, brand=car_brand.brand,
+                          models=tuple(car_brand.get_models_list()))
+
+
+R = TypeVar('R')
+
+
+class ReferenceTable(Generic[R]):
+    """Снимок справочника: записи, сортировки и словари поиска"""
+
+    def __init__(self, version: int, records, sort_keys: Dict[str, Callable]):
+        self.version = version
+        self.all: Tuple[R, ...] = tuple(records)
+        self.active: Tuple[R, ...] = tuple(r for r in self.all if getattr(r, 'is_active', True))
+        self.by_id: Dict[int, R] = {r.id: r for r in self.all}
+        self.by_name: Dict[str, R] = {r.name.casefold(): r for r in self.all}
+        self._orders = {
+            name: tuple(sorted(self.active, key=key)) for name, key in sort_keys.items()
+        }
+
+    def __len__(self):
+        return len(self.all)
+
+    def get(self, record_id: Optional[int]) -> Optional[R]:
+        return self.by_id.get(record_id)
+
+    def find(self, name: str) -> Optional[R]:
+        """Поиск по точному имени без учета регистра"""
+        return self.by_name.get((name or "").strip().casefold())
+
+    def ordered(self, sort_key: str = 'name') -> Tuple[R, ...]:
+        """Активные записи в заранее рассчитанном порядке"""
+        return self._orders[sort_key]
+
+
+# Описание справочников: модель, преобразование в запись, сортировки
+_SOURCES = {
+    SERVICES: (ServiceCatalog, _service_record, {
+        'name': lambda r: r.name.casefold(),
+        'category': lambda r: (r.category.casefold(), r.name.casefold()),
+        'price': lambda r: (r.default_price, r.name.casefold()),
+    }),
+    EMPLOYEES: (Employee, _employee_record, {
+        'name': lambda r: r.name.casefold(),
+        'last_name': lambda r: (r.last_name.casefold(), r.first_name.casefold()),
+    }),
+    CAR_BRANDS: (CarBrand, _car_brand_record, {
+        'name': lambda r: r.brand.casefold(),
+    }),
+}
+
+_MODEL_KINDS = {model: kind for kind, (model, _, _) in _SOURCES.items()}
+_CHANGED_KINDS_KEY = 'sto_changed_reference_kinds'
+
+
+class ReferenceDataCache:
+    """Кэш справочников с версиями (один на процесс)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions = {kind: 0 for kind in _SOURCES}
+        self._tables: Dict[str, ReferenceTable] = {}
+
+    def version(self, kind: str) -> int:
+        """Текущая версия справочника"""
+        return self._versions[kind]
+
+    def table(self, session, kind: str) -> ReferenceTable:
+        """Снимок справочника (перечитывается, если версия устарела)"""
+        version = self._versions[kind]
+        table = self._tables.get(kind)
+        if table is not None and table.version == version:
+            return table
+
+        model, to_record, sort_keys = _SOURCES[kind]
+        records = [to_record(obj) for obj in session.execute(select(model)).scalars()]
+        table = ReferenceTable(version, records, sort_keys)
+        with self._lock:
+            # За время чтения справочник мог снова измениться - тогда снимок не сохраняем
+            if self._versions[kind] == version:
+                self._tables[kind] = table
+        logger.debug(f"Справочник {kind} загружен: {len(records)} записей")
+        return table
+
+    def services(self, session) -> ReferenceTable:
+        return self.table(session, SERVICES)
+
+    def employees(self, session) -> ReferenceTable:
+        return self.table(session, EMPLOYEES)
+
+    def car_brands(self, session) -> ReferenceTable:
+        return self.table(session, CAR_BRANDS)
+
+    def invalidate(self, *kinds):
+        """Сбросить справочники (без аргументов - все)"""
+        with self._lock:
+            for kind in kinds or tuple(self._versions):
+                self._versions[kind] += 1
+                self._tables.pop(kind, None)
+
+
+reference_cache = ReferenceDataCache()
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_references(session, flush_context):
+    """Сбор справочников, измененных во flush"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        kind = _MODEL_KINDS.get(type(obj))
+        if kind:
+            session.info.setdefault(_CHANGED_KINDS_KEY, set()).add(kind)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_references(session):
+    kinds = session.info.pop(_CHANGED_KINDS_KEY, None)
+    if kinds:
+        reference_cache.invalidate(*kinds)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changed_references(session):
+    session.info.pop(_CHANGED_KINDS_KEY, None)
@@ -0,0 +1,251 @@
+# sto_app/utils/ui_watchdog.py
+"""
+Сторож зависаний интерфейса.
+
+Таймер в GUI-потоке каждые HEARTBEAT_MS отмечает "пульс" цикла событий.
+Отдельный поток проверяет пульс; если его нет дольше порога (200 мс по
+умолчанию), цикл событий заблокирован обработчиком. Тогда через
+sys._current_frames() снимается стек GUI-потока - и повторно, пока
+зависание длится, - вместе с активным окном/вкладкой и текущим
+действием (sql_profiler.action). Когда пульс возвращается, зависание
+записывается в лог с длительностью и стеком.
+
+Место зависания - самый глубокий кадр кода приложения (не библиотек),
+чаще всего встречавшийся в снимках. report() ранжирует места по
+суммарному времени зависаний.
+
+Настройка: STO_UI_WATCHDOG=0 - выключить, число - порог в мс;
+STO_UI_WATCHDOG_REPORT - файл отчета, записываемого при выходе.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from PySide6.QtCore import QObject, QTimer
+
+from config.sql_profiler import sql_profiler
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD_MS = 200
+HEARTBEAT_MS = 50
+MAX_SAMPLES = 20
+MAX_STALLS = 500
+DEFAULT_REPORT_PATH = 'ui_stalls.txt'
+
+# Кадры из этих каталогов считаются кодом приложения
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_APP_DIRS = tuple(os.path.join(_PROJECT_ROOT, name) + os.sep
+                  for name in ('sto_app', 'shared_models', 'config'))
+
+
+def _is_app_frame(frame: traceback.FrameSummary) -> bool:
+    return os.path.abspath(frame.filename).startswith(_APP_DIRS)
+
+
+def _site(stack: traceback.StackSummary) -> str:
+    """Место зависания: самый глубокий кадр кода приложения"""
+    for frame in reversed(stack):
+        if _is_app_frame(frame):
+            return f"{os.path.relpath(frame.filename, _PROJECT_ROOT)}:{frame.lineno} ({frame.name})"
+    if stack:
+        frame = stack[-1]
+        return f"{frame.filename}:{frame.lineno} ({frame.name})"
+    return '(стек недоступен)'
+
+
+@dataclass
+class Stall:
+    """Одно зависание цикла событий"""
+    started_at: float  # time.time()
+    duration_ms: float
+    context: str
+    action: Optional[str]
+    site: str
+    stack: str
+    samples: int
+
+
+@dataclass
+class _OpenStall:
+    started_at: float
+    context: str
+    action: Optional[str]
+    stacks: List[traceback.StackSummary] = field(default_factory=list)
+    sites: Counter = field(default_factory=Counter)
+
+
+class UiWatchdog(QObject):
+    """Пульс в GUI-потоке и поток-сторож, снимающий стек при зависании"""
+
+    def __init__(self, threshold_ms: float = DEFAULT_THRESHOLD_MS, parent=None):
+        super().__init__(parent)
+        self.threshold_ms = threshold_ms
+        self.report_path = DEFAULT_REPORT_PATH
+        self.context_provider: Optional[Callable[[], str]] = None
+        self.stalls: List[Stall] = []
+
+        self._lock = threading.Lock()
+        self._gui_thread_id = None
+        self._last_beat = None  # perf_counter последнего пульса; None - цикл событий еще не запущен
+        self._context = ''
+        self._open: Optional[_OpenStall] = None
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(HEARTBEAT_MS)
+        self._timer.timeout.connect(self._beat)
+
+    # --- Управление ---
+
+    def configure_from_env(self, environ=os.environ) -> bool:
+        """Порог и файл отчета из окружения; False - сторож выключен"""
+        value = environ.get('STO_UI_WATCHDOG', '').strip()
+        if value in ('0', 'false', 'no'):
+            return False
+        if value:
+            try:
+                self.threshold_ms = float(value)
+            except ValueError:
+                logger.warning(f"Некорректный порог STO_UI_WATCHDOG: {value!r}")
+        self.report_path = environ.get('STO_UI_WATCHDOG_REPORT', '').strip() or DEFAULT_REPORT_PATH
+        return True
+
+    def start(self, context_provider: Optional[Callable[[], str]] = None):
+        """Запустить (вызывается из GUI-потока)"""
+        if self._thread is not None:
+            return
+        self.context_provider = context_provider
+        self._gui_thread_id = threading.get_ident()
+        self._last_beat = None
+        self._stop.clear()
+        self._timer.start()
+        self._thread = threading.Thread(target=self._watch, name='ui-watchdog', daemon=True)
+        self._thread.start()
+        logger.info(f"Сторож зависаний интерфейса запущен (порог {self.threshold_ms:.0f} мс)")
+
+    def stop(self):
+        self._timer.stop()
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    # --- GUI-поток ---
+
+    def _beat(self):
+        context = ''
+        if self.context_provider is not None:
+            try:
+                context = self.context_provider()
+            except Exception:
+                context = ''
+        with self._lock:
+            self._last_beat = time.perf_counter()
+            self._context = context
+            finished = self._open
+            self._open = None
+        if finished is not None:
+            self._record(finished)
+
+    # --- Поток-сторож ---
+
+    def _watch(self):
+        interval = min(HEARTBEAT_MS, self.threshold_ms / 4) / 1000
+        while not self._stop.wait(interval):
+            with self._lock:
+                last_beat = self._last_beat
+                if last_beat is None:
+                    continue
+                blocked_ms = (time.perf_counter() - last_beat) * 1000
+                if blocked_ms - HEARTBEAT_MS < self.threshold_ms:
+                    continue
+                stall = self._open
+                if stall is None:
+                    stall = self._open = _OpenStall(
+                        time.time() - blocked_ms / 1000, self._context,
+                        sql_profiler.current_action(self._gui_thread_id)
+                    )
+                    logger.warning(f"Интерфейс не отвечает > {self.threshold_ms:.0f} мс "
+                                   f"({stall.context or 'окно не определено'})")
+            if len(stall.stacks) < MAX_SAMPLES:
+                frame = sys._current_frames().get(self._gui_thread_id)
+                if frame is not None:
+                    stack = traceback.extract_stack(frame)
+                    stall.stacks.append(stack)
+                    stall.sites[_site(stack)] += 1
+                    del frame
+
+    def _record(self, open_stall: _OpenStall):
+        """Зависание закончилось: посчитать длительность и записать в лог"""
+        duration_ms = (time.time() - open_stall.started_at) * 1000
+        if open_stall.sites:
+            site = open_stall.sites.most_common(1)[0][0]
+            stack = next(s for s in open_stall.stacks if _site(s) == site)
+            stack_text = ''.join(stack.format())
+        else:
+            site, stack_text = '(стек недоступен)', ''
+        stall = Stall(open_stall.started_at, duration_ms, open_stall.context,
+                      open_stall.action, site, stack_text, len(open_stall.stacks))
+        if len(self.stalls) < MAX_STALLS:
+            self.stalls.append(stall)
+        logger.warning(
+            f"Зависание интерфейса {duration_ms:.0f} мс в {site}; "
+            f"окно: {stall.context or '-'}; действие: {stall.action or '-'}\n{stack_text}"
+        )
+
+    # --- Отчет ---
+
+    def summary(self) -> List[Dict]:
+        """Места зависаний по убыванию суммарного времени"""
+        sites: Dict[str, Dict] = {}
+        for stall in self.stalls:
+            entry = sites.setdefault(stall.site, {
+                'site': stall.site, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                'contexts': Counter(), 'actions': Counter(), 'stack': stall.stack,
+            })
+            entry['count'] += 1
+            entry['total_ms'] += stall.duration_ms
+            if stall.duration_ms > entry['max_ms']:
+                entry['max_ms'] = stall.duration_ms
+                entry['stack'] = stall.stack
+            entry['contexts'][stall.context or '-'] += 1
+            entry['actions'][stall.action or '-'] += 1
+        return sorted(sites.values(), key=lambda e: -e['total_ms'])
+
+    def report(self) -> str:
+        summary = self.summary()
+        total_ms = sum(entry['total_ms'] for entry in summary)
+        lines = [f"Зависания интерфейса (порог {self.threshold_ms:.0f} мс): "
+                 f"{len(self.stalls)}, всего {total_ms:.0f} мс", ""]
+        for rank, entry in enumerate(summary, 1):
+            contexts = ', '.join(name for name, _ in entry['contexts'].most_common(3))
+            actions = ', '.join(name for name, _ in entry['actions'].most_common(3))
+            lines.append(f"{rank}. {entry['site']}")
+            lines.append(f"   {entry['count']} раз, всего {entry['total_ms']:.0f} мс, "
+                         f"максимум {entry['max_ms']:.0f} мс")
+            lines.append(f"   окна: {contexts}; действия: {actions}")
+            lines += ['   ' + line for line in entry['stack'].rstrip().splitlines()]
+            lines.append('')
+        return '\n'.join(lines) + '\n'
+
+    def write_report(self) -> Optional[str]:
+        """Записать отчет (если были зависания)"""
+        if not self.stalls:
+            return None
+        try:
+            with open(self.report_path, 'w', encoding='utf-8') as f:
+                f.write(self.report())
+            logger.info(f"Отчет о зависаниях интерфейса записан в {self.report_path}")
+            return self.report_path
+        except OSError as e:
+            logger.error(f"Не удалось записать отчет о зависаниях: {e}")
+            return None
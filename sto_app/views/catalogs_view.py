@@ -3,8 +3,8 @@
 """
 
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QTabWidget, QTableWidget,
-    QTableWidgetItem, QPushButton, QHeaderView, QAbstractItemView,
+    QWidget, QVBoxLayout, QHBoxLayout, QTabWidget, QTableView,
+    QPushButton, QHeaderView, QAbstractItemView,
     QMessageBox, QDialog, QFormLayout, QLineEdit, QComboBox,
     QTextEdit, QDoubleSpinBox, QGroupBox, QLabel, QCheckBox,
     QDateEdit, QSpinBox
@@ -15,6 +15,9 @@ from sqlalchemy import select, desc
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from sto_app.models_sto import ServiceCatalog
 from shared_models.common_models import Employee
+from sto_app.services import catalog, ServiceError, ValidationError
+from sto_app.widgets import ServiceCatalogTableModel, EmployeeTableModel
+from config.sql_profiler import sql_profiler
 from decimal import Decimal
 import logging
 
@@ -131,49 +134,38 @@ class ServiceCatalogDialog(QDialog):
     def save_service(self):
         """Сохранение услуги"""
         name = self.name_edit.text().strip()
-        if not name:
-            QMessageBox.warning(self, "Предупреждение", "Введите название услуги")
-            self.name_edit.setFocus()
-            return
         
         try:
-            if self.is_editing:
-                # Обновляем существующую услугу
-                service = self.service
-            else:
-                # Создаем новую услугу
-                service = ServiceCatalog()
-                self.db_session.add(service)
-            
-            # Заполняем данные
-            service.name = name
-            service.description = self.description_edit.toPlainText().strip() or None
-            service.category = self.category_combo.currentText().strip() or None
-            service.default_price = Decimal(str(self.price_spin.value()))
-            service.vat_rate = Decimal(str(self.vat_rate_spin.value()))
-            service.duration_hours = Decimal(str(self.duration_spin.value())) if self.duration_spin.value() > 0 else None
-            
-            if hasattr(service, 'is_active'):
-                service.is_active = self.is_active_check.isChecked()
-            
-            self.db_session.commit()
+            duration = self.duration_spin.value()
+            self.service = catalog.save_service(
+                self.db_session,
+                self.service if self.is_editing else None,
+                name=name,
+                description=self.description_edit.toPlainText().strip() or None,
+                category=self.category_combo.currentText().strip() or None,
+                default_price=Decimal(str(self.price_spin.value())),
+                vat_rate=Decimal(str(self.vat_rate_spin.value())),
+                duration_hours=Decimal(str(duration)) if duration > 0 else None,
+                is_active=self.is_active_check.isChecked()
+            )
             
             action = "обновлена" if self.is_editing else "добавлена"
             QMessageBox.information(self, "Успех", f"Услуга '{name}' успешно {action}")
             self.accept()
             
+        except ValidationError as e:
+            QMessageBox.warning(self, "Предупреждение", e.message)
+            self.name_edit.setFocus()
+            
         except IntegrityError as e:
-            self.db_session.rollback()
             self.logger.error(f"Ошибка целостности при сохранении услуги: {e}")
             QMessageBox.critical(self, "Ошибка", "Услуга с таким названием уже существует")
             
         except SQLAlchemyError as e:
-            self.db_session.rollback()
             self.logger.error(f"Ошибка БД при сохранении услуги: {e}")
             QMessageBox.critical(self, "Ошибка БД", f"Не удалось сохранить услугу: {e}")
         
         except Exception as e:
-            self.db_session.rollback()
             self.logger.error(f"Неожиданная ошибка при сохранении услуги: {e}")
             QMessageBox.critical(self, "Ошибка", f"Неожиданная ошибка: {e}")
     
@@ -316,55 +308,36 @@ class EmployeeDialog(QDialog):
         """Сохранение сотрудника"""
         last_name = self.last_name_edit.text().strip()
         first_name = self.first_name_edit.text().strip()
-        position = self.position_edit.text().strip()
-        
-        if not last_name or not first_name:
-            QMessageBox.warning(self, "Предупреждение", "Введите фамилию и имя сотрудника")
-            return
-        
-        if not position:
-            QMessageBox.warning(self, "Предупреждение", "Введите должность сотрудника")
-            return
         
         try:
-            if self.is_editing:
-                employee = self.employee
-            else:
-                employee = Employee()
-                self.db_session.add(employee)
-            
-            # ИСПРАВЛЕНИЕ: ОБЯЗАТЕЛЬНО заполняем name ПЕРВЫМ!
-            employee.name = f"{last_name} {first_name}"  # КРИТИЧНО!
-            employee.last_name = last_name
-            employee.first_name = first_name
-            employee.middle_name = self.middle_name_edit.text().strip() or None
-            employee.phone = self.phone_edit.text().strip() or None
-            employee.email = self.email_edit.text().strip() or None
-            employee.position = position
-            employee.role = position  # Дублируем для совместимости
-            employee.department = self.department_combo.currentText().strip() or None
-            employee.hire_date = self.hire_date_edit.date().toPython()
-            
-            if self.hourly_rate_spin.value() > 0:
-                employee.hourly_rate = Decimal(str(self.hourly_rate_spin.value()))
-            else:
-                employee.hourly_rate = None
-            
-            employee.is_active = self.is_active_check.isChecked()
-            
-            self.db_session.commit()
+            hourly_rate = self.hourly_rate_spin.value()
+            self.employee = catalog.save_employee(
+                self.db_session,
+                self.employee if self.is_editing else None,
+                last_name=last_name,
+                first_name=first_name,
+                middle_name=self.middle_name_edit.text().strip() or None,
+                phone=self.phone_edit.text().strip() or None,
+                email=self.email_edit.text().strip() or None,
+                position=self.position_edit.text().strip(),
+                department=self.department_combo.currentText().strip() or None,
+                hire_date=self.hire_date_edit.date().toPython(),
+                hourly_rate=Decimal(str(hourly_rate)) if hourly_rate > 0 else None,
+                is_active=self.is_active_check.isChecked()
+            )
             
             action = "обновлен" if self.is_editing else "добавлен"
             QMessageBox.information(self, "Успех", f"Сотрудник '{last_name} {first_name}' успешно {action}")
             self.accept()
             
+        except ValidationError as e:
+            QMessageBox.warning(self, "Предупреждение", e.message)
+            
         except SQLAlchemyError as e:
-            self.db_session.rollback()
             self.logger.error(f"Ошибка БД при сохранении сотрудника: {e}")
             QMessageBox.critical(self, "Ошибка БД", f"Не удалось сохранить сотрудника: {e}")
         
         except Exception as e:
-            self.db_session.rollback()
             self.logger.error(f"Неожиданная ошибка при сохранении сотрудника: {e}")
             QMessageBox.critical(self, "Ошибка", f"Неожиданная ошибка: {e}")
     
@@ -439,34 +412,22 @@ class CatalogsView(QWidget):
         
         buttons_layout.addStretch()
         
+        self.services_filter_edit = QLineEdit()
+        self.services_filter_edit.setPlaceholderText("🔍 Фильтр...")
+        self.services_filter_edit.setClearButtonEnabled(True)
+        buttons_layout.addWidget(self.services_filter_edit)
+        
         refresh_services_btn = QPushButton("🔄 Обновить")
         refresh_services_btn.clicked.connect(self.load_services)
         buttons_layout.addWidget(refresh_services_btn)
         
         layout.addLayout(buttons_layout)
         
-        # Таблица услуг
-        self.services_table = QTableWidget()
-        self.services_table.setColumnCount(6)
-        self.services_table.setHorizontalHeaderLabels([
-            "ID", "Название", "Категория", "Цена по умолчанию", "НДС %", "Статус"
-        ])
-        
-        # Настройка таблицы
-        self.services_table.setSelectionBehavior(QAbstractItemView.SelectRows)
-        self.services_table.setAlternatingRowColors(True)
-        self.services_table.setSortingEnabled(True)
-        
-        header = self.services_table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)  # ID
-        header.setSectionResizeMode(1, QHeaderView.Stretch)           # Название
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)  # Категория
-        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)  # Цена
-        header.setSectionResizeMode(4, QHeaderView.ResizeToContents)  # НДС
-        header.setSectionResizeMode(5, QHeaderView.ResizeToContents)  # Статус
-        
-        # Скрываем колонку ID
-        self.services_table.setColumnHidden(0, True)
+        # Таблица услуг (модель хранит компактные строки, ячейки форматируются при отрисовке)
+        self.services_model = ServiceCatalogTableModel(self)
+        self.services_table = QTableView()
+        self._setup_catalog_table(self.services_table, self.services_model)
+        self.services_filter_edit.textChanged.connect(self.services_model.set_filter_text)
         
         # Двойной клик для редактирования
         self.services_table.doubleClicked.connect(self.edit_service)
@@ -497,6 +458,11 @@ class CatalogsView(QWidget):
         
         buttons_layout.addStretch()
         
+        self.employees_filter_edit = QLineEdit()
+        self.employees_filter_edit.setPlaceholderText("🔍 Фильтр...")
+        self.employees_filter_edit.setClearButtonEnabled(True)
+        buttons_layout.addWidget(self.employees_filter_edit)
+        
         refresh_employees_btn = QPushButton("🔄 Обновить")
         refresh_employees_btn.clicked.connect(self.load_employees)
         buttons_layout.addWidget(refresh_employees_btn)
@@ -504,27 +470,10 @@ class CatalogsView(QWidget):
         layout.addLayout(buttons_layout)
         
         # Таблица сотрудников
-        self.employees_table = QTableWidget()
-        self.employees_table.setColumnCount(6)
-        self.employees_table.setHorizontalHeaderLabels([
-            "ID", "ФИО", "Должность", "Отдел", "Телефон", "Статус"
-        ])
-        
-        # Настройка таблицы
-        self.employees_table.setSelectionBehavior(QAbstractItemView.SelectRows)
-        self.employees_table.setAlternatingRowColors(True)
-        self.employees_table.setSortingEnabled(True)
-        
-        header = self.employees_table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)  # ID
-        header.setSectionResizeMode(1, QHeaderView.Stretch)           # ФИО
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)  # Должность
-        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)  # Отдел
-        header.setSectionResizeMode(4, QHeaderView.ResizeToContents)  # Телефон
-        header.setSectionResizeMode(5, QHeaderView.ResizeToContents)  # Статус
-        
-        # Скрываем колонку ID
-        self.employees_table.setColumnHidden(0, True)
+        self.employees_model = EmployeeTableModel(self)
+        self.employees_table = QTableView()
+        self._setup_catalog_table(self.employees_table, self.employees_model)
+        self.employees_filter_edit.textChanged.connect(self.employees_model.set_filter_text)
         
         # Двойной клик для редактирования
         self.employees_table.doubleClicked.connect(self.edit_employee)
@@ -533,6 +482,35 @@ class CatalogsView(QWidget):
         
         self.tab_widget.addTab(employees_widget, "Сотрудники")
     
+    def _setup_catalog_table(self, table: QTableView, model):
+        """Общая настройка таблицы справочника"""
+        table.setModel(model)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.setSelectionMode(QAbstractItemView.SingleSelection)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setAlternatingRowColors(True)
+        table.setSortingEnabled(True)
+        table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        
+        # Ширины колонок фиксированы: ResizeToContents измерял бы все строки
+        header = table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.Interactive)
+        header.setSectionResizeMode(1, QHeaderView.Stretch)
+        for column in range(2, model.columnCount()):
+            header.resizeSection(column, 140)
+        table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        
+        # Скрываем колонку ID
+        table.setColumnHidden(0, True)
+    
+    def _current_id(self, table: QTableView):
+        """id записи в текущей строке таблицы (None, если не выбрана)"""
+        index = table.currentIndex()
+        return index.data(Qt.UserRole) if index.isValid() else None
+    
+    def _current_text(self, table: QTableView, column: int) -> str:
+        return table.model().row_text(table.currentIndex().row(), column)
+    
     def _load_data(self):
         """Загрузка всех данных"""
         self.load_services()
@@ -541,50 +519,9 @@ class CatalogsView(QWidget):
     def load_services(self):
         """Загрузка каталога услуг"""
         try:
-            stmt = select(ServiceCatalog).order_by(ServiceCatalog.name)
-            result = self.db_session.execute(stmt)
-            services = result.scalars().all()
-            
-            self.services_table.setRowCount(len(services))
-            
-            for row, service in enumerate(services):
-                # ID (скрытая колонка)
-                id_item = QTableWidgetItem(str(service.id))
-                id_item.setData(Qt.UserRole, service.id)
-                self.services_table.setItem(row, 0, id_item)
-                
-                # Название
-                self.services_table.setItem(row, 1, QTableWidgetItem(service.name or ""))
-                
-                # Категория
-                self.services_table.setItem(row, 2, QTableWidgetItem(service.category or ""))
-                
-                # Цена по умолчанию
-                price = float(service.default_price) if service.default_price else 0.0
-                price_item = QTableWidgetItem(f"{price:.2f} грн")
-                price_item.setTextAlignment(Qt.AlignRight)
-                self.services_table.setItem(row, 3, price_item)
-                
-                # НДС
-                vat_rate = float(service.vat_rate) if service.vat_rate else 0.0
-                vat_item = QTableWidgetItem(f"{vat_rate:.1f}%")
-                vat_item.setTextAlignment(Qt.AlignCenter)
-                self.services_table.setItem(row, 4, vat_item)
-                
-                # Статус
-                status = "Активна"
-                if hasattr(service, 'is_active') and not service.is_active:
-                    status = "Неактивна"
-                
-                status_item = QTableWidgetItem(status)
-                if status == "Неактивна":
-                    status_item.setForeground(Qt.red)
-                else:
-                    status_item.setForeground(Qt.darkGreen)
-                
-                self.services_table.setItem(row, 5, status_item)
-            
-            self.logger.info(f"Загружено {len(services)} услуг")
+            with sql_profiler.action('CatalogsView.load_services'):
+                self.services_model.load(self.db_session)
+            self.logger.info(f"Загружено {self.services_model.total_count()} услуг")
             
         except SQLAlchemyError as e:
             self.logger.error(f"Ошибка загрузки услуг: {e}")
@@ -593,50 +530,9 @@ class CatalogsView(QWidget):
     def load_employees(self):
         """Загрузка списка сотрудников"""
         try:
-            stmt = select(Employee).order_by(Employee.last_name, Employee.first_name)
-            result = self.db_session.execute(stmt)
-            employees = result.scalars().all()
-            
-            self.employees_table.setRowCount(len(employees))
-            
-            for row, employee in enumerate(employees):
-                # ID (скрытая колонка)
-                id_item = QTableWidgetItem(str(employee.id))
-                id_item.setData(Qt.UserRole, employee.id)
-                self.employees_table.setItem(row, 0, id_item)
-                
-                # ФИО
-                full_name = f"{employee.last_name} {employee.first_name}"
-                if employee.middle_name:
-                    full_name += f" {employee.middle_name}"
-                self.employees_table.setItem(row, 1, QTableWidgetItem(full_name))
-                
-                # Должность
-                self.employees_table.setItem(row, 2, QTableWidgetItem(employee.role or ""))
-                
-                # Отдел
-                department = ""
-                if hasattr(employee, 'department'):
-                    department = employee.department or ""
-                self.employees_table.setItem(row, 3, QTableWidgetItem(department))
-                
-                # Телефон
-                self.employees_table.setItem(row, 4, QTableWidgetItem(employee.phone or ""))
-                
-                # Статус
-                status = "Активен"
-                if hasattr(employee, 'is_active') and not employee.is_active:
-                    status = "Неактивен"
-                
-                status_item = QTableWidgetItem(status)
-                if status == "Неактивен":
-                    status_item.setForeground(Qt.red)
-                else:
-                    status_item.setForeground(Qt.darkGreen)
-                
-                self.employees_table.setItem(row, 5, status_item)
-            
-            self.logger.info(f"Загружено {len(employees)} сотрудников")
+            with sql_profiler.action('CatalogsView.load_employees'):
+                self.employees_model.load(self.db_session)
+            self.logger.info(f"Загружено {self.employees_model.total_count()} сотрудников")
             
         except SQLAlchemyError as e:
             self.logger.error(f"Ошибка загрузки сотрудников: {e}")
@@ -648,18 +544,16 @@ class CatalogsView(QWidget):
         """Добавление новой услуги"""
         dialog = ServiceCatalogDialog(self)
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_services()
+            self.services_model.refresh_row(self.db_session, dialog.service.id)
             self.data_changed.emit()
     
     def edit_service(self):
         """Редактирование выбранной услуги"""
-        current_row = self.services_table.currentRow()
-        if current_row < 0:
+        service_id = self._current_id(self.services_table)
+        if service_id is None:
             QMessageBox.information(self, "Информация", "Выберите услугу для редактирования")
             return
         
-        service_id = self.services_table.item(current_row, 0).data(Qt.UserRole)
-        
         try:
             stmt = select(ServiceCatalog).where(ServiceCatalog.id == service_id)
             result = self.db_session.execute(stmt)
@@ -671,7 +565,7 @@ class CatalogsView(QWidget):
             
             dialog = ServiceCatalogDialog(self, service=service)
             if dialog.exec() == QDialog.DialogCode.Accepted:
-                self.load_services()
+                self.services_model.refresh_row(self.db_session, service_id)
                 self.data_changed.emit()
                 
         except SQLAlchemyError as e:
@@ -680,13 +574,12 @@ class CatalogsView(QWidget):
     
     def delete_service(self):
         """Удаление выбранной услуги"""
-        current_row = self.services_table.currentRow()
-        if current_row < 0:
+        service_id = self._current_id(self.services_table)
+        if service_id is None:
             QMessageBox.information(self, "Информация", "Выберите услугу для удаления")
             return
         
-        service_name = self.services_table.item(current_row, 1).text()
-        service_id = self.services_table.item(current_row, 0).data(Qt.UserRole)
+        service_name = self._current_text(self.services_table, 1)
         
         reply = QMessageBox.question(
             self, 'Подтверждение удаления',
@@ -698,20 +591,16 @@ class CatalogsView(QWidget):
         
         if reply == QMessageBox.Yes:
             try:
-                service = self.db_session.get(ServiceCatalog, service_id)
-                if service:
-                    self.db_session.delete(service)
-                    self.db_session.commit()
-                    
-                    self.load_services()
-                    self.data_changed.emit()
-                    
-                    QMessageBox.information(self, "Успех", f'Услуга "{service_name}" удалена')
-                else:
-                    QMessageBox.warning(self, "Предупреждение", "Услуга не найдена")
+                catalog.delete_service(self.db_session, service_id)
+                
+                self.services_model.remove_row(service_id)
+                self.data_changed.emit()
+                
+                QMessageBox.information(self, "Успех", f'Услуга "{service_name}" удалена')
                     
+            except ServiceError as e:
+                QMessageBox.warning(self, "Предупреждение", str(e))
             except IntegrityError as e:
-                self.db_session.rollback()
                 self.logger.error(f"Ошибка целостности при удалении услуги: {e}")
                 QMessageBox.critical(
                     self, "Ошибка удаления",
@@ -719,7 +608,6 @@ class CatalogsView(QWidget):
                     'Возможно, она используется в заказах.'
                 )
             except SQLAlchemyError as e:
-                self.db_session.rollback()
                 self.logger.error(f"Ошибка БД при удалении услуги: {e}")
                 QMessageBox.critical(self, "Ошибка БД", f"Не удалось удалить услугу: {e}")
     
@@ -729,18 +617,16 @@ class CatalogsView(QWidget):
         """Добавление нового сотрудника"""
         dialog = EmployeeDialog(self)
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_employees()
+            self.employees_model.refresh_row(self.db_session, dialog.employee.id)
             self.data_changed.emit()
     
     def edit_employee(self):
         """Редактирование выбранного сотрудника"""
-        current_row = self.employees_table.currentRow()
-        if current_row < 0:
+        employee_id = self._current_id(self.employees_table)
+        if employee_id is None:
             QMessageBox.information(self, "Информация", "Выберите сотрудника для редактирования")
             return
         
-        employee_id = self.employees_table.item(current_row, 0).data(Qt.UserRole)
-        
         try:
             stmt = select(Employee).where(Employee.id == employee_id)
             result = self.db_session.execute(stmt)
@@ -752,7 +638,7 @@ class CatalogsView(QWidget):
             
             dialog = EmployeeDialog(self, employee=employee)
             if dialog.exec() == QDialog.DialogCode.Accepted:
-                self.load_employees()
+                self.employees_model.refresh_row(self.db_session, employee_id)
                 self.data_changed.emit()
                 
         except SQLAlchemyError as e:
@@ -761,13 +647,12 @@ class CatalogsView(QWidget):
     
     def delete_employee(self):
         """Удаление выбранного сотрудника"""
-        current_row = self.employees_table.currentRow()
-        if current_row < 0:
+        employee_id = self._current_id(self.employees_table)
+        if employee_id is None:
             QMessageBox.information(self, "Информация", "Выберите сотрудника для удаления")
             return
         
-        employee_name = self.employees_table.item(current_row, 1).text()
-        employee_id = self.employees_table.item(current_row, 0).data(Qt.UserRole)
+        employee_name = self._current_text(self.employees_table, 1)
         
         reply = QMessageBox.question(
             self, 'Подтверждение удаления',
@@ -779,20 +664,16 @@ class CatalogsView(QWidget):
         
         if reply == QMessageBox.Yes:
             try:
-                employee = self.db_session.get(Employee, employee_id)
-                if employee:
-                    self.db_session.delete(employee)
-                    self.db_session.commit()
-                    
-                    self.load_employees()
-                    self.data_changed.emit()
-                    
-                    QMessageBox.information(self, "Успех", f'Сотрудник "{employee_name}" удален')
-                else:
-                    QMessageBox.warning(self, "Предупреждение", "Сотрудник не найден")
+                catalog.delete_employee(self.db_session, employee_id)
+                
+                self.employees_model.remove_row(employee_id)
+                self.data_changed.emit()
+                
+                QMessageBox.information(self, "Успех", f'Сотрудник "{employee_name}" удален')
                     
+            except ServiceError as e:
+                QMessageBox.warning(self, "Предупреждение", str(e))
             except IntegrityError as e:
-                self.db_session.rollback()
                 self.logger.error(f"Ошибка целостности при удалении сотрудника: {e}")
                 QMessageBox.critical(
                     self, "Ошибка удаления",
@@ -800,7 +681,6 @@ class CatalogsView(QWidget):
                     'Возможно, он назначен исполнителем в заказах.'
                 )
             except SQLAlchemyError as e:
-                self.db_session.rollback()
                 self.logger.error(f"Ошибка БД при удалении сотрудника: {e}")
                 QMessageBox.critical(self, "Ошибка БД", f"Не удалось удалить сотрудника: {e}")
     
@@ -809,30 +689,18 @@ class CatalogsView(QWidget):
         self._load_data()
     
     def get_active_services(self):
-        """Получение списка активных услуг для использования в других модулях"""
+        """Получение списка активных услуг для использования в других модулях (из общего кэша)"""
         try:
-            stmt = select(ServiceCatalog)
-            if hasattr(ServiceCatalog, 'is_active'):
-                stmt = stmt.where(ServiceCatalog.is_active == True)
-            stmt = stmt.order_by(ServiceCatalog.name)
-            
-            result = self.db_session.execute(stmt)
-            return result.scalars().all()
+            return catalog.active_services(self.db_session)
             
         except SQLAlchemyError as e:
             self.logger.error(f"Ошибка получения активных услуг: {e}")
             return []
     
     def get_active_employees(self):
-        """Получение списка активных сотрудников для использования в других модулях"""
+        """Получение списка активных сотрудников для использования в других модулях (из общего кэша)"""
         try:
-            stmt = select(Employee)
-            if hasattr(Employee, 'is_active'):
-                stmt = stmt.where(Employee.is_active == True)
-            stmt = stmt.order_by(Employee.last_name, Employee.first_name)
-            
-            result = self.db_session.execute(stmt)
-            return result.scalars().all()
+            return catalog.active_employees(self.db_session)
             
         except SQLAlchemyError as e:
             self.logger.error(f"Ошибка получения активных сотрудников: {e}")
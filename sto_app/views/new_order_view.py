@@ -4,7 +4,7 @@
 
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, 
                                QLabel, QLineEdit, QPushButton, QTextEdit, QComboBox, 
-                               QFrame, QCheckBox, QCompleter, QProgressBar, QScrollArea,
+                               QFrame, QCheckBox, QProgressBar, QScrollArea,
                                QSplitter, QGroupBox, QSpacerItem, QSizePolicy, QDateEdit,
                                QDoubleSpinBox, QSpinBox, QTableWidget, QTableWidgetItem,
                                QHeaderView, QAbstractItemView, QTabWidget, QMessageBox,
@@ -13,29 +13,44 @@ from PySide6.QtCore import Qt, QDate, Signal, QTimer, QDateTime
 from PySide6.QtGui import QFont, QPalette, QColor, QPixmap, QPainter
 import logging
 from datetime import datetime
-from decimal import Decimal
 
 # Импорты моделей
-from shared_models.common_models import Client, Car, Employee
-from ..models_sto import Order, OrderService, OrderPart, ServiceCatalog, OrderStatus
+from ..models_sto import OrderService, OrderPart, OrderStatus
 
 # Импорты диалогов
 from ..dialogs.client_dialog import ClientDialog
+from ..widgets import ClientCompleter
 from ..dialogs.car_dialog import CarDialog
 from ..dialogs.service_dialog import ServiceDialog
 from ..dialogs.part_dialog import PartDialog
 
+# Позиции заказа в памяти
+from ..utils.order_lines import OrderLineItems, ServiceLine, PartLine, next_order_number
+from ..utils.draft_autosave import DraftSaveWorker
+from ..utils.fuzzy_search import service_index
+from ..services import clients as clients_service, orders as orders_service, ValidationError
+from ..services.orders import DRAFT_FIELDS, OrderFields
+from config.sql_profiler import sql_profiler
+
 
 class NewOrderView(QWidget):
-    """Представление для создания нового заказа"""
+    """
+    Представление для создания нового заказа.
+    
+    Заказы и клиенты читаются и пишутся через сервисы (service, clients):
+    модули services.orders и services.clients или их аналоги режима
+    клиента (api.remote), тогда db_session - None.
+    """
     
     order_created = Signal(dict)
     status_message = Signal(str, int)
     order_saved = Signal()
     
-    def __init__(self, db_session, parent=None):
+    def __init__(self, db_session, parent=None, service=orders_service, clients=clients_service):
         super().__init__(parent)
         self.db_session = db_session
+        self.service = service
+        self.clients = clients
         self.logger = logging.getLogger(__name__)
         
         # Данные заказа
@@ -44,13 +59,20 @@ class NewOrderView(QWidget):
         self.selected_car = None
         self.unsaved_changes = False
         
+        # Услуги и запчасти заказа (в БД пишутся только при сохранении)
+        self.line_items = OrderLineItems()
+        
+        # Измененные поля заказа и текущая фоновая запись черновика
+        self._dirty_fields = set()
+        self._autosave_worker = None
+        
         self.setup_ui()
         self.setup_connections()
         self.load_data()
         
         # Автосохранение
         self.autosave_timer = QTimer()
-        self.autosave_timer.timeout.connect(self.save_draft)
+        self.autosave_timer.timeout.connect(self.autosave)
         self.autosave_timer.start(300000)  # 5 минут
     
     def setup_ui(self):
@@ -319,30 +341,36 @@ class NewOrderView(QWidget):
         self.discount_input.setSuffix(" %")
         group_layout.addWidget(self.discount_input, 2, 1)
         
+        # НДС по услугам
+        group_layout.addWidget(QLabel("НДС (услуги):"), 3, 0)
+        self.vat_total_label = QLabel("0.00 ₴")
+        self.vat_total_label.setStyleSheet("color: #7f8c8d;")
+        group_layout.addWidget(self.vat_total_label, 3, 1)
+        
         # Разделитель
         line = QFrame()
         line.setFrameShape(QFrame.HLine)
         line.setFrameShadow(QFrame.Sunken)
-        group_layout.addWidget(line, 3, 0, 1, 2)
+        group_layout.addWidget(line, 4, 0, 1, 2)
         
         # Общая сумма
-        group_layout.addWidget(QLabel("ИТОГО:"), 4, 0)
+        group_layout.addWidget(QLabel("ИТОГО:"), 5, 0)
         self.total_label = QLabel("0.00 ₴")
         self.total_label.setStyleSheet("font-weight: bold; font-size: 16px; color: #e74c3c;")
-        group_layout.addWidget(self.total_label, 4, 1)
+        group_layout.addWidget(self.total_label, 5, 1)
         
-                # Предоплата
-        group_layout.addWidget(QLabel("Предоплата:"), 5, 0)
+        # Предоплата
+        group_layout.addWidget(QLabel("Предоплата:"), 6, 0)
         self.prepayment_input = QDoubleSpinBox()
         self.prepayment_input.setRange(0, 999999)
         self.prepayment_input.setSuffix(" ₴")
-        group_layout.addWidget(self.prepayment_input, 5, 1)
+        group_layout.addWidget(self.prepayment_input, 6, 1)
         
         # К доплате
-        group_layout.addWidget(QLabel("К доплате:"), 6, 0)
+        group_layout.addWidget(QLabel("К доплате:"), 7, 0)
         self.balance_label = QLabel("0.00 ₴")
         self.balance_label.setStyleSheet("font-weight: bold; font-size: 14px; color: #e74c3c;")
-        group_layout.addWidget(self.balance_label, 6, 1)
+        group_layout.addWidget(self.balance_label, 7, 1)
         
         totals_layout.addWidget(totals_group)
         totals_layout.addStretch()
@@ -426,6 +454,9 @@ class NewOrderView(QWidget):
         # Расчеты
         self.discount_input.valueChanged.connect(self.calculate_totals)
         self.prepayment_input.valueChanged.connect(self.calculate_totals)
+        self.discount_input.valueChanged.connect(lambda: self.mark_field_dirty('discount_percent'))
+        self.discount_input.valueChanged.connect(lambda: self.mark_field_dirty('total_amount'))
+        self.prepayment_input.valueChanged.connect(lambda: self.mark_field_dirty('prepayment'))
         
         # Управляющие кнопки
         self.save_btn.clicked.connect(self.save_order)
@@ -433,23 +464,27 @@ class NewOrderView(QWidget):
         self.clear_btn.clicked.connect(self.clear_form)
         
         # Отслеживание изменений
-        self.notes_edit.textChanged.connect(self.mark_unsaved_changes)
-        self.date_received_edit.dateTimeChanged.connect(self.mark_unsaved_changes)
-        self.date_delivery_edit.dateTimeChanged.connect(self.mark_unsaved_changes)
+        self.notes_edit.textChanged.connect(lambda: self.mark_field_dirty('notes'))
+        self.date_received_edit.dateTimeChanged.connect(lambda: self.mark_field_dirty('date_received'))
+        self.date_delivery_edit.dateTimeChanged.connect(lambda: self.mark_field_dirty('date_delivery'))
     
     def load_data(self):
         """Загрузка данных"""
         try:
-            # Настройка автодополнения для поиска клиентов
-            clients = self.db_session.query(Client).all()
-            client_names = [f"{c.name} - {c.phone}" for c in clients]
-            completer = QCompleter(client_names)
-            completer.setCaseSensitivity(Qt.CaseInsensitive)
-            self.client_search_edit.setCompleter(completer)
+            # Автодополнение клиентов: запрос только по введенному тексту, постранично
+            self.client_completer = ClientCompleter(self.db_session, self.client_search_edit, self,
+                                                    clients=self.clients)
+            self.client_completer.client_activated.connect(self.select_client_by_id)
             
         except Exception as e:
             self.logger.error(f"Ошибка загрузки данных: {e}")
     
+    def select_client_by_id(self, client_id: int):
+        """Выбор клиента из автодополнения (запрос по первичному ключу)"""
+        client = self.clients.get_client(self.db_session, client_id)
+        if client:
+            self.select_client(client)
+    
     def search_clients(self, text):
         """Поиск клиентов"""
         if len(text) < 2:
@@ -461,10 +496,8 @@ class NewOrderView(QWidget):
             return
         
         try:
-            clients = self.db_session.query(Client).filter(
-                (Client.name.ilike(f"%{text}%")) |
-                (Client.phone.ilike(f"%{text}%"))
-            ).limit(10).all()
+            # Поиск по началу имени/телефона - диапазон по индексу
+            clients = self.clients.find_clients(self.db_session, text, limit=1)
             
             if clients:
                 # Автоматически выбираем первого найденного клиента
@@ -488,6 +521,7 @@ class NewOrderView(QWidget):
         
         # Включаем возможность добавления нового автомобиля
         self.new_car_btn.setEnabled(True)
+        self.mark_field_dirty('client_id')
         
         self.check_form_validity()
     
@@ -497,7 +531,7 @@ class NewOrderView(QWidget):
             return
         
         try:
-            cars = self.db_session.query(Car).filter_by(client_id=self.selected_client.id).all()
+            cars = self.clients.client_cars(self.db_session, self.selected_client.id)
             
             self.car_combo.clear()
             self.car_combo.addItem("Выберите автомобиль", None)
@@ -532,13 +566,13 @@ class NewOrderView(QWidget):
         if car.vin:
             info_text += f"\n📋 VIN: {car.vin}"
         self.car_info_label.setText(info_text)
+        self.mark_field_dirty('car_id')
         
         self.check_form_validity()
     
     def create_new_client(self):
         """Создание нового клиента"""
-        dialog = ClientDialog(parent=self)
-        dialog.db_session = self.db_session
+        dialog = ClientDialog(parent=self, service=self.clients)
         if dialog.exec():
             client = dialog.get_client()
             if client:
@@ -552,8 +586,7 @@ class NewOrderView(QWidget):
             QMessageBox.information(self, "Информация", "Сначала выберите клиента")
             return
         
-        dialog = CarDialog(parent=self, client_id=self.selected_client.id)
-        dialog.db_session = self.db_session
+        dialog = CarDialog(parent=self, client_id=self.selected_client.id, service=self.clients)
         if dialog.exec():
             car = dialog.get_car()
             if car:
@@ -567,21 +600,27 @@ class NewOrderView(QWidget):
     
     def add_service(self):
         """Добавление услуги"""
-        if not self.current_order:
-            if not self.save_draft():
-                return
-        
         try:
-            dialog = ServiceDialog(parent=self, order_id=self.current_order.id)
-            dialog.db_session = self.db_session
+            dialog = ServiceDialog(parent=self, defer_save=True)
             if dialog.exec():
-                self.refresh_services_table()
+                line = ServiceLine(**dialog.get_line_data())
+                self.line_items.add_service(line)
+                self._append_service_row(line)
                 self.calculate_totals()
-                self.mark_unsaved_changes()
+                self.mark_field_dirty('total_amount')
         except Exception as e:
             self.logger.error(f"Ошибка добавления услуги: {e}")
             QMessageBox.critical(self, "Ошибка", f"Не удалось добавить услугу: {e}")
     
+    def search_service_by_name(self, name):
+        """Поиск услуги в каталоге по названию или синониму (с учетом опечаток)"""
+        try:
+            matches = service_index.search(self.db_session, name, limit=1)
+            return matches[0].record if matches else None
+        except Exception as e:
+            self.logger.error(f"Ошибка поиска услуги: {e}")
+            return None
+    
     def remove_service(self):
         """Удаление услуги"""
         current_row = self.services_table.currentRow()
@@ -592,23 +631,21 @@ class NewOrderView(QWidget):
                 QMessageBox.Yes | QMessageBox.No
             )
             if result == QMessageBox.Yes:
+                self.line_items.remove_service(current_row)
                 self.services_table.removeRow(current_row)
                 self.calculate_totals()
-                self.mark_unsaved_changes()
+                self.mark_field_dirty('total_amount')
     
     def add_part(self):
         """Добавление запчасти"""
-        if not self.current_order:
-            if not self.save_draft():
-                return
-        
         try:
-            dialog = PartDialog(parent=self, order_id=self.current_order.id)
-            dialog.db_session = self.db_session
+            dialog = PartDialog(parent=self, defer_save=True)
             if dialog.exec():
-                self.refresh_parts_table()
+                line = PartLine(**dialog.get_line_data())
+                self.line_items.add_part(line)
+                self._append_part_row(line)
                 self.calculate_totals()
-                self.mark_unsaved_changes()
+                self.mark_field_dirty('total_amount')
         except Exception as e:
             self.logger.error(f"Ошибка добавления запчасти: {e}")
             QMessageBox.critical(self, "Ошибка", f"Не удалось добавить запчасть: {e}")
@@ -623,46 +660,41 @@ class NewOrderView(QWidget):
                 QMessageBox.Yes | QMessageBox.No
             )
             if result == QMessageBox.Yes:
+                self.line_items.remove_part(current_row)
                 self.parts_table.removeRow(current_row)
                 self.calculate_totals()
-                self.mark_unsaved_changes()
+                self.mark_field_dirty('total_amount')
+    
+    def _append_service_row(self, line):
+        """Добавление строки услуги в таблицу"""
+        row = self.services_table.rowCount()
+        self.services_table.insertRow(row)
+        self.services_table.setItem(row, 0, QTableWidgetItem(line.service_name or ''))
+        self.services_table.setItem(row, 1, QTableWidgetItem(f"{line.total:.2f} ₴"))
+        self.services_table.setItem(row, 2, QTableWidgetItem(""))  # Мастер
+        self.services_table.setItem(row, 3, QTableWidgetItem("Ожидает"))  # Статус
+    
+    def _append_part_row(self, line):
+        """Добавление строки запчасти в таблицу"""
+        row = self.parts_table.rowCount()
+        self.parts_table.insertRow(row)
+        self.parts_table.setItem(row, 0, QTableWidgetItem(line.article or ''))
+        self.parts_table.setItem(row, 1, QTableWidgetItem(line.part_name or ''))
+        self.parts_table.setItem(row, 2, QTableWidgetItem(f"{line.quantity:g}"))
+        self.parts_table.setItem(row, 3, QTableWidgetItem(f"{line.price:.2f} ₴"))
+        self.parts_table.setItem(row, 4, QTableWidgetItem(f"{line.total:.2f} ₴"))
     
     def refresh_services_table(self):
-        """Обновление таблицы услуг"""
-        if not self.current_order:
-            return
-        
-        try:
-            services = self.db_session.query(OrderService).filter_by(order_id=self.current_order.id).all()
-            
-            self.services_table.setRowCount(len(services))
-            
-            for row, service in enumerate(services):
-                self.services_table.setItem(row, 0, QTableWidgetItem(service.service_name or ''))
-                self.services_table.setItem(row, 1, QTableWidgetItem(f"{service.price:.2f} ₴"))
-                self.services_table.setItem(row, 2, QTableWidgetItem(""))  # Мастер
-                self.services_table.setItem(row, 3, QTableWidgetItem("Ожидает"))  # Статус
-        except Exception as e:
-            self.logger.error(f"Ошибка обновления таблицы услуг: {e}")
+        """Обновление таблицы услуг из позиций заказа в памяти"""
+        self.services_table.setRowCount(0)
+        for line in self.line_items.services:
+            self._append_service_row(line)
     
     def refresh_parts_table(self):
-        """Обновление таблицы запчастей"""
-        if not self.current_order:
-            return
-        
-        try:
-            parts = self.db_session.query(OrderPart).filter_by(order_id=self.current_order.id).all()
-            
-            self.parts_table.setRowCount(len(parts))
-            
-            for row, part in enumerate(parts):
-                self.parts_table.setItem(row, 0, QTableWidgetItem(part.part_name or ''))
-                self.parts_table.setItem(row, 1, QTableWidgetItem(part.article or ''))
-                self.parts_table.setItem(row, 2, QTableWidgetItem(str(part.quantity)))
-                self.parts_table.setItem(row, 3, QTableWidgetItem(f"{part.price:.2f} ₴"))
-                
-        except Exception as e:
-            self.logger.error(f"Ошибка обновления таблицы запчастей: {e}")
+        """Обновление таблицы запчастей из позиций заказа в памяти"""
+        self.parts_table.setRowCount(0)
+        for line in self.line_items.parts:
+            self._append_part_row(line)
             
         def add_service_from_search(self):
             """Добавление услуги из поисковой строки"""
@@ -722,20 +754,6 @@ class NewOrderView(QWidget):
                 if reply2 == QMessageBox.Yes:
                     self.add_part()
 
-        def search_service_by_name(self, name):
-            """Поиск услуги по названию в каталоге"""
-            try:
-                return self.db_session.query(ServiceCatalog).filter(
-                    or_(
-                        ServiceCatalog.name.ilike(f'%{name}%'),
-                        ServiceCatalog.synonyms.ilike(f'%{name}%')
-                    ),
-                    ServiceCatalog.is_active == 1
-                ).first()
-            except Exception as e:
-                logger.error(f"Ошибка поиска услуги: {e}")
-                return None
-
         def refresh_services_table(self):
             """Обновление таблицы услуг из БД"""
             if not self.current_order or not self.current_order.id:
@@ -886,43 +904,24 @@ class NewOrderView(QWidget):
                     logger.error(f"Ошибка удаления запчасти: {e}")
                     QMessageBox.critical(self, 'Ошибка', f'Не удалось удалить запчасть: {e}')            
     
+    def current_totals(self):
+        """Итоги заказа по позициям в памяти"""
+        return self.line_items.totals(
+            discount_percent=self.discount_input.value(),
+            prepayment=self.prepayment_input.value()
+        )
+    
     def calculate_totals(self):
-        """Расчет итогов"""
-        # Сумма услуг
-        services_total = 0.0
-        if self.current_order:
-            try:
-                services = self.db_session.query(OrderService).filter_by(order_id=self.current_order.id).all()
-                services_total = sum(service.price for service in services)
-            except:
-                pass
-        
-        self.services_total_label.setText(f"{services_total:.2f} ₴")
+        """Расчет итогов (без обращения к БД)"""
+        totals = self.current_totals()
         
-        # Сумма запчастей
-        parts_total = 0.0
-        if self.current_order:
-            try:
-                parts = self.db_session.query(OrderPart).filter_by(order_id=self.current_order.id).all()
-                parts_total = sum(part.quantity * part.price for part in parts)
-            except:
-                pass
+        self.services_total_label.setText(f"{totals.services_total:.2f} ₴")
+        self.parts_total_label.setText(f"{totals.parts_total:.2f} ₴")
+        self.vat_total_label.setText(f"{totals.vat_total:.2f} ₴")
+        self.total_label.setText(f"{totals.total:.2f} ₴")
         
-        self.parts_total_label.setText(f"{parts_total:.2f} ₴")
-        
-        # Общая сумма до скидки
-        subtotal = services_total + parts_total
-        
-        # Применяем скидку
-        discount_percent = self.discount_input.value()
-        discount_amount = subtotal * (discount_percent / 100)
-        total = subtotal - discount_amount
-        
-        self.total_label.setText(f"{total:.2f} ₴")
-        
-                # К доплате
-        prepayment = self.prepayment_input.value()
-        balance = total - prepayment
+        # К доплате
+        balance = totals.balance
         
         if balance > 0:
             self.balance_label.setText(f"{balance:.2f} ₴")
@@ -950,76 +949,170 @@ class NewOrderView(QWidget):
         """Отметка несохраненных изменений"""
         self.unsaved_changes = True
     
+    def mark_field_dirty(self, field_name):
+        """Отметка измененного поля заказа"""
+        self._dirty_fields.add(field_name)
+        self.unsaved_changes = True
+    
+    def is_draft_dirty(self):
+        """Есть ли изменения, не записанные в БД"""
+        return bool(self._dirty_fields) or self.line_items.is_dirty
+    
+    def _order_field_values(self, field_names):
+        """Значения полей заказа из формы"""
+        totals = self.current_totals()
+        values = {
+            'client_id': self.selected_client.id if self.selected_client else None,
+            'car_id': self.selected_car.id if self.selected_car else None,
+            'date_received': self.date_received_edit.dateTime().toPython(),
+            'date_delivery': self.date_delivery_edit.dateTime().toPython(),
+            'notes': self.notes_edit.toPlainText(),
+            'discount_percent': float(totals.discount_percent),
+            'total_amount': float(totals.total),
+            'prepayment': float(totals.prepayment),
+        }
+        return {name: values[name] for name in field_names
+                if values[name] is not None or name in ('notes', 'date_delivery')}
+    
+    def autosave(self):
+        """
+        Фоновое автосохранение черновика.
+        
+        Без изменений ничего не делает. Иначе снимает минимальный набор
+        изменений и пишет его в отдельном потоке; ошибки уходят в строку
+        состояния и лог, а не в диалоги.
+        """
+        if self._autosave_worker is not None or not self.is_draft_dirty():
+            return
+        
+        if self.current_order is None:
+            # Новый заказ можно создать только с клиентом и автомобилем
+            if not (self.selected_client and self.selected_car):
+                return
+            order_id = None
+            field_names = DRAFT_FIELDS
+        else:
+            order_id = self.current_order.id
+            field_names = set(self._dirty_fields)
+            if self.line_items.is_dirty:
+                field_names.add('total_amount')
+        
+        changes = self.line_items.take_changes(order_id, self._order_field_values(field_names))
+        self._dirty_fields.clear()
+        
+        worker = DraftSaveWorker(self.service.draft_writer(self.db_session), changes, self)
+        worker.save_completed.connect(lambda *_: self._finish_autosave(worker))
+        self._autosave_worker = worker
+        worker.start()
+    
+    def _finish_autosave(self, worker):
+        """Обработка результата фоновой записи (в UI-потоке)"""
+        if worker.handled:
+            return
+        worker.handled = True
+        self._autosave_worker = None
+        changes = worker.changes
+        
+        if not worker.success:
+            self.line_items.restore_changes(changes)
+            self._dirty_fields.update(changes.order_fields)
+            self.status_message.emit(f"Автосохранение не удалось: {worker.error}", 5000)
+            return
+        
+        self.line_items.apply_saved_changes(changes)
+        if self.current_order is None:
+            self.current_order = self.service.get_order(self.db_session, changes.order_id)
+            self.order_number_edit.setText(changes.order_number or "")
+        elif self.db_session is not None:
+            # Данные заказа изменены другой сессией
+            self.db_session.expire(self.current_order)
+        
+        self.unsaved_changes = self.is_draft_dirty()
+        self.status_message.emit("Черновик автосохранен", 2000)
+    
+    def _wait_for_autosave(self):
+        """Ожидание завершения фоновой записи перед синхронным сохранением"""
+        worker = self._autosave_worker
+        if worker is not None:
+            worker.wait()
+            self._finish_autosave(worker)
+    
     def generate_order_number(self):
         """Генерация номера заказа"""
         try:
-            today = datetime.now()
-            date_str = today.strftime('%Y%m%d')
-            
-            # Ищем последний номер за сегодня
-            pattern = f'СТО-{date_str}-%'
-            last_order = self.db_session.query(Order).filter(
-                Order.order_number.like(pattern)
-            ).order_by(Order.order_number.desc()).first()
-            
-            if last_order:
-                last_num = int(last_order.order_number.split('-')[-1])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-                
-            return f'СТО-{date_str}-{new_num:03d}'
+            return next_order_number(self.db_session)
             
         except Exception as e:
             self.logger.error(f"Ошибка генерации номера заказа: {e}")
             return f'СТО-{datetime.now().strftime("%Y%m%d")}-001'
     
+    def load_order(self, order):
+        """Открытие существующего заказа для редактирования"""
+        self.current_order = order
+        self.order_number_edit.setText(order.order_number)
+
+        if order.client:
+            self.client_search_edit.blockSignals(True)
+            self.client_search_edit.setText(order.client.name)
+            self.client_search_edit.blockSignals(False)
+            self.select_client(order.client)
+        if order.car:
+            for i in range(self.car_combo.count()):
+                car = self.car_combo.itemData(i)
+                if car and car.id == order.car_id:
+                    self.car_combo.setCurrentIndex(i)
+                    break
+
+        if order.date_received:
+            self.date_received_edit.setDateTime(QDateTime(order.date_received))
+        if order.date_delivery:
+            self.date_delivery_edit.setDateTime(QDateTime(order.date_delivery))
+        self.notes_edit.setPlainText(order.notes or "")
+        self.discount_input.setValue(order.discount_percent or 0)
+        self.prepayment_input.setValue(order.prepayment or 0)
+
+        # Строки заказа читаются из БД один раз при открытии
+        self.line_items.load_order(self.db_session, order.id)
+        self.refresh_services_table()
+        self.refresh_parts_table()
+        self.calculate_totals()
+        self._dirty_fields.clear()
+        self.unsaved_changes = False
+
+    def _order_form(self) -> OrderFields:
+        """Поля заказа из формы"""
+        return OrderFields(
+            client_id=self.selected_client.id if self.selected_client else None,
+            car_id=self.selected_car.id if self.selected_car else None,
+            date_received=self.date_received_edit.dateTime().toPython(),
+            date_delivery=self.date_delivery_edit.dateTime().toPython(),
+            notes=self.notes_edit.toPlainText(),
+            discount_percent=self.discount_input.value(),
+            prepayment=self.prepayment_input.value()
+        )
+
+    def _order_saved(self, order):
+        """Заказ записан в БД: номер в форме, изменений нет"""
+        self.current_order = order
+        self.order_number_edit.setText(order.order_number)
+        self._dirty_fields.clear()
+        self.unsaved_changes = False
+
     def save_draft(self):
         """Сохранение черновика"""
+        self._wait_for_autosave()
         try:
-            if not self.selected_client:
-                QMessageBox.warning(self, "Предупреждение", "Выберите клиента")
-                return False
-            
-            # Создаем новый заказ если его нет
-            if not self.current_order:
-                self.current_order = Order()
-                self.current_order.order_number = self.generate_order_number()
-                self.order_number_edit.setText(self.current_order.order_number)
-                self.db_session.add(self.current_order)
-            
-            # Заполняем данные
-            self.current_order.client_id = self.selected_client.id
-            if self.selected_car:
-                self.current_order.car_id = self.selected_car.id
-            
-            self.current_order.date_received = self.date_received_edit.dateTime().toPython()
-            self.current_order.date_delivery = self.date_delivery_edit.dateTime().toPython()
-            self.current_order.notes = self.notes_edit.toPlainText()
-            self.current_order.status = OrderStatus.DRAFT
-            
-            # Рассчитываем итоговую сумму
-            services_total = 0.0
-            parts_total = 0.0
-            
-            if self.current_order.id:
-                services = self.db_session.query(OrderService).filter_by(order_id=self.current_order.id).all()
-                services_total = sum(service.price for service in services)
-                
-                parts = self.db_session.query(OrderPart).filter_by(order_id=self.current_order.id).all()
-                parts_total = sum(part.quantity * part.price for part in parts)
-            
-            self.current_order.total_amount = services_total + parts_total
-            
-            self.db_session.commit()
-            
-            self.unsaved_changes = False
+            order = self.service.save_draft(self.db_session, self.line_items,
+                                            self._order_form(), self.current_order)
+            self._order_saved(order)
             self.status_message.emit("Черновик сохранен", 2000)
             
             return True
             
+        except ValidationError as e:
+            QMessageBox.warning(self, "Предупреждение", e.message)
+            return False
         except Exception as e:
-            self.db_session.rollback()
             self.logger.error(f"Ошибка сохранения черновика: {e}")
             QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить черновик: {e}")
             return False
@@ -1031,20 +1124,15 @@ class NewOrderView(QWidget):
             return
         
         try:
-            # Сначала сохраняем как черновик
-            if not self.save_draft():
-                return
-            
-            # Устанавливаем статус
-            status_index = self.status_combo.currentIndex()
-            if status_index >= 0:
-                status_data = self.status_combo.itemData(status_index)
-                if status_data:
-                    self.current_order.status = status_data
-                else:
-                    self.current_order.status = OrderStatus.IN_WORK
-            
-            self.db_session.commit()
+            with sql_profiler.action('NewOrderView.save_order'):
+                self._wait_for_autosave()
+                
+                # Статус из формы (по умолчанию - в работе)
+                status_index = self.status_combo.currentIndex()
+                status = self.status_combo.itemData(status_index) if status_index >= 0 else None
+                order = self.service.place_order(self.db_session, self.line_items,
+                                                 self._order_form(), self.current_order, status)
+                self._order_saved(order)
             
             # Отправляем сигнал о создании заказа
             order_data = {
@@ -1062,8 +1150,9 @@ class NewOrderView(QWidget):
             # Очищаем форму для нового заказа
             self.clear_form()
             
+        except ValidationError as e:
+            QMessageBox.warning(self, "Предупреждение", e.message)
         except Exception as e:
-            self.db_session.rollback()
             self.logger.error(f"Ошибка сохранения заказа: {e}")
             QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить заказ: {e}")
     
@@ -1079,11 +1168,12 @@ class NewOrderView(QWidget):
             if result != QMessageBox.Yes:
                 return
         
+        self._wait_for_autosave()
+        
         # Очищаем данные
         self.current_order = None
         self.selected_client = None
         self.selected_car = None
-        self.unsaved_changes = False
         
         # Очищаем интерфейс
         self.order_number_edit.clear()
@@ -1099,14 +1189,19 @@ class NewOrderView(QWidget):
         self.date_delivery_edit.setDateTime(QDateTime.currentDateTime().addDays(1))
         self.status_combo.setCurrentIndex(0)
         
+        self.line_items.clear()
         self.services_table.setRowCount(0)
         self.parts_table.setRowCount(0)
         
         self.discount_input.setValue(0)
+        self.prepayment_input.setValue(0)
         self.notes_edit.clear()
         
         self.calculate_totals()
         self.check_form_validity()
+        
+        self._dirty_fields.clear()
+        self.unsaved_changes = False
     
     def has_unsaved_changes(self):
         """Проверка наличия несохраненных изменений"""
@@ -1130,4 +1225,5 @@ class NewOrderView(QWidget):
                 return
         
         self.autosave_timer.stop()
+        self._wait_for_autosave()
         event.accept()
\ No newline at end of file
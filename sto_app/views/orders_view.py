@@ -6,13 +6,13 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableView,
 from PySide6.QtCore import Qt, Signal, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, QDate
 from PySide6.QtGui import QAction, QIcon, QFont, QColor, QPalette
 from sto_app.dialogs.order_details_dialog import OrderDetailsDialog
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, desc
+from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 import logging
 
-from shared_models.common_models import Client, Car
-from sto_app.models_sto import Order, OrderStatus
+from sto_app.models_sto import OrderStatus
+from sto_app.services import orders as orders_service
+from config.sql_profiler import sql_profiler
 
 
 logger = logging.getLogger(__name__)
@@ -21,9 +21,10 @@ logger = logging.getLogger(__name__)
 class OrdersTableModel(QAbstractTableModel):
     """Модель данных для таблицы заказов"""
     
-    def __init__(self, db_session: Session):
+    def __init__(self, db_session: Session, service=orders_service):
         super().__init__()
         self.db_session = db_session
+        self.service = service
         self.orders = []
         self.headers = [
             '№ заказа', 'Дата приёма', 'Клиент', 'Автомобиль', 
@@ -110,41 +111,56 @@ class OrdersTableModel(QAbstractTableModel):
         self.beginResetModel()
         
         try:
-            query = self.db_session.query(Order).options(
-                joinedload(Order.client),
-                joinedload(Order.car),
-                joinedload(Order.responsible_person)
-            )
-            
-            # Применяем фильтры
-            if filters:
-                if filters.get('status') and filters['status'] != 'Все':
-                    query = query.filter(Order.status == OrderStatus(filters['status']))
-                    
-                if filters.get('client_search'):
-                    search_term = f"%{filters['client_search']}%"
-                    query = query.join(Client).filter(Client.name.ilike(search_term))
-                    
-                if filters.get('vin_search'):
-                    search_term = f"%{filters['vin_search']}%"
-                    query = query.join(Car).filter(Car.vin.ilike(search_term))
-                    
-                if filters.get('date_from'):
-                    query = query.filter(Order.date_received >= filters['date_from'])
-                    
-                if filters.get('date_to'):
-                    query = query.filter(Order.date_received <= filters['date_to'])
-                    
-                if filters.get('only_unpaid'):
-                    query = query.filter(Order.total_amount > Order.prepayment + Order.additional_payment)
-            
-            self.orders = query.order_by(desc(Order.date_received)).all()
+            self.orders = self.service.list_orders(self.db_session, filters)
             
         except Exception as e:
             logger.error(f"Ошибка загрузки заказов: {e}")
             self.orders = []
             
         self.endResetModel()
+        
+    def apply_changes(self, change_set, filters=None):
+        """
+        Обновить только строки, затронутые изменениями (services.changes):
+        измененные заказы перечитываются, заказы, которые больше не проходят
+        фильтры, убираются, новые - вставляются по дате приёма
+        """
+        order_ids = set(change_set.ids('orders'))
+        clients = change_set.ids('clients')
+        cars = change_set.ids('cars')
+        employees = change_set.ids('employees')
+        if clients or cars or employees:
+            # Переименованный клиент, автомобиль или сотрудник - строки его заказов
+            order_ids.update(order.id for order in self.orders
+                             if order.client_id in clients or order.car_id in cars
+                             or order.responsible_person_id in employees)
+        if not order_ids:
+            return
+        
+        fresh = {order.id: order
+                 for order in self.service.changed_orders(self.db_session, order_ids, filters)}
+        
+        for row in reversed(range(len(self.orders))):
+            order = self.orders[row]
+            if order.id not in order_ids:
+                continue
+            updated = fresh.get(order.id)
+            if updated is not None and updated.date_received == order.date_received:
+                # Место в списке не изменилось - обновляем строку на месте
+                self.orders[row] = fresh.pop(order.id)
+                self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+            else:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.orders[row]
+                self.endRemoveRows()
+        
+        # Новые заказы и заказы с измененной датой - на место по дате (список по убыванию)
+        for order in fresh.values():
+            row = next((i for i, existing in enumerate(self.orders)
+                        if existing.date_received < order.date_received), len(self.orders))
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.orders.insert(row, order)
+            self.endInsertRows()
 
 
 class OrdersView(QWidget):
@@ -153,9 +169,11 @@ class OrdersView(QWidget):
     status_message = Signal(str, int)
     order_selected = Signal(int)
     
-    def __init__(self, db_session: Session):
+    def __init__(self, db_session: Session, service=orders_service):
         super().__init__()
         self.db_session = db_session
+        # Режим клиента: service - api.remote.RemoteOrders, db_session - None
+        self.service = service
         self.setup_ui()
         self.load_orders()
         
@@ -297,7 +315,7 @@ class OrdersView(QWidget):
         
         # Таблица заказов
         self.orders_table = QTableView()
-        self.orders_model = OrdersTableModel(self.db_session)
+        self.orders_model = OrdersTableModel(self.db_session, self.service)
         self.orders_table.setModel(self.orders_model)
         
         # Настройка таблицы
@@ -420,9 +438,9 @@ class OrdersView(QWidget):
         row = selection.currentIndex().row()
         return self.orders_model.get_order(row)
         
-    def apply_filters(self):
-        """Применить фильтры"""
-        filters = {
+    def current_filters(self):
+        """Фильтры из панели"""
+        return {
             'status': self.status_filter.currentText(),
             'client_search': self.client_search.text().strip(),
             'vin_search': self.vin_search.text().strip(),
@@ -431,7 +449,26 @@ class OrdersView(QWidget):
             'only_unpaid': self.unpaid_only_cb.isChecked()
         }
         
-        self.orders_model.refresh_data(filters)
+    def apply_filters(self):
+        """Применить фильтры"""
+        with sql_profiler.action('OrdersView.apply_filters'):
+            self.orders_model.refresh_data(self.current_filters())
+        self.update_records_count()
+        
+    def apply_changes(self, change_set):
+        """Изменения из других экземпляров приложения (utils.change_notifier)"""
+        if not change_set.touches('orders', 'clients', 'cars', 'employees'):
+            return
+        if change_set.reset:
+            self.apply_filters()
+            return
+        
+        try:
+            with sql_profiler.action('OrdersView.apply_changes'):
+                self.orders_model.apply_changes(change_set, self.current_filters())
+        except Exception as e:
+            logger.error(f"Ошибка обновления заказов: {e}")
+            return
         self.update_records_count()
         
     def reset_filters(self):
@@ -465,19 +502,15 @@ class OrdersView(QWidget):
         
     def view_order_details(self):
         """Просмотр полных деталей выбранного заказа"""
-        current_row = self.orders_table.currentRow()
-        if current_row < 0:
+        order = self.get_selected_order()
+        if not order:
             QMessageBox.information(self, "Информация", "Выберите заказ для просмотра")
             return
         
         try:
-            order_id = self.get_order_id_from_row(current_row)
-            
-            if not order_id:
-                QMessageBox.warning(self, "Предупреждение", "Не удалось определить ID заказа")
-                return
-                
-            dialog = OrderDetailsDialog(self, order_id=order_id)
+            # updated_at из строки списка позволяет взять детали из кэша без запросов
+            dialog = OrderDetailsDialog(self, order_id=order.id, updated_at=order.updated_at,
+                                        service=self.service)
             dialog.exec()
             
         except Exception as e:
@@ -485,18 +518,14 @@ class OrdersView(QWidget):
         
     def edit_order(self):
         """Редактирование заказа"""
-        current_row = self.orders_table.currentRow()
-        if current_row < 0:
+        order = self.get_selected_order()
+        if not order:
             QMessageBox.information(self, 'Информация', 'Выберите заказ для редактирования')
             return
         
         try:
-            order_id = self.get_order_id_from_row(current_row)
-            if not order_id:
-                QMessageBox.warning(self, "Предупреждение", "Не удалось определить ID заказа")
-                return
-                
-            dialog = OrderDetailsDialog(self, order_id=order_id, read_only=False)
+            dialog = OrderDetailsDialog(self, order_id=order.id, updated_at=order.updated_at,
+                                        read_only=False, service=self.service)
             if dialog.exec():
                 self.refresh_orders()
                 
@@ -510,12 +539,10 @@ class OrdersView(QWidget):
             return
             
         try:
-            order.status = OrderStatus.IN_WORK
-            self.db_session.commit()
+            self.service.start_work(self.db_session, order)
             self.refresh_orders()
             self.status_message.emit(f'Заказ {order.order_number} переведён в работу', 3000)
         except Exception as e:
-            self.db_session.rollback()
             logger.error(f"Ошибка изменения статуса: {e}")
             QMessageBox.critical(self, 'Ошибка', f'Не удалось изменить статус: {e}')
             
@@ -526,18 +553,15 @@ class OrdersView(QWidget):
             return
             
         try:
-            if order.balance_due > 0:
-                order.status = OrderStatus.WAITING_PAYMENT
+            status = self.service.complete_work(self.db_session, order)
+            if status == OrderStatus.WAITING_PAYMENT:
                 message = f'Заказ {order.order_number} ожидает доплату'
             else:
-                order.status = OrderStatus.COMPLETED
                 message = f'Заказ {order.order_number} завершён'
                 
-            self.db_session.commit()
             self.refresh_orders()
             self.status_message.emit(message, 3000)
         except Exception as e:
-            self.db_session.rollback()
             logger.error(f"Ошибка завершения работ: {e}")
             QMessageBox.critical(self, 'Ошибка', f'Не удалось завершить работы: {e}')
             
@@ -547,11 +571,13 @@ class OrdersView(QWidget):
         if not order:
             return
             
-        # Здесь будет диалог для добавления оплаты
         from sto_app.dialogs.payment_dialog import PaymentDialog
-        dialog = PaymentDialog(self, order)
+        dialog = PaymentDialog(self, order, self.service)
         if dialog.exec():
             self.refresh_orders()
+            self.status_message.emit(
+                f'Оплата по заказу {order.order_number} добавлена, остаток {order.balance_due:.2f} ₴', 3000
+            )
             
     def print_order(self):
         """Печать заказа"""
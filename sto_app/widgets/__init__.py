@@ -0,0 +1,23 @@
+"""
+Переиспользуемые виджеты и Qt-модели для модуля СТО.
+"""
+
+from .reference_models import ReferenceListModel, reference_model
+from .client_picker import ClientQueryModel, ClientCompleter, ClientPicker
+from .catalog_models import CatalogTableModel, ServiceCatalogTableModel, EmployeeTableModel
+from .report_table_model import ReportColumn, ReportTableModel
+from .lazy_tabs import LazyTabWidget
+
+__all__ = [
+    'ReferenceListModel',
+    'reference_model',
+    'ClientQueryModel',
+    'ClientCompleter',
+    'ClientPicker',
+    'CatalogTableModel',
+    'ServiceCatalogTableModel',
+    'EmployeeTableModel',
+    'ReportColumn',
+    'ReportTableModel',
+    'LazyTabWidget'
+]
@@ -0,0 +1,284 @@
+# sto_app/widgets/catalog_models.py
+"""
+Табличные модели справочников для CatalogsView.
+
+Вместо QTableWidget с шестью QTableWidgetItem на строку модель хранит
+компактные кортежи значений, прочитанные одним SELECT нужных колонок,
+и форматирует ячейки только при отрисовке (data()). Сортировка и
+фильтр работают по индексу строк, без пересоздания данных; после
+добавления, правки или удаления перечитывается одна строка.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence
+
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PySide6.QtGui import QColor
+from sqlalchemy import select
+
+from shared_models.common_models import Employee
+from shared_models.normalize import name_key
+from sto_app.models_sto import ServiceCatalog
+
+
+@dataclass(frozen=True)
+class CatalogColumn:
+    """Колонка таблицы: заголовок, текст ячейки и ключ сортировки по строке"""
+    header: str
+    text: Callable
+    sort_key: Callable
+    alignment: Qt.AlignmentFlag = Qt.AlignLeft | Qt.AlignVCenter
+
+
+def _status_color(active) -> QColor:
+    return QColor(Qt.darkGreen) if active else QColor(Qt.red)
+
+
+class CatalogTableModel(QAbstractTableModel):
+    """
+    Таблица справочника по компактным строкам.
+
+    Подклассы задают выбираемые поля (первое - id), колонки таблицы и
+    колонку статуса. UserRole любой ячейки - id записи.
+    """
+
+    fields: Sequence = ()
+    columns: Sequence[CatalogColumn] = ()
+    status_column: Optional[int] = None
+    active_field: Optional[int] = None  # индекс поля is_active в строке
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows: List[tuple] = []
+        self._visible: List[int] = []  # индексы _rows в порядке отображения
+        self._positions = {}  # id -> индекс в _rows
+        self._search_keys = {}  # id -> текст строки для фильтра (по мере надобности)
+        self._filter_text = ""
+        self._sort_column = None
+        self._sort_order = Qt.AscendingOrder
+
+    # --- Загрузка ---
+
+    def _select(self):
+        return select(*self.fields)
+
+    def load(self, session):
+        """Полная загрузка справочника одним запросом"""
+        rows = [tuple(row) for row in session.execute(self._select())]
+        self.beginResetModel()
+        self._rows = rows
+        self._positions = {row[0]: pos for pos, row in enumerate(rows)}
+        self._search_keys = {}
+        self._rebuild_visible()
+        self.endResetModel()
+
+    def refresh_row(self, session, record_id):
+        """Перечитать одну строку после добавления или правки"""
+        row = session.execute(self._select().where(self.fields[0] == record_id)).first()
+        if row is None:
+            self.remove_row(record_id)
+            return
+        row = tuple(row)
+        self._search_keys.pop(record_id, None)
+        pos = self._positions.get(record_id)
+        if pos is None:
+            self._positions[record_id] = len(self._rows)
+            self._rows.append(row)
+            self._relayout()
+            return
+        self._rows[pos] = row
+        if self._needs_relayout(pos):
+            self._relayout()
+        else:
+            view_row = self._visible.index(pos)
+            self.dataChanged.emit(self.index(view_row, 0),
+                                  self.index(view_row, self.columnCount() - 1))
+
+    def remove_row(self, record_id):
+        """Убрать удаленную запись"""
+        pos = self._positions.get(record_id)
+        if pos is None:
+            return
+        if pos in self._visible:
+            view_row = self._visible.index(pos)
+            self.beginRemoveRows(QModelIndex(), view_row, view_row)
+            self._drop(pos)
+            self.endRemoveRows()
+        else:
+            self._drop(pos)
+
+    def _drop(self, pos):
+        self._search_keys.pop(self._rows[pos][0], None)
+        del self._rows[pos]
+        self._positions = {row[0]: i for i, row in enumerate(self._rows)}
+        self._visible = [i if i < pos else i - 1 for i in self._visible if i != pos]
+
+    # --- Сортировка и фильтр по индексу строк ---
+
+    def _search_key(self, row) -> str:
+        key = self._search_keys.get(row[0])
+        if key is None:
+            key = name_key(" | ".join(column.text(row) for column in self.columns[1:]))
+            self._search_keys[row[0]] = key
+        return key
+
+    def _matches(self, row) -> bool:
+        return not self._filter_text or self._filter_text in self._search_key(row)
+
+    def _rebuild_visible(self):
+        visible = [pos for pos, row in enumerate(self._rows) if self._matches(row)]
+        if self._sort_column is not None:
+            key = self.columns[self._sort_column].sort_key
+            visible.sort(key=lambda pos: key(self._rows[pos]),
+                         reverse=self._sort_order == Qt.DescendingOrder)
+        self._visible = visible
+
+    def _needs_relayout(self, pos) -> bool:
+        """Изменилась ли видимость строки или ее место в сортировке"""
+        if pos not in self._visible:
+            return self._matches(self._rows[pos])
+        if not self._matches(self._rows[pos]):
+            return True
+        if self._sort_column is None:
+            return False
+        key = self.columns[self._sort_column].sort_key
+        keys = [key(self._rows[p]) for p in self._neighbours(pos)]
+        if self._sort_order == Qt.DescendingOrder:
+            keys.reverse()
+        return keys != sorted(keys)
+
+    def _neighbours(self, pos):
+        """Строка и ее соседи в порядке отображения"""
+        view_row = self._visible.index(pos)
+        return self._visible[max(view_row - 1, 0):view_row + 2]
+
+    def _relayout(self):
+        """Пересортировка с сохранением выделения на тех же записях"""
+        self.layoutAboutToBeChanged.emit()
+        persistent = [(index, self._visible[index.row()])
+                      for index in self.persistentIndexList()
+                      if index.row() < len(self._visible)]
+        self._rebuild_visible()
+        view_rows = {pos: view_row for view_row, pos in enumerate(self._visible)}
+        for index, pos in persistent:
+            view_row = view_rows.get(pos)
+            self.changePersistentIndex(
+                index, self.index(view_row, index.column()) if view_row is not None else QModelIndex()
+            )
+        self.layoutChanged.emit()
+
+    def set_filter_text(self, text: str):
+        """Фильтр по подстроке в любой видимой колонке (без учета регистра)"""
+        text = name_key(text)
+        if text == self._filter_text:
+            return
+        self._filter_text = text
+        self.beginResetModel()
+        self._rebuild_visible()
+        self.endResetModel()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self._sort_column = column
+        self._sort_order = order
+        self._relayout()
+
+    # --- Доступ к строкам ---
+
+    def record_id(self, view_row: int):
+        """id записи в строке представления"""
+        if 0 <= view_row < len(self._visible):
+            return self._rows[self._visible[view_row]][0]
+        return None
+
+    def row_text(self, view_row: int, column: int) -> str:
+        if 0 <= view_row < len(self._visible):
+            return self.columns[column].text(self._rows[self._visible[view_row]])
+        return ""
+
+    def total_count(self) -> int:
+        return len(self._rows)
+
+    # --- QAbstractTableModel ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._visible)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columns[section].header
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[self._visible[index.row()]]
+        column = self.columns[index.column()]
+        if role == Qt.DisplayRole:
+            return column.text(row)
+        if role == Qt.UserRole:
+            return row[0]
+        if role == Qt.TextAlignmentRole:
+            return int(column.alignment)
+        if role == Qt.ForegroundRole and index.column() == self.status_column:
+            return _status_color(row[self.active_field])
+        return None
+
+
+def _casefold(value) -> str:
+    return (value or "").casefold()
+
+
+class ServiceCatalogTableModel(CatalogTableModel):
+    """Каталог услуг: ID, название, категория, цена, НДС, статус"""
+
+    # id, name, category, default_price, vat_rate, is_active
+    fields = (ServiceCatalog.id, ServiceCatalog.name, ServiceCatalog.category,
+              ServiceCatalog.default_price, ServiceCatalog.vat_rate, ServiceCatalog.is_active)
+    columns = (
+        CatalogColumn("ID", lambda r: str(r[0]), lambda r: r[0]),
+        CatalogColumn("Название", lambda r: r[1] or "", lambda r: _casefold(r[1])),
+        CatalogColumn("Категория", lambda r: r[2] or "", lambda r: _casefold(r[2])),
+        CatalogColumn("Цена по умолчанию", lambda r: f"{float(r[3] or 0):.2f} грн",
+                      lambda r: float(r[3] or 0), Qt.AlignRight | Qt.AlignVCenter),
+        CatalogColumn("НДС %", lambda r: f"{float(r[4] or 0):.1f}%",
+                      lambda r: float(r[4] or 0), Qt.AlignCenter),
+        CatalogColumn("Статус", lambda r: "Активна" if r[5] else "Неактивна",
+                      lambda r: bool(r[5])),
+    )
+    status_column = 5
+    active_field = 5
+
+    def _select(self):
+        return super()._select().order_by(ServiceCatalog.name)
+
+
+def _employee_full_name(row) -> str:
+    full_name = f"{row[1] or ''} {row[2] or ''}"
+    if row[3]:
+        full_name += f" {row[3]}"
+    return full_name
+
+
+class EmployeeTableModel(CatalogTableModel):
+    """Сотрудники: ID, ФИО, должность, отдел, телефон, статус"""
+
+    # id, last_name, first_name, middle_name, role, department, phone, is_active
+    fields = (Employee.id, Employee.last_name, Employee.first_name, Employee.middle_name,
+              Employee.role, Employee.department, Employee.phone, Employee.is_active)
+    columns = (
+        CatalogColumn("ID", lambda r: str(r[0]), lambda r: r[0]),
+        CatalogColumn("ФИО", _employee_full_name, lambda r: _employee_full_name(r).casefold()),
+        CatalogColumn("Должность", lambda r: r[4] or "", lambda r: _casefold(r[4])),
+        CatalogColumn("Отдел", lambda r: r[5] or "", lambda r: _casefold(r[5])),
+        CatalogColumn("Телефон", lambda r: r[6] or "", lambda r: r[6] or ""),
+        CatalogColumn("Статус", lambda r: "Активен" if r[7] else "Неактивен",
+                      lambda r: bool(r[7])),
+    )
+    status_column = 5
+    active_field = 7
+
+    def _select(self):
+        return super()._select().order_by(Employee.last_name, Employee.first_name)
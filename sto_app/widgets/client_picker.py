@@ -0,0 +1,220 @@
+# sto_app/widgets/client_picker.py
+"""
+Выбор клиента без загрузки всей таблицы клиентов.
+
+ClientQueryModel - список клиентов, читаемый страницами (LIMIT + keyset по
+(name_key, id)) только по введенному тексту; поиск по началу имени или
+телефона идет диапазоном по индексированным ключам (utils.client_search). ClientCompleter подключает его к
+любому QLineEdit как автодополнение с задержкой ввода, ClientPicker -
+готовое поле выбора клиента для диалогов. Предвыбранный клиент
+определяется одним запросом по первичному ключу.
+
+Без сессии БД (режим клиента) строки берутся поиском сервиса клиентов
+(api.remote.RemoteClients) одной страницей.
+"""
+
+from typing import Optional
+
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QTimer, Signal
+from PySide6.QtWidgets import QCompleter, QLineEdit, QWidget, QHBoxLayout
+from sqlalchemy import and_, or_, select
+
+from shared_models.common_models import Client
+from sto_app.services import clients as clients_service
+from sto_app.utils.client_search import client_search_condition
+
+
+class ClientQueryModel(QAbstractListModel):
+    """
+    Постраничная модель клиентов по тексту поиска.
+
+    DisplayRole - "Имя - телефон", UserRole - id клиента, UserRole + 1 - имя.
+    Следующая страница подгружается, когда представление дошло до конца.
+    С paginate=False модель отдает только первую страницу: QCompleter
+    выбирает все страницы сразу, поэтому автодополнению нужна именно она.
+    """
+
+    NameRole = Qt.UserRole + 1
+    PAGE_SIZE = 50
+
+    def __init__(self, db_session, paginate: bool = True, parent=None, clients=clients_service):
+        super().__init__(parent)
+        self.db_session = db_session
+        self.clients = clients
+        self.paginate = paginate
+        self.search_text = ""
+        self._rows = []  # (id, name, phone, name_key)
+        self._exhausted = True
+
+    def _filter(self, stmt):
+        """Условие поиска по имени или телефону (начало строки)"""
+        text = self.search_text
+        if not text:
+            return stmt
+        return stmt.where(client_search_condition(text))
+
+    def _fetch_page(self):
+        """Следующая страница после последней загруженной строки (keyset)"""
+        if self.db_session is None:
+            self._exhausted = True
+            if not self.search_text:
+                return []
+            return [(client.id, client.name, client.phone, None)
+                    for client in self.clients.find_clients(None, self.search_text, limit=self.PAGE_SIZE)]
+        stmt = self._filter(select(Client.id, Client.name, Client.phone, Client.name_key))
+        if self._rows:
+            last_id, _, _, last_key = self._rows[-1]
+            stmt = stmt.where(or_(
+                Client.name_key > last_key,
+                and_(Client.name_key == last_key, Client.id > last_id)
+            ))
+        stmt = stmt.order_by(Client.name_key, Client.id).limit(self.PAGE_SIZE)
+        rows = [tuple(row) for row in self.db_session.execute(stmt)]
+        self._exhausted = len(rows) < self.PAGE_SIZE
+        return rows
+
+    def set_search_text(self, text: str):
+        """Новый текст поиска: модель перечитывает первую страницу"""
+        self.beginResetModel()
+        self.search_text = (text or "").strip()
+        self._rows = []
+        self._exhausted = False
+        self._rows = self._fetch_page()
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return self.paginate and not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        rows = self._fetch_page()
+        if rows:
+            self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(rows) - 1)
+            self._rows.extend(rows)
+            self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        client_id, name, phone, _ = self._rows[index.row()]
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return f"{name} - {phone}" if phone else name
+        if role == Qt.UserRole:
+            return client_id
+        if role == self.NameRole:
+            return name
+        return None
+
+
+class ClientCompleter(QCompleter):
+    """
+    Автодополнение клиентов для QLineEdit.
+
+    Запрос выполняется только по введенному тексту; таймер с нулевой
+    задержкой объединяет нажатия, пришедшие в одном цикле событий, а сам
+    индексный запрос укладывается в один кадр. Показываются первые
+    PAGE_SIZE совпадений, уточнение - дальнейшим вводом.
+    """
+
+    client_activated = Signal(int)  # id клиента
+
+    MIN_CHARS = 2
+    DELAY_MS = 0
+
+    def __init__(self, db_session, line_edit: QLineEdit, parent=None, clients=clients_service):
+        super().__init__(parent or line_edit)
+        self.line_edit = line_edit
+        self.client_model = ClientQueryModel(db_session, paginate=False, parent=self, clients=clients)
+        self.setModel(self.client_model)
+        self.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.setCaseSensitivity(Qt.CaseInsensitive)
+        self.setWidget(line_edit)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.DELAY_MS)
+        self._timer.timeout.connect(self._refresh)
+
+        line_edit.textEdited.connect(self._on_text_edited)
+        self.activated[QModelIndex].connect(self._on_activated)
+
+    def _on_text_edited(self, text: str):
+        self._timer.start()
+
+    def _refresh(self):
+        """Запрос совпадений по текущему тексту"""
+        text = self.line_edit.text().strip()
+        if len(text) < self.MIN_CHARS:
+            self.popup().hide()
+            return
+        self.client_model.set_search_text(text)
+        if self.client_model.rowCount():
+            self.complete()
+        else:
+            self.popup().hide()
+
+    def _on_activated(self, index: QModelIndex):
+        client_id = index.data(Qt.UserRole)
+        if client_id is None:
+            return
+        # Текст поля - только имя; сигналы не нужны, выбор сообщается через client_activated
+        self.line_edit.blockSignals(True)
+        self.line_edit.setText(index.data(ClientQueryModel.NameRole))
+        self.line_edit.blockSignals(False)
+        self.client_activated.emit(client_id)
+
+
+class ClientPicker(QWidget):
+    """
+    Поле выбора клиента.
+
+    Совместимо с прежним QComboBox по currentData() (id выбранного клиента
+    или None). Предвыбор - set_client_id(), один запрос по первичному ключу.
+    """
+
+    client_changed = Signal(object)  # id клиента или None
+
+    def __init__(self, db_session, parent=None, clients=clients_service):
+        super().__init__(parent)
+        self.db_session = db_session
+        self.clients = clients
+        self._client_id: Optional[int] = None
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.line_edit = QLineEdit()
+        self.line_edit.setPlaceholderText("Начните вводить имя или телефон клиента...")
+        self.line_edit.setClearButtonEnabled(True)
+        layout.addWidget(self.line_edit)
+
+        self.completer = ClientCompleter(db_session, self.line_edit, self, clients=clients)
+        self.completer.client_activated.connect(self._set_selected)
+        self.line_edit.textEdited.connect(self._on_text_edited)
+
+    def _set_selected(self, client_id: Optional[int]):
+        if client_id != self._client_id:
+            self._client_id = client_id
+            self.client_changed.emit(client_id)
+
+    def _on_text_edited(self, text: str):
+        # Ручная правка текста снимает выбор до выбора из списка
+        self._set_selected(None)
+
+    def set_client_id(self, client_id: Optional[int]):
+        """Предвыбор клиента по id"""
+        client = self.clients.get_client(self.db_session, client_id) if client_id else None
+        self.line_edit.setText(client.name if client else "")
+        self._set_selected(client.id if client else None)
+
+    def client_id(self) -> Optional[int]:
+        return self._client_id
+
+    def currentData(self):
+        return self._client_id
+
+    def setFocus(self):
+        self.line_edit.setFocus()
@@ -0,0 +1,106 @@
+# sto_app/widgets/lazy_tabs.py
+"""
+Вкладки с отложенным созданием.
+
+Вкладка регистрируется фабрикой; до первого открытия на ее месте стоит
+пустая заглушка, поэтому представление (и его начальные запросы к БД)
+создается только когда пользователь действительно переходит на вкладку.
+После показа окна вкладки из списка предзагрузки создаются по одной в
+простое цикла событий, чтобы переход на них тоже был мгновенным.
+"""
+
+import logging
+from typing import Callable, Dict, Iterable, Optional
+
+from PySide6.QtCore import QTimer, Signal
+from PySide6.QtGui import QIcon
+from PySide6.QtWidgets import QTabWidget, QWidget
+
+logger = logging.getLogger(__name__)
+
+
+class LazyTabWidget(QTabWidget):
+    """QTabWidget, создающий содержимое вкладок при первой активации"""
+
+    view_created = Signal(str, object)  # ключ вкладки, представление
+
+    PREFETCH_DELAY_MS = 300
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._factories: Dict[str, Callable[[], QWidget]] = {}
+        self._placeholders: Dict[str, QWidget] = {}
+        self._views: Dict[str, QWidget] = {}
+        self._prefetch_queue = []
+        self.currentChanged.connect(self._on_current_changed)
+
+    def add_lazy_tab(self, key: str, factory: Callable[[], QWidget], icon: QIcon, title: str) -> int:
+        """Добавить вкладку; factory вызывается при первой активации"""
+        placeholder = QWidget()
+        self._factories[key] = factory
+        self._placeholders[key] = placeholder
+        # Первая добавленная вкладка становится текущей и создается сразу
+        index = self.addTab(placeholder, icon, title)
+        if self.currentWidget() is placeholder:
+            self.ensure_view(key)
+        return index
+
+    def created_view(self, key: str) -> Optional[QWidget]:
+        """Представление вкладки, если оно уже создано (без создания)"""
+        return self._views.get(key)
+
+    def created_views(self):
+        return dict(self._views)
+
+    def ensure_view(self, key: str) -> QWidget:
+        """Представление вкладки (создается при первом обращении)"""
+        view = self._views.get(key)
+        if view is not None:
+            return view
+
+        placeholder = self._placeholders[key]
+        view = self._factories[key]()
+        del self._placeholders[key]
+        self._views[key] = view
+
+        # Заглушка заменяется на представление на той же позиции
+        index = self.indexOf(placeholder)
+        was_current = self.currentIndex()
+        self.blockSignals(True)
+        try:
+            icon, title = self.tabIcon(index), self.tabText(index)
+            self.removeTab(index)
+            self.insertTab(index, view, icon, title)
+            self.setCurrentIndex(was_current)
+        finally:
+            self.blockSignals(False)
+        placeholder.deleteLater()
+
+        logger.debug(f"Вкладка {key} создана")
+        self.view_created.emit(key, view)
+        return view
+
+    def _on_current_changed(self, index: int):
+        widget = self.widget(index)
+        for key, placeholder in list(self._placeholders.items()):
+            if placeholder is widget:
+                self.ensure_view(key)
+                break
+
+    def start_prefetch(self, keys: Iterable[str]):
+        """Создать вкладки в простое, по одной за такт цикла событий"""
+        self._prefetch_queue = [key for key in keys if key in self._placeholders]
+        if self._prefetch_queue:
+            QTimer.singleShot(self.PREFETCH_DELAY_MS, self._prefetch_next)
+
+    def _prefetch_next(self):
+        while self._prefetch_queue:
+            key = self._prefetch_queue.pop(0)
+            if key in self._placeholders:
+                try:
+                    self.ensure_view(key)
+                except Exception as e:
+                    logger.error(f"Ошибка предзагрузки вкладки {key}: {e}")
+                break
+        if self._prefetch_queue:
+            QTimer.singleShot(self.PREFETCH_DELAY_MS, self._prefetch_next)
@@ -0,0 +1,126 @@
+# sto_app/widgets/reference_models.py
+"""
+Qt-модели справочников поверх общего кэша (utils.reference_cache).
+
+Модели общие для всех окон: комбобокс любого диалога может взять готовую
+модель через reference_model() вместо собственного запроса к БД.
+Модель перестраивается только при смене версии справочника.
+"""
+
+from typing import Callable, Optional
+
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex
+
+from sto_app.utils.reference_cache import (reference_cache, SERVICES, EMPLOYEES,
+                                           CAR_BRANDS)
+
+
+def _service_text(service) -> str:
+    return f"{service.name} - {service.default_price:.2f} грн"
+
+
+def _employee_text(employee) -> str:
+    return f"{employee.name} ({employee.position or 'Сотрудник'})"
+
+
+def _car_brand_text(car_brand) -> str:
+    return car_brand.brand
+
+
+# Текст строки и порядок сортировки по умолчанию для каждого справочника
+_DISPLAY = {
+    SERVICES: (_service_text, 'name'),
+    EMPLOYEES: (_employee_text, 'name'),
+    CAR_BRANDS: (_car_brand_text, 'name'),
+}
+
+
+class ReferenceListModel(QAbstractListModel):
+    """
+    Список записей справочника для QComboBox/QCompleter/QListView.
+
+    DisplayRole - текст записи, UserRole - id, UserRole + 1 - сама запись.
+    Необязательная первая строка-заглушка (например, "-- Не назначен --")
+    имеет id None.
+    """
+
+    RecordRole = Qt.UserRole + 1
+
+    def __init__(self, kind: str, placeholder: Optional[str] = None,
+                 display: Optional[Callable] = None, sort_key: Optional[str] = None,
+                 parent=None):
+        super().__init__(parent)
+        default_display, default_sort = _DISPLAY[kind]
+        self.kind = kind
+        self.placeholder = placeholder
+        self.display = display or default_display
+        self.sort_key = sort_key or default_sort
+        self.version = None
+        self.table = None
+        self._records = ()
+        self._texts = []
+
+    def refresh(self, session, force: bool = False):
+        """Перестроить модель, если справочник изменился"""
+        table = reference_cache.table(session, self.kind)
+        if not force and table.version == self.version:
+            return
+        self.beginResetModel()
+        self.table = table
+        self.version = table.version
+        self._records = table.ordered(self.sort_key)
+        self._texts = [self.display(record) for record in self._records]
+        self.endResetModel()
+
+    def _offset(self) -> int:
+        return 1 if self.placeholder is not None else 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._records) + self._offset()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row() - self._offset()
+        if row < 0:
+            return self.placeholder if role in (Qt.DisplayRole, Qt.EditRole) else None
+        if row >= len(self._records):
+            return None
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return self._texts[row]
+        if role == Qt.UserRole:
+            return self._records[row].id
+        if role == self.RecordRole:
+            return self._records[row]
+        return None
+
+    def record(self, row: int):
+        """Запись по номеру строки (None для заглушки)"""
+        row -= self._offset()
+        return self._records[row] if 0 <= row < len(self._records) else None
+
+    def row_of(self, record_id) -> int:
+        """Номер строки записи по id (-1, если нет)"""
+        for row, record in enumerate(self._records):
+            if record.id == record_id:
+                return row + self._offset()
+        return -1
+
+
+_shared_models = {}
+
+
+def reference_model(session, kind: str, placeholder: Optional[str] = None) -> ReferenceListModel:
+    """
+    Общая (на процесс) модель справочника, актуализированная по версии кэша.
+
+    Модели живут в GUI-потоке и не имеют родителя, поэтому переживают
+    закрытие диалогов, которые их используют.
+    """
+    key = (kind, placeholder)
+    model = _shared_models.get(key)
+    if model is None:
+        model = ReferenceListModel(kind, placeholder)
+        _shared_models[key] = model
+    model.refresh(session)
+    return model
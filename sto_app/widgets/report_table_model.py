@@ -0,0 +1,133 @@
+# sto_app/widgets/report_table_model.py
+"""
+Табличная модель предварительного просмотра отчетов.
+
+Отчет читается одним запросом только нужных колонок (без ORM-объектов и
+ленивых обращений к связям) и хранится по колонкам: суммы и количества -
+в массивах целых чисел (копейки), остальное - в списках значений.
+Текст ячеек формируется только при отрисовке. Сортировка по заголовку
+выполняется в БД: тот же запрос повторяется с ORDER BY (строки,
+полученные с сервера API, сортируются в памяти).
+"""
+
+from array import array
+from typing import List, Sequence
+
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+# Описание колонок и виды значений - в сервисном слое (без Qt);
+# виды значений по-прежнему доступны и из этого модуля
+from sto_app.services.reports import ReportColumn, TEXT, DATE, MONEY, COUNT, PERCENT, ENUM
+
+__all__ = ['ReportTableModel', 'ReportColumn', 'TEXT', 'DATE', 'MONEY', 'COUNT', 'PERCENT', 'ENUM']
+
+_ALIGNMENT = {
+    MONEY: Qt.AlignRight | Qt.AlignVCenter,
+    COUNT: Qt.AlignCenter,
+    PERCENT: Qt.AlignCenter,
+}
+
+
+def _column_store(kind: str):
+    # Суммы и количества - компактные массивы; NULL в них хранится как 0
+    return array('q') if kind in (MONEY, COUNT) else []
+
+
+class ReportTableModel(QAbstractTableModel):
+    """Отчет по колонкам с сортировкой запросом к БД"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.session = None
+        self.statement = None
+        self.columns: Sequence[ReportColumn] = ()
+        self._data: List = []
+        self._row_count = 0
+
+    def clear(self):
+        self.beginResetModel()
+        self.statement = None
+        self.columns = ()
+        self._data = []
+        self._row_count = 0
+        self.endResetModel()
+
+    def set_report(self, session, columns: Sequence[ReportColumn], statement):
+        """
+        Новый отчет. statement - SELECT колонок отчета (в порядке columns)
+        с JOIN, WHERE и GROUP BY; его ORDER BY - порядок по умолчанию.
+        """
+        self.session = session
+        self.statement = statement
+        self.columns = tuple(columns)
+        self._load(statement)
+
+    def set_rows(self, columns: Sequence[ReportColumn], rows):
+        """
+        Отчет из уже полученных строк (режим клиента: строки приходят с
+        сервера API). Сортировка по заголовку - в памяти.
+        """
+        self.session = None
+        self.statement = None
+        self.columns = tuple(columns)
+        self._store(rows)
+
+    def _load(self, statement):
+        self._store(self.session.execute(statement))
+
+    def _store(self, result):
+        data = [_column_store(column.kind) for column in self.columns]
+        numeric = [column.kind in (MONEY, COUNT) for column in self.columns]
+        rows = 0
+        for row in result:
+            for store, is_numeric, value in zip(data, numeric, row):
+                store.append(int(value or 0) if is_numeric else value)
+            rows += 1
+        self.beginResetModel()
+        self._data = data
+        self._row_count = rows
+        self.endResetModel()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Сортировка в БД по выражению колонки (в памяти для set_rows)"""
+        if not 0 <= column < len(self.columns):
+            return
+        descending = order == Qt.DescendingOrder
+        if self.statement is None:
+            values = self._data[column] if self._data else []
+            # Пустые значения - в конце при любом направлении; Enum - по value
+            present = sorted((i for i in range(self._row_count) if values[i] is not None),
+                             key=lambda i: getattr(values[i], 'value', values[i]), reverse=descending)
+            missing = [i for i in range(self._row_count) if values[i] is None]
+            rows = present + missing
+            self._store([tuple(store[i] for store in self._data) for i in rows])
+            return
+        expression = self.columns[column].expression
+        expression = expression.desc() if descending else expression.asc()
+        self._load(self.statement.order_by(None).order_by(expression))
+
+    def value(self, row: int, column: int):
+        """Исходное значение ячейки (копейки для сумм)"""
+        return self._data[column][row]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columns[section].header
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = self.columns[index.column()]
+        if role == Qt.DisplayRole:
+            return column.format(self._data[index.column()][index.row()])
+        if role == Qt.TextAlignmentRole:
+            alignment = _ALIGNMENT.get(column.kind)
+            return int(alignment) if alignment is not None else None
+        return None
@@ -0,0 +1,589 @@
+#!/usr/bin/env python
+"""
+Командная строка СТО для пакетных операций без интерфейса (cron, ночные задания).
+
+Команды:
+    export   - выгрузка таблицы (orders, clients, cars, employees, services, payments)
+    report   - отчет за период (orders, status, clients, services, financial)
+    backup   - резервная копия БД
+    verify   - проверка целостности (SQLite, внешние ключи, итоги заказов, ключи поиска)
+    reindex  - пересчет ключей поиска, REINDEX и ANALYZE
+    vacuum   - сжатие файла БД
+    sync     - репликация между площадками (init, status, export, import)
+    archive  - перенос закрытых заказов в архив (run, status, restore)
+
+Данные пишутся в stdout (или в файл -o) построчно по мере чтения,
+ход работы и сообщения - в stderr. PySide6 не загружается.
+
+Коды возврата: 0 - успех, 1 - ошибка, 2 - неверные аргументы,
+3 - verify нашел проблемы, 130 - прервано.
+
+Примеры:
+    python sto_cli.py export orders --from 2025-01-01 --format jsonl -o orders.jsonl
+    python sto_cli.py report financial --from 2025-01-01 --to 2025-12-31
+    python sto_cli.py backup --dir /var/backups/sto
+    python sto_cli.py verify --quick || echo "БД повреждена"
+    python sto_cli.py sync export --to B --dir /mnt/exchange
+    python sto_cli.py archive run --days 365
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, redirect_stdout
+from datetime import date, datetime, time as day_time, timedelta
+from decimal import Decimal
+from enum import Enum
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2
+EXIT_CHECK_FAILED = 3
+EXIT_INTERRUPTED = 130
+
+# Производные колонки (ключи поиска) не выгружаются
+DERIVED_COLUMNS = {'name_key', 'phone_digits', 'vin_norm', 'vin_rev', 'plate_norm'}
+
+REPORTS = ('orders', 'status', 'clients', 'services', 'financial')
+EXPORTS = ('orders', 'clients', 'cars', 'employees', 'services', 'payments')
+
+
+class CliError(Exception):
+    """Ошибка выполнения команды (сообщение для stderr, код 1)"""
+
+
+class Progress:
+    """Сообщения о ходе работы в stderr (отключаются --quiet)"""
+
+    def __init__(self, quiet: bool = False, every: int = 10000):
+        self.quiet = quiet
+        self.every = every
+        self.started = time.perf_counter()
+
+    def info(self, message: str):
+        if not self.quiet:
+            print(message, file=sys.stderr, flush=True)
+
+    def rows(self, label: str, count: int):
+        if count and count % self.every == 0:
+            self.info(f"🔄 {label}: {count} строк")
+
+    def done(self, message: str):
+        self.info(f"✅ {message} за {time.perf_counter() - self.started:.1f} с")
+
+
+def parse_date(value: str) -> date:
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ожидается дата ГГГГ-ММ-ДД: {value}")
+
+
+def period(args):
+    """Период из --from/--to; --to включает весь день"""
+    date_to = args.date_to or date.today()
+    date_from = args.date_from or date_to - timedelta(days=30)
+    if date_from > date_to:
+        raise CliError("Начало периода позже конца")
+    return datetime.combine(date_from, day_time.min), datetime.combine(date_to, day_time.max)
+
+
+def plain(value):
+    """Значение для CSV/JSON"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+# --- Вывод ---
+
+@contextmanager
+def output_stream(path):
+    """
+    stdout или файл. Файл пишется во временный рядом и переименовывается
+    только после успешного завершения - cron не оставит половину выгрузки.
+    """
+    if not path:
+        sys.stdout.reconfigure(encoding='utf-8')
+        yield sys.stdout
+        sys.stdout.flush()
+        return
+
+    target = Path(path)
+    partial = target.with_name(target.name + '.part')
+    try:
+        with open(partial, 'w', encoding='utf-8', newline='') as f:
+            yield f
+        os.replace(partial, target)
+    finally:
+        if partial.exists():
+            partial.unlink()
+
+
+class RowWriter:
+    """Построчная запись CSV (с заголовком) или JSON Lines"""
+
+    def __init__(self, stream, headers, fmt: str):
+        self.stream = stream
+        self.headers = list(headers)
+        self.fmt = fmt
+        if fmt == 'csv':
+            self.csv = csv.writer(stream, lineterminator='\n')
+            self.csv.writerow(self.headers)
+
+    def write(self, row):
+        if self.fmt == 'csv':
+            self.csv.writerow([plain(value) for value in row])
+        else:
+            record = {header: plain(value) for header, value in zip(self.headers, row)}
+            self.stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def write_rows(args, progress: Progress, label: str, headers, rows) -> int:
+    count = 0
+    with output_stream(args.output) as stream:
+        writer = RowWriter(stream, headers, args.format)
+        for row in rows:
+            writer.write(row)
+            count += 1
+            progress.rows(label, count)
+    return count
+
+
+# --- Команды ---
+
+def export_statement(entity: str, args):
+    from sqlalchemy import select
+    from shared_models.common_models import Client, Car, Employee
+    from sto_app.models_sto import Order, OrderPayment, OrderStatus, ServiceCatalog
+
+    model = {
+        'orders': Order, 'clients': Client, 'cars': Car,
+        'employees': Employee, 'services': ServiceCatalog, 'payments': OrderPayment,
+    }[entity]
+    columns = [column for column in model.__table__.columns if column.name not in DERIVED_COLUMNS]
+    statement = select(*columns).order_by(model.__table__.c.id)
+
+    if entity == 'orders':
+        if args.date_from or args.date_to:
+            date_from, date_to = period(args)
+            statement = statement.where(Order.date_received.between(date_from, date_to))
+        if args.status:
+            try:
+                status = OrderStatus[args.status.upper()]
+            except KeyError:
+                raise CliError(f"Неизвестный статус {args.status}, допустимые: "
+                               f"{', '.join(item.name for item in OrderStatus)}")
+            statement = statement.where(Order.status == status)
+    return [column.name for column in columns], statement
+
+
+def cmd_export(args, progress: Progress) -> int:
+    from config.database import SessionLocal
+
+    headers, statement = export_statement(args.entity, args)
+    with SessionLocal() as session:
+        rows = session.execute(statement.execution_options(yield_per=args.batch_size))
+        count = write_rows(args, progress, f"export {args.entity}", headers, rows)
+    progress.done(f"Выгружено {args.entity}: {count}")
+    return EXIT_OK
+
+
+def financial_rows(report, raw: bool):
+    from sto_app.utils.pricing import from_kopecks
+
+    fields = ('orders', 'services', 'parts', 'discounts', 'vat', 'total', 'paid')
+
+    def money(value):
+        return value if raw else f'{from_kopecks(value):.2f}'
+
+    for item in report.periods:
+        yield [item.period, item.orders, *(money(getattr(item, name)) for name in fields[1:])]
+    yield ['Итого', report.orders, *(money(getattr(report, name)) for name in fields[1:])]
+
+
+def cmd_report(args, progress: Progress) -> int:
+    from config.database import SessionLocal
+    from sto_app.services import archive, reports
+
+    date_from, date_to = period(args)
+
+    with SessionLocal() as session:
+        # Период, заходящий в архив, читается вместе с архивом заказов
+        use_archive = archive.reaches(session, date_from)
+        progress.info(f"🔄 Отчет {args.name}: {date_from:%d.%m.%Y} - {date_to:%d.%m.%Y}"
+                      f"{' (включая архив)' if use_archive else ''}")
+        if args.name == 'financial':
+            report = reports.financial_report(session, date_from, date_to, args.min_amount, use_archive)
+            headers = ['Период', 'Заказов', 'Услуги', 'Запчасти', 'Скидки', 'НДС', 'Итого', 'Оплачено']
+            rows = financial_rows(report, args.raw)
+        else:
+            builder = {
+                'orders': reports.orders_report,
+                'status': reports.status_report,
+                'clients': reports.clients_report,
+                'services': reports.services_report,
+            }[args.name]
+            report = builder(date_from, date_to, use_archive)
+            headers = report.headers
+            stream = report.stream(session, args.batch_size)
+            rows = stream if args.raw else (report.format_row(row) for row in stream)
+        count = write_rows(args, progress, f"report {args.name}", headers, rows)
+    progress.done(f"Отчет {args.name}: {count} строк")
+    return EXIT_OK
+
+
+def database_path() -> Path:
+    from config.database import engine
+
+    if engine.url.get_backend_name() != 'sqlite' or not engine.url.database:
+        raise CliError(f"Команда работает только с файлом SQLite: {engine.url}")
+    return Path(engine.url.database)
+
+
+def cmd_backup(args, progress: Progress) -> int:
+    from config.database import ARCHIVE_DATABASE
+    from sto_app.services.backup import create_backup
+
+    if args.output:
+        backup_path = Path(args.output)
+    else:
+        backup_dir = Path(args.dir or Path.home() / 'STO_Backups')
+        backup_dir.mkdir(parents=True, exist_ok=True)
+        backup_type = 'full' if args.with_files else 'db'
+        backup_path = backup_dir / f"sto_backup_{backup_type}_{datetime.now():%Y%m%d_%H%M%S}.zip"
+
+    create_backup(str(backup_path), str(database_path()), args.with_files,
+                  lambda percent, message: progress.info(f"🔄 {percent:3d}% {message}"),
+                  archive_path=ARCHIVE_DATABASE)
+    print(backup_path, flush=True)
+    progress.done(f"Резервная копия: {backup_path.stat().st_size // 1024} КБ")
+    return EXIT_OK
+
+
+def cmd_verify(args, progress: Progress) -> int:
+    from sqlalchemy import text
+    from config.database import SessionLocal, engine, client_search_key_updates, car_search_key_updates
+    from sto_app.models_sto import recalculate_order_totals
+
+    problems = 0
+
+    def result(name: str, failures: list):
+        nonlocal problems
+        if failures:
+            problems += 1
+            print(f"FAIL {name}: {len(failures)}", flush=True)
+            for failure in failures[:args.limit]:
+                print(f"  {failure}", flush=True)
+        else:
+            print(f"OK   {name}", flush=True)
+
+    with engine.connect() as connection:
+        pragma = 'quick_check' if args.quick else 'integrity_check'
+        progress.info(f"🔄 PRAGMA {pragma}...")
+        messages = [row[0] for row in connection.execute(text(f"PRAGMA {pragma}"))]
+        result(pragma, [message for message in messages if message != 'ok'])
+
+        progress.info("🔄 Внешние ключи...")
+        rows = connection.execute(text("PRAGMA foreign_key_check")).fetchall()
+        result('foreign_keys', [f"{row[0]} rowid={row[1]} -> {row[2]}" for row in rows])
+
+        progress.info("🔄 Итоги заказов...")
+        # Пересчет пишет только расходящиеся итоги; без --repair изменения откатываются
+        connection.rollback()
+        order_ids = recalculate_order_totals(connection)
+        if args.repair:
+            connection.commit()
+            if order_ids:
+                progress.info(f"✅ Исправлено заказов: {len(order_ids)}")
+                order_ids = []
+        else:
+            connection.rollback()
+        result('order_totals', [f"order id={order_id}" for order_id in order_ids])
+
+    progress.info("🔄 Ключи поиска...")
+    with SessionLocal() as session:
+        stale = [f"client id={row['id']}" for row in client_search_key_updates(session)]
+        stale += [f"car id={row['id']}" for row in car_search_key_updates(session)]
+    result('search_keys', stale)
+
+    progress.done(f"Проверка завершена, проблем: {problems}")
+    return EXIT_CHECK_FAILED if problems else EXIT_OK
+
+
+def cmd_reindex(args, progress: Progress) -> int:
+    from sqlalchemy import text
+    from config.database import engine, rebuild_search_keys
+
+    progress.info("🔄 Ключи поиска...")
+    for table, count in rebuild_search_keys().items():
+        print(f"{table}: обновлено ключей {count}", flush=True)
+
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        progress.info("🔄 REINDEX...")
+        connection.execute(text("REINDEX"))
+        progress.info("🔄 ANALYZE...")
+        connection.execute(text("ANALYZE"))
+    progress.done("Индексы перестроены")
+    return EXIT_OK
+
+
+def cmd_vacuum(args, progress: Progress) -> int:
+    from sqlalchemy import text
+    from config.database import engine
+
+    path = database_path()
+    size_before = path.stat().st_size
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        if args.into:
+            if Path(args.into).exists():
+                raise CliError(f"Файл уже существует: {args.into}")
+            progress.info(f"🔄 VACUUM INTO {args.into}...")
+            connection.execute(text("VACUUM INTO :path"), {'path': args.into})
+            target = Path(args.into)
+        else:
+            progress.info("🔄 VACUUM...")
+            connection.execute(text("VACUUM"))
+            connection.execute(text("PRAGMA optimize"))
+            target = path
+    size_after = target.stat().st_size
+    print(f"{target}: {size_before // 1024} КБ -> {size_after // 1024} КБ", flush=True)
+    progress.done("Сжатие завершено")
+    return EXIT_OK
+
+
+def cmd_sync(args, progress: Progress) -> int:
+    from sto_app.services.errors import ServiceError
+
+    try:
+        return run_sync(args, progress)
+    except ServiceError as e:
+        raise CliError(f"sync {args.action}: {e}")
+
+
+def run_sync(args, progress: Progress) -> int:
+    from config.database import engine
+    from sto_app.services import replication
+
+    if args.action == 'init':
+        with engine.begin() as connection:
+            result = replication.init_site(connection, args.site)
+        if result.peer_id:
+            progress.info(f"✅ Копия площадки {result.peer_id} стала площадкой {result.site_id} "
+                          f"(изменения {result.peer_id} известны до часов {result.until})")
+        else:
+            progress.info(f"✅ Площадка {result.site_id}: записей с ключами {sum(result.counts.values())}")
+        return EXIT_OK
+
+    if args.action == 'status':
+        with engine.connect() as connection:
+            status = replication.sync_status(connection)
+        print(f"Площадка {status.site_id}, часы {status.clock}")
+        for peer in status.peers:
+            print(f"  {peer.site_id}: получено до {peer.imported_clock} ({peer.imported_at or '-'}), "
+                  f"подтверждено до {peer.acked_clock}, к отправке записей: {peer.pending}")
+        return EXIT_OK
+
+    if args.action == 'export':
+        with engine.connect() as connection:
+            site_id, clock = replication.site_state(connection)
+            target = Path(args.output or Path(args.dir or '.') /
+                          f"sto_sync_{site_id}_to_{args.to.upper()}_{clock}.jsonl.gz")
+            partial = target.with_name(target.name + '.part')
+            try:
+                with replication.open_bundle(partial, 'w', compressed=target.name.endswith('.gz')) as stream:
+                    result = replication.export_bundle(connection, args.to, stream, args.since)
+                os.replace(partial, target)
+            finally:
+                if partial.exists():
+                    partial.unlink()
+        print(target, flush=True)
+        progress.done(f"Пакет {result.site_id} -> {result.peer_id}, часы {result.since}..{result.until}: "
+                      f"{', '.join(f'{k} {v}' for k, v in result.counts.items()) or 'изменений нет'}")
+        return EXIT_OK
+
+    for path in args.files:
+        # Каждый пакет - своя транзакция: ошибка не оставит половину изменений
+        with engine.begin() as connection, replication.open_bundle(path) as lines:
+            result = replication.import_bundle(connection, lines)
+        progress.info(f"✅ {path}: {result.peer_id}, часы {result.since}..{result.until}: "
+                      f"{', '.join(f'{k} {v}' for k, v in result.counts.items()) or 'изменений нет'}")
+    progress.done(f"Импортировано пакетов: {len(args.files)}")
+    return EXIT_OK
+
+
+def cmd_archive(args, progress: Progress) -> int:
+    from sto_app.services.errors import ServiceError
+
+    try:
+        return run_archive(args, progress)
+    except ServiceError as e:
+        raise CliError(f"archive {args.action}: {e}")
+
+
+def run_archive(args, progress: Progress) -> int:
+    from config.database import engine
+    from sto_app.services import archive
+
+    if args.action == 'status':
+        with engine.connect() as connection:
+            status = archive.archive_status(connection, args.days)
+        print(f"Архив: {status.path}")
+        print(f"Заказов в рабочей БД: {status.hot_orders}, к переносу (старше {args.days} дн.): {status.eligible}")
+        print(f"Заказов в архиве: {status.archived_orders}"
+              + (f" ({status.oldest:%d.%m.%Y} - {status.newest:%d.%m.%Y})" if status.oldest else ''))
+        return EXIT_OK
+
+    if args.action == 'restore':
+        order_id = archive.restore_order(engine, args.number)
+        progress.info(f"✅ Заказ {args.number} возвращен в рабочую БД (id {order_id})")
+        return EXIT_OK
+
+    def report(result):
+        progress.info(f"🔄 Пакетов {result.batches}, перенесено заказов: {result.orders}")
+
+    result = archive.archive_orders(engine, args.days, args.batch_size, report)
+    if result.recovered:
+        progress.info(f"⚠️  Убраны копии прерванного переноса: {result.recovered}")
+    if result.changed:
+        progress.info(f"⚠️  Изменены во время переноса, остались в рабочей БД: {result.changed}")
+    lines = ', '.join(f"{table} {count}" for table, count in result.lines.items())
+    progress.done(f"В архив перенесено заказов: {result.orders} (принятых до {result.cutoff:%d.%m.%Y})"
+                  + (f", строк: {lines}" if lines else ''))
+    return EXIT_OK
+
+
+# --- Разбор аргументов ---
+
+def add_period_arguments(parser):
+    parser.add_argument('--from', dest='date_from', type=parse_date, metavar='ДАТА', help='Начало периода ГГГГ-ММ-ДД')
+    parser.add_argument('--to', dest='date_to', type=parse_date, metavar='ДАТА', help='Конец периода ГГГГ-ММ-ДД (включительно)')
+
+
+def add_output_arguments(parser):
+    parser.add_argument('--format', choices=('csv', 'jsonl'), default='csv', help='Формат вывода (csv)')
+    parser.add_argument('-o', '--output', help='Файл вывода (по умолчанию stdout)')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Строк за одно чтение из БД')
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Пакетные операции СТО без интерфейса",
+        epilog="Коды возврата: 0 - успех, 1 - ошибка, 2 - аргументы, 3 - verify нашел проблемы"
+    )
+    parser.add_argument('--db', help='Файл БД SQLite (по умолчанию DATABASE_URL или sto_database.db)')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Без сообщений о ходе работы')
+    commands = parser.add_subparsers(dest='command', required=True, metavar='command')
+
+    export = commands.add_parser('export', help='Выгрузка таблицы')
+    export.add_argument('entity', choices=EXPORTS)
+    add_period_arguments(export)
+    export.add_argument('--status', help='Статус заказа (orders), например IN_WORK')
+    add_output_arguments(export)
+    export.set_defaults(handler=cmd_export)
+
+    report = commands.add_parser('report', help='Отчет за период (по умолчанию последние 30 дней)')
+    report.add_argument('name', choices=REPORTS)
+    add_period_arguments(report)
+    report.add_argument('--raw', action='store_true', help='Значения без форматирования (суммы в копейках)')
+    report.add_argument('--min-amount', type=float, default=0, help='Минимальная сумма заказа (financial)')
+    add_output_arguments(report)
+    report.set_defaults(handler=cmd_report)
+
+    backup = commands.add_parser('backup', help='Резервная копия БД (путь архива - в stdout)')
+    target = backup.add_mutually_exclusive_group()
+    target.add_argument('-o', '--output', help='Файл архива')
+    target.add_argument('--dir', help='Каталог архивов (по умолчанию ~/STO_Backups)')
+    backup.add_argument('--with-files', action='store_true', help='Включить каталог resources')
+    backup.set_defaults(handler=cmd_backup)
+
+    verify = commands.add_parser('verify', help='Проверка целостности')
+    verify.add_argument('--quick', action='store_true', help='PRAGMA quick_check вместо integrity_check')
+    verify.add_argument('--repair', action='store_true', help='Исправить расхождения итогов заказов')
+    verify.add_argument('--limit', type=int, default=20, help='Сколько проблем показывать по проверке')
+    verify.set_defaults(handler=cmd_verify)
+
+    reindex = commands.add_parser('reindex', help='Пересчет ключей поиска, REINDEX и ANALYZE')
+    reindex.set_defaults(handler=cmd_reindex)
+
+    vacuum = commands.add_parser('vacuum', help='Сжатие файла БД')
+    vacuum.add_argument('--into', help='Записать сжатую копию в новый файл (VACUUM INTO)')
+    vacuum.set_defaults(handler=cmd_vacuum)
+
+    sync = commands.add_parser('sync', help='Репликация между площадками')
+    actions = sync.add_subparsers(dest='action', required=True, metavar='action')
+    sync_init = actions.add_parser('init', help='Включить репликацию (или сделать копию БД новой площадкой)')
+    sync_init.add_argument('--site', required=True, help='Код площадки: 1-8 латинских букв или цифр')
+    actions.add_parser('status', help='Часы площадки и состояние обмена')
+    sync_export = actions.add_parser('export', help='Пакет изменений для соседней площадки (путь - в stdout)')
+    sync_export.add_argument('--to', required=True, help='Код площадки-получателя')
+    target = sync_export.add_mutually_exclusive_group()
+    target.add_argument('-o', '--output', help='Файл пакета (.jsonl.gz - сжатый)')
+    target.add_argument('--dir', help='Каталог пакетов (имя по площадкам и часам)')
+    sync_export.add_argument('--since', type=int, help='Часы начала (по умолчанию - подтвержденные получателем)')
+    sync_import = actions.add_parser('import', help='Применить пакеты соседней площадки по порядку')
+    sync_import.add_argument('files', nargs='+', help='Файлы пакетов')
+    sync.set_defaults(handler=cmd_sync)
+
+    archive = commands.add_parser('archive', help='Архив закрытых заказов')
+    actions = archive.add_subparsers(dest='action', required=True, metavar='action')
+    archive_run = actions.add_parser('run', help='Перенести закрытые заказы старше порога в архив')
+    archive_run.add_argument('--batch-size', type=int, default=500, help='Заказов в одной транзакции')
+    archive_status = actions.add_parser('status', help='Заказы в рабочей БД и в архиве')
+    for action in (archive_run, archive_status):
+        action.add_argument('--days', type=int, default=365, help='Порог: дней с даты приема (365)')
+    archive_restore = actions.add_parser('restore', help='Вернуть заказ из архива в рабочую БД')
+    archive_restore.add_argument('number', help='Номер заказа')
+    archive.set_defaults(handler=cmd_archive)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    progress = Progress(args.quiet)
+
+    if args.db:
+        os.environ['DATABASE_URL'] = f"sqlite:///{Path(args.db).resolve()}"
+
+    try:
+        from config.database import init_database
+
+        path = database_path()
+        if not path.exists():
+            raise CliError(f"База данных не найдена: {path}")
+        if args.command != 'backup':
+            # Миграции схемы, как при запуске приложения; их сообщения - в stderr
+            with redirect_stdout(io.StringIO() if args.quiet else sys.stderr):
+                init_database()
+        return args.handler(args, progress)
+
+    except CliError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+    except KeyboardInterrupt:
+        print("⚠️  Прервано", file=sys.stderr)
+        return EXIT_INTERRUPTED
+    except BrokenPipeError:
+        # Читатель закрыл канал (например, | head) - это не ошибка
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return EXIT_OK
+    except Exception as e:
+        print(f"❌ {args.command}: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+
+if __name__ == "__main__":
+    sys.exit(main())
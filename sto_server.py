@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+Сервер СТО для нескольких рабочих мест.
+
+Процесс владеет файлом БД и отдает операции заказов, клиентов,
+справочников и отчетов как JSON API (sto_app/api). Рабочие места
+запускаются в режиме клиента:
+
+    python sto_server.py --host 0.0.0.0 --port 8765 --token секрет
+    STO_API_TOKEN=секрет python main.py --server http://сервер:8765
+
+PySide6 не нужен. Токен можно задать переменной STO_API_TOKEN;
+без токена сервер принимает запросы от всех, кто видит порт.
+
+--wal включает журнал WAL (чтение не ждет записи) на время работы
+сервера; для файла на сетевом диске сервер не запустится с --wal. При
+остановке файл возвращается в обычный режим журнала.
+"""
+import argparse
+import io
+import logging
+import os
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sto_app.api.codec import DEFAULT_PORT
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Сервер JSON API СТО")
+    parser.add_argument('--host', default='127.0.0.1', help='Адрес (0.0.0.0 - все интерфейсы, по умолчанию 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Порт ({DEFAULT_PORT})')
+    parser.add_argument('--db', help='Файл БД SQLite (по умолчанию DATABASE_URL или sto_database.db)')
+    parser.add_argument('--token', default=os.environ.get('STO_API_TOKEN'),
+                        help='Токен доступа (по умолчанию STO_API_TOKEN)')
+    parser.add_argument('--wal', action='store_true',
+                        help='Журнал WAL на время работы (только для файла на локальном диске)')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Без сообщений запуска')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Журнал каждого запроса')
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stderr
+    )
+
+    if args.db:
+        os.environ['DATABASE_URL'] = f"sqlite:///{Path(args.db).resolve()}"
+
+    from config.database import init_database, engine
+    from sto_app.api.server import ApiServer, prepare_engine, restore_journal_mode
+
+    try:
+        # Миграции схемы, как при запуске приложения; их сообщения - в stderr
+        with redirect_stdout(io.StringIO() if args.quiet else sys.stderr):
+            init_database()
+        wal = prepare_engine(engine, wal=args.wal)
+        server = ApiServer((args.host, args.port), token=args.token)
+    except Exception as e:
+        print(f"❌ Не удалось запустить сервер: {e}", file=sys.stderr)
+        return 1
+
+    if not args.quiet:
+        print(f"✅ Сервер СТО: {server.url} (БД: {engine.url.database}{', журнал WAL' if wal else ''})",
+              file=sys.stderr)
+        if not args.token:
+            print("⚠️  Токен не задан - доступ без проверки", file=sys.stderr)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        if not args.quiet:
+            print("🔄 Остановка сервера...", file=sys.stderr)
+    finally:
+        server.server_close()
+        if wal:
+            restore_journal_mode(engine)
+        engine.dispose()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+# tests/conftest.py
+"""
+Общие фикстуры тестов.
+
+config.database читает DATABASE_URL при импорте, поэтому путь к БД
+задается до первого импорта: шаблонная БД (с архивом) создается
+init_database() один раз за сессию, каждый тест получает ее копию.
+"""
+
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+_TEMPLATE_DIR = Path(tempfile.mkdtemp(prefix='sto_tests_'))
+os.environ['DATABASE_URL'] = f"sqlite:///{_TEMPLATE_DIR / 'template.db'}"
+os.environ.pop('STO_ARCHIVE_DB', None)
+
+
+@pytest.fixture(scope='session')
+def template_db():
+    """Файлы шаблонной БД и ее архива после всех миграций"""
+    from config import database
+
+    database.init_database()
+    database.engine.dispose()
+    yield Path(database.engine.url.database), Path(database.ARCHIVE_DATABASE)
+    shutil.rmtree(_TEMPLATE_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def db_engine(template_db, tmp_path):
+    """Движок на копии шаблонной БД с подключенным архивом"""
+    from config.database import ARCHIVE_SCHEMA, archive_path_for
+
+    database_path = tmp_path / 'sto_test.db'
+    archive_path = Path(archive_path_for(str(database_path)))
+    shutil.copy(template_db[0], database_path)
+    shutil.copy(template_db[1], archive_path)
+
+    engine = create_engine(f"sqlite:///{database_path}")
+
+    @event.listens_for(engine, 'connect')
+    def _attach_archive(dbapi_connection, connection_record):
+        dbapi_connection.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (str(archive_path),))
+
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(db_engine):
+    """ORM-сессия на копии шаблонной БД"""
+    session = Session(bind=db_engine)
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def order(db_session):
+    """Черновик заказа без строк и оплат"""
+    from shared_models.common_models import Car, Client
+    from sto_app.models_sto import Order, OrderStatus
+
+    client = Client(name='Клиент', phone='+380671234567')
+    db_session.add(client)
+    db_session.flush()
+    car = Car(client_id=client.id, brand='Toyota', model='Camry')
+    db_session.add(car)
+    db_session.flush()
+    order = Order(order_number='СТО-20260110-001', client_id=client.id, car_id=car.id,
+                  date_received=datetime(2026, 1, 10, 10), status=OrderStatus.DRAFT)
+    db_session.add(order)
+    db_session.commit()
+    return order
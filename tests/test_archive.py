@@ -0,0 +1,131 @@
+# tests/test_archive.py
+"""Перенос закрытых заказов в архив и возврат обратно"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from sto_app.services import archive
+from sto_app.services.errors import ServiceError, ValidationError
+
+OLD = '2024-01-10 10:00:00.000000'
+STAMP = {'created_at': OLD, 'updated_at': OLD}
+LINES = {
+    'order_services': {'service_name': 'Диагностика', 'price': 500},
+    'order_parts': {'part_name': 'Фильтр', 'price': 250, 'quantity': 2},
+    'order_payments': dict(STAMP, amount=1000, method='CASH', paid_at=OLD),
+}
+
+
+def _insert(connection, table, **values):
+    return connection.execute(text(
+        f"INSERT INTO {table} ({', '.join(values)}) VALUES ({', '.join(':' + name for name in values)}) "
+        f"RETURNING id"), values).scalar()
+
+
+def _order(connection, number, status='COMPLETED', balance_due=0, date_received=OLD):
+    client_id = _insert(connection, 'clients', name=f'Клиент {number}', **STAMP)
+    car_id = _insert(connection, 'cars', client_id=client_id, brand='Toyota', **STAMP)
+    return _insert(connection, 'orders', order_number=number, client_id=client_id, car_id=car_id,
+                   date_received=date_received, status=status, balance_due=balance_due, **STAMP)
+
+
+def _line(connection, table, order_id):
+    return _insert(connection, table, order_id=order_id, **LINES[table])
+
+
+def _snapshot(connection, schema, order_id):
+    """Заказ и его строки в схеме main или archive"""
+    order = connection.execute(text(f"SELECT * FROM {schema}.orders WHERE id = :id"),
+                               {'id': order_id}).mappings().first()
+    lines = {table: [dict(row) for row in connection.execute(text(
+                 f"SELECT * FROM {schema}.{table} WHERE order_id = :id ORDER BY id"), {'id': order_id}).mappings()]
+             for table in archive.LINE_TABLES}
+    return (dict(order) if order is not None else None), lines
+
+
+def _ids(connection, schema):
+    return {row[0] for row in connection.execute(text(f"SELECT id FROM {schema}.orders"))}
+
+
+@pytest.fixture
+def orders(db_engine):
+    """Закрытые и открытые заказы; id по ключам"""
+    with db_engine.begin() as connection:
+        ids = {
+            'closed': _order(connection, 'A-0001'),
+            'last_payment': _order(connection, 'A-0002'),
+            'cancelled': _order(connection, 'A-0003', status='CANCELLED', balance_due=500),
+            'debt': _order(connection, 'A-0004', balance_due=100),
+            'recent': _order(connection, 'A-0005', date_received=datetime.now()),
+            'last': _order(connection, 'A-0006'),
+        }
+        for table in archive.LINE_TABLES:
+            _line(connection, table, ids['closed'])
+        _line(connection, 'order_services', ids['debt'])
+        _line(connection, 'order_parts', ids['debt'])
+        _line(connection, 'order_payments', ids['last_payment'])
+    return ids
+
+
+def test_archive_moves_closed_orders_and_keeps_highest_rowids(db_engine, orders):
+    with db_engine.connect() as connection:
+        before = _snapshot(connection, 'main', orders['closed'])
+
+    result = archive.archive_orders(db_engine, days=365, batch_size=1)
+
+    assert result.orders == 2
+    assert result.batches == 2
+    assert result.lines == {'order_services': 1, 'order_parts': 1, 'order_payments': 1}
+    with db_engine.connect() as connection:
+        assert _ids(connection, 'archive') == {orders['closed'], orders['cancelled']}
+        # Последний заказ и заказ с последней оплатой остаются: id не выдаются повторно
+        assert _ids(connection, 'main') == {orders[key] for key in
+                                            ('last_payment', 'debt', 'recent', 'last')}
+        assert _snapshot(connection, 'archive', orders['closed']) == before
+        assert _snapshot(connection, 'main', orders['closed']) == (None, {table: [] for table in archive.LINE_TABLES})
+        assert archive.archive_status(connection, days=365).eligible == 0
+
+    with db_engine.begin() as connection:
+        new_id = _order(connection, 'A-0007')
+        new_line = _line(connection, 'order_payments', new_id)
+        assert new_id > max(_ids(connection, 'archive'))
+        assert new_line > before[1]['order_payments'][0]['id']
+
+
+def test_restore_round_trip(db_engine, orders):
+    with db_engine.connect() as connection:
+        before = _snapshot(connection, 'main', orders['closed'])
+    archive.archive_orders(db_engine, days=365)
+
+    assert archive.restore_order(db_engine, 'A-0001') == orders['closed']
+
+    with db_engine.connect() as connection:
+        assert _snapshot(connection, 'main', orders['closed']) == before
+        assert orders['closed'] not in _ids(connection, 'archive')
+        assert orders['cancelled'] in _ids(connection, 'archive')
+    with pytest.raises(ServiceError):
+        archive.restore_order(db_engine, 'A-0001')
+
+    # Возвращенный заказ по-прежнему закрыт и уходит в архив снова
+    result = archive.archive_orders(db_engine, days=365)
+    assert result.orders == 1
+    with db_engine.connect() as connection:
+        assert _snapshot(connection, 'archive', orders['closed']) == before
+
+
+def test_restore_refuses_number_taken_in_working_db(db_engine, orders):
+    archive.archive_orders(db_engine, days=365)
+    with db_engine.begin() as connection:
+        _order(connection, 'A-0001', status='DRAFT')
+
+    with pytest.raises(ServiceError):
+        archive.restore_order(db_engine, 'A-0001')
+    with db_engine.connect() as connection:
+        assert orders['closed'] in _ids(connection, 'archive')
+
+
+def test_archive_requires_at_least_one_day(db_engine):
+    with pytest.raises(ValidationError):
+        archive.archive_orders(db_engine, days=0)
@@ -0,0 +1,60 @@
+# tests/test_order_lines.py
+"""Строки заказа в памяти: снимок изменений и фоновое автосохранение"""
+
+from decimal import Decimal
+
+from sto_app.models_sto import OrderPart, OrderService
+from sto_app.utils.order_lines import OrderLineItems, PartLine, ServiceLine, apply_draft_changes
+
+
+def _save(session, items, changes):
+    """Запись снимка, как в DraftSaveWorker, и возврат результата редактору"""
+    apply_draft_changes(session, changes)
+    session.commit()
+    items.apply_saved_changes(changes)
+
+
+def _stored(session, order_id):
+    session.expire_all()
+    service = session.query(OrderService).filter_by(order_id=order_id).one()
+    part = session.query(OrderPart).filter_by(order_id=order_id).one()
+    return service.price, part.quantity
+
+
+def test_edit_during_save_goes_to_next_save(db_session, order):
+    items = OrderLineItems()
+    items.add_service(ServiceLine('Диагностика', Decimal('100')))
+    items.add_part(PartLine('Фильтр', Decimal('50')))
+    changes = items.take_changes(order.id)
+
+    # Пока идет запись снимка, строки меняют в редакторе
+    items.update_service(0, price=Decimal('250'))
+    items.update_part(0, quantity=Decimal('3'))
+    _save(db_session, items, changes)
+
+    assert _stored(db_session, order.id) == (100.0, 1.0)
+    assert items.services[0].db_id is not None
+    assert items.is_dirty
+
+    changes = items.take_changes(order.id)
+    assert not changes.new_services and not changes.new_parts
+    assert [values['price'] for values in changes.updated_services] == [250.0]
+    assert [values['quantity'] for values in changes.updated_parts] == [3.0]
+    _save(db_session, items, changes)
+
+    assert _stored(db_session, order.id) == (250.0, 3.0)
+    assert not items.is_dirty
+
+
+def test_edit_before_first_save_is_inserted_once(db_session, order):
+    items = OrderLineItems()
+    items.add_service(ServiceLine('Диагностика', Decimal('100')))
+    items.update_service(0, price=Decimal('120'))
+
+    changes = items.take_changes(order.id)
+    assert [values['price'] for _, values in changes.new_services] == [120.0]
+    assert not changes.updated_services
+    _save(db_session, items, changes)
+
+    assert not items.is_dirty
+    assert items.take_changes(order.id).is_empty()
@@ -0,0 +1,94 @@
+# tests/test_order_totals.py
+"""Сохраненные итоги заказа: пересчет при коммите сессии"""
+
+from sqlalchemy import text, update
+
+from sto_app import models_sto
+from sto_app.models_sto import (ORDER_TOTAL_COLUMNS, OrderPart, OrderService, on_orders_committed,
+                                recalculate_order_totals, touch_order_totals)
+
+
+def _totals(session, order):
+    """Итоги заказа, записанные в БД"""
+    session.expire(order)
+    return {name: getattr(order, name) for name in ORDER_TOTAL_COLUMNS}
+
+
+def _expected(services=0.0, parts=0.0, vat=0.0, discount=0.0, prepayment=0.0, additional=0.0):
+    total = services + parts - discount
+    paid = prepayment + additional
+    return {'services_total': services, 'parts_total': parts, 'vat_total': vat,
+            'discount_total': discount, 'total_amount': total, 'prepayment': prepayment,
+            'additional_payment': additional, 'paid_total': paid, 'balance_due': total - paid}
+
+
+def test_totals_follow_line_changes(db_session, order):
+    service = OrderService(order_id=order.id, service_name='Диагностика', price=1000, price_with_vat=1200)
+    part = OrderPart(order_id=order.id, part_name='Фильтр', price=100, quantity=2, total=200)
+    db_session.add_all([service, part])
+    db_session.commit()
+    assert _totals(db_session, order) == _expected(services=1000, parts=200, vat=200)
+
+    service.price, service.price_with_vat = 500, 600
+    db_session.commit()
+    assert _totals(db_session, order) == _expected(services=500, parts=200, vat=100)
+
+    db_session.delete(part)
+    db_session.commit()
+    assert _totals(db_session, order) == _expected(services=500, vat=100)
+
+
+def test_discount_change_recalculates_totals(db_session, order):
+    db_session.add(OrderService(order_id=order.id, service_name='Диагностика', price=500, price_with_vat=600))
+    db_session.commit()
+
+    order.discount_percent = 10
+    db_session.commit()
+    # НДС уменьшается пропорционально скидке
+    assert _totals(db_session, order) == _expected(services=500, vat=90, discount=50)
+
+
+def test_bulk_update_needs_touch(db_session, order):
+    db_session.add(OrderService(order_id=order.id, service_name='Диагностика', price=500, price_with_vat=600))
+    db_session.commit()
+
+    db_session.execute(update(OrderService).where(OrderService.order_id == order.id)
+                       .values(price=800, price_with_vat=960))
+    touch_order_totals(db_session, order.id)
+    db_session.commit()
+    assert _totals(db_session, order) == _expected(services=800, vat=160)
+
+
+def test_rollback_keeps_stored_totals(db_session, db_engine, order):
+    db_session.add(OrderService(order_id=order.id, service_name='Диагностика', price=500, price_with_vat=600))
+    db_session.commit()
+    stored = _totals(db_session, order)
+
+    db_session.add(OrderService(order_id=order.id, service_name='Мойка', price=300, price_with_vat=360))
+    order.discount_percent = 50
+    db_session.flush()
+    db_session.rollback()
+
+    assert _totals(db_session, order) == stored
+    # Отмененные изменения забыты: следующий коммит не пересчитывает и не оповещает
+    committed = []
+    on_orders_committed(committed.append)
+    try:
+        db_session.commit()
+    finally:
+        models_sto._orders_committed_callbacks.remove(committed.append)
+    assert committed == []
+    with db_engine.connect() as connection:
+        assert connection.execute(text("SELECT total_amount, balance_due FROM orders WHERE id = :id"),
+                                  {'id': order.id}).one() == (500.0, 500.0)
+
+
+def test_integrity_check_repairs_only_diverged_orders(db_session, db_engine, order):
+    db_session.add(OrderService(order_id=order.id, service_name='Диагностика', price=500, price_with_vat=600))
+    db_session.commit()
+
+    with db_engine.begin() as connection:
+        assert recalculate_order_totals(connection) == []
+        connection.execute(text("UPDATE orders SET balance_due = 1 WHERE id = :id"), {'id': order.id})
+        assert recalculate_order_totals(connection) == [order.id]
+    assert _totals(db_session, order) == _expected(services=500, vat=100)
@@ -0,0 +1,77 @@
+# tests/test_payments.py
+"""Журнал оплат: paid_total и balance_due заказа, корректировки предоплаты"""
+
+from sto_app.models_sto import OrderPayment, OrderService
+from sto_app.utils.order_lines import DraftChanges, apply_draft_changes
+from sto_app.utils.payments import add_payment, prepayment_kopecks, sync_prepayment
+
+
+def _balance(session, order):
+    session.expire(order)
+    return order.prepayment, order.additional_payment, order.paid_total, order.balance_due
+
+
+def _journal(session, order):
+    return [(payment.amount, payment.is_prepayment, payment.note) for payment in
+            session.query(OrderPayment).filter_by(order_id=order.id).order_by(OrderPayment.id)]
+
+
+def _with_service(session, order, price=1000):
+    session.add(OrderService(order_id=order.id, service_name='Ремонт', price=price, price_with_vat=price * 1.2))
+    session.commit()
+
+
+def test_payment_reduces_balance(db_session, order):
+    _with_service(db_session, order)
+
+    add_payment(db_session, order.id, 300)
+    db_session.commit()
+    assert _balance(db_session, order) == (0, 300, 300, 700)
+
+    # Переплата - отрицательный долг, исправление - отрицательная запись
+    add_payment(db_session, order.id, 800)
+    add_payment(db_session, order.id, -100.004)
+    db_session.commit()
+    assert _balance(db_session, order) == (0, 1000, 1000, 0)
+    assert [amount for amount, _, _ in _journal(db_session, order)] == [300, 800, -100]
+
+
+def test_prepayment_edit_writes_correction(db_session, order):
+    _with_service(db_session, order)
+
+    sync_prepayment(db_session, order.id, 400)
+    db_session.commit()
+    assert _balance(db_session, order) == (400, 0, 400, 600)
+
+    sync_prepayment(db_session, order.id, 250)
+    db_session.commit()
+    assert _balance(db_session, order) == (250, 0, 250, 750)
+    assert _journal(db_session, order) == [(400, 1, 'Предоплата'), (-150, 1, 'Корректировка предоплаты')]
+
+    assert sync_prepayment(db_session, order.id, '250.00') is None
+    assert prepayment_kopecks(db_session, order.id) == 25000
+
+
+def test_prepayment_from_order_form(db_session, order):
+    _with_service(db_session, order)
+    add_payment(db_session, order.id, 100)
+    db_session.commit()
+
+    apply_draft_changes(db_session, DraftChanges(order_id=order.id, order_fields={'prepayment': 500}))
+    db_session.commit()
+    assert _balance(db_session, order) == (500, 100, 600, 400)
+
+    # Та же предоплата в форме - журнал не меняется
+    apply_draft_changes(db_session, DraftChanges(order_id=order.id, order_fields={'prepayment': 500}))
+    db_session.commit()
+    assert len(_journal(db_session, order)) == 2
+
+
+def test_rolled_back_payment_keeps_balance(db_session, order):
+    _with_service(db_session, order)
+
+    add_payment(db_session, order.id, 300)
+    db_session.flush()
+    db_session.rollback()
+    assert _balance(db_session, order) == (0, 0, 0, 1000)
+    assert _journal(db_session, order) == []
@@ -0,0 +1,71 @@
+# tests/test_pricing.py
+"""Пакетный расчет строк: округление копеек, скидки, НДС"""
+
+from decimal import Decimal
+
+from sto_app.utils.pricing import price_batch, price_line, to_kopecks
+
+
+def test_half_kopeck_rounds_away_from_zero():
+    # 2.675 и 1.005 во float чуть меньше половины - считаются как записаны
+    assert to_kopecks(2.675) == 268
+    assert to_kopecks(1.005) == 101
+    assert to_kopecks(-2.675) == -268
+    assert to_kopecks('0.005') == 1
+    assert to_kopecks(0.1 + 0.2) == 30
+
+
+def test_subtotal_rounding_with_fractional_quantity():
+    batch = price_batch([10.01, 0.05, 0.05, -0.05], [0.333, 0.5, 0.3, 0.5])
+    # 333.333 -> 333, 2.5 -> 3, 1.5 -> 2, -2.5 -> -3
+    assert batch.subtotals == [333, 3, 2, -3]
+    assert batch.totals == batch.subtotals
+
+
+def test_input_types_give_same_kopecks():
+    values = [Decimal('19.99'), '19.99', 19.99]
+    batch = price_batch(values, [3, '3', 3.0], [12.5, '12.5', Decimal('12.5')])
+    assert batch.subtotals == [5997] * 3
+    assert batch.discounts == [750] * 3
+
+
+def test_percent_discount_rounding():
+    # 99.99 * 12.5% = 12.49875 -> 12.50
+    batch = price_batch([99.99, 0.04], discount_percents=[12.5, 12.5])
+    assert batch.subtotals == [9999, 4]
+    assert batch.discounts == [1250, 1]   # 0.5 коп. -> 1 коп.
+    assert batch.totals == [8749, 3]
+
+
+def test_fixed_discount_is_added_and_capped_by_subtotal():
+    batch = price_batch([100, 10, 10], discount_percents=[10, 0, 50], discount_amounts=[5, 15, 7])
+    assert batch.discounts == [1500, 1000, 1000]
+    assert batch.totals == [8500, 0, 0]
+
+
+def test_no_discount_on_negative_or_zero_subtotal():
+    batch = price_batch([-10, 0], discount_percents=[10, 10], discount_amounts=[1, 1])
+    assert batch.discounts == [0, 0]
+    assert batch.totals == [-1000, 0]
+
+
+def test_vat_is_taken_from_discounted_total():
+    batch = price_batch([100, 0.33], discount_percents=[10, 0], vat_rates=[20, 20])
+    assert batch.totals == [9000, 33]
+    assert batch.vats == [1800, 7]        # 6.6 коп. -> 7 коп.
+    assert batch.vat_kop == 1807
+    assert batch.total_kop == 9033
+
+
+def test_defaults_and_price_line_match_batch():
+    batch = price_batch([12.345, 7], [2, 1.5], [5, 0], [0.1, 0], [20, 7])
+    assert price_batch([12.345]).totals == [1235]
+    for index, args in enumerate([(12.345, 2, 5, 0.1, 20), (7, 1.5, 0, 0, 7)]):
+        assert price_line(*args) == batch.line(index)
+    # Цена сначала округляется до копеек: 12.345 -> 12.35
+    line = price_line(12.345, 2, 5, 0.1, 20)
+    assert line.subtotal == Decimal('24.70')
+    assert line.discount == Decimal('1.34')
+    assert line.total == Decimal('23.36')
+    assert line.vat == Decimal('4.67')
+    assert line.total_with_vat == Decimal('28.03')
@@ -0,0 +1,188 @@
+# tests/test_replication.py
+"""Импорт пакета репликации: версии (часы, площадка), удаления, номера заказов"""
+
+import json
+
+import pytest
+from sqlalchemy import text
+
+from sto_app.services.replication import BUNDLE_FORMAT, BUNDLE_VERSION, import_bundle, init_site
+
+STAMP = {'created_at': '2026-01-10 10:00:00.000000', 'updated_at': '2026-01-10 10:00:00.000000'}
+
+
+@pytest.fixture
+def connection(db_engine):
+    """Соединение площадки A (транзакция не коммитится)"""
+    with db_engine.connect() as connection:
+        with connection.begin():
+            init_site(connection, 'A')
+            yield connection
+
+
+def _import(connection, *records):
+    """Пакет площадки B с записями records"""
+    header = {'format': BUNDLE_FORMAT, 'version': BUNDLE_VERSION, 'from': 'B', 'to': 'A',
+              'since': 0, 'until': max(record['clock'] for record in records), 'ack': 0,
+              'created_at': '2026-01-01T00:00:00'}
+    return import_bundle(connection, [json.dumps(item) for item in (header,) + records])
+
+
+def _client(uid, version, name='Клиент B'):
+    return {'table': 'clients', 'uid': uid, 'clock': version[0], 'site': version[1],
+            'row': dict(STAMP, name=name, phone='+380501112233')}
+
+
+def _deleted(table, uid, version):
+    return {'table': table, 'uid': uid, 'clock': version[0], 'site': version[1], 'deleted': True}
+
+
+def _insert(connection, table, **values):
+    """Локальная запись (версию и ключ ставят триггеры), вернуть sync_uid"""
+    values = dict(STAMP, **values)
+    row_id = connection.execute(text(
+        f"INSERT INTO {table} ({', '.join(values)}) VALUES ({', '.join(':' + name for name in values)}) "
+        f"RETURNING id"), values).scalar()
+    return connection.execute(text(f"SELECT sync_uid FROM {table} WHERE id = :id"), {'id': row_id}).scalar()
+
+
+def _set_version(connection, table, uid, version):
+    connection.execute(text("UPDATE sync_state SET importing = 1"))
+    connection.execute(text(f"UPDATE {table} SET sync_clock = :clock, sync_site = :site WHERE sync_uid = :uid"),
+                       {'clock': version[0], 'site': version[1], 'uid': uid})
+    connection.execute(text("UPDATE sync_state SET importing = 0"))
+
+
+def _row(connection, table, uid):
+    return connection.execute(text(f"SELECT * FROM {table} WHERE sync_uid = :uid"), {'uid': uid}).mappings().first()
+
+
+def _tombstone(connection, table, uid):
+    row = connection.execute(text(
+        "SELECT sync_clock, sync_site FROM sync_tombstones WHERE table_name = :table AND sync_uid = :uid"),
+        {'table': table, 'uid': uid}).first()
+    return tuple(row) if row is not None else None
+
+
+def _local_order(connection, number='2026-0001'):
+    client_uid = _insert(connection, 'clients', name='Клиент A', phone='+380671234567')
+    client_id = _row(connection, 'clients', client_uid)['id']
+    car_uid = _insert(connection, 'cars', client_id=client_id, brand='Toyota', model='Camry')
+    order_uid = _insert(connection, 'orders', order_number=number, client_id=client_id,
+                        car_id=_row(connection, 'cars', car_uid)['id'],
+                        date_received='2026-01-10 10:00:00.000000', status='DRAFT')
+    order_id = _row(connection, 'orders', order_uid)['id']
+    connection.execute(text(
+        "INSERT INTO order_services (order_id, service_name, price) VALUES (:id, 'Диагностика', 500)"),
+        {'id': order_id})
+    return order_uid
+
+
+@pytest.mark.parametrize('local, incoming, applied', [
+    ((5, 'A'), (5, 'B'), True),     # равные часы - побеждает больший код площадки
+    ((5, 'C'), (5, 'B'), False),
+    ((5, 'B'), (5, 'B'), False),    # та же версия уже применена
+    ((6, 'A'), (5, 'B'), False),    # часы важнее площадки
+    ((4, 'C'), (5, 'B'), True),
+])
+def test_upsert_version_tie_break(connection, local, incoming, applied):
+    uid = _insert(connection, 'clients', name='Клиент A', phone='+380671234567')
+    _set_version(connection, 'clients', uid, local)
+
+    result = _import(connection, _client(uid, incoming))
+
+    row = _row(connection, 'clients', uid)
+    assert row['name'] == ('Клиент B' if applied else 'Клиент A')
+    assert (row['sync_clock'], row['sync_site']) == (incoming if applied else local)
+    assert result.counts.get('updated', 0) == int(applied)
+    assert result.counts.get('skipped', 0) == int(not applied)
+
+
+@pytest.mark.parametrize('local, incoming, deleted', [
+    ((5, 'A'), (5, 'B'), True),
+    ((5, 'B'), (5, 'B'), True),     # удаление той же версии, что здесь
+    ((5, 'C'), (5, 'B'), False),    # изменена здесь позже удаления
+    ((6, 'A'), (5, 'B'), False),
+])
+def test_delete_version_tie_break(connection, local, incoming, deleted):
+    uid = _insert(connection, 'clients', name='Клиент A', phone='+380671234567')
+    _set_version(connection, 'clients', uid, local)
+
+    result = _import(connection, _deleted('clients', uid, incoming))
+
+    assert (_row(connection, 'clients', uid) is None) == deleted
+    assert _tombstone(connection, 'clients', uid) == (incoming if deleted else None)
+    assert result.counts.get('deleted', 0) == int(deleted)
+
+
+def test_tombstone_blocks_older_upsert(connection):
+    # Удаление пришло раньше изменения, сделанного до него
+    result = _import(connection, _deleted('clients', 'B-7', (7, 'B')))
+    assert _tombstone(connection, 'clients', 'B-7') == (7, 'B')
+    assert 'deleted' not in result.counts
+
+    for version in ((6, 'B'), (7, 'B'), (7, 'A')):
+        result = _import(connection, _client('B-7', version))
+        assert result.counts == {'skipped': 1}
+        assert _row(connection, 'clients', 'B-7') is None
+
+    # Запись создана заново после удаления
+    result = _import(connection, _client('B-7', (8, 'B')))
+    assert result.counts.get('inserted') == 1
+    assert _row(connection, 'clients', 'B-7')['sync_clock'] == 8
+    assert _tombstone(connection, 'clients', 'B-7') is None
+
+
+def test_local_delete_wins_over_older_change(connection):
+    uid = _insert(connection, 'clients', name='Клиент A', phone='+380671234567')
+    connection.execute(text("DELETE FROM clients WHERE sync_uid = :uid"), {'uid': uid})
+    clock, site = _tombstone(connection, 'clients', uid)
+    assert site == 'A'
+
+    assert _import(connection, _client(uid, (clock - 1, 'B'))).counts == {'skipped': 1}
+    assert _row(connection, 'clients', uid) is None
+
+    _import(connection, _client(uid, (clock, 'B')))
+    assert _row(connection, 'clients', uid)['name'] == 'Клиент B'
+
+
+def test_delete_removes_order_lines(connection):
+    uid = _local_order(connection)
+    order_id = _row(connection, 'orders', uid)['id']
+    clock = _row(connection, 'orders', uid)['sync_clock']
+
+    _import(connection, _deleted('orders', uid, (clock + 1, 'B')))
+
+    assert _row(connection, 'orders', uid) is None
+    assert connection.execute(text("SELECT COUNT(*) FROM order_services WHERE order_id = :id"),
+                              {'id': order_id}).scalar() == 0
+    # Триггеры выключены на время импорта: своя версия удаления не пишется
+    assert _tombstone(connection, 'orders', uid) == (clock + 1, 'B')
+
+
+def test_order_with_taken_number_is_renumbered(connection):
+    local_uid = _local_order(connection, '2026-0001')
+    order = {'table': 'orders', 'uid': 'B-1', 'clock': 3, 'site': 'B',
+             'row': dict(STAMP, order_number='2026-0001', client_id='B-1', car_id='B-1',
+                         date_received='2026-01-11 09:00:00.000000', status='DRAFT'),
+             'lines': {'order_services': [{'service_name': 'Замена масла', 'price': 300}]}}
+
+    result = _import(connection,
+                     _client('B-1', (1, 'B')),
+                     {'table': 'cars', 'uid': 'B-1', 'clock': 2, 'site': 'B',
+                      'row': dict(STAMP, client_id='B-1', brand='Honda', model='Civic')},
+                     order)
+
+    assert result.counts.get('renumbered') == 1
+    assert _row(connection, 'orders', local_uid)['order_number'] == '2026-0001'
+    incoming = _row(connection, 'orders', 'B-1')
+    assert incoming['order_number'] == '2026-0001-B'
+    assert incoming['client_id'] == _row(connection, 'clients', 'B-1')['id']
+    assert [row[0] for row in connection.execute(text(
+        "SELECT service_name FROM order_services WHERE order_id = :id"), {'id': incoming['id']})] == ['Замена масла']
+
+    # Следующая версия того же заказа остается под выданным номером
+    order = dict(order, clock=4)
+    _import(connection, order)
+    assert _row(connection, 'orders', 'B-1')['order_number'] == '2026-0001-B'
+    assert connection.execute(text("SELECT COUNT(*) FROM orders WHERE order_number LIKE '2026-0001%'")).scalar() == 2